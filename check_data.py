@@ -12,6 +12,11 @@ python check_data.py [-p, --problem] <problem_file_name> [-s, --solution] <solut
 * write summary.json, data_errors.txt, ignored_errors.txt, solution_errors.txt
 * solution check does not check feasibility of the solution or compute objective
 * it is mainly about formatting
+
+python check_data.py [-p, --problem] <problem_file_name> --batch <solution_file_name> [<solution_file_name> ...]
+* check a problem file once and evaluate each solution file against it
+* write a summary json file and a solution errors file for each solution file in --batch_summary_dir,
+  and one row for each solution file in the summary csv
 '''
 
 import argparse, pathlib
@@ -20,6 +25,7 @@ from datautilities import validation, utils
 default_config_file = 'config.json'
 summary_csv_file = 'summary.csv'
 summary_json_file = 'summary.json'
+batch_summary_dir = 'batch_summary'
 data_errors_file = 'data_errors.txt'
 ignored_errors_file = 'ignored_errors.txt'
 solution_errors_file = 'solution_errors.txt'
@@ -43,6 +49,7 @@ if __name__ == '__main__':
         "problem_opt", nargs="?",
         help="The problem file that we are checking. This is an optional positional argument for backward compatibility and should not be used in combination with the keyword argument \"--problem\".")
     problem_group.add_argument("-p", "--problem", help="The problem file that we are checking.", default=None)
+    parser.add_argument("-b", "--batch", nargs="+", default=None, help="Solution files to evaluate against the problem, loading and preparing the problem only once. Do not use this argument in combination with \"--solution\".")
     parser.add_argument("-s", "--solution", help="The solution file that we are checking. If this argument is supplied, then the solution will be evaluated. Minimal validation will be performed on the problem data in the process of loading it, to save time, since this validation should have been done before considering solutions.", default=None)
 
     # long arguments - these all have defaults and will not be needed as often as the short parameters
@@ -55,6 +62,8 @@ if __name__ == '__main__':
     parser.add_argument("--data_errors", default=data_errors_file, help="Data errors output file")
     parser.add_argument("--ignored_errors", default=ignored_errors_file, help="Ignored errors output file")
     parser.add_argument("--solution_errors", default=solution_errors_file, help="Solution errors output file")
+    parser.add_argument("--batch_summary_dir", default=batch_summary_dir, help="Directory for the summary json file and solution errors file of each solution file in \"--batch\"")
+    parser.add_argument("--batch_workers", type=int, default=1, help="Number of processes evaluating the solution files in \"--batch\"")
     parser.add_argument("--pop_solution", default=None, help="Prior Operating Point (POP) solution file. If this argument is supplied, then the problem data will be read and validated thoroughly, then a POP solution will be created and written to a solution file.")
     parser.add_argument("--scrubbed_problem", default=None, help="File path name to write scrubbed problem file. If this argument is supplied, then the problem data will be loaded, scrubbed, and rewritten. Scrubbing involves anonymizing the UIDs and removing optional data fields. Limited validation is performed on the original data in the process of reading the original data file.")
 
@@ -73,5 +82,8 @@ if __name__ == '__main__':
     if problem is not None:
         if args.scrubbed_problem is not None: # if scrubbing, ignore other arguments
             validation.scrub_data(problem, default_config, args.configuration, args.parameters, args.scrubbed_problem)
+        elif args.batch is not None:
+            assert args.solution is None, 'use either --solution or --batch, not both'
+            validation.check_data_batch(problem, args.batch, default_config, args.configuration, args.parameters, args.summary_csv, args.batch_summary_dir, args.data_errors, args.ignored_errors, args.batch_workers)
         else:
             validation.check_data(problem, args.solution, default_config, args.configuration, args.parameters, args.summary_csv, args.summary_json, args.data_errors, args.ignored_errors, args.solution_errors, args.pop_solution)
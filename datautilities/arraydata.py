@@ -1,4 +1,279 @@
+import itertools
 import numpy
+from datautilities import utils
+
+# problem fields that InputData reads from each list of items of the problem file, as
+# ((section, key), [(field, dtype, kind), ...]).
+# field is the path of the field in the item, e.g. initial_status.vm, and kind is how its value is nested:
+# * value - a number or string
+# * list - a list of numbers or strings, e.g. a time series
+# * tuples - a list of tuples, dtype is a tuple of the types of their elements, e.g. startup_states
+# * list_tuples - a list of lists of tuples, e.g. the cost blocks of each interval
+PROBLEM_FIELDS = [
+    (('network', 'bus'), [
+        ('uid', str, 'value'),
+        ('vm_ub', float, 'value'),
+        ('vm_lb', float, 'value'),
+        ('initial_status.vm', float, 'value'),
+        ('initial_status.va', float, 'value'),
+        ('active_reserve_uids', str, 'list'),
+        ('reactive_reserve_uids', str, 'list')]),
+    (('network', 'shunt'), [
+        ('uid', str, 'value'),
+        ('bus', str, 'value'),
+        ('gs', float, 'value'),
+        ('bs', float, 'value'),
+        ('step_ub', int, 'value'),
+        ('step_lb', int, 'value'),
+        ('initial_status.step', int, 'value')]),
+    (('network', 'simple_dispatchable_device'), [
+        ('uid', str, 'value'),
+        ('bus', str, 'value'),
+        ('device_type', str, 'value'),
+        ('startup_cost', float, 'value'),
+        ('shutdown_cost', float, 'value'),
+        ('on_cost', float, 'value'),
+        ('in_service_time_lb', float, 'value'),
+        ('down_time_lb', float, 'value'),
+        ('p_ramp_up_ub', float, 'value'),
+        ('p_ramp_down_ub', float, 'value'),
+        ('p_startup_ramp_ub', float, 'value'),
+        ('p_shutdown_ramp_ub', float, 'value'),
+        ('startup_states', (float, float), 'tuples'),
+        ('startups_ub', (float, float, int), 'tuples'),
+        ('energy_req_ub', (float, float, float), 'tuples'),
+        ('energy_req_lb', (float, float, float), 'tuples'),
+        ('initial_status.on_status', int, 'value'),
+        ('initial_status.p', float, 'value'),
+        ('initial_status.q', float, 'value'),
+        ('initial_status.accu_down_time', float, 'value'),
+        ('initial_status.accu_up_time', float, 'value'),
+        ('q_linear_cap', int, 'value'),
+        ('q_bound_cap', int, 'value'),
+        ('p_reg_res_up_ub', float, 'value'),
+        ('p_reg_res_down_ub', float, 'value'),
+        ('p_syn_res_ub', float, 'value'),
+        ('p_nsyn_res_ub', float, 'value'),
+        ('p_ramp_res_up_online_ub', float, 'value'),
+        ('p_ramp_res_down_online_ub', float, 'value'),
+        ('p_ramp_res_up_offline_ub', float, 'value'),
+        ('p_ramp_res_down_offline_ub', float, 'value'),
+        ('q_0', float, 'value'),
+        ('q_0_ub', float, 'value'),
+        ('q_0_lb', float, 'value'),
+        ('beta', float, 'value'),
+        ('beta_ub', float, 'value'),
+        ('beta_lb', float, 'value')]),
+    (('network', 'ac_line'), [
+        ('uid', str, 'value'),
+        ('fr_bus', str, 'value'),
+        ('to_bus', str, 'value'),
+        ('r', float, 'value'),
+        ('x', float, 'value'),
+        ('b', float, 'value'),
+        ('mva_ub_nom', float, 'value'),
+        ('mva_ub_em', float, 'value'),
+        ('connection_cost', float, 'value'),
+        ('disconnection_cost', float, 'value'),
+        ('initial_status.on_status', int, 'value'),
+        ('additional_shunt', int, 'value'),
+        ('g_fr', float, 'value'),
+        ('b_fr', float, 'value'),
+        ('g_to', float, 'value'),
+        ('b_to', float, 'value')]),
+    (('network', 'dc_line'), [
+        ('uid', str, 'value'),
+        ('fr_bus', str, 'value'),
+        ('to_bus', str, 'value'),
+        ('pdc_ub', float, 'value'),
+        ('qdc_fr_ub', float, 'value'),
+        ('qdc_fr_lb', float, 'value'),
+        ('qdc_to_ub', float, 'value'),
+        ('qdc_to_lb', float, 'value'),
+        ('initial_status.pdc_fr', float, 'value'),
+        ('initial_status.qdc_fr', float, 'value'),
+        ('initial_status.qdc_to', float, 'value')]),
+    (('network', 'two_winding_transformer'), [
+        ('uid', str, 'value'),
+        ('fr_bus', str, 'value'),
+        ('to_bus', str, 'value'),
+        ('r', float, 'value'),
+        ('x', float, 'value'),
+        ('b', float, 'value'),
+        ('tm_ub', float, 'value'),
+        ('tm_lb', float, 'value'),
+        ('ta_ub', float, 'value'),
+        ('ta_lb', float, 'value'),
+        ('mva_ub_nom', float, 'value'),
+        ('mva_ub_em', float, 'value'),
+        ('connection_cost', float, 'value'),
+        ('disconnection_cost', float, 'value'),
+        ('initial_status.on_status', int, 'value'),
+        ('initial_status.tm', float, 'value'),
+        ('initial_status.ta', float, 'value'),
+        ('additional_shunt', int, 'value'),
+        ('g_fr', float, 'value'),
+        ('b_fr', float, 'value'),
+        ('g_to', float, 'value'),
+        ('b_to', float, 'value')]),
+    (('network', 'active_zonal_reserve'), [
+        ('uid', str, 'value'),
+        ('REG_UP', float, 'value'),
+        ('REG_DOWN', float, 'value'),
+        ('SYN', float, 'value'),
+        ('NSYN', float, 'value'),
+        ('REG_UP_vio_cost', float, 'value'),
+        ('REG_DOWN_vio_cost', float, 'value'),
+        ('SYN_vio_cost', float, 'value'),
+        ('NSYN_vio_cost', float, 'value'),
+        ('RAMPING_RESERVE_UP_vio_cost', float, 'value'),
+        ('RAMPING_RESERVE_DOWN_vio_cost', float, 'value')]),
+    (('network', 'reactive_zonal_reserve'), [
+        ('uid', str, 'value'),
+        ('REACT_UP_vio_cost', float, 'value'),
+        ('REACT_DOWN_vio_cost', float, 'value')]),
+    (('time_series_input', 'simple_dispatchable_device'), [
+        ('uid', str, 'value'),
+        ('on_status_ub', int, 'list'),
+        ('on_status_lb', int, 'list'),
+        ('p_ub', float, 'list'),
+        ('p_lb', float, 'list'),
+        ('q_ub', float, 'list'),
+        ('q_lb', float, 'list'),
+        ('cost', (float, float), 'list_tuples'),
+        ('p_reg_res_up_cost', float, 'list'),
+        ('p_reg_res_down_cost', float, 'list'),
+        ('p_syn_res_cost', float, 'list'),
+        ('p_nsyn_res_cost', float, 'list'),
+        ('p_ramp_res_up_online_cost', float, 'list'),
+        ('p_ramp_res_down_online_cost', float, 'list'),
+        ('p_ramp_res_up_offline_cost', float, 'list'),
+        ('p_ramp_res_down_offline_cost', float, 'list'),
+        ('q_res_up_cost', float, 'list'),
+        ('q_res_down_cost', float, 'list')]),
+    (('time_series_input', 'active_zonal_reserve'), [
+        ('uid', str, 'value'),
+        ('RAMPING_RESERVE_UP', float, 'list'),
+        ('RAMPING_RESERVE_DOWN', float, 'list')]),
+    (('time_series_input', 'reactive_zonal_reserve'), [
+        ('uid', str, 'value'),
+        ('REACT_UP', float, 'list'),
+        ('REACT_DOWN', float, 'list')]),
+    (('reliability', 'contingency'), [
+        ('uid', str, 'value'),
+        ('components', str, 'list')]),
+]
+
+PROBLEM_SECTION_FIELDS = dict(PROBLEM_FIELDS)
+
+# objects of the problem file that InputData or the problem summary read, kept whole
+PROBLEM_OBJECTS = [
+    ('network', 'general'),
+    ('network', 'violation_cost'),
+    ('time_series_input', 'general'),
+]
+
+# the fields for set_network_from_columns: all those of the branches and contingencies,
+# and the uids, and types of devices, of the others
+PROBLEM_NETWORK_FIELDS = [
+    (key, fields if key in [
+        ('network', 'ac_line'), ('network', 'dc_line'), ('network', 'two_winding_transformer'), ('reliability', 'contingency')]
+     else [f for f in fields if f[0] in ['uid', 'device_type']])
+    for key, fields in PROBLEM_FIELDS if key[0] != 'time_series_input']
+
+def get_problem_columns(data, is_json, fields=PROBLEM_FIELDS):
+    '''
+    columns of the problem, for InputData.set_from_columns:
+    columns[section, key][field] is the column of a field, e.g. columns['network', 'bus']['vm_ub'],
+    for the fields of PROBLEM_FIELDS, as from get_items_columns,
+    and columns[section, key], for (section, key) in PROBLEM_OBJECTS, is the object as a dict.
+    data - the problem file as parsed by json if is_json, else its data model, e.g. InputDataFile
+    '''
+
+    columns = {}
+    for (section, key), section_fields in fields:
+        items = data[section][key] if is_json else getattr(getattr(data, section), key)
+        columns[section, key] = get_items_columns(items, section_fields, is_json)
+    for section, key in PROBLEM_OBJECTS:
+        columns[section, key] = data[section][key] if is_json else getattr(getattr(data, section), key).dict()
+    return columns
+
+def get_items_columns(items, fields, is_json):
+    '''
+    columns of a list of items of the problem file, or a batch of it, as a dict of field: column.
+    items - dicts parsed by json if is_json, else data model objects
+    the column of each field, by its kind, with its values as numpy arrays of its dtype,
+    concatenated over the items, and the lengths of its lists for each item:
+    * value - values
+    * list - (lengths, values)
+    * tuples - (lengths, [values of the first elements, values of the second elements, ...])
+    * list_tuples - (lengths, lengths of each list in the list, [values of the first elements, ...])
+    strings have surrounding whitespace stripped, and optional fields that are not given are nan
+    '''
+
+    columns = {}
+    for field, dtype, kind in fields:
+        values = items
+        for name in field.split('.'):
+            values = [x.get(name) for x in values] if is_json else [getattr(x, name) for x in values]
+        if kind == 'value':
+            columns[field] = get_column_array(values, dtype)
+            continue
+        lens = numpy.array([len(v) for v in values], dtype=int)
+        values = list(itertools.chain.from_iterable(values))
+        if kind == 'list':
+            columns[field] = (lens, get_column_array(values, dtype))
+        elif kind == 'tuples':
+            columns[field] = (lens, [get_column_array([v[i] for v in values], dtype[i]) for i in range(len(dtype))])
+        else:
+            sub_lens = numpy.array([len(v) for v in values], dtype=int)
+            values = list(itertools.chain.from_iterable(values))
+            columns[field] = (lens, sub_lens, [get_column_array([v[i] for v in values], dtype[i]) for i in range(len(dtype))])
+    return columns
+
+def get_column_array(values, dtype):
+
+    if dtype is str:
+        return numpy.array([v.strip() for v in values], dtype=str)
+    return numpy.array(values, dtype=dtype)
+
+def concatenate_columns(batches, fields):
+    '''
+    columns of a list of items from the columns of batches of it, from get_items_columns
+    '''
+
+    if len(batches) == 0:
+        return get_items_columns([], fields, True)
+    if len(batches) == 1:
+        return batches[0]
+    columns = {}
+    for field, dtype, kind in fields:
+        column = [b[field] for b in batches]
+        if kind == 'value':
+            columns[field] = numpy.concatenate(column)
+        elif kind == 'list':
+            columns[field] = tuple(numpy.concatenate([c[i] for c in column]) for i in range(2))
+        else:
+            columns[field] = tuple(
+                numpy.concatenate([c[i] for c in column]) for i in range(len(column[0]) - 1)) + (
+                [numpy.concatenate([c[-1][j] for c in column]) for j in range(len(dtype))], )
+    return columns
+
+def split_column(lens, values):
+    '''
+    the list of the arrays values[ptr[i]:ptr[i + 1]], where ptr are the offsets of lens
+    '''
+
+    ptr = numpy.zeros(shape=(len(lens) + 1, ), dtype=int)
+    numpy.cumsum(lens, out=ptr[1:])
+    return [values[ptr[i]:ptr[i + 1]] for i in range(len(lens))]
+
+def get_map_index(uid_map, uids):
+    '''
+    int array of uid_map[u] for the strings u in uids
+    '''
+
+    return numpy.array([uid_map[u] for u in uids.tolist()], dtype=int)
 
 class InputData(object):
 
@@ -8,63 +283,92 @@ class InputData(object):
     
     def set_from_data_model(self, data):
 
-        self.set_structure(data)
-        self.set_scalars(data)
-        self.set_bus(data)
-        self.set_sh(data)
-        self.set_sd(data)
-        self.set_acl(data)
-        self.set_dcl(data)
-        self.set_xfr(data)
-        self.set_prz(data)
-        self.set_qrz(data)
-        self.set_t(data)
-        self.set_k(data)
-        self.set_sd_t(data)
-        self.set_sd_t_cost(data)
-        self.set_prz_t(data)
-        self.set_qrz_t(data)
-
-    def set_structure(self, data):
-
-        self.set_num(data)
-        self.set_uid(data)
+        self.set_from_columns(get_problem_columns(data, False))
+
+    def set_from_json(self, data):
+        '''
+        set the problem directly from data, the problem file as parsed by json, without the data model,
+        filling the arrays per section and field from the lists of items.
+        data should pass validation.problem_json_checks first
+        '''
+
+        self.set_from_columns(get_problem_columns(data, True))
+
+    def set_from_columns(self, columns):
+        '''
+        set the problem from its columns, from get_problem_columns or validation.load_problem_stream
+        '''
+
+        self.set_structure(columns)
+        self.set_scalars(columns)
+        self.set_bus(columns)
+        self.set_sh(columns)
+        self.set_sd(columns)
+        self.set_acl(columns)
+        self.set_dcl(columns)
+        self.set_xfr(columns)
+        self.set_prz(columns)
+        self.set_qrz(columns)
+        self.set_t(columns)
+        self.set_k(columns)
+        self.set_sd_t(columns)
+        self.set_sd_t_cost(columns)
+        self.set_prz_t(columns)
+        self.set_qrz_t(columns)
+
+    def set_network_from_data_model(self, data):
+        '''
+        only the network structure - buses, branches, and contingencies,
+        e.g. for topology.NetworkTopology in the problem connectedness check
+        '''
+
+        columns = get_problem_columns(data, False, PROBLEM_NETWORK_FIELDS)
+        self.set_structure(columns)
+        self.set_acl(columns)
+        self.set_dcl(columns)
+        self.set_xfr(columns)
+        self.set_k(columns)
+
+    def set_structure(self, columns):
+
+        self.set_num(columns)
+        self.set_uid(columns)
         self.num_all = self.all_uid.size
-        self.set_range(data)
-        self.set_map(data)
-        self.set_type_indicator(data)
-
-    def set_num(self, data):
-
-        self.num_bus = len(data.network.bus)
-        self.num_acl = len(data.network.ac_line)
-        self.num_dcl = len(data.network.dc_line)
-        self.num_xfr = len(data.network.two_winding_transformer)
-        self.num_sh = len(data.network.shunt)
-        self.num_sd = len(data.network.simple_dispatchable_device)
-        self.num_pr = len([i for i in data.network.simple_dispatchable_device if i.device_type == 'producer'])
-        self.num_cs = len([i for i in data.network.simple_dispatchable_device if i.device_type == 'consumer'])
-        self.num_prz = len(data.network.active_zonal_reserve)
-        self.num_qrz = len(data.network.reactive_zonal_reserve)
-        self.num_t = len(data.time_series_input.general.interval_duration)
-        self.num_k = len(data.reliability.contingency)
-
-    def set_uid(self, data):
+        self.set_range(columns)
+        self.set_map(columns)
+        self.set_type_indicator(columns)
+
+    def set_num(self, columns):
+
+        sd_type = columns['network', 'simple_dispatchable_device']['device_type']
+        self.num_bus = len(columns['network', 'bus']['uid'])
+        self.num_acl = len(columns['network', 'ac_line']['uid'])
+        self.num_dcl = len(columns['network', 'dc_line']['uid'])
+        self.num_xfr = len(columns['network', 'two_winding_transformer']['uid'])
+        self.num_sh = len(columns['network', 'shunt']['uid'])
+        self.num_sd = len(sd_type)
+        self.num_pr = int(numpy.sum(sd_type == 'producer'))
+        self.num_cs = int(numpy.sum(sd_type == 'consumer'))
+        self.num_prz = len(columns['network', 'active_zonal_reserve']['uid'])
+        self.num_qrz = len(columns['network', 'reactive_zonal_reserve']['uid'])
+        self.num_t = len(columns['time_series_input', 'general']['interval_duration'])
+        self.num_k = len(columns['reliability', 'contingency']['uid'])
+
+    def set_uid(self, columns):
 
         # establish an order of elements in each type
-        self.bus_uid = numpy.array([i.uid for i in data.network.bus], dtype=str)
-        self.acl_uid = numpy.array([i.uid for i in data.network.ac_line], dtype=str)
-        self.dcl_uid = numpy.array([i.uid for i in data.network.dc_line], dtype=str)
-        self.xfr_uid = numpy.array([i.uid for i in data.network.two_winding_transformer], dtype=str)
-        self.sh_uid = numpy.array([i.uid for i in data.network.shunt], dtype=str)
-        self.sd_uid = numpy.array([i.uid for i in data.network.simple_dispatchable_device], dtype=str)
-        self.pr_uid = numpy.array(
-            [i.uid for i in data.network.simple_dispatchable_device if i.device_type == 'producer'], dtype=str)
-        self.cs_uid = numpy.array(
-            [i.uid for i in data.network.simple_dispatchable_device if i.device_type == 'consumer'], dtype=str)
-        self.prz_uid = numpy.array([i.uid for i in data.network.active_zonal_reserve], dtype=str)
-        self.qrz_uid = numpy.array([i.uid for i in data.network.reactive_zonal_reserve], dtype=str)
-        self.k_uid = numpy.array([i.uid for i in data.reliability.contingency], dtype=str)
+        sd_type = columns['network', 'simple_dispatchable_device']['device_type']
+        self.bus_uid = columns['network', 'bus']['uid']
+        self.acl_uid = columns['network', 'ac_line']['uid']
+        self.dcl_uid = columns['network', 'dc_line']['uid']
+        self.xfr_uid = columns['network', 'two_winding_transformer']['uid']
+        self.sh_uid = columns['network', 'shunt']['uid']
+        self.sd_uid = columns['network', 'simple_dispatchable_device']['uid']
+        self.pr_uid = numpy.array(self.sd_uid[sd_type == 'producer'].tolist(), dtype=str)
+        self.cs_uid = numpy.array(self.sd_uid[sd_type == 'consumer'].tolist(), dtype=str)
+        self.prz_uid = columns['network', 'active_zonal_reserve']['uid']
+        self.qrz_uid = columns['network', 'reactive_zonal_reserve']['uid']
+        self.k_uid = columns['reliability', 'contingency']['uid']
         self.all_uid = numpy.concatenate((self.bus_uid,
             self.acl_uid,
             self.dcl_uid,
@@ -75,12 +379,12 @@ class InputData(object):
             self.qrz_uid,
             self.k_uid))
 
-    def set_range(self, data):
+    def set_range(self, columns):
 
         # ranges
         self.t_num = numpy.array(list(range(self.num_t)), dtype=int)
 
-    def set_map(self, data):
+    def set_map(self, columns):
 
         # maps
         self.bus_map = {self.bus_uid[i]:i for i in range(self.num_bus)}
@@ -94,7 +398,7 @@ class InputData(object):
         self.k_map = {self.k_uid[i]:i for i in range(self.num_k)}
         self.all_map = {self.all_uid[i]:i for i in range(self.num_all)}
 
-    def set_type_indicator(self, data):
+    def set_type_indicator(self, columns):
 
         # boolean type indicators
         
@@ -137,109 +441,121 @@ class InputData(object):
         self.all_is_k = numpy.array([(start <= i and i < end) for i in range(self.num_all)], dtype=bool)
         start += self.num_k
 
-    def set_scalars(self, data):
+    def set_scalars(self, columns):
 
-        self.c_p = float(data.network.violation_cost.p_bus_vio_cost)
-        self.c_q = float(data.network.violation_cost.p_bus_vio_cost)
-        self.c_s = float(data.network.violation_cost.s_vio_cost)
-        self.c_e = float(data.network.violation_cost.e_vio_cost)
+        violation_cost = columns['network', 'violation_cost']
+        self.c_p = float(violation_cost['p_bus_vio_cost'])
+        self.c_q = float(violation_cost['p_bus_vio_cost'])
+        self.c_s = float(violation_cost['s_vio_cost'])
+        self.c_e = float(violation_cost['e_vio_cost'])
         #self.c_e = 1.0e6 # 1.0e4 USD/MWh = 1.0e6 USD/pu-h # todo read this from data, validate, including preferred value in config, check value > 0, add assumptions to formulation, add symbol and algebra to formulation 
 
-    def set_bus(self, data):
-
-        data_map = {x.uid:x for x in data.network.bus}
-        self.bus_v_max = numpy.array([data_map[i].vm_ub for i in self.bus_uid], dtype=float)
-        self.bus_v_min = numpy.array([data_map[i].vm_lb for i in self.bus_uid], dtype=float)
-        self.bus_v_0 = numpy.array([data_map[i].initial_status.vm for i in self.bus_uid], dtype=float)
-        self.bus_theta_0 = numpy.array([data_map[i].initial_status.va for i in self.bus_uid], dtype=float)
-        self.bus_num_prz = numpy.array([len(data_map[i].active_reserve_uids) for i in self.bus_uid], dtype=int)
-        bus_prz_uid_list = [numpy.array(data_map[i].active_reserve_uids, dtype=str) for i in self.bus_uid]
-        self.bus_prz_list = [numpy.array([self.prz_map[j] for j in i], dtype=int) for i in bus_prz_uid_list]
-        self.bus_num_qrz = numpy.array([len(data_map[i].reactive_reserve_uids) for i in self.bus_uid], dtype=int)
-        bus_qrz_uid_list = [numpy.array(data_map[i].reactive_reserve_uids, dtype=str) for i in self.bus_uid]
-        self.bus_qrz_list = [numpy.array([self.qrz_map[j] for j in i], dtype=int) for i in bus_qrz_uid_list]
-
-    def set_sh(self, data):
-
-        data_map = {x.uid:x for x in data.network.shunt}
-        sh_bus_uid = numpy.array([data_map[i].bus for i in self.sh_uid], dtype=str)
-        self.sh_bus = numpy.array([self.bus_map[i] for i in sh_bus_uid], dtype=int)
-        self.sh_g_st = numpy.array([data_map[i].gs for i in self.sh_uid], dtype=float)
-        self.sh_b_st = numpy.array([data_map[i].bs for i in self.sh_uid], dtype=float)
-        self.sh_u_st_max = numpy.array([data_map[i].step_ub for i in self.sh_uid], dtype=int)
-        self.sh_u_st_min = numpy.array([data_map[i].step_lb for i in self.sh_uid], dtype=int)
-        self.sh_u_st_0 = numpy.array([data_map[i].initial_status.step for i in self.sh_uid], dtype=int)
-
-    def set_sd(self, data):
-
-        data_map = {x.uid:x for x in data.network.simple_dispatchable_device}
-        sd_bus_uid = numpy.array([data_map[i].bus for i in self.sd_uid], dtype=str)
-        self.sd_bus = numpy.array([self.bus_map[i] for i in sd_bus_uid], dtype=int)
-        self.sd_is_pr = numpy.array([1 if data_map[i].device_type == 'producer' else 0 for i in self.sd_uid], dtype=int)
-        self.sd_is_cs = numpy.array([1 if data_map[i].device_type == 'consumer' else 0 for i in self.sd_uid], dtype=int)
-        self.pr_sd = numpy.array(
-            [i for i in range(self.num_sd) if data_map[self.sd_uid[i]].device_type == 'producer'], dtype=int)
-        self.cs_sd = numpy.array(
-            [i for i in range(self.num_sd) if data_map[self.sd_uid[i]].device_type == 'consumer'], dtype=int)
-        self.sd_c_su = numpy.array([data_map[i].startup_cost for i in self.sd_uid], dtype=float)
-        self.sd_c_sd = numpy.array([data_map[i].shutdown_cost for i in self.sd_uid], dtype=float)
-        self.sd_c_on = numpy.array([data_map[i].on_cost for i in self.sd_uid], dtype=float)
-        self.sd_d_up_min = numpy.array([data_map[i].in_service_time_lb for i in self.sd_uid], dtype=float)
-        self.sd_d_dn_min = numpy.array([data_map[i].down_time_lb for i in self.sd_uid], dtype=float)
-        self.sd_p_ramp_up_max = numpy.array([data_map[i].p_ramp_up_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_ramp_dn_max = numpy.array([data_map[i].p_ramp_down_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_startup_ramp_up_max = numpy.array([data_map[i].p_startup_ramp_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_shutdown_ramp_dn_max = numpy.array([data_map[i].p_shutdown_ramp_ub for i in self.sd_uid], dtype=float)
+    def set_bus(self, columns):
+
+        bus = columns['network', 'bus']
+        self.bus_v_max = bus['vm_ub']
+        self.bus_v_min = bus['vm_lb']
+        self.bus_v_0 = bus['initial_status.vm']
+        self.bus_theta_0 = bus['initial_status.va']
+        self.bus_num_prz, bus_prz_uid = bus['active_reserve_uids']
+        self.bus_prz_list = split_column(self.bus_num_prz, get_map_index(self.prz_map, bus_prz_uid))
+        self.bus_num_qrz, bus_qrz_uid = bus['reactive_reserve_uids']
+        self.bus_qrz_list = split_column(self.bus_num_qrz, get_map_index(self.qrz_map, bus_qrz_uid))
+
+    def set_sh(self, columns):
+
+        sh = columns['network', 'shunt']
+        self.sh_bus = get_map_index(self.bus_map, sh['bus'])
+        self.sh_g_st = sh['gs']
+        self.sh_b_st = sh['bs']
+        self.sh_u_st_max = sh['step_ub']
+        self.sh_u_st_min = sh['step_lb']
+        self.sh_u_st_0 = sh['initial_status.step']
+
+    def set_sd(self, columns):
+
+        sd = columns['network', 'simple_dispatchable_device']
+        self.sd_bus = get_map_index(self.bus_map, sd['bus'])
+        self.sd_is_pr = (sd['device_type'] == 'producer').astype(int)
+        self.sd_is_cs = (sd['device_type'] == 'consumer').astype(int)
+        self.pr_sd = numpy.flatnonzero(self.sd_is_pr)
+        self.cs_sd = numpy.flatnonzero(self.sd_is_cs)
+        self.sd_c_su = sd['startup_cost']
+        self.sd_c_sd = sd['shutdown_cost']
+        self.sd_c_on = sd['on_cost']
+        self.sd_d_up_min = sd['in_service_time_lb']
+        self.sd_d_dn_min = sd['down_time_lb']
+        self.sd_p_ramp_up_max = sd['p_ramp_up_ub']
+        self.sd_p_ramp_dn_max = sd['p_ramp_down_ub']
+        self.sd_p_startup_ramp_up_max = sd['p_startup_ramp_ub']
+        self.sd_p_shutdown_ramp_dn_max = sd['p_shutdown_ramp_ub']
 
         # downtime-dependent startup cost data
-        startup_states = {i:sorted(data_map[i].startup_states, key=(lambda x: x[0])) for i in self.sd_uid} # sort startup states so that cost is increasing within each sd
-        self.sd_num_startup_state = numpy.array([len(startup_states[i]) for i in self.sd_uid], dtype=int)
-        self.sd_startup_state_d_max_list = [numpy.array([s[1] for s in startup_states[i]], dtype=float) for i in self.sd_uid]
-        self.sd_startup_state_c_list = [numpy.array([s[0] for s in startup_states[i]], dtype=float) for i in self.sd_uid]
-        #self.sd_startup_state_d_max = numpy.array([s[1] for i in self.sd_uid for s in startup_states[i]])
-        #self.sd_startup_state_c = numpy.array([s[0] for i in self.sd_uid for s in startup_states[i]])
+        # sort startup states so that cost is increasing within each sd. stable, so equal cost states stay in data order
+        self.sd_num_startup_state, (startup_state_c, startup_state_d_max) = sd['startup_states']
+        order = numpy.lexsort((startup_state_c, numpy.repeat(numpy.arange(self.num_sd), self.sd_num_startup_state)))
+        self.sd_startup_state_d_max_list = split_column(self.sd_num_startup_state, startup_state_d_max[order])
+        self.sd_startup_state_c_list = split_column(self.sd_num_startup_state, startup_state_c[order])
+        # the same startup states in a table padded to the max number of states,
+        # padded states with d_max = -inf so they never qualify, and c = 0
+        max_num_startup_state = numpy.amax(self.sd_num_startup_state, initial=0)
+        self.sd_startup_state_d_max = numpy.full(
+            shape=(self.num_sd, max_num_startup_state), fill_value=-numpy.inf, dtype=float)
+        self.sd_startup_state_c = numpy.zeros(shape=(self.num_sd, max_num_startup_state), dtype=float)
+        for i in range(self.num_sd):
+            self.sd_startup_state_d_max[i, :self.sd_num_startup_state[i]] = self.sd_startup_state_d_max_list[i]
+            self.sd_startup_state_c[i, :self.sd_num_startup_state[i]] = self.sd_startup_state_c_list[i]
 
         # max startups constraint data
-        self.sd_num_max_startup_constr = numpy.array([len(data_map[i].startups_ub) for i in self.sd_uid], dtype=int)
-        self.sd_max_startup_constr_a_start_list = [
-            numpy.array([s[0] for s in data_map[i].startups_ub], dtype=float) for i in self.sd_uid]
-        self.sd_max_startup_constr_a_end_list = [
-            numpy.array([s[1] for s in data_map[i].startups_ub], dtype=float) for i in self.sd_uid]
-        self.sd_max_startup_constr_max_startup_list = [
-            numpy.array([s[2] for s in data_map[i].startups_ub], dtype=int) for i in self.sd_uid]
+        self.sd_num_max_startup_constr, (
+            self.sd_max_startup_w_a_start, self.sd_max_startup_w_a_end, self.sd_max_startup_w_max) = sd['startups_ub']
+        self.sd_max_startup_constr_a_start_list = split_column(
+            self.sd_num_max_startup_constr, self.sd_max_startup_w_a_start)
+        self.sd_max_startup_constr_a_end_list = split_column(
+            self.sd_num_max_startup_constr, self.sd_max_startup_w_a_end)
+        self.sd_max_startup_constr_max_startup_list = split_column(
+            self.sd_num_max_startup_constr, self.sd_max_startup_w_max)
         # self.sd_max_startup_constr_t_start_list = [
         #     numpy.array([ for a in sd_max_startup_constr_a_start_list[i]])
         #     for i in self.sd_uid]
 
         # max energy constraint data
-        self.sd_num_max_energy_constr = numpy.array([len(data_map[i].energy_req_ub) for i in self.sd_uid], dtype=int)
-        self.sd_max_energy_constr_a_start_list = [
-            numpy.array([s[0] for s in data_map[i].energy_req_ub], dtype=float) for i in self.sd_uid]
-        self.sd_max_energy_constr_a_end_list = [
-            numpy.array([s[1] for s in data_map[i].energy_req_ub], dtype=float) for i in self.sd_uid]
-        self.sd_max_energy_constr_max_energy_list = [
-            numpy.array([s[2] for s in data_map[i].energy_req_ub], dtype=float) for i in self.sd_uid]
+        self.sd_num_max_energy_constr, (
+            self.sd_max_energy_w_a_start, self.sd_max_energy_w_a_end, self.sd_max_energy_w_max) = sd['energy_req_ub']
+        self.sd_max_energy_constr_a_start_list = split_column(
+            self.sd_num_max_energy_constr, self.sd_max_energy_w_a_start)
+        self.sd_max_energy_constr_a_end_list = split_column(
+            self.sd_num_max_energy_constr, self.sd_max_energy_w_a_end)
+        self.sd_max_energy_constr_max_energy_list = split_column(
+            self.sd_num_max_energy_constr, self.sd_max_energy_w_max)
 
         # min energy constraint data
-        self.sd_num_min_energy_constr = numpy.array([len(data_map[i].energy_req_lb) for i in self.sd_uid], dtype=int)
-        self.sd_min_energy_constr_a_start_list = [
-            numpy.array([s[0] for s in data_map[i].energy_req_lb], dtype=float) for i in self.sd_uid]
-        self.sd_min_energy_constr_a_end_list = [
-            numpy.array([s[1] for s in data_map[i].energy_req_lb], dtype=float) for i in self.sd_uid]
-        self.sd_min_energy_constr_min_energy_list = [
-            numpy.array([s[2] for s in data_map[i].energy_req_lb], dtype=float) for i in self.sd_uid]
+        self.sd_num_min_energy_constr, (
+            self.sd_min_energy_w_a_start, self.sd_min_energy_w_a_end, self.sd_min_energy_w_min) = sd['energy_req_lb']
+        self.sd_min_energy_constr_a_start_list = split_column(
+            self.sd_num_min_energy_constr, self.sd_min_energy_w_a_start)
+        self.sd_min_energy_constr_a_end_list = split_column(
+            self.sd_num_min_energy_constr, self.sd_min_energy_w_a_end)
+        self.sd_min_energy_constr_min_energy_list = split_column(
+            self.sd_num_min_energy_constr, self.sd_min_energy_w_min)
+
+        # the same window constraints in flat arrays over the windows of all devices, for evaluating them all at once.
+        # window w is a constraint of device *_w_sd[w]. the windows of each device are contiguous and in data order
+        self.sd_max_startup_w_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_max_startup_constr)
+        self.sd_max_energy_w_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_max_energy_constr)
+        self.sd_min_energy_w_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_min_energy_constr)
 
         # prior state data
-        self.sd_u_on_0 = numpy.array([data_map[i].initial_status.on_status for i in self.sd_uid], dtype=int)
-        self.sd_p_0 = numpy.array([data_map[i].initial_status.p for i in self.sd_uid], dtype=float)
-        self.sd_q_0 = numpy.array([data_map[i].initial_status.q for i in self.sd_uid], dtype=float)
-        self.sd_d_dn_0 = numpy.array([data_map[i].initial_status.accu_down_time for i in self.sd_uid], dtype=float)
-        self.sd_d_up_0 = numpy.array([data_map[i].initial_status.accu_up_time for i in self.sd_uid], dtype=float)
+        self.sd_u_on_0 = sd['initial_status.on_status']
+        self.sd_p_0 = sd['initial_status.p']
+        self.sd_q_0 = sd['initial_status.q']
+        self.sd_d_dn_0 = sd['initial_status.accu_down_time']
+        self.sd_d_up_0 = sd['initial_status.accu_up_time']
         
         # p-q indicators:
-        self.sd_is_pqe = numpy.array([data_map[i].q_linear_cap for i in self.sd_uid], dtype=int)
-        self.sd_is_pqa = numpy.array([data_map[i].q_bound_cap for i in self.sd_uid], dtype=int)
-        self.sd_is_pqi = numpy.array([data_map[i].q_bound_cap for i in self.sd_uid], dtype=int)
+        self.sd_is_pqe = sd['q_linear_cap']
+        self.sd_is_pqa = sd['q_bound_cap']
+        self.sd_is_pqi = sd['q_bound_cap'].copy()
         self.sd_is_pqae = self.sd_is_pqa + self.sd_is_pqe
         self.sd_is_pqie = self.sd_is_pqi + self.sd_is_pqe
         self.num_pqe = numpy.sum(self.sd_is_pqe)
@@ -249,120 +565,100 @@ class InputData(object):
         self.num_pqie = numpy.sum(self.sd_is_pqie)
 
         # reserves:
-        self.sd_p_rgu_max = numpy.array([data_map[i].p_reg_res_up_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_rgd_max = numpy.array([data_map[i].p_reg_res_down_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_scr_max = numpy.array([data_map[i].p_syn_res_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_nsc_max = numpy.array([data_map[i].p_nsyn_res_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_rru_on_max = numpy.array([data_map[i].p_ramp_res_up_online_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_rrd_on_max = numpy.array([data_map[i].p_ramp_res_down_online_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_rru_off_max = numpy.array([data_map[i].p_ramp_res_up_offline_ub for i in self.sd_uid], dtype=float)
-        self.sd_p_rrd_off_max = numpy.array([data_map[i].p_ramp_res_down_offline_ub for i in self.sd_uid], dtype=float)
+        self.sd_p_rgu_max = sd['p_reg_res_up_ub']
+        self.sd_p_rgd_max = sd['p_reg_res_down_ub']
+        self.sd_p_scr_max = sd['p_syn_res_ub']
+        self.sd_p_nsc_max = sd['p_nsyn_res_ub']
+        self.sd_p_rru_on_max = sd['p_ramp_res_up_online_ub']
+        self.sd_p_rrd_on_max = sd['p_ramp_res_down_online_ub']
+        self.sd_p_rru_off_max = sd['p_ramp_res_up_offline_ub']
+        self.sd_p_rrd_off_max = sd['p_ramp_res_down_offline_ub']
         
         # p-q optionals:
-        self.sd_q_p0_pqe = numpy.array(
-            [data_map[i].q_0 if data_map[i].q_linear_cap else 0.0 for i in self.sd_uid], dtype=float)
-        self.sd_q_p0_pqa = numpy.array(
-            [data_map[i].q_0_ub if data_map[i].q_bound_cap else 0.0 for i in self.sd_uid], dtype=float)
-        self.sd_q_p0_pqi = numpy.array(
-            [data_map[i].q_0_lb if data_map[i].q_bound_cap else 0.0 for i in self.sd_uid], dtype=float)
-        self.sd_beta_pqe = numpy.array(
-            [data_map[i].beta if data_map[i].q_linear_cap else 0.0 for i in self.sd_uid], dtype=float)
-        self.sd_beta_pqa = numpy.array(
-            [data_map[i].beta_ub if data_map[i].q_bound_cap else 0.0 for i in self.sd_uid], dtype=float)
-        self.sd_beta_pqi = numpy.array(
-            [data_map[i].beta_lb if data_map[i].q_bound_cap else 0.0 for i in self.sd_uid], dtype=float)
+        self.sd_q_p0_pqe = numpy.where(sd['q_linear_cap'] == 1, sd['q_0'], 0.0)
+        self.sd_q_p0_pqa = numpy.where(sd['q_bound_cap'] == 1, sd['q_0_ub'], 0.0)
+        self.sd_q_p0_pqi = numpy.where(sd['q_bound_cap'] == 1, sd['q_0_lb'], 0.0)
+        self.sd_beta_pqe = numpy.where(sd['q_linear_cap'] == 1, sd['beta'], 0.0)
+        self.sd_beta_pqa = numpy.where(sd['q_bound_cap'] == 1, sd['beta_ub'], 0.0)
+        self.sd_beta_pqi = numpy.where(sd['q_bound_cap'] == 1, sd['beta_lb'], 0.0)
         self.sd_q_p0_pqae = self.sd_q_p0_pqe + self.sd_q_p0_pqa
         self.sd_q_p0_pqie = self.sd_q_p0_pqe + self.sd_q_p0_pqi
         self.sd_beta_pqae = self.sd_beta_pqe + self.sd_beta_pqa
         self.sd_beta_pqie = self.sd_beta_pqe + self.sd_beta_pqi
         
-    def set_acl(self, data):
-
-        data_map = {x.uid:x for x in data.network.ac_line}
-        acl_fbus_uid = numpy.array([data_map[i].fr_bus for i in self.acl_uid], dtype=str)
-        acl_tbus_uid = numpy.array([data_map[i].to_bus for i in self.acl_uid], dtype=str)
-        self.acl_fbus = numpy.array([self.bus_map[i] for i in acl_fbus_uid], dtype=int)
-        self.acl_tbus = numpy.array([self.bus_map[i] for i in acl_tbus_uid], dtype=int)
-        self.acl_r_sr = numpy.array([data_map[i].r for i in self.acl_uid], dtype=float)
-        self.acl_x_sr = numpy.array([data_map[i].x for i in self.acl_uid], dtype=float)
+    def set_acl(self, columns):
+
+        acl = columns['network', 'ac_line']
+        self.acl_fbus = get_map_index(self.bus_map, acl['fr_bus'])
+        self.acl_tbus = get_map_index(self.bus_map, acl['to_bus'])
+        self.acl_r_sr = acl['r']
+        self.acl_x_sr = acl['x']
         self.acl_g_sr = self.acl_r_sr / (self.acl_r_sr**2 + self.acl_x_sr**2)
         self.acl_b_sr = - self.acl_x_sr / (self.acl_r_sr**2 + self.acl_x_sr**2)
-        self.acl_b_ch = numpy.array([data_map[i].b for i in self.acl_uid], dtype=float)
-        self.acl_s_max = numpy.array([data_map[i].mva_ub_nom for i in self.acl_uid], dtype=float)
-        self.acl_s_max_ctg = numpy.array([data_map[i].mva_ub_em for i in self.acl_uid], dtype=float)
-        self.acl_c_su = numpy.array([data_map[i].connection_cost for i in self.acl_uid], dtype=float)
-        self.acl_c_sd = numpy.array([data_map[i].disconnection_cost for i in self.acl_uid], dtype=float)
-        self.acl_u_on_0 = numpy.array([data_map[i].initial_status.on_status for i in self.acl_uid], dtype=int)
-        self.acl_g_fr = numpy.array(
-            [data_map[i].g_fr if data_map[i].additional_shunt == 1 else 0.0 for i in self.acl_uid], dtype=float)
-        self.acl_b_fr = numpy.array(
-            [data_map[i].b_fr if data_map[i].additional_shunt == 1 else 0.0 for i in self.acl_uid], dtype=float)
-        self.acl_g_to = numpy.array(
-            [data_map[i].g_to if data_map[i].additional_shunt == 1 else 0.0 for i in self.acl_uid], dtype=float)
-        self.acl_b_to = numpy.array(
-            [data_map[i].b_to if data_map[i].additional_shunt == 1 else 0.0 for i in self.acl_uid], dtype=float)
-
-    def set_dcl(self, data):
-
-        data_map = {x.uid:x for x in data.network.dc_line}
-        dcl_fbus_uid = numpy.array([data_map[i].fr_bus for i in self.dcl_uid], dtype=str)
-        dcl_tbus_uid = numpy.array([data_map[i].to_bus for i in self.dcl_uid], dtype=str)
-        self.dcl_fbus = numpy.array([self.bus_map[i] for i in dcl_fbus_uid], dtype=int)
-        self.dcl_tbus = numpy.array([self.bus_map[i] for i in dcl_tbus_uid], dtype=int)
-        self.dcl_p_max = numpy.array([data_map[i].pdc_ub for i in self.dcl_uid], dtype=float)
-        self.dcl_q_fr_max = numpy.array([data_map[i].qdc_fr_ub for i in self.dcl_uid], dtype=float)
-        self.dcl_q_fr_min = numpy.array([data_map[i].qdc_fr_lb for i in self.dcl_uid], dtype=float)
-        self.dcl_q_to_max = numpy.array([data_map[i].qdc_to_ub for i in self.dcl_uid], dtype=float)
-        self.dcl_q_to_min = numpy.array([data_map[i].qdc_to_lb for i in self.dcl_uid], dtype=float)
-        self.dcl_p_0 = numpy.array([data_map[i].initial_status.pdc_fr for i in self.dcl_uid], dtype=float)
-        self.dcl_q_fr_0 = numpy.array([data_map[i].initial_status.qdc_fr for i in self.dcl_uid], dtype=float)
-        self.dcl_q_to_0 = numpy.array([data_map[i].initial_status.qdc_to for i in self.dcl_uid], dtype=float)
-
-    def set_xfr(self, data):
-
-        data_map = {x.uid:x for x in data.network.two_winding_transformer}
-        xfr_fbus_uid = numpy.array([data_map[i].fr_bus for i in self.xfr_uid], dtype=str)
-        xfr_tbus_uid = numpy.array([data_map[i].to_bus for i in self.xfr_uid], dtype=str)
-        self.xfr_fbus = numpy.array([self.bus_map[i] for i in xfr_fbus_uid], dtype=int)
-        self.xfr_tbus = numpy.array([self.bus_map[i] for i in xfr_tbus_uid], dtype=int)
-        self.xfr_r_sr = numpy.array([data_map[i].r for i in self.xfr_uid], dtype=float)
-        self.xfr_x_sr = numpy.array([data_map[i].x for i in self.xfr_uid], dtype=float)
+        self.acl_b_ch = acl['b']
+        self.acl_s_max = acl['mva_ub_nom']
+        self.acl_s_max_ctg = acl['mva_ub_em']
+        self.acl_c_su = acl['connection_cost']
+        self.acl_c_sd = acl['disconnection_cost']
+        self.acl_u_on_0 = acl['initial_status.on_status']
+        self.acl_g_fr = numpy.where(acl['additional_shunt'] == 1, acl['g_fr'], 0.0)
+        self.acl_b_fr = numpy.where(acl['additional_shunt'] == 1, acl['b_fr'], 0.0)
+        self.acl_g_to = numpy.where(acl['additional_shunt'] == 1, acl['g_to'], 0.0)
+        self.acl_b_to = numpy.where(acl['additional_shunt'] == 1, acl['b_to'], 0.0)
+
+    def set_dcl(self, columns):
+
+        dcl = columns['network', 'dc_line']
+        self.dcl_fbus = get_map_index(self.bus_map, dcl['fr_bus'])
+        self.dcl_tbus = get_map_index(self.bus_map, dcl['to_bus'])
+        self.dcl_p_max = dcl['pdc_ub']
+        self.dcl_q_fr_max = dcl['qdc_fr_ub']
+        self.dcl_q_fr_min = dcl['qdc_fr_lb']
+        self.dcl_q_to_max = dcl['qdc_to_ub']
+        self.dcl_q_to_min = dcl['qdc_to_lb']
+        self.dcl_p_0 = dcl['initial_status.pdc_fr']
+        self.dcl_q_fr_0 = dcl['initial_status.qdc_fr']
+        self.dcl_q_to_0 = dcl['initial_status.qdc_to']
+
+    def set_xfr(self, columns):
+
+        xfr = columns['network', 'two_winding_transformer']
+        self.xfr_fbus = get_map_index(self.bus_map, xfr['fr_bus'])
+        self.xfr_tbus = get_map_index(self.bus_map, xfr['to_bus'])
+        self.xfr_r_sr = xfr['r']
+        self.xfr_x_sr = xfr['x']
         self.xfr_g_sr = self.xfr_r_sr / (self.xfr_r_sr**2 + self.xfr_x_sr**2)
         self.xfr_b_sr = - self.xfr_x_sr / (self.xfr_r_sr**2 + self.xfr_x_sr**2)
-        self.xfr_b_ch = numpy.array([data_map[i].b for i in self.xfr_uid], dtype=float)
-        self.xfr_tau_max = numpy.array([data_map[i].tm_ub for i in self.xfr_uid], dtype=float)
-        self.xfr_tau_min = numpy.array([data_map[i].tm_lb for i in self.xfr_uid], dtype=float)
-        self.xfr_phi_max = numpy.array([data_map[i].ta_ub for i in self.xfr_uid], dtype=float)
-        self.xfr_phi_min = numpy.array([data_map[i].ta_lb for i in self.xfr_uid], dtype=float)
-        self.xfr_s_max = numpy.array([data_map[i].mva_ub_nom for i in self.xfr_uid], dtype=float)
-        self.xfr_s_max_ctg = numpy.array([data_map[i].mva_ub_em for i in self.xfr_uid], dtype=float)
-        self.xfr_c_su = numpy.array([data_map[i].connection_cost for i in self.xfr_uid], dtype=float)
-        self.xfr_c_sd = numpy.array([data_map[i].disconnection_cost for i in self.xfr_uid], dtype=float)
-        self.xfr_u_on_0 = numpy.array([data_map[i].initial_status.on_status for i in self.xfr_uid], dtype=int)
-        self.xfr_tau_0 = numpy.array([data_map[i].initial_status.tm for i in self.xfr_uid], dtype=float)
-        self.xfr_phi_0 = numpy.array([data_map[i].initial_status.ta for i in self.xfr_uid], dtype=float)
-        self.xfr_g_fr = numpy.array(
-            [data_map[i].g_fr if data_map[i].additional_shunt == 1 else 0.0 for i in self.xfr_uid], dtype=float)
-        self.xfr_b_fr = numpy.array(
-            [data_map[i].b_fr if data_map[i].additional_shunt == 1 else 0.0 for i in self.xfr_uid], dtype=float)
-        self.xfr_g_to = numpy.array(
-            [data_map[i].g_to if data_map[i].additional_shunt == 1 else 0.0 for i in self.xfr_uid], dtype=float)
-        self.xfr_b_to = numpy.array(
-            [data_map[i].b_to if data_map[i].additional_shunt == 1 else 0.0 for i in self.xfr_uid], dtype=float)
-
-    def set_prz(self, data):
-
-        data_map = {x.uid:x for x in data.network.active_zonal_reserve}
-        self.prz_sigma_rgu = numpy.array([data_map[i].REG_UP for i in self.prz_uid], dtype=float)
-        self.prz_sigma_rgd = numpy.array([data_map[i].REG_DOWN for i in self.prz_uid], dtype=float)
-        self.prz_sigma_scr = numpy.array([data_map[i].SYN for i in self.prz_uid], dtype=float)
-        self.prz_sigma_nsc = numpy.array([data_map[i].NSYN for i in self.prz_uid], dtype=float)
-        self.prz_c_rgu = numpy.array([data_map[i].REG_UP_vio_cost for i in self.prz_uid], dtype=float)
-        self.prz_c_rgd = numpy.array([data_map[i].REG_DOWN_vio_cost for i in self.prz_uid], dtype=float)
-        self.prz_c_scr = numpy.array([data_map[i].SYN_vio_cost for i in self.prz_uid], dtype=float)
-        self.prz_c_nsc = numpy.array([data_map[i].NSYN_vio_cost for i in self.prz_uid], dtype=float)
-        self.prz_c_rru = numpy.array([data_map[i].RAMPING_RESERVE_UP_vio_cost for i in self.prz_uid], dtype=float)
-        self.prz_c_rrd = numpy.array([data_map[i].RAMPING_RESERVE_DOWN_vio_cost for i in self.prz_uid], dtype=float)
+        self.xfr_b_ch = xfr['b']
+        self.xfr_tau_max = xfr['tm_ub']
+        self.xfr_tau_min = xfr['tm_lb']
+        self.xfr_phi_max = xfr['ta_ub']
+        self.xfr_phi_min = xfr['ta_lb']
+        self.xfr_s_max = xfr['mva_ub_nom']
+        self.xfr_s_max_ctg = xfr['mva_ub_em']
+        self.xfr_c_su = xfr['connection_cost']
+        self.xfr_c_sd = xfr['disconnection_cost']
+        self.xfr_u_on_0 = xfr['initial_status.on_status']
+        self.xfr_tau_0 = xfr['initial_status.tm']
+        self.xfr_phi_0 = xfr['initial_status.ta']
+        self.xfr_g_fr = numpy.where(xfr['additional_shunt'] == 1, xfr['g_fr'], 0.0)
+        self.xfr_b_fr = numpy.where(xfr['additional_shunt'] == 1, xfr['b_fr'], 0.0)
+        self.xfr_g_to = numpy.where(xfr['additional_shunt'] == 1, xfr['g_to'], 0.0)
+        self.xfr_b_to = numpy.where(xfr['additional_shunt'] == 1, xfr['b_to'], 0.0)
+
+    def set_prz(self, columns):
+
+        prz = columns['network', 'active_zonal_reserve']
+        self.prz_sigma_rgu = prz['REG_UP']
+        self.prz_sigma_rgd = prz['REG_DOWN']
+        self.prz_sigma_scr = prz['SYN']
+        self.prz_sigma_nsc = prz['NSYN']
+        self.prz_c_rgu = prz['REG_UP_vio_cost']
+        self.prz_c_rgd = prz['REG_DOWN_vio_cost']
+        self.prz_c_scr = prz['SYN_vio_cost']
+        self.prz_c_nsc = prz['NSYN_vio_cost']
+        self.prz_c_rru = prz['RAMPING_RESERVE_UP_vio_cost']
+        self.prz_c_rrd = prz['RAMPING_RESERVE_DOWN_vio_cost']
         prz_bus_list = [[] for i in self.prz_uid]
         for i in range(self.num_bus):
             for j in self.bus_prz_list[i]:
@@ -376,11 +672,11 @@ class InputData(object):
         self.prz_num_sd = numpy.array([len(i) for i in prz_sd_list], dtype=int)
         self.prz_sd_list = [numpy.array(i, dtype=int) for i in prz_sd_list]
 
-    def set_qrz(self, data):
+    def set_qrz(self, columns):
 
-        data_map = {x.uid:x for x in data.network.reactive_zonal_reserve}
-        self.qrz_c_qru = numpy.array([data_map[i].REACT_UP_vio_cost for i in self.qrz_uid])
-        self.qrz_c_qrd = numpy.array([data_map[i].REACT_DOWN_vio_cost for i in self.qrz_uid])
+        qrz = columns['network', 'reactive_zonal_reserve']
+        self.qrz_c_qru = qrz['REACT_UP_vio_cost']
+        self.qrz_c_qrd = qrz['REACT_DOWN_vio_cost']
         qrz_bus_list = [[] for i in self.qrz_uid]
         for i in range(self.num_bus):
             for j in self.bus_qrz_list[i]:
@@ -394,136 +690,221 @@ class InputData(object):
         self.qrz_num_sd = numpy.array([len(i) for i in qrz_sd_list], dtype=int)
         self.qrz_sd_list = [numpy.array(i, dtype=int) for i in qrz_sd_list]
 
-    def set_t(self, data):
+    def set_t(self, columns):
 
-        self.t_d = numpy.array(data.time_series_input.general.interval_duration, dtype=float)
+        self.t_d = numpy.array(columns['time_series_input', 'general']['interval_duration'], dtype=float)
         self.t_a_end = numpy.cumsum(self.t_d)
         self.t_a_start = numpy.zeros(shape=(self.num_t, ), dtype=float)
         self.t_a_start[1:self.num_t] = self.t_a_end[0:(self.num_t - 1)]
         self.t_a_mid = 0.5 * (self.t_a_start + self.t_a_end)
 
-    def set_k(self, data):
-
-        k_out_device_uid = numpy.array([k.components[0] for k in data.reliability.contingency])
-        self.k_out_device = numpy.array([self.all_map[k_out_device_uid[i]] for i in range(self.num_k)], dtype=int)
-        self.k_out_is_acl = numpy.array([self.all_is_acl[self.k_out_device[i]] for i in range(self.num_k)], dtype=int)
-        self.k_out_is_dcl = numpy.array([self.all_is_dcl[self.k_out_device[i]] for i in range(self.num_k)], dtype=int)
-        self.k_out_is_xfr = numpy.array([self.all_is_xfr[self.k_out_device[i]] for i in range(self.num_k)], dtype=int)
-        self.k_out_acl = numpy.array(
-            [self.acl_map[k_out_device_uid[i]] if self.k_out_is_acl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_dcl = numpy.array(
-            [self.dcl_map[k_out_device_uid[i]] if self.k_out_is_dcl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_xfr = numpy.array(
-            [self.xfr_map[k_out_device_uid[i]] if self.k_out_is_xfr[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_fbus_is_acl = numpy.array(
-            [self.acl_fbus[self.k_out_acl[i]] if self.k_out_is_acl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_tbus_is_acl = numpy.array(
-            [self.acl_tbus[self.k_out_acl[i]] if self.k_out_is_acl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_fbus_is_dcl = numpy.array(
-            [self.dcl_fbus[self.k_out_dcl[i]] if self.k_out_is_dcl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_tbus_is_dcl = numpy.array(
-            [self.dcl_tbus[self.k_out_dcl[i]] if self.k_out_is_dcl[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_fbus_is_xfr = numpy.array(
-            [self.xfr_fbus[self.k_out_xfr[i]] if self.k_out_is_xfr[i] else 0 for i in range(self.num_k)], dtype=int)
-        self.k_out_tbus_is_xfr = numpy.array(
-            [self.xfr_tbus[self.k_out_xfr[i]] if self.k_out_is_xfr[i] else 0 for i in range(self.num_k)], dtype=int)
+    def set_k(self, columns):
+
+        self.k_num_out, k_out_all_device_uid = columns['reliability', 'contingency']['components']
+        # all outaged devices of each contingency - the k_out_* arrays below are for the first one.
+        # the devices outaged by contingency i are k_out_all_*[k_out_all_ptr[i]:k_out_all_ptr[i + 1]]
+        self.k_out_all_ptr = numpy.zeros(shape=(self.num_k + 1, ), dtype=int)
+        numpy.cumsum(self.k_num_out, out=self.k_out_all_ptr[1:])
+        self.k_out_all_device = get_map_index(self.all_map, k_out_all_device_uid)
+        self.k_out_all_is_acl = self.all_is_acl[self.k_out_all_device].astype(int)
+        self.k_out_all_is_dcl = self.all_is_dcl[self.k_out_all_device].astype(int)
+        self.k_out_all_is_xfr = self.all_is_xfr[self.k_out_all_device].astype(int)
+        all_acl = numpy.zeros(shape=(self.num_all, ), dtype=int)
+        all_acl[self.all_is_acl] = numpy.arange(self.num_acl)
+        all_dcl = numpy.zeros(shape=(self.num_all, ), dtype=int)
+        all_dcl[self.all_is_dcl] = numpy.arange(self.num_dcl)
+        all_xfr = numpy.zeros(shape=(self.num_all, ), dtype=int)
+        all_xfr[self.all_is_xfr] = numpy.arange(self.num_xfr)
+        self.k_out_all_acl = all_acl[self.k_out_all_device]
+        self.k_out_all_dcl = all_dcl[self.k_out_all_device]
+        self.k_out_all_xfr = all_xfr[self.k_out_all_device]
+
+        first = self.k_out_all_ptr[:-1]
+        self.k_out_device = self.k_out_all_device[first]
+        self.k_out_is_acl = self.k_out_all_is_acl[first]
+        self.k_out_is_dcl = self.k_out_all_is_dcl[first]
+        self.k_out_is_xfr = self.k_out_all_is_xfr[first]
+        self.k_out_acl = self.k_out_all_acl[first]
+        self.k_out_dcl = self.k_out_all_dcl[first]
+        self.k_out_xfr = self.k_out_all_xfr[first]
+        k_is_acl = self.k_out_is_acl == 1
+        self.k_out_fbus_is_acl = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_fbus_is_acl[k_is_acl] = self.acl_fbus[self.k_out_acl[k_is_acl]]
+        self.k_out_tbus_is_acl = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_tbus_is_acl[k_is_acl] = self.acl_tbus[self.k_out_acl[k_is_acl]]
+        k_is_dcl = self.k_out_is_dcl == 1
+        self.k_out_fbus_is_dcl = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_fbus_is_dcl[k_is_dcl] = self.dcl_fbus[self.k_out_dcl[k_is_dcl]]
+        self.k_out_tbus_is_dcl = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_tbus_is_dcl[k_is_dcl] = self.dcl_tbus[self.k_out_dcl[k_is_dcl]]
+        k_is_xfr = self.k_out_is_xfr == 1
+        self.k_out_fbus_is_xfr = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_fbus_is_xfr[k_is_xfr] = self.xfr_fbus[self.k_out_xfr[k_is_xfr]]
+        self.k_out_tbus_is_xfr = numpy.zeros(shape=(self.num_k, ), dtype=int)
+        self.k_out_tbus_is_xfr[k_is_xfr] = self.xfr_tbus[self.k_out_xfr[k_is_xfr]]
         self.k_out_fbus = self.k_out_fbus_is_acl + self.k_out_fbus_is_dcl + self.k_out_fbus_is_xfr
         self.k_out_tbus = self.k_out_tbus_is_acl + self.k_out_tbus_is_dcl + self.k_out_tbus_is_xfr
 
-    def set_sd_t(self, data):
-
-        data_map = {x.uid:x for x in data.time_series_input.simple_dispatchable_device}
-        self.sd_t_u_on_max = numpy.reshape(
-            numpy.array([data_map[i].on_status_ub for i in self.sd_uid], dtype=int),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_u_on_min = numpy.reshape(
-            numpy.array([data_map[i].on_status_lb for i in self.sd_uid], dtype=int),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_p_max = numpy.reshape(
-            numpy.array([data_map[i].p_ub for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_p_min = numpy.reshape(
-            numpy.array([data_map[i].p_lb for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_q_max = numpy.reshape(
-            numpy.array([data_map[i].q_ub for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_q_min = numpy.reshape(
-            numpy.array([data_map[i].q_lb for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rgu = numpy.reshape(
-            numpy.array([data_map[i].p_reg_res_up_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rgd = numpy.reshape(
-            numpy.array([data_map[i].p_reg_res_down_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_scr = numpy.reshape(
-            numpy.array([data_map[i].p_syn_res_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_nsc = numpy.reshape(
-            numpy.array([data_map[i].p_nsyn_res_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rru_on = numpy.reshape(
-            numpy.array([data_map[i].p_ramp_res_up_online_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rrd_on = numpy.reshape(
-            numpy.array([data_map[i].p_ramp_res_down_online_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rru_off = numpy.reshape(
-            numpy.array([data_map[i].p_ramp_res_up_offline_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_rrd_off = numpy.reshape(
-            numpy.array([data_map[i].p_ramp_res_down_offline_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_qru = numpy.reshape(
-            numpy.array([data_map[i].q_res_up_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_c_qrd = numpy.reshape(
-            numpy.array([data_map[i].q_res_down_cost for i in self.sd_uid], dtype=float),
-            newshape=(self.num_sd, self.num_t))
-
-    def set_sd_t_cost(self, data):
+    def get_t_rows(self, column, uids, uid_map, num):
+        '''
+        the lists of a time series column, one per item, as a (num, num_t) array
+        with the row of each item at the index of its uid in uid_map
+        '''
+
+        values = numpy.reshape(column[1], newshape=(len(uids), self.num_t))
+        rows = numpy.zeros(shape=(num, self.num_t), dtype=values.dtype)
+        rows[get_map_index(uid_map, uids)] = values
+        return rows
+
+    def set_sd_t(self, columns):
+
+        sd_t = columns['time_series_input', 'simple_dispatchable_device']
+        uids = sd_t['uid']
+        self.sd_t_u_on_max = self.get_t_rows(sd_t['on_status_ub'], uids, self.sd_map, self.num_sd)
+        self.sd_t_u_on_min = self.get_t_rows(sd_t['on_status_lb'], uids, self.sd_map, self.num_sd)
+        self.sd_t_p_max = self.get_t_rows(sd_t['p_ub'], uids, self.sd_map, self.num_sd)
+        self.sd_t_p_min = self.get_t_rows(sd_t['p_lb'], uids, self.sd_map, self.num_sd)
+        self.sd_t_q_max = self.get_t_rows(sd_t['q_ub'], uids, self.sd_map, self.num_sd)
+        self.sd_t_q_min = self.get_t_rows(sd_t['q_lb'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rgu = self.get_t_rows(sd_t['p_reg_res_up_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rgd = self.get_t_rows(sd_t['p_reg_res_down_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_scr = self.get_t_rows(sd_t['p_syn_res_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_nsc = self.get_t_rows(sd_t['p_nsyn_res_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rru_on = self.get_t_rows(sd_t['p_ramp_res_up_online_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rrd_on = self.get_t_rows(sd_t['p_ramp_res_down_online_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rru_off = self.get_t_rows(sd_t['p_ramp_res_up_offline_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_rrd_off = self.get_t_rows(sd_t['p_ramp_res_down_offline_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_qru = self.get_t_rows(sd_t['q_res_up_cost'], uids, self.sd_map, self.num_sd)
+        self.sd_t_c_qrd = self.get_t_rows(sd_t['q_res_down_cost'], uids, self.sd_map, self.num_sd)
+
+    def set_sd_t_cost(self, columns):
         '''
         cost blocks are processed in two ways beyond the raw data
         1. marginal cost value is negated for consumer devices, i.e. positive benefit is transformed into negative cost
         2. for each device and each time interval, the cost blocks are sorted in order of increasing marginal cost
         then to evaluate the cost of a given p value, one loops over the cost blocks in order,
         applying the cost to the remaining dispatched energy, subtracting pmax from the dispatched energy
+
+        the blocks are stored in flat arrays, for evaluating all device-interval costs at once.
+        the blocks of device i in interval j are sd_t_block_ptr[i * num_t + j]:sd_t_block_ptr[i * num_t + j + 1]
         '''
 
-        data_map = {x.uid:x for x in data.time_series_input.simple_dispatchable_device}
-        cost_blocks = [data_map[i].cost for i in self.sd_uid]
-        for i in range(self.num_sd): # negate the cost value for consumer blocks. keep producer blocks as is
-            if self.sd_is_cs[i]:
-                cost_blocks[i] = [[((-1.0) * t_b_c[0], t_b_c[1]) for t_b_c in t_c] for t_c in cost_blocks[i]]
-        for i in range(self.num_sd): # sort blocks in order of increasing cost
-            cost_blocks[i] = [sorted(t_c, key=(lambda x: x[0])) for t_c in cost_blocks[i]]
-        self.sd_t_num_block = numpy.reshape(
-            numpy.array([[len(t_c) for t_c in c] for c in cost_blocks], dtype=int),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_block_c_list = [[numpy.array([t_b_c[0] for t_b_c in t_c], dtype=float) for t_c in c] for c in cost_blocks]
-        self.sd_t_block_p_max_list = [
-            [numpy.array([t_b_c[1] for t_b_c in t_c], dtype=float) for t_c in c] for c in cost_blocks]
-
-    def set_prz_t(self, data):
-
-        data_map = {x.uid:x for x in data.time_series_input.active_zonal_reserve}
-        self.prz_t_p_rru_min = numpy.reshape(
-            numpy.array([data_map[i].RAMPING_RESERVE_UP for i in self.prz_uid], dtype=float),
-            newshape=(self.num_prz, self.num_t))
-        self.prz_t_p_rrd_min = numpy.reshape(
-            numpy.array([data_map[i].RAMPING_RESERVE_DOWN for i in self.prz_uid], dtype=float),
-            newshape=(self.num_prz, self.num_t))
-
-    def set_qrz_t(self, data):
-
-        data_map = {x.uid:x for x in data.time_series_input.reactive_zonal_reserve}
-        self.qrz_t_q_qru_min = numpy.reshape(
-            numpy.array([data_map[i].REACT_UP for i in self.qrz_uid], dtype=float),
-            newshape=(self.num_qrz, self.num_t))
-        self.qrz_t_q_qrd_min = numpy.reshape(
-            numpy.array([data_map[i].REACT_DOWN for i in self.qrz_uid], dtype=float),
-            newshape=(self.num_qrz, self.num_t))
+
+        sd_t = columns['time_series_input', 'simple_dispatchable_device']
+        lens, num_block, (block_c, block_p_max) = sd_t['cost']
+        self.sd_t_num_block = self.get_t_rows((lens, num_block), sd_t['uid'], self.sd_map, self.num_sd)
+        self.sd_t_block_ptr = numpy.zeros(shape=(self.num_sd * self.num_t + 1, ), dtype=int)
+        numpy.cumsum(self.sd_t_num_block, out=self.sd_t_block_ptr[1:])
+        # the blocks of each device, in the order of the devices
+        item_sd = get_map_index(self.sd_map, sd_t['uid'])
+        item_num_block = numpy.sum(numpy.reshape(num_block, newshape=(len(item_sd), self.num_t)), axis=1)
+        order = numpy.argsort(numpy.repeat(item_sd, item_num_block), kind='stable')
+        block_c = block_c[order]
+        block_p_max = block_p_max[order]
+        block_sd_t = numpy.repeat(numpy.arange(self.num_sd * self.num_t), numpy.ravel(self.sd_t_num_block))
+
+        # negate the cost value for consumer blocks. keep producer blocks as is
+        numpy.negative(block_c, out=block_c, where=(self.sd_is_cs[block_sd_t // self.num_t] == 1))
+
+        # sort blocks in order of increasing cost. stable, so equal cost blocks stay in data order
+        order = numpy.lexsort((block_c, block_sd_t))
+        self.sd_t_block_c = block_c[order]
+        self.sd_t_block_p_max = block_p_max[order]
+        self.sd_t_block_p_start = utils.get_block_p_start(self.sd_t_block_ptr, self.sd_t_block_p_max)
+
+    def set_prz_t(self, columns):
+
+        prz_t = columns['time_series_input', 'active_zonal_reserve']
+        self.prz_t_p_rru_min = self.get_t_rows(prz_t['RAMPING_RESERVE_UP'], prz_t['uid'], self.prz_map, self.num_prz)
+        self.prz_t_p_rrd_min = self.get_t_rows(prz_t['RAMPING_RESERVE_DOWN'], prz_t['uid'], self.prz_map, self.num_prz)
+
+    def set_qrz_t(self, columns):
+
+        qrz_t = columns['time_series_input', 'reactive_zonal_reserve']
+        self.qrz_t_q_qru_min = self.get_t_rows(qrz_t['REACT_UP'], qrz_t['uid'], self.qrz_map, self.num_qrz)
+        self.qrz_t_q_qrd_min = self.get_t_rows(qrz_t['REACT_DOWN'], qrz_t['uid'], self.qrz_map, self.num_qrz)
+
+    def get_arrays(self):
+        '''
+        arrays, scalars = get_arrays()
+
+        the problem as flat numpy arrays, e.g. to keep it in shared memory or in files,
+        and back with set_from_arrays.
+        a ragged list of arrays x, e.g. prz_sd_list, is given as arrays x + '.flat', the arrays concatenated,
+        and x + '.ptr', the offset of each in it.
+        the uid maps are left out, as set_map sets them from the uids.
+        scalars - dict of the ints and floats, e.g. num_bus
+        '''
+
+        arrays = {}
+        scalars = {}
+        for k, v in self.__dict__.items():
+            if isinstance(v, numpy.ndarray):
+                arrays[k] = v
+            elif isinstance(v, list):
+                ptr = numpy.zeros(shape=(len(v) + 1, ), dtype=int)
+                numpy.cumsum([x.size for x in v], out=ptr[1:])
+                arrays[k + '.flat'] = numpy.concatenate(v) if len(v) > 0 else numpy.zeros(shape=(0, ), dtype=float)
+                arrays[k + '.ptr'] = ptr
+            elif isinstance(v, dict) and k.endswith('_map'):
+                pass
+            elif isinstance(v, (int, float, numpy.integer, numpy.floating)):
+                scalars[k] = v
+            else:
+                raise ValueError('InputData.get_arrays cannot flatten {}, type: {}'.format(k, type(v)))
+        return arrays, scalars
+
+    def set_from_arrays(self, arrays, scalars):
+        '''
+        set the problem from get_arrays output, without copying the arrays.
+        the ragged lists are views of the flat arrays
+        '''
+
+        for k, v in scalars.items():
+            setattr(self, k, v)
+        for k, v in arrays.items():
+            if k.endswith('.flat'):
+                name = k[:-len('.flat')]
+                ptr = arrays[name + '.ptr']
+                setattr(self, name, [v[ptr[i]:ptr[i + 1]] for i in range(ptr.size - 1)])
+            elif not k.endswith('.ptr'):
+                setattr(self, k, v)
+        self.set_map(None)
+
+# solution fields in each time_series_output section of the solution file, as
+# (section, device type in InputData, [(field, OutputData array, dtype), ...])
+SOLUTION_FIELDS = [
+    ('bus', 'bus', [
+        ('vm', 'bus_t_v', float),
+        ('va', 'bus_t_theta', float)]),
+    ('shunt', 'sh', [
+        ('step', 'sh_t_u_st', int)]),
+    ('simple_dispatchable_device', 'sd', [
+        ('on_status', 'sd_t_u_on', int),
+        ('p_on', 'sd_t_p_on', float),
+        ('q', 'sd_t_q', float),
+        ('p_reg_res_up', 'sd_t_p_rgu', float),
+        ('p_reg_res_down', 'sd_t_p_rgd', float),
+        ('p_syn_res', 'sd_t_p_scr', float),
+        ('p_nsyn_res', 'sd_t_p_nsc', float),
+        ('p_ramp_res_up_online', 'sd_t_p_rru_on', float),
+        ('p_ramp_res_down_online', 'sd_t_p_rrd_on', float),
+        ('p_ramp_res_up_offline', 'sd_t_p_rru_off', float),
+        ('p_ramp_res_down_offline', 'sd_t_p_rrd_off', float),
+        ('q_res_up', 'sd_t_q_qru', float),
+        ('q_res_down', 'sd_t_q_qrd', float)]),
+    ('ac_line', 'acl', [
+        ('on_status', 'acl_t_u_on', int)]),
+    ('dc_line', 'dcl', [
+        ('pdc_fr', 'dcl_t_p', float),
+        ('qdc_fr', 'dcl_t_q_fr', float),
+        ('qdc_to', 'dcl_t_q_to', float)]),
+    ('two_winding_transformer', 'xfr', [
+        ('on_status', 'xfr_t_u_on', int),
+        ('tm', 'xfr_t_tau', float),
+        ('ta', 'xfr_t_phi', float)]),
+]
+SOLUTION_SECTION_FIELDS = {section: (dev_type, fields) for section, dev_type, fields in SOLUTION_FIELDS}
 
 class OutputData(object):
 
@@ -531,6 +912,40 @@ class OutputData(object):
 
         pass
 
+    def set_from_json(self, input_data, data):
+        '''
+        set the solution arrays directly from data, the solution file as parsed by json,
+        without the pydantic data model.
+        data should pass validation.solution_json_checks first
+        '''
+
+        self.set_zero(input_data)
+        for section, dev_type, fields in SOLUTION_FIELDS:
+            self.set_items(input_data, section, data['time_series_output'][section])
+
+    def set_zero(self, input_data):
+        '''
+        allocate the solution arrays, filled with 0, for set_items
+        '''
+
+        for section, dev_type, fields in SOLUTION_FIELDS:
+            num_dev = getattr(input_data, 'num_' + dev_type)
+            for field, name, dtype in fields:
+                setattr(self, name, numpy.zeros(shape=(num_dev, input_data.num_t), dtype=dtype))
+
+    def set_items(self, input_data, section, items):
+        '''
+        write items, a list of items of the time_series_output section of the solution file,
+        to their rows of the solution arrays, e.g. for a batch of items read by jsonstream
+        '''
+
+        dev_type, fields = SOLUTION_SECTION_FIELDS[section]
+        dev_map = getattr(input_data, dev_type + '_map')
+        idx = numpy.array([dev_map[x['uid']] for x in items], dtype=int)
+        for field, name, dtype in fields:
+            getattr(self, name)[idx, :] = numpy.reshape(
+                numpy.array([x[field] for x in items], dtype=dtype), newshape=(len(items), input_data.num_t))
+
     def set_from_data_model(self, input_data, output_data_model):
         
         self.set_bus_t(input_data, output_data_model)
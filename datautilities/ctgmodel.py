@@ -53,27 +53,196 @@ Y. Chen, F. Pan, J. Holzer, E. Rothberg, Y. Ma, and A. Veeramany, "A High Perfor
 Y. Chen, F. Pan, J. Holzer, A. Veeramany, and Z. Wu, "On Improving Efficiency of Electricity Market Clearing Software with A Concurrent High Performance Computer Based Security Constrained Unit Commitment Solver", in IEEE PES General Meeting, 2021.
 '''
 
-import time, numpy, scipy, scipy.sparse, scipy.sparse.linalg
+import os, time, collections, concurrent.futures, numpy, scipy, scipy.linalg, scipy.sparse, scipy.sparse.linalg
 from datautilities import utils
+from datautilities.errors import ModelError
+
+# optional sparse Cholesky backend
+cholmod = None
+try:
+    from sksparse import cholmod
+except ImportError:
+    pass
 
 # todo - refactor, with a class
 # obviously this huge block of code should be refactored
 
+class TopologyCache(object):
+    '''
+    Least recently used cache of the per-interval linear algebra of the post-contingency model,
+    keyed by the in service AC branch set, i.e. the bytes of the packed u_on vector.
+
+    An entry holds whatever is needed to solve with A_t (factors of A_t, or factors of V_t for SMW),
+    together with W_tk and the inverses of V_tk.
+    The total size of the entries is kept within max_bytes by evicting the least recently used ones.
+    max_bytes <= 0 disables the cache.
+    '''
+
+    def __init__(self, max_bytes):
+
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.entry_bytes = {}
+        self.num_bytes = 0
+        self.num_hit = 0
+        self.num_miss = 0
+        self.num_evict = 0
+
+    def get(self, key):
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.num_miss += 1
+        else:
+            self.num_hit += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry, num_bytes):
+
+        if num_bytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.num_bytes -= self.entry_bytes.pop(key)
+            del self.entries[key]
+        while self.num_bytes + num_bytes > self.max_bytes:
+            evict_key, evict_entry = self.entries.popitem(last=False)
+            self.num_bytes -= self.entry_bytes.pop(evict_key)
+            self.num_evict += 1
+        self.entries[key] = entry
+        self.entry_bytes[key] = num_bytes
+        self.num_bytes += num_bytes
+
+def get_topology_nbytes(topology, shared_arrays):
+    '''
+    approximate memory used by a topology cache entry.
+    arrays in shared_arrays are referenced by the entry, not owned by it, so they are not counted
+    '''
+
+    num_bytes = 0
+    for k in ['w_acl_k', 'w_xfr_k', 'v_acl_k_inv', 'v_xfr_k_inv']:
+        if topology[k] is not None and not any(topology[k] is a for a in shared_arrays):
+            num_bytes += topology[k].nbytes
+    if topology['a_factors_t'] is not None:
+        # factor values and row indices, and column pointers
+        num_bytes += topology['a_factors_t'].nnz * 12 + topology['a_factors_t'].shape[0] * 24
+    if topology['v_t_factors'] is not None:
+        num_bytes += topology['v_t_factors'][0].nbytes + topology['v_t_factors'][1].nbytes
+    return num_bytes
+
+# factorization methods for SymmetricFactors
+FACTOR_METHODS = ['auto', 'cholmod', 'splu_sym', 'splu']
+
+class SymmetricFactors(object):
+    '''
+    Factors of a sparse symmetric nonsingular matrix A, with solve(rhs) = A^-1 rhs for a 1d or 2d rhs.
+
+    method
+    * cholmod - sparse Cholesky L L^T with fill reducing ordering, from scikit-sparse.
+      only for positive definite A. same as splu_sym if scikit-sparse is not installed
+    * splu_sym - SuperLU in symmetric mode, with a symmetric fill reducing ordering (MMD on A^T + A)
+      and the pivots on the diagonal, i.e. L D L^T in LU form.
+      only for positive definite A, as without pivoting it is not stable otherwise
+    * splu - SuperLU with the default column ordering and partial pivoting, for any nonsingular A
+    * auto - same as cholmod
+
+    A method that needs positive definite A falls back to splu if A is not,
+    which is detected by cholmod, or by a nonpositive pivot in splu_sym.
+    A is usually positive definite, but may be indefinite if some branches have X_sr < 0.
+
+    after factoring:
+    method - the method used
+    nnz - nonzeros in the factors
+    fill - nnz / nonzeros in A
+    factor_time - including any failed attempts
+    '''
+
+    def __init__(self, a_mat, method='auto'):
+
+        assert method in FACTOR_METHODS
+        if method in ['auto', 'cholmod']:
+            method = ('cholmod' if cholmod is not None else 'splu_sym')
+        start_time = time.time()
+        a_mat = scipy.sparse.csc_matrix(a_mat)
+        self.shape = a_mat.shape
+        self.factors = None
+        if method == 'cholmod':
+            try:
+                self.factors = cholmod.cholesky(a_mat)
+                self.nnz = self.factors.L().nnz
+            except cholmod.CholmodNotPositiveDefiniteError:
+                self.factors = None
+        elif method == 'splu_sym':
+            try:
+                self.factors = scipy.sparse.linalg.splu(
+                    a_mat, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0, options={'SymmetricMode': True})
+                # P A P^T = L D L^T in LU form has U = D L^T, so A is positive definite iff the pivots are positive
+                if not (numpy.array_equal(self.factors.perm_r, self.factors.perm_c) and
+                        numpy.all(self.factors.U.diagonal() > 0.0)):
+                    self.factors = None
+                else:
+                    self.nnz = self.factors.nnz
+            except RuntimeError: # exactly singular pivot
+                self.factors = None
+        if self.factors is None:
+            method = 'splu'
+            self.factors = scipy.sparse.linalg.splu(a_mat)
+            self.nnz = self.factors.nnz
+        self.method = method
+        self.fill = self.nnz / max(1, a_mat.nnz)
+        self.factor_time = time.time() - start_time
+
+    def solve(self, rhs):
+
+        if self.method == 'cholmod':
+            return self.factors(rhs)
+        return self.factors.solve(rhs)
+
+    def get_stats(self):
+
+        return 'method: {}, nnz: {}, fill: {}, time: {}'.format(self.method, self.nnz, self.fill, self.factor_time)
+
 @utils.timeit
 def eval_post_contingency_model(sol_eval):
     '''
     loop over t
-    * create and factor negative admittance matrix A_t[t]
+    * create and factor negative admittance matrix A_t[t],
+      or, if few branches change in t relative to the static matrix A, use SMW on A instead
+      (config: ctg_use_smw_over_t, ctg_smw_over_t_max_br_delta)
+    * reuse A, its factors, and W_k from an earlier solution of the same problem in sol_eval.shared
+      if the AC branches in service in some t are the same
+    * factor A and A_t[t] with sparse Cholesky or symmetric LU if positive definite, otherwise LU (config: ctg_factor_method)
+    * reuse A_t[t] factors and W_tk[t,k] from an earlier t with the same in service AC branch set
+      (config: ctg_topology_cache_max_mb)
+    * contingencies are processed in blocks of columns to bound the memory used
+      (config: ctg_k_block_max_mb, ctg_k_block_max_size)
+    * intervals are independent given the static factors, so they may be spread over a pool of processes,
+      with the static arrays in shared memory (config: ctg_num_proc)
+    * compute post-contingency flows on all AC branches, or only on those that a bound on the flow deltas
+      shows can exceed their limits (config: ctg_flow_engine)
+    * compute violations only on AC branches that exceed their limits under some contingency in the block,
+      with the same results (config: ctg_br_filter_by_worst_ctg)
     * evaluate base case flows p_t[t]
     * compute rank-1 adjustments w_tk[t,k], v_tk[t,k], for contingencies k
-    * 
+    * keep the static factors and the results of each t in sol_eval.ctg_model,
+      so update_post_contingency_model can re-evaluate only the t that change
     '''
 
     # algorithm control parameters
-    br_filter_by_worst_ctg = False
-    t_use_smw = False
-    t_skip_update_if_no_br_change = False # not implemented yet - probably not much value, at least in the test cases we have so far
-    check_power_balance = True # not implemented yet # note this has to be skipped if br_filter_by_worst_ctg is True
+    br_filter_by_worst_ctg = sol_eval.config['ctg_br_filter_by_worst_ctg']
+    use_smw_over_t = sol_eval.config['ctg_use_smw_over_t']
+    smw_over_t_max_br_delta = sol_eval.config['ctg_smw_over_t_max_br_delta']
+    smw_over_t_v_t_cond_max = 1.0e10 # refactor A_t instead if V_t is this badly conditioned
+    multi_v_k_cond_max = 1.0e10 # a multiple outage with V_tk this badly conditioned disconnects the network
+    topology_cache_max_bytes = int(sol_eval.config['ctg_topology_cache_max_mb'] * 1.0e6)
+    num_proc = sol_eval.config['ctg_num_proc'] # <= 1 evaluates the intervals serially in this process
+    k_block_max_bytes = int(sol_eval.config['ctg_k_block_max_mb'] * 1.0e6) # per process
+    k_block_max_size = sol_eval.config['ctg_k_block_max_size'] # <= 0 for no limit other than k_block_max_bytes
+    flow_engine = sol_eval.config['ctg_flow_engine'] # 'all_branches' or 'at_risk_branches'
+    factor_method = sol_eval.config['ctg_factor_method'] # one of FACTOR_METHODS
+    assert factor_method in FACTOR_METHODS
+    assert flow_engine in ['all_branches', 'at_risk_branches']
+    check_power_balance = True # not implemented yet # note this has to be done before eval_br_delta_k, which drops the filtered out branches
 
     # problem dimensions
     num_bus = sol_eval.problem.num_bus
@@ -97,7 +266,7 @@ def eval_post_contingency_model(sol_eval):
     nonref_bus_dcl_inc = nonref_bus_dcl_inc[nonref_bus, :]
     nonref_bus_xfr_inc = sol_eval.bus_xfr_to_inj_mat - sol_eval.bus_xfr_fr_inj_mat
     nonref_bus_xfr_inc = nonref_bus_xfr_inc[nonref_bus, :]
-    nonref_bus_br_inc = scipy.sparse.hstack((nonref_bus_acl_inc, nonref_bus_xfr_inc))
+    nonref_bus_br_inc = scipy.sparse.hstack((nonref_bus_acl_inc, nonref_bus_xfr_inc), format='csr')
     acl_b = numpy.array(sol_eval.problem.acl_b_sr, dtype=float)
     xfr_b = numpy.array(sol_eval.problem.xfr_b_sr, dtype=float)
     br_b = numpy.concatenate((acl_b, xfr_b))
@@ -111,21 +280,34 @@ def eval_post_contingency_model(sol_eval):
 
     # static matrix A = -B = - M*Bsr*Mt on non-reference buses, generally symmetric nonsingular
     # usually positive definite but may be indefinite if some branches have X_sr < 0
-    # if positive definite, using a Cholesky factorization instead of LU can improve run time
+    # if positive definite, a Cholesky factorization (or symmetric LU) has much less fill than LU,
+    # so SymmetricFactors tries that first
     # note we exclude branches that are out of service for all t
     # t delta will be on those that are out of service for a given t but in service for at least some t
-    start_time = time.time()
-    a_mat = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_u_max_over_t, newshape=(num_br, 1)))
-    a_mat = nonref_bus_br_inc.dot(a_mat)
-    a_mat = a_mat.multiply(-1.0)
-    end_time = time.time()
-    print('construct static bus admittance matrix. time: {}'.format(end_time - start_time))
+    # A, its factors, and the static W_k depend on the solution only through br_u_max_over_t,
+    # so they are reused from an earlier solution of the same problem if that is the same, e.g. in batch evaluation
+    static = None
+    if sol_eval.shared is not None:
+        static = sol_eval.shared.get('ctg_static')
+        if static is not None and not numpy.array_equal(static['br_u_max_over_t'], br_u_max_over_t):
+            static = None
+    if static is not None:
+        a_mat = static['a_mat']
+        a_factors = static['a_factors']
+        print('reuse static bus admittance matrix and factors from an earlier solution. {}'.format(a_factors.get_stats()))
+    else:
+        start_time = time.time()
+        a_mat = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_u_max_over_t, newshape=(num_br, 1)))
+        a_mat = nonref_bus_br_inc.dot(a_mat)
+        a_mat = a_mat.multiply(-1.0).tocsc()
+        end_time = time.time()
+        print('construct static bus admittance matrix. time: {}'.format(end_time - start_time))
 
-    # factor
-    start_time = time.time()
-    a_factors = scipy.sparse.linalg.splu(a_mat)
-    end_time = time.time()
-    print('factor static bus admittance matrix. time: {}'.format(end_time - start_time))
+        # factor
+        start_time = time.time()
+        a_factors = SymmetricFactors(a_mat, factor_method)
+        end_time = time.time()
+        print('factor static bus admittance matrix. time: {}, {}'.format(end_time - start_time, a_factors.get_stats()))
 
     # get AC branches that are in service in at least one t but out of service in a given t
     acl_in_some_t = numpy.nonzero(acl_u_max_over_t)[0]
@@ -157,14 +339,30 @@ def eval_post_contingency_model(sol_eval):
     t_num_br_delta_t = [t_br_delta_t[t].size for t in range(num_t)]
     print('t_acl_delta_t: {}, t_xfr_delta_t: {}, t_br_delta_t: {}, acl_delta_t: {}, xfr_delta_t: {}, br_delta_t: {}'.format(t_acl_delta_t, t_xfr_delta_t, t_br_delta_t, acl_delta_t, xfr_delta_t, br_delta_t))
 
-    # get AC branches going out of service in at least one contingency
+    # choose SMW or refactoring for each t
+    # SMW with respect to the static matrix A costs a dense solve with V_t, of size t_num_br_delta_t[t],
+    # and dense products with W_t, so it is cheaper than factoring A_t and solving for W_tk
+    # as long as the number of branches changing in t is small.
+    # note br_delta_t_smw may be smaller than br_delta_t, as we only need static W columns
+    # for branches changing in the t where we use SMW
+    t_use_smw = [(use_smw_over_t and t_num_br_delta_t[t] <= smw_over_t_max_br_delta) for t in range(num_t)]
+    br_delta_t_smw = numpy.unique(numpy.concatenate(
+        [numpy.zeros(shape=(0, ), dtype=int)] + [t_br_delta_t[t] for t in range(num_t) if t_use_smw[t]]))
+    br_delta_t_smw_map = {br_delta_t_smw[i]:i for i in range(br_delta_t_smw.size)}
+    num_br_delta_t_smw = br_delta_t_smw.size
+    print('SMW over t. use: {}, max br delta: {}, num t with SMW: {}, num t with refactoring: {}, br delta for SMW: {}'.format(
+        use_smw_over_t, smw_over_t_max_br_delta, sum(t_use_smw), num_t - sum(t_use_smw), num_br_delta_t_smw))
+
+    # get AC branches going out of service in at least one contingency outaging a single device
+    # contingencies outaging more than one device are handled separately below
+    k_single = (sol_eval.problem.k_num_out == 1)
     #acl_delta_k = numpy.array([
     acl_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_acl[k] for k in range(num_k) if sol_eval.problem.k_out_is_acl[k]]))), dtype=int)
+        sol_eval.problem.k_out_acl[k] for k in range(num_k) if sol_eval.problem.k_out_is_acl[k] and k_single[k]]))), dtype=int)
     xfr_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_xfr[k] for k in range(num_k) if sol_eval.problem.k_out_is_xfr[k]]))), dtype=int)
+        sol_eval.problem.k_out_xfr[k] for k in range(num_k) if sol_eval.problem.k_out_is_xfr[k] and k_single[k]]))), dtype=int)
     dcl_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_dcl[k] for k in range(num_k) if sol_eval.problem.k_out_is_dcl[k]]))), dtype=int)
+        sol_eval.problem.k_out_dcl[k] for k in range(num_k) if sol_eval.problem.k_out_is_dcl[k] and k_single[k]]))), dtype=int)
     br_delta_k = numpy.concatenate((acl_delta_k, num_acl + xfr_delta_k))
     num_br_delta_k = br_delta_k.size
     num_acl_delta_k = acl_delta_k.size
@@ -173,41 +371,81 @@ def eval_post_contingency_model(sol_eval):
     acl_delta_k_map = {acl_delta_k[i]:i for i in range(num_acl_delta_k)}
     dcl_delta_k_map = {dcl_delta_k[i]:i for i in range(num_dcl_delta_k)}
     xfr_delta_k_map = {xfr_delta_k[i]:i for i in range(num_xfr_delta_k)}
-    k_out_is_acl_list = numpy.nonzero(sol_eval.problem.k_out_is_acl)[0]
+    k_out_is_acl_list = numpy.nonzero(numpy.logical_and(sol_eval.problem.k_out_is_acl, k_single))[0]
     k_out_is_acl_acl_list = sol_eval.problem.k_out_acl[k_out_is_acl_list]
     k_out_is_acl_acl_delta_k_list = numpy.array([acl_delta_k_map[i] for i in k_out_is_acl_acl_list], dtype=int)
-    k_out_is_dcl_list = numpy.nonzero(sol_eval.problem.k_out_is_dcl)[0]
+    k_out_is_dcl_list = numpy.nonzero(numpy.logical_and(sol_eval.problem.k_out_is_dcl, k_single))[0]
     k_out_is_dcl_dcl_list = sol_eval.problem.k_out_dcl[k_out_is_dcl_list]
     k_out_is_dcl_dcl_delta_k_list = numpy.array([dcl_delta_k_map[i] for i in k_out_is_dcl_dcl_list], dtype=int)
-    k_out_is_xfr_list = numpy.nonzero(sol_eval.problem.k_out_is_xfr)[0]
+    k_out_is_xfr_list = numpy.nonzero(numpy.logical_and(sol_eval.problem.k_out_is_xfr, k_single))[0]
     k_out_is_xfr_xfr_list = sol_eval.problem.k_out_xfr[k_out_is_xfr_list]
     k_out_is_xfr_xfr_delta_k_list = numpy.array([xfr_delta_k_map[i] for i in k_out_is_xfr_xfr_list], dtype=int)
-    br_acl_delta_k_out_idx_lists = (acl_delta_k, numpy.arange(num_acl_delta_k, dtype=int))
-    br_xfr_delta_k_out_idx_lists = (num_acl + xfr_delta_k, numpy.arange(num_xfr_delta_k, dtype=int))
     print('contingency delta branches. acl: {}, xfr: {}, dcl: {}'.format(
         num_acl_delta_k, num_xfr_delta_k, num_dcl_delta_k))
 
+    # get the outaged device sets of contingencies outaging more than one device
+    # such a contingency is a rank r update of A_t on the AC branches it outages, r = 0, 1, 2, ...,
+    # together with RHS terms from the transformers and DC lines it outages.
+    # as with single outages, contingencies with the same outaged device set share a column,
+    # and the columns are ordered by r, so that columns with the same r can be processed together
+    k_out_is_multi_list = numpy.nonzero(sol_eval.problem.k_num_out > 1)[0]
+    k_out_is_multi_key_list = []
+    for k in k_out_is_multi_list:
+        k_out_all = slice(sol_eval.problem.k_out_all_ptr[k], sol_eval.problem.k_out_all_ptr[k + 1])
+        k_out_all_is_acl = sol_eval.problem.k_out_all_is_acl[k_out_all]
+        k_out_all_is_xfr = sol_eval.problem.k_out_all_is_xfr[k_out_all]
+        k_out_all_is_dcl = sol_eval.problem.k_out_all_is_dcl[k_out_all]
+        k_out_br = (
+            [i for i, j in zip(sol_eval.problem.k_out_all_acl[k_out_all], k_out_all_is_acl) if j] +
+            [num_acl + i for i, j in zip(sol_eval.problem.k_out_all_xfr[k_out_all], k_out_all_is_xfr) if j])
+        k_out_dcl = [i for i, j in zip(sol_eval.problem.k_out_all_dcl[k_out_all], k_out_all_is_dcl) if j]
+        k_out_is_multi_key_list.append((tuple(sorted(set(k_out_br))), tuple(sorted(set(k_out_dcl)))))
+    multi_delta_k = sorted(list(set(k_out_is_multi_key_list)), key=(lambda x: (len(x[0]), x)))
+    num_multi_delta_k = len(multi_delta_k)
+    multi_delta_k_map = {multi_delta_k[i]:i for i in range(num_multi_delta_k)}
+    k_out_is_multi_multi_delta_k_list = numpy.array([multi_delta_k_map[i] for i in k_out_is_multi_key_list], dtype=int)
+    multi_delta_k_rank = numpy.array([len(i[0]) for i in multi_delta_k], dtype=int)
+    multi_delta_k_br_ptr = numpy.zeros(shape=(num_multi_delta_k + 1, ), dtype=int)
+    numpy.cumsum(multi_delta_k_rank, out=multi_delta_k_br_ptr[1:])
+    multi_delta_k_br = numpy.array([j for i in multi_delta_k for j in i[0]], dtype=int)
+    multi_delta_k_xfr = [(j - num_acl, i) for i in range(num_multi_delta_k) for j in multi_delta_k[i][0] if j >= num_acl]
+    multi_delta_k_xfr_mat = scipy.sparse.csc_matrix(
+        (numpy.ones(shape=(len(multi_delta_k_xfr), ), dtype=float),
+         ([i[0] for i in multi_delta_k_xfr], [i[1] for i in multi_delta_k_xfr])),
+        shape=(num_xfr, num_multi_delta_k))
+    multi_delta_k_dcl = [(j, i) for i in range(num_multi_delta_k) for j in multi_delta_k[i][1]]
+    multi_delta_k_dcl_mat = scipy.sparse.csc_matrix(
+        (numpy.ones(shape=(len(multi_delta_k_dcl), ), dtype=float),
+         ([i[0] for i in multi_delta_k_dcl], [i[1] for i in multi_delta_k_dcl])),
+        shape=(num_dcl, num_multi_delta_k))
+    # worst violations are reported with the uid of the first contingency with the outaged device set
+    multi_delta_k_k = numpy.zeros(shape=(num_multi_delta_k, ), dtype=int)
+    multi_delta_k_k[k_out_is_multi_multi_delta_k_list[::-1]] = k_out_is_multi_list[::-1]
+    multi_delta_k_uid = numpy.array([sol_eval.problem.k_uid[k] for k in multi_delta_k_k], dtype=str)
+    print('contingency delta device sets of multiple outages: {}, by rank: {}'.format(
+        num_multi_delta_k, dict(zip(*numpy.unique(multi_delta_k_rank, return_counts=True)))))
+
+    # choose the number of contingency columns to process at a time
+    # dense bus-k and br-k arrays are needed for each column in a block:
+    # M_k, W_k, W_tk, and up to 4 work arrays on buses, and 1 work array on branches
+    # if all contingencies fit in one block, keep M_k and W_k for all of them, computing W_k only once,
+    # otherwise compute them per block. either way the memory used is about k_block_max_bytes
+    k_col_bytes = 8 * (7 * (num_bus - 1) + num_br)
+    # a column of rank r > 1 of multiple outages needs about r times as much, so it is in blocks of k_block_size / r
+    num_delta_k = num_acl_delta_k + num_dcl_delta_k + num_xfr_delta_k + num_multi_delta_k
+    k_block_size = max(1, k_block_max_bytes // k_col_bytes)
+    if k_block_max_size > 0:
+        k_block_size = min(k_block_size, k_block_max_size)
+    k_blocked = (num_delta_k > k_block_size)
+    if not k_blocked:
+        k_block_size = max(1, num_acl_delta_k, num_dcl_delta_k, num_xfr_delta_k, num_multi_delta_k)
+    print('contingency blocks. max bytes: {}, bytes per k: {}, blocked: {}, block size: {}'.format(
+        k_block_max_bytes, k_col_bytes, k_blocked, k_block_size))
+
     # collect bus-t injections from producers, consumers, and shunts:
     # p_inj = p_pr - p_cs - p_sh
     start_time = time.time()
-    sol_eval.bus_t_float[:] = 0.0
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sd_inj_mat, sol_eval.sd_t_p, out=sol_eval.bus_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sh_inj_mat, sol_eval.sh_t_p, out=sol_eval.bus_t_float)
-    # subtract the distributed slack
-    t_p_sl = numpy.sum(sol_eval.bus_t_float, axis=0)
-    numpy.subtract(
-        sol_eval.bus_t_float, (1.0 / num_bus) * numpy.reshape(t_p_sl, newshape=(1, num_t)), out=sol_eval.bus_t_float)
-    # subtract pre-contingency power absorption due to DC line flow
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_fr_inj_mat, sol_eval.dcl_t_p, out=sol_eval.bus_t_float)
-    numpy.negative(sol_eval.dcl_t_p, out=sol_eval.dcl_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_to_inj_mat, sol_eval.dcl_t_float, out=sol_eval.bus_t_float)
-    # subtract pre-contingency power absorption due to transformer phase difference
-    numpy.multiply(numpy.reshape(xfr_b, newshape=(num_xfr, 1)), sol_eval.xfr_t_phi, out=sol_eval.xfr_t_float)
-    numpy.multiply(sol_eval.xfr_t_u_on, sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_fr_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
-    numpy.negative(sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_to_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
-    # todo - check sign on terms, especially transformer
+    set_bus_t_rhs(sol_eval, xfr_b)
     end_time = time.time()
     print('construct bus,t-indexed right hand side. time: {}'.format(end_time - start_time))
 
@@ -223,17 +461,21 @@ def eval_post_contingency_model(sol_eval):
     #br_t_u = numpy.concatenate((sol_eval.acl_t_u_on, sol_eval.xfr_t_u_on), axis=0)
     #br_t_phi
     acl_phi = numpy.zeros(shape=(num_acl, ), dtype=float)
-    m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].toarray()
-    m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].toarray()
-    m_br_t = nonref_bus_br_inc.tocsr()[:, br_delta_t].toarray()
+    m_acl_k = None
+    m_xfr_k = None
+    if static is not None:
+        m_acl_k = static['m_acl_k']
+        m_xfr_k = static['m_xfr_k']
+    elif not k_blocked:
+        m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].toarray()
+        m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].toarray()
+    m_br_t = nonref_bus_br_inc[:, br_delta_t_smw].toarray()
     # m_acl_t = nonref_bus_acl_inc[:, acl_delta_t].toarray()
     # m_xfr_t = nonref_bus_xfr_inc[:, xfr_delta_t].toarray()
     #mw_k = numpy.zeros(shape=(num_bus - 1, num_br_delta_k), dtype=float)
-    w_acl_k = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float) # t->k
-    w_xfr_k = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float) # t->k
-    w0_acl_k = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float) # 0->k
-    w0_xfr_k = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float) # 0->k
-    w_br_t = numpy.zeros(shape=(num_bus - 1, num_br_delta_t), dtype=float) # 0->t
+    w0_acl_k = None # 0->k
+    w0_xfr_k = None # 0->k
+    w_br_t = numpy.zeros(shape=(num_bus - 1, num_br_delta_t_smw), dtype=float) # 0->t
     # w_acl_t = numpy.zeros(shape=(num_bus - 1, num_acl_delta_t), dtype=float) # 0->t
     # w_xfr_t = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_t), dtype=float) # 0->t
     end_time = time.time()
@@ -246,8 +488,21 @@ def eval_post_contingency_model(sol_eval):
     # Wt can just be all of the columns we need over any t
     # compute Vt in the loop
     start_time = time.time()
-    w0_acl_k[:] = a_factors.solve(m_acl_k)
-    w0_xfr_k[:] = a_factors.solve(m_xfr_k)
+    if static is not None:
+        w0_acl_k = static['w0_acl_k']
+        w0_xfr_k = static['w0_xfr_k']
+    elif not k_blocked:
+        w0_acl_k = a_factors.solve(m_acl_k)
+        w0_xfr_k = a_factors.solve(m_xfr_k)
+    if sol_eval.shared is not None:
+        sol_eval.shared['ctg_static'] = {
+            'br_u_max_over_t': br_u_max_over_t,
+            'a_mat': a_mat,
+            'a_factors': a_factors,
+            'm_acl_k': m_acl_k,
+            'm_xfr_k': m_xfr_k,
+            'w0_acl_k': w0_acl_k,
+            'w0_xfr_k': w0_xfr_k}
     w_br_t[:] = a_factors.solve(m_br_t)
     # w_acl_t[:] = a_factors.solve(m_acl_t)
     # w_xfr_t[:] = a_factors.solve(m_xfr_t)
@@ -257,186 +512,500 @@ def eval_post_contingency_model(sol_eval):
     end_time = time.time()
     compute_static_w_time = end_time - start_time
 
-    bus_rhs = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term of RHS
-    bus_theta = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term
-    bus_float = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
-    bus_acl_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float)
-    bus_dcl_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_dcl_delta_k), dtype=float)
-    bus_dcl_delta_k_float_1 = numpy.zeros(shape=(num_bus - 1, num_dcl_delta_k), dtype=float)
-    bus_xfr_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-    bus_xfr_delta_k_float_1 = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-    bus_xfr_delta_k_float_2 = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-
-    br_p = numpy.zeros(shape=(num_br, ), dtype=float) # main term
-    br_bool_1 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_bool_2 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_bool_3 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_float = numpy.zeros(shape=(num_br, ), dtype=float)
-    br_float_1 = numpy.zeros(shape=(num_br, ), dtype=float)
-    br_acl_delta_k_float = numpy.zeros(shape=(num_br, num_acl_delta_k), dtype=float)
-    br_dcl_delta_k_float = numpy.zeros(shape=(num_br, num_dcl_delta_k), dtype=float)
-    br_xfr_delta_k_float = numpy.zeros(shape=(num_br, num_xfr_delta_k), dtype=float)
-
-    acl_delta_k_float = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
-    dcl_delta_k_float = numpy.zeros(shape=(num_dcl_delta_k, ), dtype=float)
-    xfr_delta_k_float = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
-
-    # keep track of run time of certain phases of the loop over t
-    get_time_varying_branch_characteristics_time = 0.0
-    construct_a_t_time = 0.0
-    factor_a_t_time = 0.0
-    compute_w_with_t_a_solve_time = 0.0
-    compute_v_t_time = 0.0
-    compute_w_with_t_smw_time = 0.0
-    compute_v_time = 0.0 # includes v_inv
-    compute_bus_theta_with_t_a_solve_time = 0.0
-    compute_bus_theta_with_t_smw_time = 0.0
-    compute_br_p_time = 0.0
-    apply_w_v_wt_time = 0.0
-    compute_bus_dtheta_rhs_dcl_k_time = 0.0
-    compute_w_v_wt_xfr_k_time = 0.0
-    compute_bus_dtheta_rhs_xfr_k_time = 0.0
-    compute_br_acl_delta_k_p_delta_time = 0.0
-    compute_br_dcl_delta_k_p_delta_time = 0.0
-    compute_br_xfr_delta_k_p_delta_time = 0.0
-    filter_branches_acl_k_time = 0.0
-    filter_branches_dcl_k_time = 0.0
-    filter_branches_xfr_k_time = 0.0
-    compute_br_acl_delta_k_p_time = 0.0
-    compute_br_dcl_delta_k_p_time = 0.0
-    compute_br_xfr_delta_k_p_time = 0.0
-    compute_br_acl_delta_k_s_over_time = 0.0
-    compute_br_dcl_delta_k_s_over_time = 0.0
-    compute_br_xfr_delta_k_s_over_time = 0.0
-    zero_out_time = 0.0
-    get_max_br_acl_delta_k_s_over_time = 0.0
-    get_max_br_dcl_delta_k_s_over_time = 0.0
-    get_max_br_xfr_delta_k_s_over_time = 0.0
-    compute_br_k_z_time = 0.0
-    collect_penalties_into_obj_array_time = 0.0
-
-    # largest violations
-    viol = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_acl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_acl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_dcl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_dcl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_xfr_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_xfr_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-
-    t_computation_time = {}
-
+    # everything the evaluation of a single t needs
+    # none of it is modified in the loop over t, so it can be shared by evaluators in other processes
+    data = {
+        'num_bus': num_bus,
+        'num_acl': num_acl,
+        'num_xfr': num_xfr,
+        'num_dcl': num_dcl,
+        'num_br': num_br,
+        'num_k': num_k,
+        'br_filter_by_worst_ctg': br_filter_by_worst_ctg,
+        'flow_engine': flow_engine,
+        'smw_over_t_v_t_cond_max': smw_over_t_v_t_cond_max,
+        'multi_v_k_cond_max': multi_v_k_cond_max,
+        'topology_cache_max_bytes': topology_cache_max_bytes,
+        'factor_method': factor_method,
+        'c_s': sol_eval.problem.c_s,
+        't_d': numpy.array(sol_eval.problem.t_d, dtype=float),
+        'acl_uid': sol_eval.problem.acl_uid,
+        'xfr_uid': sol_eval.problem.xfr_uid,
+        'dcl_uid': sol_eval.problem.dcl_uid,
+        'nonref_bus_acl_inc': nonref_bus_acl_inc,
+        'nonref_bus_xfr_inc': nonref_bus_xfr_inc,
+        'nonref_bus_dcl_inc': nonref_bus_dcl_inc,
+        'nonref_bus_br_inc': nonref_bus_br_inc,
+        'a_mat': a_mat,
+        'acl_b': acl_b,
+        'xfr_b': xfr_b,
+        'br_b': br_b,
+        'br_s_max': br_s_max,
+        'acl_phi': acl_phi,
+        't_use_smw': t_use_smw,
+        't_num_br_delta_t': t_num_br_delta_t,
+        't_br_delta_t': t_br_delta_t,
+        'br_delta_t_smw_map': br_delta_t_smw_map,
+        'acl_delta_k': acl_delta_k,
+        'xfr_delta_k': xfr_delta_k,
+        'dcl_delta_k': dcl_delta_k,
+        'k_out_is_acl_list': k_out_is_acl_list,
+        'k_out_is_acl_acl_delta_k_list': k_out_is_acl_acl_delta_k_list,
+        'k_out_is_dcl_list': k_out_is_dcl_list,
+        'k_out_is_dcl_dcl_delta_k_list': k_out_is_dcl_dcl_delta_k_list,
+        'k_out_is_xfr_list': k_out_is_xfr_list,
+        'k_out_is_xfr_xfr_delta_k_list': k_out_is_xfr_xfr_delta_k_list,
+        'k_out_is_multi_list': k_out_is_multi_list,
+        'k_out_is_multi_multi_delta_k_list': k_out_is_multi_multi_delta_k_list,
+        'multi_delta_k_rank': multi_delta_k_rank,
+        'multi_delta_k_br_ptr': multi_delta_k_br_ptr,
+        'multi_delta_k_br': multi_delta_k_br,
+        'multi_delta_k_xfr_mat': multi_delta_k_xfr_mat,
+        'multi_delta_k_dcl_mat': multi_delta_k_dcl_mat,
+        'multi_delta_k_uid': multi_delta_k_uid,
+        'k_block_size': k_block_size,
+        'k_blocked': k_blocked,
+        'm_acl_k': m_acl_k,
+        'm_xfr_k': m_xfr_k,
+        'm_br_t': m_br_t,
+        'w0_acl_k': w0_acl_k,
+        'w0_xfr_k': w0_xfr_k,
+        'w_br_t': w_br_t,
+        'bus_t_rhs': sol_eval.bus_t_float[nonref_bus, :],
+        'xfr_t_phi': sol_eval.xfr_t_phi,
+        'acl_t_u_on': sol_eval.acl_t_u_on,
+        'xfr_t_u_on': sol_eval.xfr_t_u_on,
+        'acl_t_q_fr': sol_eval.acl_t_q_fr,
+        'acl_t_q_to': sol_eval.acl_t_q_to,
+        'xfr_t_q_fr': sol_eval.xfr_t_q_fr,
+        'xfr_t_q_to': sol_eval.xfr_t_q_to,
+        'dcl_t_p': sol_eval.dcl_t_p}
+
+    # evaluate each t, serially or on a pool of processes
+    num_proc = max(1, min(num_proc, num_t))
+    print('contingency model processes: {}'.format(num_proc))
+    if num_proc > 1:
+        t_topology_key = [
+            numpy.packbits(numpy.concatenate((sol_eval.acl_t_u_on[:, t], sol_eval.xfr_t_u_on[:, t]))).tobytes()
+            for t in range(num_t)]
+        t_results, eval_time, topology_cache_stats = eval_t_parallel(data, t_topology_key, num_proc)
+        evaluator = None # the evaluators are in the worker processes
+    else:
+        evaluator = IntervalEvaluator(data, a_factors)
+        t_results = [evaluator.eval_t(t) for t in range(num_t)]
+        eval_time = evaluator.time
+        topology_cache_stats = evaluator.get_topology_cache_stats()
+
+    # collect penalties and reduce worst violations over t
+    reduce_t_results(sol_eval, t_results)
+    t_num_br_k_pruned = [0 for t in range(num_t)]
     for t in range(num_t):
+        t_use_smw[t] = t_results[t]['use_smw']
+        t_num_br_k_pruned[t] = t_results[t]['num_br_k_pruned']
+
+    # keep what update_post_contingency_model needs to re-evaluate only the t that change
+    sol_eval.ctg_model = {
+        'data': data,
+        'a_factors': a_factors,
+        'evaluator': evaluator,
+        'nonref_bus': nonref_bus,
+        'br_u_max_over_t': br_u_max_over_t,
+        'br_in_some_t': br_in_some_t,
+        'use_smw_over_t': use_smw_over_t,
+        'smw_over_t_max_br_delta': smw_over_t_max_br_delta,
+        't_results': t_results,
+        't_inputs': {k: numpy.copy(data[k]) for k in T_INPUT_KEYS}}
 
-        t_start_time = time.time()
+    # todo check result
 
-        br_acl_delta_k_float[:] = 0.0
-        acl_delta_k_float[:] = 0.0
-        br_dcl_delta_k_float[:] = 0.0
-        dcl_delta_k_float[:] = 0.0
-        br_xfr_delta_k_float[:] = 0.0
-        xfr_delta_k_float[:] = 0.0
+    # not needed
+    # reduce as in HIPPO SFT
+    # LHS : monitored branches (well, they are all monitored so this will not help)
+    # RHS : injection buses (generators, loads, shunts) and deal with distributed slack
+    # really this is only of value in case of repeated evaluation, as in a solver callback, not in solution eval
 
-        # not needed
-        # skip certain computations if there was no change from the previous t, i.e. ac br u_su/sd == 0
-        # probably not much value in this though
+    # not needed
+    # GPU deployment of linear algebra, as in DMC-SCY0 paper
 
-        # do low rank update with respect to t, as in HIPPO/MISO paper
-        # todo create test data with more line switching to test this sufficiently
-        # e.g. ~ 10 to 100 switches per time interval, some connecting, some disconnecting
+    print('num t with SMW: {}, num t with refactoring: {}'.format(sum(t_use_smw), num_t - sum(t_use_smw)))
+    print('num AC branch-contingency pairs pruned by t: {}, of {} per t'.format(t_num_br_k_pruned, num_br * num_k))
+    print('initialize_m_w_time: {}'.format(initialize_m_w_time))
+    print('compute_static_w_time: {}'.format(compute_static_w_time))
+    print('topology cache. max bytes: {}, bytes: {}, entries: {}, hits: {}, misses: {}, evictions: {}'.format(
+        topology_cache_max_bytes, topology_cache_stats['num_bytes'], topology_cache_stats['num_entries'],
+        topology_cache_stats['num_hit'], topology_cache_stats['num_miss'], topology_cache_stats['num_evict']))
+    # summed over processes if parallel
+    for k, v in eval_time.items():
+        print('{}: {}'.format(k, v))
+    print('end of contingency model method 1, memory info: {}'.format(utils.get_memory_info()))
 
-        # get some time-varying characteristics of branches from the base case solution
-        start_time = time.time()
-        xfr_phi = sol_eval.xfr_t_phi[:, t]
-        br_phi = numpy.concatenate((acl_phi, xfr_phi))
-        acl_u = sol_eval.acl_t_u_on[:, t]
-        xfr_u = sol_eval.xfr_t_u_on[:, t]
-        br_u = numpy.concatenate((acl_u, xfr_u))
-        br_b_t = br_u * br_b
-        acl_q_fr = sol_eval.acl_t_q_fr[:, t]
-        xfr_q_fr = sol_eval.xfr_t_q_fr[:, t]
-        br_q_fr = numpy.concatenate((acl_q_fr, xfr_q_fr))
-        acl_q_to = sol_eval.acl_t_q_to[:, t]
-        xfr_q_to = sol_eval.xfr_t_q_to[:, t]
-        br_q_to = numpy.concatenate((acl_q_to, xfr_q_to))
-        br_q = numpy.maximum(numpy.absolute(br_q_fr), numpy.absolute(br_q_to)) # no need to track which side is violated
-        dcl_p = sol_eval.dcl_t_p[:, t]
-        end_time = time.time()
-        get_time_varying_branch_characteristics_time += (end_time - start_time)
+def update_post_contingency_model(sol_eval):
+    '''
+    re-evaluate the post-contingency model after a change to the solution,
+    e.g. by SolutionEvaluator.apply_patch, in only the t whose solution data
+    (bus injections, in service AC branches, transformer phase shifts and reactive flows, DC line flows)
+    differ from the last evaluation.
+    the static factors, static W columns, and topology cache of the last evaluation are reused.
+
+    falls back to eval_post_contingency_model if there is no last evaluation,
+    or if the change invalidates the static data, i.e. changes the set of AC branches in service in some t,
+    or takes out of service in a t using SMW over t a branch with no static W_t column
+    '''
 
-        # form A_t
-        start_time = time.time()
-        if not t_use_smw:
-            a_mat_t = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_t, newshape=(num_br, 1)))
-            a_mat_t = nonref_bus_br_inc.dot(a_mat_t)
-            a_mat_t = a_mat_t.multiply(-1.0)
-        end_time = time.time()
-        construct_a_t_time += (end_time - start_time)
+    ctg_model = sol_eval.ctg_model
+    if ctg_model is None:
+        eval_post_contingency_model(sol_eval)
+        return
 
-        # factor A_t
-        start_time = time.time()
-        if not t_use_smw:
-            a_factors_t = scipy.sparse.linalg.splu(a_mat_t)
-        end_time = time.time()
-        factor_a_t_time += (end_time - start_time)
+    start_time = time.time()
+    data = ctg_model['data']
+    num_acl = data['num_acl']
+    num_t = sol_eval.problem.num_t
+    br_u_max_over_t = numpy.concatenate((numpy.amax(sol_eval.acl_t_u_on, axis=1), numpy.amax(sol_eval.xfr_t_u_on, axis=1)))
+    if not numpy.array_equal(br_u_max_over_t, ctg_model['br_u_max_over_t']):
+        print('contingency model update. AC branches in service in some t changed, evaluating all t')
+        eval_post_contingency_model(sol_eval)
+        return
+
+    # find the t with changed solution data
+    set_bus_t_rhs(sol_eval, data['xfr_b'])
+    t_inputs = {k: getattr(sol_eval, k) for k in T_INPUT_KEYS if k != 'bus_t_rhs'}
+    t_inputs['bus_t_rhs'] = sol_eval.bus_t_float[ctg_model['nonref_bus'], :]
+    t_changed = numpy.zeros(shape=(num_t, ), dtype=bool)
+    for k in T_INPUT_KEYS:
+        numpy.logical_or(t_changed, numpy.any(t_inputs[k] != ctg_model['t_inputs'][k], axis=0), out=t_changed)
+    t_list = numpy.nonzero(t_changed)[0]
+
+    # branches changing in each of these t relative to the static matrix
+    t_br_delta_t = {}
+    t_use_smw = {}
+    for t in t_list:
+        br_u = numpy.concatenate((sol_eval.acl_t_u_on[:, t], sol_eval.xfr_t_u_on[:, t]))
+        t_br_delta_t[t] = numpy.intersect1d(ctg_model['br_in_some_t'], numpy.nonzero(1 - br_u)[0], assume_unique=True)
+        t_use_smw[t] = (ctg_model['use_smw_over_t'] and t_br_delta_t[t].size <= ctg_model['smw_over_t_max_br_delta'])
+        if t_use_smw[t] and not all(i in data['br_delta_t_smw_map'] for i in t_br_delta_t[t]):
+            print('contingency model update. no static W_t column for a branch out of service in t: {}, evaluating all t'.format(t))
+            eval_post_contingency_model(sol_eval)
+            return
+
+    # update data and evaluate the changed t
+    evaluator = ctg_model['evaluator']
+    if evaluator is None:
+        evaluator = IntervalEvaluator(data, ctg_model['a_factors'])
+        ctg_model['evaluator'] = evaluator
+    data.update(t_inputs)
+    for t in t_list:
+        data['t_br_delta_t'][t] = t_br_delta_t[t]
+        data['t_num_br_delta_t'][t] = t_br_delta_t[t].size
+        data['t_use_smw'][t] = t_use_smw[t]
+        evaluator.t_use_smw[t] = t_use_smw[t]
+        ctg_model['t_results'][t] = evaluator.eval_t(t)
+    ctg_model['t_inputs'] = {k: numpy.copy(v) for k, v in t_inputs.items()}
+    reduce_t_results(sol_eval, ctg_model['t_results'])
+    end_time = time.time()
+    print('contingency model update. t evaluated: {}, time: {}'.format(list(t_list), end_time - start_time))
+
+def reduce_t_results(sol_eval, t_results):
+    '''
+    collect the penalties in the results of IntervalEvaluator.eval_t for each t into sol_eval.t_k_z,
+    and set the worst violations over t in sol_eval.
+    strict > in order of t, so ties go to the earliest t, whether or not the t were evaluated in parallel
+    '''
+
+    max_viol = {k: utils.make_empty_viol(val=0.0, num_indices=3) for k in CTG_VIOL_KEYS}
+    for t, r in enumerate(t_results):
+        sol_eval.t_k_z[t, :] = r['k_z']
+        for k in CTG_VIOL_KEYS:
+            viol = r['viol'][k]
+            if viol is not None and viol['val'] > max_viol[k]['val']:
+                max_viol[k] = viol
+
+    # report worst violations
+    sol_eval.viol_acl_acl_t_s_max_ctg = max_viol['acl_acl']
+    sol_eval.viol_xfr_acl_t_s_max_ctg = max_viol['xfr_acl']
+    sol_eval.viol_acl_dcl_t_s_max_ctg = max_viol['acl_dcl']
+    sol_eval.viol_xfr_dcl_t_s_max_ctg = max_viol['xfr_dcl']
+    sol_eval.viol_acl_xfr_t_s_max_ctg = max_viol['acl_xfr']
+    sol_eval.viol_xfr_xfr_t_s_max_ctg = max_viol['xfr_xfr']
+    sol_eval.viol_acl_multi_t_s_max_ctg = max_viol['acl_multi']
+    sol_eval.viol_xfr_multi_t_s_max_ctg = max_viol['xfr_multi']
+
+def set_bus_t_rhs(sol_eval, xfr_b):
+    '''
+    set sol_eval.bus_t_float to the bus-t right hand side of the DC power flow,
+    i.e. injections from producers, consumers, and shunts, net of the distributed slack,
+    DC line flows, and transformer phase shifts
+    '''
+
+    num_bus = sol_eval.problem.num_bus
+    num_xfr = sol_eval.problem.num_xfr
+    num_t = sol_eval.problem.num_t
+
+    sol_eval.bus_t_float[:] = 0.0
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sd_inj_mat, sol_eval.sd_t_p, out=sol_eval.bus_t_float)
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sh_inj_mat, sol_eval.sh_t_p, out=sol_eval.bus_t_float)
+    # subtract the distributed slack
+    t_p_sl = numpy.sum(sol_eval.bus_t_float, axis=0)
+    numpy.subtract(
+        sol_eval.bus_t_float, (1.0 / num_bus) * numpy.reshape(t_p_sl, newshape=(1, num_t)), out=sol_eval.bus_t_float)
+    # subtract pre-contingency power absorption due to DC line flow
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_fr_inj_mat, sol_eval.dcl_t_p, out=sol_eval.bus_t_float)
+    numpy.negative(sol_eval.dcl_t_p, out=sol_eval.dcl_t_float)
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_to_inj_mat, sol_eval.dcl_t_float, out=sol_eval.bus_t_float)
+    # subtract pre-contingency power absorption due to transformer phase difference
+    numpy.multiply(numpy.reshape(xfr_b, newshape=(num_xfr, 1)), sol_eval.xfr_t_phi, out=sol_eval.xfr_t_float)
+    numpy.multiply(sol_eval.xfr_t_u_on, sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_fr_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
+    numpy.negative(sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
+    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_to_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
+    # todo - check sign on terms, especially transformer
+
+# keys of the worst violation records, (monitored branch type)_(outaged device type),
+# with outaged device type multi for contingencies outaging more than one device
+CTG_VIOL_KEYS = ['acl_acl', 'xfr_acl', 'acl_dcl', 'xfr_dcl', 'acl_xfr', 'xfr_xfr', 'acl_multi', 'xfr_multi']
+
+# keys of the solution arrays in the data of IntervalEvaluator, indexed by t in the last axis
+T_INPUT_KEYS = ['bus_t_rhs', 'xfr_t_phi', 'acl_t_u_on', 'xfr_t_u_on', 'acl_t_q_fr', 'acl_t_q_to', 'xfr_t_q_fr', 'xfr_t_q_to', 'dcl_t_p']
+
+class IntervalEvaluator(object):
+    '''
+    Evaluates the post-contingency model in one t at a time.
+
+    data holds the static arrays and the solution arrays, as constructed in eval_post_contingency_model.
+    The evaluator only reads data, so several evaluators, possibly in different processes, can share it.
+    Work arrays, the topology cache, and run time counters belong to the evaluator.
+
+    Contingencies of each type (ACL, DCL, XFR, and multi for those outaging more than one device)
+    are processed in blocks of at most data['k_block_size'] columns,
+    so the dense bus-k and branch-k work arrays have that many columns rather than one per contingency.
+    If data['k_blocked'] is False, there is one block per type and the static M_k and W_k = A^-1 M_k are in data.
+    Otherwise they are computed for each block, and W_tk is not kept in the topology cache.
+
+    If data['flow_engine'] is 'at_risk_branches', the branch-k flow deltas of a block are computed only on the
+    branches that can exceed their limit under some contingency in the block, by a bound from the bus-k deltas.
+    '''
+
+    def __init__(self, data, a_factors=None):
+
+        self.data = data
+        if a_factors is None:
+            a_factors = SymmetricFactors(data['a_mat'], data['factor_method'])
+        self.a_factors = a_factors
+        self.t_use_smw = list(data['t_use_smw']) # may be changed to False for t with badly conditioned V_t
+
+        num_bus = data['num_bus']
+        num_br = data['num_br']
+        num_acl_delta_k = data['acl_delta_k'].size
+        num_dcl_delta_k = data['dcl_delta_k'].size
+        num_xfr_delta_k = data['xfr_delta_k'].size
+        num_multi_delta_k = data['multi_delta_k_rank'].size
+        k_block_size = data['k_block_size']
+
+        self.bus_rhs = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term of RHS
+        self.bus_theta = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term
+        self.bus_float = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
+
+        self.br_p = numpy.zeros(shape=(num_br, ), dtype=float) # main term
+        self.br_q_2 = numpy.zeros(shape=(num_br, ), dtype=float)
+        self.br_bool = numpy.zeros(shape=(num_br, ), dtype=bool) # filtered branches for the current block
+        self.br_bool_1 = numpy.zeros(shape=(num_br, ), dtype=bool) # filtered branches for any ACL block
+        self.br_bool_2 = numpy.zeros(shape=(num_br, ), dtype=bool) # DCL
+        self.br_bool_3 = numpy.zeros(shape=(num_br, ), dtype=bool) # XFR
+        self.br_bool_4 = numpy.zeros(shape=(num_br, ), dtype=bool) # multi
+        self.br_float = numpy.zeros(shape=(num_br, ), dtype=float)
+        self.br_float_1 = numpy.zeros(shape=(num_br, ), dtype=float)
+
+        # branch-bus incidence, split into positive and negative parts, for bounds on the branch flow deltas
+        if data['flow_engine'] == 'at_risk_branches':
+            self.br_bus_inc = data['nonref_bus_br_inc'].transpose().tocsr()
+            self.br_bus_inc_pos = self.br_bus_inc.maximum(0.0).tocsr()
+            self.br_bus_inc_neg = (-self.br_bus_inc).maximum(0.0).tocsr()
+            self.bus_float_1 = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
+            self.bus_float_2 = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
+        self.num_br_delta_k_computed = {'acl': 0, 'dcl': 0, 'xfr': 0, 'multi': 0} # in the current t
+        self.num_br_delta_k_pruned = {'acl': 0, 'dcl': 0, 'xfr': 0, 'multi': 0} # in the current t, by either engine or the filter
+
+        # bus-k and br-k work arrays, shared by all contingency types and blocks
+        # flat, so that the views for a partial block, from get_block_view, are contiguous
+        self.bus_delta_k_float = numpy.zeros(shape=((num_bus - 1) * k_block_size, ), dtype=float)
+        self.bus_delta_k_float_1 = numpy.zeros(shape=((num_bus - 1) * k_block_size, ), dtype=float)
+        self.bus_delta_k_float_2 = numpy.zeros(shape=((num_bus - 1) * k_block_size, ), dtype=float)
+        self.br_delta_k_float = numpy.zeros(shape=(num_br * k_block_size, ), dtype=float)
+
+        self.acl_delta_k_float = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
+        self.dcl_delta_k_float = numpy.zeros(shape=(num_dcl_delta_k, ), dtype=float)
+        self.xfr_delta_k_float = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+        self.multi_delta_k_float = numpy.zeros(shape=(num_multi_delta_k, ), dtype=float)
+
+        # A_t factors, W_tk, V_tk by in service AC branch set
+        # w_tk (t->k) arrays are created for each new topology
+        self.topology_cache = TopologyCache(data['topology_cache_max_bytes'])
+
+        # linear algebra of the current t, set in eval_t
+        self.a_factors_t = None # None if using SMW with respect to t
+        self.v_t_factors = None # None if not using SMW with respect to t, or if A_t == A
+        self.w_t = None # W_t = A^-1 M_t, on the branches changing in t, if v_t_factors is not None
+
+        # keep track of run time of certain phases of the loop over t
+        self.time = collections.OrderedDict()
+        self.reset_time()
+
+    def reset_time(self):
+
+        for k in [
+                'get_time_varying_branch_characteristics_time',
+                'topology_cache_time',
+                'construct_a_t_time',
+                'factor_a_t_time',
+                'compute_w_with_t_a_solve_time',
+                'compute_v_t_time',
+                'compute_w_with_t_smw_time',
+                'compute_v_time', # includes v_inv
+                'compute_bus_theta_with_t_a_solve_time',
+                'compute_bus_theta_with_t_smw_time',
+                'compute_br_p_time',
+                'apply_w_v_wt_time',
+                'compute_bus_dtheta_rhs_dcl_k_time',
+                'compute_w_v_wt_xfr_k_time',
+                'compute_w_v_wt_multi_k_time',
+                'compute_br_acl_delta_k_p_delta_time',
+                'compute_br_dcl_delta_k_p_delta_time',
+                'compute_br_xfr_delta_k_p_delta_time',
+                'compute_br_multi_delta_k_p_delta_time',
+                'filter_branches_acl_k_time',
+                'filter_branches_dcl_k_time',
+                'filter_branches_xfr_k_time',
+                'filter_branches_multi_k_time',
+                'compute_br_acl_delta_k_p_time',
+                'compute_br_dcl_delta_k_p_time',
+                'compute_br_xfr_delta_k_p_time',
+                'compute_br_multi_delta_k_p_time',
+                'compute_br_acl_delta_k_s_over_time',
+                'compute_br_dcl_delta_k_s_over_time',
+                'compute_br_xfr_delta_k_s_over_time',
+                'compute_br_multi_delta_k_s_over_time',
+                'zero_out_time',
+                'get_max_br_acl_delta_k_s_over_time',
+                'get_max_br_dcl_delta_k_s_over_time',
+                'get_max_br_xfr_delta_k_s_over_time',
+                'get_max_br_multi_delta_k_s_over_time',
+                'compute_br_k_z_time',
+                'collect_penalties_into_obj_array_time']:
+            self.time[k] = 0.0
+
+    def get_topology_cache_stats(self):
+
+        return {
+            'num_bytes': self.topology_cache.num_bytes,
+            'num_entries': len(self.topology_cache.entries),
+            'num_hit': self.topology_cache.num_hit,
+            'num_miss': self.topology_cache.num_miss,
+            'num_evict': self.topology_cache.num_evict}
+
+    def get_k_blocks(self, num_delta_k):
+        '''
+        slices of range(num_delta_k) of at most k_block_size
+        '''
+
+        k_block_size = self.data['k_block_size']
+        return [slice(k_start, min(k_start + k_block_size, num_delta_k))
+                for k_start in range(0, num_delta_k, k_block_size)]
+
+    def get_multi_k_blocks(self):
+        '''
+        slices of the multiple outage columns, each with columns of a single rank r,
+        of at most k_block_size / r
+        '''
+
+        k_block_size = self.data['k_block_size']
+        multi_delta_k_rank = self.data['multi_delta_k_rank']
+        if multi_delta_k_rank.size == 0:
+            return []
+        rank_starts = [0] + list(numpy.nonzero(numpy.diff(multi_delta_k_rank))[0] + 1)
+        rank_stops = rank_starts[1:] + [multi_delta_k_rank.size]
+        k_blocks = []
+        for rank_start, rank_stop in zip(rank_starts, rank_stops):
+            rank_k_block_size = max(1, k_block_size // max(1, multi_delta_k_rank[rank_start]))
+            k_blocks += [slice(k_start, min(k_start + rank_k_block_size, rank_stop))
+                         for k_start in range(rank_start, rank_stop, rank_k_block_size)]
+        return k_blocks
+
+    def get_block_view(self, arr, num_rows, num_cols):
+        '''
+        contiguous num_rows-by-num_cols view of the start of the flat work array arr
+        '''
+
+        return numpy.reshape(arr[0:(num_rows * num_cols)], newshape=(num_rows, num_cols))
+
+    def solve_a_t(self, rhs, out, work):
+        '''
+        out = A_t^-1 rhs
+        with the factors of A_t, or with SMW with respect to t on the static A
+        work - array like rhs, overwritten. may be rhs itself
+        '''
+
+        if self.a_factors_t is not None:
+            out[:] = self.a_factors_t.solve(rhs)
+        else:
+            out[:] = self.a_factors.solve(rhs)
+            if self.v_t_factors is not None:
+                w_t_rhs = self.w_t.transpose().dot(rhs)
+                w_t_rhs = scipy.linalg.lu_solve(self.v_t_factors, w_t_rhs)
+                numpy.dot(self.w_t, w_t_rhs, out=work)
+                numpy.subtract(out, work, out=out)
+
+    def compute_w_k(self, m_k, m_k_sparse, w0_k):
+        '''
+        W_tk = A_t^-1 M_k for a block of contingencies
+        m_k - M_k, dense
+        m_k_sparse - M_k, sparse, for the SMW term
+        w0_k - W_k = A^-1 M_k, or None to solve for it here
+        returns a new array, or w0_k itself if A_t == A
+        '''
 
         # solve with A_t for W_tk - this is expensive ~80 s
         # two ideas can improve this:
-        # skipping updates if ac br u_su/sd == 0
+        # skipping updates if the topology was seen before - topology cache
         # applying low rank update technique to network changes with respect to t
         start_time = time.time()
-        if not t_use_smw:
-            w_acl_k[:] = a_factors_t.solve(m_acl_k)
-            w_xfr_k[:] = a_factors_t.solve(m_xfr_k)
-            #w_k = a_factors_t.solve(m_k) # no in-place, creating w_k for each t (instead of w[:] = ..) is better
+        if self.a_factors_t is not None:
+            w_k = self.a_factors_t.solve(m_k)
             #for k in range(sol_eval.problem.num_k):
             #    w[:, k] = bus_b_mat_factors.solve(m[:, k])
         end_time = time.time()
-        compute_w_with_t_a_solve_time += (end_time - start_time)
-
-        # compute v_t
-        start_time = time.time()
-        if t_use_smw:
-            # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
-            if t_num_br_delta_t[t] > 0:
-                # set w_acl_k and w_xfr_k equal to the delta term in SMW formula for w_tk, then subtract from w_k
-                t_br_delta_t_in_br_delta_t = [br_delta_t_map[i] for i in t_br_delta_t[t]]
-                # construct v_t
-                v_t = numpy.diag(1.0 / br_b[t_br_delta_t[t]]) + m_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(w_br_t[:, t_br_delta_t_in_br_delta_t])
-                # factor v_t
-                v_t_factors = scipy.linalg.lu_factor(v_t)
-        end_time = time.time()
-        compute_v_t_time += (end_time - start_time)
+        self.time['compute_w_with_t_a_solve_time'] += (end_time - start_time)
 
         # compute w_tk using SMW with respect to t
         start_time = time.time()
-        if t_use_smw:
+        if self.a_factors_t is None:
+            if w0_k is None:
+                w0_k = self.a_factors.solve(m_k)
             # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
-            if t_num_br_delta_t[t] > 0:
-                #w_t_m_acl_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_acl_k) # dense m
-                #w_t_m_xfr_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_xfr_k) # dense m
-                w_t_m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].transpose().dot( # sparse m, should return dense
-                    w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
-                w_t_m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].transpose().dot( # sparse m, should return dense
-                    w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
+            if self.v_t_factors is not None:
+                # set w_k equal to the delta term in SMW formula for w_tk, then subtract from w0_k
+                #w_t_m_k = self.w_t.transpose().dot(m_k) # dense m
+                w_t_m_k = m_k_sparse.transpose().dot(self.w_t).transpose() # sparse m, should return dense
                 # solve with v_t
-                w_t_m_acl_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_acl_k)
-                w_t_m_xfr_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_xfr_k)
-                # multiply w_t onto w_t_m_k
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_m_acl_k, out=w_acl_k)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_m_xfr_k, out=w_xfr_k)
-                numpy.subtract(w0_acl_k, w_acl_k, out=w_acl_k)
-                numpy.subtract(w0_xfr_k, w_xfr_k, out=w_xfr_k)
+                w_t_m_k = scipy.linalg.lu_solve(self.v_t_factors, w_t_m_k)
+                # multiply w_t onto w_t_m_k and subtract from w0_k
+                w_k = numpy.dot(self.w_t, w_t_m_k)
+                numpy.subtract(w0_k, w_k, out=w_k)
             else:
-                w_acl_k[:] = w0_acl_k
-                w_xfr_k[:] = w0_xfr_k
+                # no copy - w_k is only read from here on
+                w_k = w0_k
         end_time = time.time()
-        compute_w_with_t_smw_time += (end_time - start_time)
-        
-        # compute V_tk and inverses
-        start_time = time.time()
-        v_acl_k = (1.0 / acl_b[acl_delta_k]) + numpy.einsum('ij,ij->j', m_acl_k, w_acl_k)
-        # v_acl_k should be nonzero so the following division should work
+        self.time['compute_w_with_t_smw_time'] += (end_time - start_time)
+
+        return w_k
+
+    def compute_v_k_inv(self, name, b_k, m_k, w_k, u_k):
+        '''
+        inverses of V_tk for a block of contingencies outaging ACL or XFR branches,
+        with 0 for branches that are out of service in the base case
+        '''
+
+        v_k = (1.0 / b_k) + numpy.einsum('ij,ij->j', m_k, w_k)
+        # v_k should be nonzero so the following division should work
         # for contingencies k where the line going out of service is not already out of service in the base case,
         # we have the assumption that the network remains connected post-contingency,
         # so the post-contingency negative admittance matrix is nonsingular,
@@ -452,282 +1021,181 @@ def eval_post_contingency_model(sol_eval):
         # todo catch this and ensure that it is not treated as a competitor error
         # and that it raises an issue for debugging.
         # todo ctg-bug
-        # fix xfr as well
-        # v_acl_k has some 0 entries.
-        # apparently only when ac_u is also 0
+        # v_k has some 0 entries.
+        # apparently only when u is also 0
         # we later zero that out, so maybe we can just do that
-        print('v_acl_k: {}'.format(v_acl_k))
-        print('acl_u[acl_delta_k]: {}'.format(acl_u[acl_delta_k]))
-        #v_acl_k_inv = 1.0 / v_acl_k
-        v_acl_k = v_acl_k * acl_u[acl_delta_k] # zero out v_acl_k from base case - this is not necessary
+        print('v_{}_k: {}'.format(name, v_k))
+        print('{}_u[{}_delta_k]: {}'.format(name, name, u_k))
+        v_k = v_k * u_k # zero out v_k from base case - this is not necessary
         # for now only do the division on nonzero entries
-        v_acl_k_inv = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
-        v_acl_k_inv[numpy.nonzero(acl_u[acl_delta_k])[0]] = 1.0 / v_acl_k[numpy.nonzero(acl_u[acl_delta_k])[0]]
-        # zero out v_acl_k_inv for any branches that are out of service due to pre-contingency state
+        # zero out v_k_inv for any branches that are out of service due to pre-contingency state
         # this will zero out the delta contribution to the solved theta,
         # so the solved theta is that of the base case, as it should be
-        #v_acl_k_inv = v_acl_k_inv * acl_u[acl_delta_k]
-        v_xfr_k = (1.0 / xfr_b[xfr_delta_k]) + numpy.einsum('ij,ij->j', m_xfr_k, w_xfr_k)
-        #v_xfr_k_inv = 1.0 / v_xfr_k
-        v_xfr_k = v_xfr_k * xfr_u[xfr_delta_k]
-        #v_xfr_k_inv = v_xfr_k_inv * xfr_u[xfr_delta_k]
-        # for now only do the division on nonzero entries
-        v_xfr_k_inv = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
-        v_xfr_k_inv[numpy.nonzero(xfr_u[xfr_delta_k])[0]] = 1.0 / v_xfr_k[numpy.nonzero(xfr_u[xfr_delta_k])[0]]
-        end_time = time.time()
-        compute_v_time += (end_time - start_time)
-
-        # set RHS terms
-        bus_rhs[:] = sol_eval.bus_t_float[nonref_bus, t]
-
-        # compute terms in theta expression
-
-        # solve for base case bus theta in the base case
-        # There are no contingencies outaging no branches
-        # every contingency outages exactly one branch
-        # some branches might be outaged by more than one contingency - why though?
-        start_time = time.time()
-        if not t_use_smw:
-            bus_theta[:] = a_factors_t.solve(bus_rhs)
-        end_time = time.time()
-        compute_bus_theta_with_t_a_solve_time += (end_time - start_time)
-
-        # solve for base case bus theta using SMW-t
-        start_time = time.time()
-        if t_use_smw:
-            bus_theta[:] = a_factors.solve(bus_rhs)
-            if t_num_br_delta_t[t] > 0:
-                w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_rhs)
-                w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_float)
-                numpy.subtract(bus_theta, bus_float, out=bus_theta)
-        end_time = time.time()
-        compute_bus_theta_with_t_smw_time += (end_time - start_time)
-
-        # compute br p under no outages from theta
-        start_time = time.time()
-        #numpy.multiply(nonref_bus_br_inc.transpose(), bus_acl_delta_k_float, out=br_acl_delta_k_float)
-        br_p[:] = nonref_bus_br_inc.transpose().dot(bus_theta)
-        numpy.subtract(br_p, br_phi, out=br_p)
-        numpy.multiply(br_b_t, br_p, out=br_p)
-        numpy.negative(br_p, out=br_p)
-        end_time = time.time()
-        compute_br_p_time += (end_time - start_time)
-
-        # compute bus theta delta term under ACL outages - from w rank 1 update of matrix
-        # this is somewhat expensive ~7 s
-        # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
-        start_time = time.time()
-        w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
-        w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
-        numpy.multiply(
-            w_acl_k, numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)), out=bus_acl_delta_k_float) #subtract this from A^-1 p
-        end_time = time.time()
-        apply_w_v_wt_time += (end_time - start_time)
-
-        # compute bus theta delta term under DCL outages - from RHS
+        v_k_inv = numpy.zeros(shape=v_k.shape, dtype=float)
+        v_k_inv[numpy.nonzero(u_k)[0]] = 1.0 / v_k[numpy.nonzero(u_k)[0]]
+        return v_k_inv
+
+    def compute_br_delta_k(self, name, bus_delta_k_float, br_b_t, br_k_out_idx_lists):
+        '''
+        br_delta_k_float, br_rows, br_delta_k_out_idx_lists = self.compute_br_delta_k(...)
+
+        AC branch flow deltas under a block of contingencies of type name (acl, dcl, xfr, multi),
+        from the bus theta deltas bus_delta_k_float,
+        zeroed out where the branch is outaged by the contingency,
+        i.e. on the (branch, column) pairs br_k_out_idx_lists, or None
+
+        br_rows - None if br_delta_k_float has a row for each AC branch (flow engine all_branches),
+          otherwise the AC branches of the rows of br_delta_k_float, in increasing order (flow engine at_risk_branches).
+          These include every branch that can exceed its limit under a contingency in the block.
+          The others have 0 violation.
+        br_delta_k_out_idx_lists - (row, col) of the zeroed out entries of br_delta_k_float
+        '''
+
+        data = self.data
+        num_br = data['num_br']
+        num_k_block = bus_delta_k_float.shape[1]
         start_time = time.time()
-        bus_dcl_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
-        nonref_bus_dcl_inc[:, dcl_delta_k].toarray(out=bus_dcl_delta_k_float_1)
-        numpy.multiply(
-            bus_dcl_delta_k_float_1,
-            numpy.reshape(dcl_p[dcl_delta_k], newshape=(1, num_dcl_delta_k)),
-            out=bus_dcl_delta_k_float_1)
-        if t_use_smw:
-            bus_dcl_delta_k_float[:] = a_factors.solve(bus_dcl_delta_k_float_1)
-            if t_num_br_delta_t[t] > 0:
-                w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_dcl_delta_k_float_1)
-                w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_dcl_delta_k_float_1)
-                numpy.subtract(bus_dcl_delta_k_float, bus_dcl_delta_k_float_1, out=bus_dcl_delta_k_float)
+        if data['flow_engine'] == 'all_branches':
+            br_rows = None
+            br_delta_k_float = self.get_block_view(self.br_delta_k_float, num_br, num_k_block)
+            br_delta_k_float[:] = data['nonref_bus_br_inc'].transpose().dot(bus_delta_k_float)
+            numpy.multiply(
+                numpy.reshape(br_b_t, newshape=(num_br, 1)), br_delta_k_float, out=br_delta_k_float)
+            br_delta_k_out_idx_lists = br_k_out_idx_lists
         else:
-            bus_dcl_delta_k_float[:] = a_factors_t.solve(bus_dcl_delta_k_float_1)
-        numpy.negative(bus_dcl_delta_k_float, out=bus_dcl_delta_k_float) # could eliminate this
-        end_time = time.time()
-        compute_bus_dtheta_rhs_dcl_k_time += (end_time - start_time)
-
-        # todo - definitely some benefit from treating xfr with phi==0 as acl - only if we have large cases with many xfr outage contingencies
-        # compute bus theta delta term under XFR outages - from rhs
-        start_time = time.time()
-        numpy.multiply(xfr_b[xfr_delta_k], xfr_phi[xfr_delta_k], out=xfr_delta_k_float)
-        numpy.multiply(xfr_u[xfr_delta_k], xfr_delta_k_float, out=xfr_delta_k_float)
-        bus_xfr_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
-        nonref_bus_xfr_inc[:, xfr_delta_k].toarray(out=bus_xfr_delta_k_float_1)
-        numpy.multiply(
-            bus_xfr_delta_k_float_1,
-            numpy.reshape(xfr_delta_k_float, newshape=(1, num_xfr_delta_k)),
-            out=bus_xfr_delta_k_float_1)
-        if t_use_smw:
-            bus_xfr_delta_k_float[:] = a_factors.solve(bus_xfr_delta_k_float_1)
-            if t_num_br_delta_t[t] > 0:
-                w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_xfr_delta_k_float_1)
-                w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_xfr_delta_k_float_2)
-                numpy.subtract(bus_xfr_delta_k_float, bus_xfr_delta_k_float_2, out=bus_xfr_delta_k_float)
-        else:
-            bus_xfr_delta_k_float[:] = a_factors_t.solve(bus_xfr_delta_k_float_1)
-        numpy.add(
-            numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), bus_xfr_delta_k_float_1, out=bus_xfr_delta_k_float_1)
-        w_xfr_k_rhs = numpy.einsum('ij,ij->j', w_xfr_k, bus_xfr_delta_k_float_1)
-        w_xfr_k_rhs = v_xfr_k_inv * w_xfr_k_rhs
-        numpy.multiply(
-            w_xfr_k, numpy.reshape(w_xfr_k_rhs, newshape=(1, num_xfr_delta_k)), out=bus_xfr_delta_k_float_1)
-        numpy.subtract(bus_xfr_delta_k_float_1, bus_xfr_delta_k_float, out=bus_xfr_delta_k_float) #subtract this from A^-1 p
-        end_time = time.time()
-        compute_w_v_wt_xfr_k_time += (end_time - start_time)
-
-        # todo we do not need this separate block
-        # compute bus theta delta term under XFR outages - from w rank 1 update of matrix
-        # todo
-        start_time = time.time()
-        #w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
-        #w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
-        #bus_acl_delta_k_float[:] = w_acl_k * numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)) #subtract this from A^-1 p
-        #bus_xfr_delta_k_float[:] = 0.0 # todo this is a placeholder
-        end_time = time.time()
-        compute_bus_dtheta_rhs_xfr_k_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under ACL outages
-        # this is somewhat expensive ~9 s
-        # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
-        # apply M, phi, B to get AC branch flows
-        start_time = time.time()
-        #numpy.multiply(nonref_bus_br_inc.transpose(), bus_acl_delta_k_float, out=br_acl_delta_k_float)
-        br_acl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_acl_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float)
-        # zero out br-acl-delta-k that are outaged
+            # bound the flow deltas of each branch over the block by the bounds over the block
+            # on the theta deltas of its end buses, then bound the post-contingency flow and the violation.
+            # the bound is valid for any sign of b, and it is cheap, O(bus * k + br), compared to M^T theta,
+            # so the flow deltas, i.e. rows of M^T A_t^-1 M_k etc., are only computed where the bound allows a violation
+            bus_float_1 = self.bus_float_1
+            bus_float_2 = self.bus_float_2
+            br_float = self.br_float
+            br_float_1 = self.br_float_1
+            numpy.amax(bus_delta_k_float, axis=1, out=bus_float_1)
+            numpy.amin(bus_delta_k_float, axis=1, out=bus_float_2)
+            br_float[:] = self.br_bus_inc_pos.dot(bus_float_1) - self.br_bus_inc_neg.dot(bus_float_2)
+            br_float_1[:] = self.br_bus_inc_pos.dot(bus_float_2) - self.br_bus_inc_neg.dot(bus_float_1)
+            numpy.multiply(br_b_t, br_float, out=br_float)
+            numpy.multiply(br_b_t, br_float_1, out=br_float_1)
+            numpy.add(self.br_p, br_float, out=br_float)
+            numpy.add(self.br_p, br_float_1, out=br_float_1)
+            numpy.absolute(br_float, out=br_float)
+            numpy.absolute(br_float_1, out=br_float_1)
+            numpy.maximum(br_float, br_float_1, out=br_float)
+            numpy.power(br_float, 2, out=br_float)
+            numpy.add(br_float, self.br_q_2, out=br_float)
+            numpy.power(br_float, 0.5, out=br_float)
+            numpy.subtract(br_float, data['br_s_max'], out=br_float)
+            # small margin for rounding, so that no branch with a computed violation is left out
+            numpy.multiply(1.0e-8, data['br_s_max'], out=br_float_1)
+            numpy.add(1.0e-8, br_float_1, out=br_float_1)
+            numpy.add(br_float, br_float_1, out=br_float)
+            br_rows = numpy.flatnonzero(br_float > 0.0)
+            br_delta_k_float = self.get_block_view(self.br_delta_k_float, br_rows.size, num_k_block)
+            br_delta_k_float[:] = self.br_bus_inc[br_rows, :].dot(bus_delta_k_float)
+            numpy.multiply(
+                numpy.reshape(br_b_t[br_rows], newshape=(br_rows.size, 1)), br_delta_k_float, out=br_delta_k_float)
+            br_delta_k_out_idx_lists = None
+            if br_k_out_idx_lists is not None:
+                # rows of the outaged branches that are in br_rows
+                out_br, out_col = br_k_out_idx_lists
+                out_in_br_rows = numpy.isin(out_br, br_rows)
+                br_delta_k_out_idx_lists = (
+                    numpy.searchsorted(br_rows, out_br[out_in_br_rows]), out_col[out_in_br_rows])
+        # zero out br-k that are outaged
         # this is correct, but still need to do it again after adding
         # it is not necessary to do it here for correctness,
         # but if we do not do it here, then we lose much of the gain from filtering the delta terms
         # drops number of branches down from ~1700 (out of 3000) to ~40
-        br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
-        end_time = time.time()
-        compute_br_acl_delta_k_p_delta_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under DCL outages
-        start_time = time.time()
-        br_dcl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_dcl_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float)
-        # zero-out step not necessary here since
-        # these contingencies are DC line outages and we are computing AC branch flow
+        if br_delta_k_out_idx_lists is not None:
+            br_delta_k_float[br_delta_k_out_idx_lists] = 0.0
+        self.num_br_delta_k_computed[name] += br_delta_k_float.size
         end_time = time.time()
-        compute_br_dcl_delta_k_p_delta_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under XFR outages
-        start_time = time.time()
-        br_xfr_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_xfr_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float)
-        br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
-        end_time = time.time()
-        compute_br_xfr_delta_k_p_delta_time += (end_time - start_time)
+        self.time['compute_br_{}_delta_k_p_delta_time'.format(name)] += (end_time - start_time)
+        return br_delta_k_float, br_rows, br_delta_k_out_idx_lists
+
+    def eval_br_delta_k(self, name, k_block, br_delta_k_float, br_rows, br_delta_k_out_idx_lists, br_bool_any, delta_k_float, t_max_arg):
+        '''
+        from the AC branch flow deltas under a block of contingencies of type name (acl, dcl, xfr),
+        on the branches br_rows (None for all), as from compute_br_delta_k,
+        compute the AC branch flow limit violations
+        and add the penalties into delta_k_float[k_block]
+        and the worst violations on acl and xfr into t_max_arg
+        br_delta_k_float is overwritten
+        '''
+
+        data = self.data
+        num_acl = data['num_acl']
+        num_xfr = data['num_xfr']
+        br_filter_by_worst_ctg = data['br_filter_by_worst_ctg']
+        num_k_block = k_block.stop - k_block.start
+        if br_rows is None:
+            num_br = data['num_br']
+            br_s_max = data['br_s_max']
+            br_p = self.br_p
+            br_q_2 = self.br_q_2
+        else:
+            num_br = br_rows.size
+            br_s_max = data['br_s_max'][br_rows]
+            br_p = self.br_p[br_rows]
+            br_q_2 = self.br_q_2[br_rows]
+        br_bool = self.br_bool[0:num_br]
+        br_float = self.br_float[0:num_br]
+        br_float_1 = self.br_float_1[0:num_br]
 
         # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
         # that could reduce the compute time (and memory use)
         # this appears to be the earliest we could do this
         start_time = time.time()
-        if num_acl_delta_k > 0:
-            numpy.amax(br_acl_delta_k_float, axis=1, out=br_float)
-            numpy.amin(br_acl_delta_k_float, axis=1, out=br_float_1)
-            numpy.add(br_p, br_float, out=br_float)
-            numpy.add(br_p, br_float_1, out=br_float_1)
-            numpy.absolute(br_float, out=br_float)
-            numpy.absolute(br_float_1, out=br_float_1)
-            numpy.maximum(br_float, br_float_1, out=br_float)
-        else:
-            br_float[:] = br_p
+        numpy.amax(br_delta_k_float, axis=1, out=br_float)
+        numpy.amin(br_delta_k_float, axis=1, out=br_float_1)
+        numpy.add(br_p, br_float, out=br_float)
+        numpy.add(br_p, br_float_1, out=br_float_1)
+        numpy.absolute(br_float, out=br_float)
+        numpy.absolute(br_float_1, out=br_float_1)
+        numpy.maximum(br_float, br_float_1, out=br_float)
         numpy.power(br_float, 2, out=br_float)
-        numpy.power(br_q, 2, out=br_float_1)
-        numpy.add(br_float, br_float_1, out=br_float)
+        numpy.add(br_float, br_q_2, out=br_float)
         numpy.power(br_float, 0.5, out=br_float)
         numpy.subtract(br_float, br_s_max, out=br_float)
         numpy.maximum(0.0, br_float, out=br_float)
         # do we want a list of nonzero indices?
         # or a boolean array with true at the nonzero indices and false at the others?
-        numpy.greater(br_float, 0.0, out=br_bool_1)
-        br_viol_list_acl_k = numpy.nonzero(br_float)[0]
-        num_br_viol_list_acl_k = br_viol_list_acl_k.size
-        print('num AC branches with possible violations in ACL contingencies: {}'.format(num_br_viol_list_acl_k))
-        end_time = time.time()
-        filter_branches_acl_k_time += (end_time - start_time)
-
-        # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
-        start_time = time.time()
-        if num_dcl_delta_k > 0:
-            numpy.amax(br_dcl_delta_k_float, axis=1, out=br_float)
-            numpy.amin(br_dcl_delta_k_float, axis=1, out=br_float_1)
-            numpy.add(br_p, br_float, out=br_float)
-            numpy.add(br_p, br_float_1, out=br_float_1)
-            numpy.absolute(br_float, out=br_float)
-            numpy.absolute(br_float_1, out=br_float_1)
-            numpy.maximum(br_float, br_float_1, out=br_float)
+        numpy.greater(br_float, 0.0, out=br_bool)
+        if br_rows is None:
+            numpy.logical_or(br_bool_any, br_bool, out=br_bool_any)
         else:
-            br_float[:] = br_p
-        numpy.power(br_float, 2, out=br_float)
-        numpy.power(br_q, 2, out=br_float_1)
-        numpy.add(br_float, br_float_1, out=br_float)
-        numpy.power(br_float, 0.5, out=br_float)
-        numpy.subtract(br_float, br_s_max, out=br_float)
-        numpy.maximum(0.0, br_float, out=br_float)
-        numpy.greater(br_float, 0.0, out=br_bool_2)
-        br_viol_list_dcl_k = numpy.nonzero(br_float)[0]
-        num_br_viol_list_dcl_k = br_viol_list_dcl_k.size
-        print('num AC branches with possible violations in DCL contingencies: {}'.format(num_br_viol_list_dcl_k))
+            br_bool_any[br_rows[br_bool]] = True
+        # keep only the rows of the filtered branches.
+        # this is exact: br_float is the largest of the violations computed below on each row,
+        # as it is computed from the largest |p + delta| by the same monotone operations,
+        # so the branches that are not filtered have 0 violation in every contingency of the block,
+        # and leaving them out changes neither the worst violations nor the sums.
+        if br_filter_by_worst_ctg:
+            br_filter_rows = numpy.flatnonzero(br_bool)
+            br_delta_k_float = br_delta_k_float[br_filter_rows, :]
+            br_rows = (br_filter_rows if br_rows is None else br_rows[br_filter_rows])
+            num_br = br_filter_rows.size
+            br_s_max = br_s_max[br_filter_rows]
+            br_p = br_p[br_filter_rows]
+            br_q_2 = br_q_2[br_filter_rows]
+            if br_delta_k_out_idx_lists is not None:
+                out_rows, out_cols = br_delta_k_out_idx_lists
+                out_cols = out_cols[br_bool[out_rows]]
+                out_rows = out_rows[br_bool[out_rows]]
+                br_delta_k_out_idx_lists = (numpy.searchsorted(br_filter_rows, out_rows), out_cols)
+        self.num_br_delta_k_pruned[name] += (data['num_br'] - num_br) * num_k_block
         end_time = time.time()
-        filter_branches_dcl_k_time += (end_time - start_time)
-
-        # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
-        start_time = time.time()
-        if num_xfr_delta_k > 0:
-            numpy.amax(br_xfr_delta_k_float, axis=1, out=br_float)
-            numpy.amin(br_xfr_delta_k_float, axis=1, out=br_float_1)
-            numpy.add(br_p, br_float, out=br_float)
-            numpy.add(br_p, br_float_1, out=br_float_1)
-            numpy.absolute(br_float, out=br_float)
-            numpy.absolute(br_float_1, out=br_float_1)
-            numpy.maximum(br_float, br_float_1, out=br_float)
-        else:
-            br_float[:] = br_p
-        numpy.power(br_float, 2, out=br_float)
-        numpy.power(br_q, 2, out=br_float_1)
-        numpy.add(br_float, br_float_1, out=br_float)
-        numpy.power(br_float, 0.5, out=br_float)
-        numpy.subtract(br_float, br_s_max, out=br_float)
-        numpy.maximum(0.0, br_float, out=br_float)
-        numpy.greater(br_float, 0.0, out=br_bool_3)
-        br_viol_list_xfr_k = numpy.nonzero(br_float)[0]
-        num_br_viol_list_xfr_k = br_viol_list_xfr_k.size
-        print('num AC branches with possible violations in XFR contingencies: {}'.format(num_br_viol_list_xfr_k))
-        end_time = time.time()
-        filter_branches_xfr_k_time += (end_time - start_time)
+        self.time['filter_branches_{}_k_time'.format(name)] += (end_time - start_time)
 
         # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches
         start_time = time.time()
         numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+            numpy.reshape(br_p, newshape=(num_br, 1)), br_delta_k_float, out=br_delta_k_float)
         end_time = time.time()
-        compute_br_acl_delta_k_p_time += (end_time - start_time)
+        self.time['compute_br_{}_delta_k_p_time'.format(name)] += (end_time - start_time)
 
-        # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches - dcl k
-        start_time = time.time()
-        numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        end_time = time.time()
-        compute_br_dcl_delta_k_p_time += (end_time - start_time)
-
-        # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches - xfr k
-        start_time = time.time()
-        numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        end_time = time.time()
-        compute_br_xfr_delta_k_p_time += (end_time - start_time)
-
-        # compute AC branch flow violations under ACL outages
+        # compute AC branch flow violations
         # this is expensive ~83 s but reduced hugely to about 2 or 3 s by
         # eliminating AC branch computations that cannot possibly lead to violation
         # as in HIPPO SFT
@@ -741,211 +1209,677 @@ def eval_post_contingency_model(sol_eval):
         # as long as just a few critical ones are controlled.
         # this redundancy is critical to many security constraint evaluation and enforcement techniques.
         start_time = time.time()
-        numpy.power(br_acl_delta_k_float, 2, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        numpy.power(br_delta_k_float, 2, out=br_delta_k_float)
         numpy.add(
-            br_acl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_acl_delta_k_float, 0.5, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+            br_delta_k_float, numpy.reshape(br_q_2, newshape=(num_br, 1)), out=br_delta_k_float)
+        numpy.power(br_delta_k_float, 0.5, out=br_delta_k_float)
         numpy.subtract(
-            br_acl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_acl_delta_k_float, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+            br_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_delta_k_float)
+        numpy.maximum(0.0, br_delta_k_float, out=br_delta_k_float)
         end_time = time.time()
-        compute_br_acl_delta_k_s_over_time += (end_time - start_time)
+        self.time['compute_br_{}_delta_k_s_over_time'.format(name)] += (end_time - start_time)
 
-        # compute AC branch flow violations under DCL outages
+        # zero out flows for branch-contingency pairs where the branch is out of service
+        # may need to use this multiple times so time it - it should be trivial
+        # not needed on DC lines since the outaged branch is not in the computed branches
         start_time = time.time()
-        numpy.power(br_dcl_delta_k_float, 2, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.add(
-            br_dcl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_dcl_delta_k_float, 0.5, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.subtract(
-            br_dcl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_dcl_delta_k_float, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        if br_delta_k_out_idx_lists is not None:
+            br_delta_k_float[br_delta_k_out_idx_lists] = 0.0
         end_time = time.time()
-        compute_br_dcl_delta_k_s_over_time += (end_time - start_time)
+        self.time['zero_out_time'] += (end_time - start_time)
 
-        # compute AC branch flow violations under XFR outages
+        # get worst violations
         start_time = time.time()
-        numpy.power(br_xfr_delta_k_float, 2, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.add(
-            br_xfr_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_xfr_delta_k_float, 0.5, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.subtract(
-            br_xfr_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_xfr_delta_k_float, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        num_acl_rows = (num_acl if br_rows is None else numpy.searchsorted(br_rows, num_acl))
+        num_xfr_rows = (num_xfr if br_rows is None else numpy.searchsorted(br_rows, num_xfr))
+        # on acl
+        t_max_arg['acl_' + name] = update_max_arg(
+            t_max_arg['acl_' + name], br_delta_k_float[0:num_acl_rows, :], k_block.start, br_rows)
+        # on xfr
+        t_max_arg['xfr_' + name] = update_max_arg(
+            t_max_arg['xfr_' + name], br_delta_k_float[0:num_xfr_rows, :], k_block.start, br_rows)
         end_time = time.time()
-        compute_br_xfr_delta_k_s_over_time += (end_time - start_time)
+        self.time['get_max_br_{}_delta_k_s_over_time'.format(name)] += (end_time - start_time)
 
-        # zero out flows for branch-contingency pairs where the branch is out of service
-        # may need to use this multiple times so time it - it should be trivial
-        # not needed on DC lines since the outaged branch is not in the computed branches
+        # compute AC branch flow penalties
+        # t_d[t] * c_s * viol
+        start_time = time.time()
+        numpy.sum(br_delta_k_float, axis=0, out=delta_k_float[k_block])
+        end_time = time.time()
+        self.time['compute_br_k_z_time'] += (end_time - start_time)
+
+    def eval_t(self, t):
+        '''
+        returns a dict with
+        k_z - penalty for each contingency in t, to go into sol_eval.t_k_z[t, :]
+        viol - worst violation in t for each of CTG_VIOL_KEYS, or None if there are no contingencies of that type
+        use_smw - whether SMW over t was used in t
+        '''
+
+        t_start_time = time.time()
+
+        # static data
+        data = self.data
+        num_bus = data['num_bus']
+        num_acl = data['num_acl']
+        num_xfr = data['num_xfr']
+        num_dcl = data['num_dcl']
+        num_br = data['num_br']
+        num_k = data['num_k']
+        k_blocked = data['k_blocked']
+        smw_over_t_v_t_cond_max = data['smw_over_t_v_t_cond_max']
+        multi_v_k_cond_max = data['multi_v_k_cond_max']
+        c_s = data['c_s']
+        t_d = data['t_d']
+        acl_uid = data['acl_uid']
+        xfr_uid = data['xfr_uid']
+        dcl_uid = data['dcl_uid']
+        nonref_bus_acl_inc = data['nonref_bus_acl_inc']
+        nonref_bus_xfr_inc = data['nonref_bus_xfr_inc']
+        nonref_bus_dcl_inc = data['nonref_bus_dcl_inc']
+        nonref_bus_br_inc = data['nonref_bus_br_inc']
+        acl_b = data['acl_b']
+        xfr_b = data['xfr_b']
+        br_b = data['br_b']
+        acl_phi = data['acl_phi']
+        t_num_br_delta_t = data['t_num_br_delta_t']
+        t_br_delta_t = data['t_br_delta_t']
+        br_delta_t_smw_map = data['br_delta_t_smw_map']
+        acl_delta_k = data['acl_delta_k']
+        xfr_delta_k = data['xfr_delta_k']
+        dcl_delta_k = data['dcl_delta_k']
+        num_acl_delta_k = acl_delta_k.size
+        num_xfr_delta_k = xfr_delta_k.size
+        num_dcl_delta_k = dcl_delta_k.size
+        k_out_is_acl_list = data['k_out_is_acl_list']
+        k_out_is_acl_acl_delta_k_list = data['k_out_is_acl_acl_delta_k_list']
+        k_out_is_dcl_list = data['k_out_is_dcl_list']
+        k_out_is_dcl_dcl_delta_k_list = data['k_out_is_dcl_dcl_delta_k_list']
+        k_out_is_xfr_list = data['k_out_is_xfr_list']
+        k_out_is_xfr_xfr_delta_k_list = data['k_out_is_xfr_xfr_delta_k_list']
+        k_out_is_multi_list = data['k_out_is_multi_list']
+        k_out_is_multi_multi_delta_k_list = data['k_out_is_multi_multi_delta_k_list']
+        multi_delta_k_rank = data['multi_delta_k_rank']
+        multi_delta_k_br_ptr = data['multi_delta_k_br_ptr']
+        multi_delta_k_br = data['multi_delta_k_br']
+        multi_delta_k_xfr_mat = data['multi_delta_k_xfr_mat']
+        multi_delta_k_dcl_mat = data['multi_delta_k_dcl_mat']
+        multi_delta_k_uid = data['multi_delta_k_uid']
+        num_multi_delta_k = multi_delta_k_rank.size
+        m_br_t = data['m_br_t']
+        w_br_t = data['w_br_t']
+        t_use_smw = self.t_use_smw
+
+        # solution data
+        bus_t_rhs = data['bus_t_rhs']
+        xfr_t_phi = data['xfr_t_phi']
+        acl_t_u_on = data['acl_t_u_on']
+        xfr_t_u_on = data['xfr_t_u_on']
+        acl_t_q_fr = data['acl_t_q_fr']
+        acl_t_q_to = data['acl_t_q_to']
+        xfr_t_q_fr = data['xfr_t_q_fr']
+        xfr_t_q_to = data['xfr_t_q_to']
+        dcl_t_p = data['dcl_t_p']
+
+        # work arrays
+        bus_rhs = self.bus_rhs
+        bus_theta = self.bus_theta
+        bus_float = self.bus_float
+        br_p = self.br_p
+        acl_delta_k_float = self.acl_delta_k_float
+        dcl_delta_k_float = self.dcl_delta_k_float
+        xfr_delta_k_float = self.xfr_delta_k_float
+        multi_delta_k_float = self.multi_delta_k_float
+
+        # results
+        # worst violations as (val, row, col), reduced over blocks
+        k_z = numpy.zeros(shape=(num_k, ), dtype=float)
+        t_max_arg = {k: None for k in CTG_VIOL_KEYS}
+
+        acl_delta_k_float[:] = 0.0
+        dcl_delta_k_float[:] = 0.0
+        xfr_delta_k_float[:] = 0.0
+        multi_delta_k_float[:] = 0.0
+        self.br_bool_1[:] = False
+        self.br_bool_2[:] = False
+        self.br_bool_3[:] = False
+        self.br_bool_4[:] = False
+        for k in self.num_br_delta_k_computed:
+            self.num_br_delta_k_computed[k] = 0
+            self.num_br_delta_k_pruned[k] = 0
+
+        # do low rank update with respect to t, as in HIPPO/MISO paper
+        # todo create test data with more line switching to test this sufficiently
+        # e.g. ~ 10 to 100 switches per time interval, some connecting, some disconnecting
+
+        # get some time-varying characteristics of branches from the base case solution
         start_time = time.time()
-        br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
-        br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
+        xfr_phi = xfr_t_phi[:, t]
+        br_phi = numpy.concatenate((acl_phi, xfr_phi))
+        acl_u = acl_t_u_on[:, t]
+        xfr_u = xfr_t_u_on[:, t]
+        br_u = numpy.concatenate((acl_u, xfr_u))
+        br_b_t = br_u * br_b
+        acl_q_fr = acl_t_q_fr[:, t]
+        xfr_q_fr = xfr_t_q_fr[:, t]
+        br_q_fr = numpy.concatenate((acl_q_fr, xfr_q_fr))
+        acl_q_to = acl_t_q_to[:, t]
+        xfr_q_to = xfr_t_q_to[:, t]
+        br_q_to = numpy.concatenate((acl_q_to, xfr_q_to))
+        br_q = numpy.maximum(numpy.absolute(br_q_fr), numpy.absolute(br_q_to)) # no need to track which side is violated
+        numpy.power(br_q, 2, out=self.br_q_2)
+        dcl_p = dcl_t_p[:, t]
         end_time = time.time()
-        zero_out_time += (end_time - start_time)
+        self.time['get_time_varying_branch_characteristics_time'] += (end_time - start_time)
 
-        # get worst violations under ACL outages
+        # look up the in service AC branch set of t in the topology cache
+        # A_t, W_tk, and V_tk depend on the solution only through br_u,
+        # so intervals with the same topology can share them
+        # this also covers topologies recurring after a switching event, not just consecutive identical ones
         start_time = time.time()
-        if num_acl_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_acl_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.acl_uid[acl_delta_k]])
-            if viol['val'] > max_viol_acl_acl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_acl_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_acl_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.acl_uid[acl_delta_k]])
-            if viol['val'] > max_viol_xfr_acl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_acl_delta_k = viol
+        topology_key = numpy.packbits(br_u).tobytes()
+        topology = self.topology_cache.get(topology_key)
+        t_new_topology = (topology is None)
+        if not t_new_topology:
+            t_use_smw[t] = topology['use_smw']
         end_time = time.time()
-        get_max_br_acl_delta_k_s_over_time += (end_time - start_time)
+        self.time['topology_cache_time'] += (end_time - start_time)
 
-        # get worst violations under DCL outages
+        # compute v_t
+        # do this before forming A_t so that we can fall back to refactoring if V_t is badly conditioned
         start_time = time.time()
-        if num_dcl_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_dcl_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.dcl_uid[dcl_delta_k]])
-            if viol['val'] > max_viol_acl_dcl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_dcl_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_dcl_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.dcl_uid[dcl_delta_k]])
-            if viol['val'] > max_viol_xfr_dcl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_dcl_delta_k = viol
+        t_br_delta_t_in_br_delta_t = None
+        v_t_factors = None
+        if t_new_topology and t_use_smw[t]:
+            # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
+            if t_num_br_delta_t[t] > 0:
+                t_br_delta_t_in_br_delta_t = [br_delta_t_smw_map[i] for i in t_br_delta_t[t]]
+                # construct v_t
+                v_t = numpy.diag(1.0 / br_b[t_br_delta_t[t]]) + m_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(w_br_t[:, t_br_delta_t_in_br_delta_t])
+                # V_t is nonsingular if the network in t is connected, but it can still be badly conditioned,
+                # in which case the SMW result is inaccurate and we refactor instead
+                v_t_cond = numpy.linalg.cond(v_t)
+                if v_t_cond > smw_over_t_v_t_cond_max:
+                    print('t: {}, V_t condition number: {}, refactoring A_t instead of SMW'.format(t, v_t_cond))
+                    t_use_smw[t] = False
+                else:
+                    # factor v_t
+                    v_t_factors = scipy.linalg.lu_factor(v_t)
         end_time = time.time()
-        get_max_br_dcl_delta_k_s_over_time += (end_time - start_time)
+        self.time['compute_v_t_time'] += (end_time - start_time)
 
-        # get worst violations under XFR outages
+        # form A_t
         start_time = time.time()
-        if num_xfr_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_xfr_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.xfr_uid[xfr_delta_k]])
-            if viol['val'] > max_viol_acl_xfr_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_xfr_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_xfr_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.xfr_uid[xfr_delta_k]])
-            if viol['val'] > max_viol_xfr_xfr_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_xfr_delta_k = viol
+        if t_new_topology and not t_use_smw[t]:
+            a_mat_t = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_t, newshape=(num_br, 1)))
+            a_mat_t = nonref_bus_br_inc.dot(a_mat_t)
+            a_mat_t = a_mat_t.multiply(-1.0)
         end_time = time.time()
-        get_max_br_xfr_delta_k_s_over_time += (end_time - start_time)
+        self.time['construct_a_t_time'] += (end_time - start_time)
 
-        # compute AC branch flow penalties
-        # t_d[t] * c_s * viol
+        # factor A_t
+        start_time = time.time()
+        a_factors_t = None
+        if t_new_topology and not t_use_smw[t]:
+            a_factors_t = SymmetricFactors(a_mat_t, data['factor_method'])
+            print('t: {}, factor A_t. {}'.format(t, a_factors_t.get_stats()))
+        end_time = time.time()
+        self.time['factor_a_t_time'] += (end_time - start_time)
+
+        # start a new topology cache entry, filled in over the contingency blocks, or get the stored one
+        # W_tk is only stored if there is one block per contingency type, as otherwise it would not fit in memory
         start_time = time.time()
-        # acl out
-        numpy.sum(br_acl_delta_k_float, axis=0, out=acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, acl_delta_k_float, out=acl_delta_k_float)
-        # dcl out
-        numpy.sum(br_dcl_delta_k_float, axis=0, out=dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, dcl_delta_k_float, out=dcl_delta_k_float)
-        # xfr out
-        numpy.sum(br_xfr_delta_k_float, axis=0, out=xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, xfr_delta_k_float, out=xfr_delta_k_float)
+        if t_new_topology:
+            topology = {
+                'use_smw': t_use_smw[t],
+                'a_factors_t': a_factors_t,
+                'v_t_factors': v_t_factors,
+                't_br_delta_t_in_br_delta_t': t_br_delta_t_in_br_delta_t,
+                'w_acl_k': None,
+                'w_xfr_k': None,
+                'v_acl_k_inv': numpy.zeros(shape=(num_acl_delta_k, ), dtype=float),
+                'v_xfr_k_inv': numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)}
+        self.a_factors_t = topology['a_factors_t']
+        self.v_t_factors = topology['v_t_factors']
+        self.w_t = None
+        if self.v_t_factors is not None:
+            self.w_t = w_br_t[:, topology['t_br_delta_t_in_br_delta_t']]
+        v_acl_k_inv = topology['v_acl_k_inv']
+        v_xfr_k_inv = topology['v_xfr_k_inv']
         end_time = time.time()
-        compute_br_k_z_time += (end_time - start_time)
+        self.time['topology_cache_time'] += (end_time - start_time)
+
+        # set RHS terms
+        bus_rhs[:] = bus_t_rhs[:, t]
+
+        # compute terms in theta expression
+
+        # solve for base case bus theta in the base case
+        # There are no contingencies outaging no branches
+        # every contingency outages exactly one branch
+        # some branches might be outaged by more than one contingency - why though?
+        start_time = time.time()
+        self.solve_a_t(bus_rhs, bus_theta, bus_float)
+        end_time = time.time()
+        self.time[
+            'compute_bus_theta_with_t_smw_time' if t_use_smw[t] else
+            'compute_bus_theta_with_t_a_solve_time'] += (end_time - start_time)
+
+        # compute br p under no outages from theta
+        start_time = time.time()
+        br_p[:] = nonref_bus_br_inc.transpose().dot(bus_theta)
+        numpy.subtract(br_p, br_phi, out=br_p)
+        numpy.multiply(br_b_t, br_p, out=br_p)
+        numpy.negative(br_p, out=br_p)
+        end_time = time.time()
+        self.time['compute_br_p_time'] += (end_time - start_time)
+
+        # ACL contingencies
+        for k_block in self.get_k_blocks(num_acl_delta_k):
+
+            num_k_block = k_block.stop - k_block.start
+            bus_delta_k_float = self.get_block_view(self.bus_delta_k_float, num_bus - 1, num_k_block)
+            block_delta_k = acl_delta_k[k_block]
+
+            # W_tk and inverses of V_tk
+            if (not t_new_topology) and (not k_blocked):
+                w_acl_k = topology['w_acl_k']
+            else:
+                if k_blocked:
+                    m_acl_k = nonref_bus_acl_inc[:, block_delta_k].toarray()
+                    w0_acl_k = None
+                else:
+                    m_acl_k = data['m_acl_k']
+                    w0_acl_k = data['w0_acl_k']
+                # w_acl_k is a new array for each new topology, not overwritten, as it may be cached
+                w_acl_k = self.compute_w_k(m_acl_k, nonref_bus_acl_inc[:, block_delta_k], w0_acl_k)
+                if not k_blocked:
+                    topology['w_acl_k'] = w_acl_k
+            start_time = time.time()
+            if t_new_topology:
+                v_acl_k_inv[k_block] = self.compute_v_k_inv(
+                    'acl', acl_b[block_delta_k], m_acl_k, w_acl_k, acl_u[block_delta_k])
+            end_time = time.time()
+            self.time['compute_v_time'] += (end_time - start_time)
+
+            # compute bus theta delta term under ACL outages - from w rank 1 update of matrix
+            # this is somewhat expensive ~7 s
+            # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
+            start_time = time.time()
+            w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
+            w_acl_k_rhs = v_acl_k_inv[k_block] * w_acl_k_rhs
+            numpy.multiply(
+                w_acl_k, numpy.reshape(w_acl_k_rhs, newshape=(1, num_k_block)), out=bus_delta_k_float) #subtract this from A^-1 p
+            end_time = time.time()
+            self.time['apply_w_v_wt_time'] += (end_time - start_time)
+
+            # compute AC branch flow deltas under ACL outages
+            # this is somewhat expensive ~9 s
+            # with flow engine at_risk_branches, only on the branches that can possibly have a violation
+            # apply M, phi, B to get AC branch flows
+            br_delta_k_float, br_rows, br_delta_k_out_idx_lists = self.compute_br_delta_k(
+                'acl', bus_delta_k_float, br_b_t, (block_delta_k, numpy.arange(num_k_block, dtype=int)))
+
+            self.eval_br_delta_k(
+                'acl', k_block, br_delta_k_float, br_rows, br_delta_k_out_idx_lists, self.br_bool_1, acl_delta_k_float, t_max_arg)
+
+        # DCL contingencies
+        for k_block in self.get_k_blocks(num_dcl_delta_k):
+
+            num_k_block = k_block.stop - k_block.start
+            bus_delta_k_float = self.get_block_view(self.bus_delta_k_float, num_bus - 1, num_k_block)
+            bus_delta_k_float_1 = self.get_block_view(self.bus_delta_k_float_1, num_bus - 1, num_k_block)
+            block_delta_k = dcl_delta_k[k_block]
+
+            # compute bus theta delta term under DCL outages - from RHS
+            start_time = time.time()
+            bus_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
+            nonref_bus_dcl_inc[:, block_delta_k].toarray(out=bus_delta_k_float_1)
+            numpy.multiply(
+                bus_delta_k_float_1,
+                numpy.reshape(dcl_p[block_delta_k], newshape=(1, num_k_block)),
+                out=bus_delta_k_float_1)
+            self.solve_a_t(bus_delta_k_float_1, bus_delta_k_float, bus_delta_k_float_1)
+            numpy.negative(bus_delta_k_float, out=bus_delta_k_float) # could eliminate this
+            end_time = time.time()
+            self.time['compute_bus_dtheta_rhs_dcl_k_time'] += (end_time - start_time)
+
+            # compute AC branch flow deltas under DCL outages
+            # zero-out step not necessary here since
+            # these contingencies are DC line outages and we are computing AC branch flow
+            br_delta_k_float, br_rows, br_delta_k_out_idx_lists = self.compute_br_delta_k(
+                'dcl', bus_delta_k_float, br_b_t, None)
+
+            self.eval_br_delta_k(
+                'dcl', k_block, br_delta_k_float, br_rows, br_delta_k_out_idx_lists, self.br_bool_2, dcl_delta_k_float, t_max_arg)
+
+        # XFR contingencies
+        for k_block in self.get_k_blocks(num_xfr_delta_k):
+
+            num_k_block = k_block.stop - k_block.start
+            bus_delta_k_float = self.get_block_view(self.bus_delta_k_float, num_bus - 1, num_k_block)
+            bus_delta_k_float_1 = self.get_block_view(self.bus_delta_k_float_1, num_bus - 1, num_k_block)
+            bus_delta_k_float_2 = self.get_block_view(self.bus_delta_k_float_2, num_bus - 1, num_k_block)
+            block_delta_k = xfr_delta_k[k_block]
+
+            # W_tk and inverses of V_tk
+            if (not t_new_topology) and (not k_blocked):
+                w_xfr_k = topology['w_xfr_k']
+            else:
+                if k_blocked:
+                    m_xfr_k = nonref_bus_xfr_inc[:, block_delta_k].toarray()
+                    w0_xfr_k = None
+                else:
+                    m_xfr_k = data['m_xfr_k']
+                    w0_xfr_k = data['w0_xfr_k']
+                w_xfr_k = self.compute_w_k(m_xfr_k, nonref_bus_xfr_inc[:, block_delta_k], w0_xfr_k)
+                if not k_blocked:
+                    topology['w_xfr_k'] = w_xfr_k
+            start_time = time.time()
+            if t_new_topology:
+                v_xfr_k_inv[k_block] = self.compute_v_k_inv(
+                    'xfr', xfr_b[block_delta_k], m_xfr_k, w_xfr_k, xfr_u[block_delta_k])
+            end_time = time.time()
+            self.time['compute_v_time'] += (end_time - start_time)
+
+            # todo - definitely some benefit from treating xfr with phi==0 as acl - only if we have large cases with many xfr outage contingencies
+            # compute bus theta delta term under XFR outages - from rhs and from w rank 1 update of matrix
+            start_time = time.time()
+            xfr_delta_k_float_block = xfr_delta_k_float[k_block]
+            numpy.multiply(xfr_b[block_delta_k], xfr_phi[block_delta_k], out=xfr_delta_k_float_block)
+            numpy.multiply(xfr_u[block_delta_k], xfr_delta_k_float_block, out=xfr_delta_k_float_block)
+            bus_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
+            nonref_bus_xfr_inc[:, block_delta_k].toarray(out=bus_delta_k_float_1)
+            numpy.multiply(
+                bus_delta_k_float_1,
+                numpy.reshape(xfr_delta_k_float_block, newshape=(1, num_k_block)),
+                out=bus_delta_k_float_1)
+            self.solve_a_t(bus_delta_k_float_1, bus_delta_k_float, bus_delta_k_float_2)
+            numpy.add(
+                numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), bus_delta_k_float_1, out=bus_delta_k_float_1)
+            w_xfr_k_rhs = numpy.einsum('ij,ij->j', w_xfr_k, bus_delta_k_float_1)
+            w_xfr_k_rhs = v_xfr_k_inv[k_block] * w_xfr_k_rhs
+            numpy.multiply(
+                w_xfr_k, numpy.reshape(w_xfr_k_rhs, newshape=(1, num_k_block)), out=bus_delta_k_float_1)
+            numpy.subtract(bus_delta_k_float_1, bus_delta_k_float, out=bus_delta_k_float) #subtract this from A^-1 p
+            end_time = time.time()
+            self.time['compute_w_v_wt_xfr_k_time'] += (end_time - start_time)
+
+            # compute AC branch flow deltas under XFR outages
+            br_delta_k_float, br_rows, br_delta_k_out_idx_lists = self.compute_br_delta_k(
+                'xfr', bus_delta_k_float, br_b_t, (num_acl + block_delta_k, numpy.arange(num_k_block, dtype=int)))
+
+            self.eval_br_delta_k(
+                'xfr', k_block, br_delta_k_float, br_rows, br_delta_k_out_idx_lists, self.br_bool_3, xfr_delta_k_float, t_max_arg)
+
+        # contingencies outaging more than one device
+        # each block has columns of a single rank r, so the rank r SMW update is vectorized over the block
+        for k_block in self.get_multi_k_blocks():
+
+            num_k_block = k_block.stop - k_block.start
+            rank = multi_delta_k_rank[k_block.start]
+            bus_delta_k_float = self.get_block_view(self.bus_delta_k_float, num_bus - 1, num_k_block)
+            bus_delta_k_float_1 = self.get_block_view(self.bus_delta_k_float_1, num_bus - 1, num_k_block)
+            bus_delta_k_float_2 = self.get_block_view(self.bus_delta_k_float_2, num_bus - 1, num_k_block)
+            # AC branches outaged in each column
+            block_br = numpy.reshape(
+                multi_delta_k_br[multi_delta_k_br_ptr[k_block.start]:multi_delta_k_br_ptr[k_block.stop]],
+                newshape=(num_k_block, rank))
+
+            # compute bus theta delta term from the RHS terms of the outaged transformers and DC lines
+            start_time = time.time()
+            xfr_rhs = multi_delta_k_xfr_mat[:, k_block].multiply(
+                numpy.reshape(xfr_b * xfr_phi * xfr_u, newshape=(num_xfr, 1)))
+            dcl_rhs = multi_delta_k_dcl_mat[:, k_block].multiply(numpy.reshape(dcl_p, newshape=(num_dcl, 1)))
+            bus_delta_k_float_1[:] = 0.0
+            (nonref_bus_xfr_inc.dot(xfr_rhs) + nonref_bus_dcl_inc.dot(dcl_rhs)).toarray(out=bus_delta_k_float_1)
+            self.solve_a_t(bus_delta_k_float_1, bus_delta_k_float, bus_delta_k_float_2)
+            numpy.add(
+                numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), bus_delta_k_float_1, out=bus_delta_k_float_1)
+            end_time = time.time()
+            self.time['compute_w_v_wt_multi_k_time'] += (end_time - start_time)
+
+            if rank > 0:
+                # W_tk on the outaged AC branches, each needed once in the block
+                block_br_unique, block_br_idx = numpy.unique(block_br, return_inverse=True)
+                block_br_idx = numpy.reshape(block_br_idx, newshape=(num_k_block, rank))
+                m_k_sparse = nonref_bus_br_inc[:, block_br_unique]
+                m_k = m_k_sparse.toarray()
+                w_k = self.compute_w_k(m_k, m_k_sparse, None)
+
+                # rank r SMW update for each column, with V_tk = diag(1 / b) + M_k^T W_tk, r-by-r
+                # a branch already out of service in t is left out of the update by zeroing its W_tk column.
+                # its row of V_tk is then unused, as its entry of W_tk^T rhs is 0.
+                # bus_delta_k_float = W_tk V_tk^-1 W_tk^T (rhs + rhs_k) - A_t^-1 rhs_k
+                start_time = time.time()
+                w_k = w_k[:, block_br_idx]
+                numpy.multiply(
+                    w_k, numpy.reshape(br_u[block_br], newshape=(1, num_k_block, rank)), out=w_k)
+                v_k = numpy.einsum('ikr,iks->krs', m_k[:, block_br_idx], w_k)
+                v_k[:, numpy.arange(rank), numpy.arange(rank)] += 1.0 / br_b[block_br]
+                # V_tk is singular if the outage disconnects the network, which eval_connectedness
+                # should have found, so the post-contingency model would not be evaluated.
+                # do not score a nearly singular one
+                v_k_cond = numpy.linalg.cond(v_k)
+                v_k_ill = numpy.flatnonzero(numpy.logical_not(v_k_cond <= multi_v_k_cond_max))
+                if v_k_ill.size > 0:
+                    raise ModelError(
+                        'multiple outage contingency with V_tk condition number > {}, i.e. disconnecting the network. t: {}, contingency uids: {}, condition numbers: {}'.format(
+                            multi_v_k_cond_max, t, multi_delta_k_uid[k_block.start + v_k_ill].tolist(), v_k_cond[v_k_ill].tolist()))
+                w_k_rhs = numpy.einsum('ikr,ik->kr', w_k, bus_delta_k_float_1)
+                w_k_rhs = numpy.linalg.solve(v_k, numpy.reshape(w_k_rhs, newshape=(num_k_block, rank, 1)))
+                numpy.einsum(
+                    'ikr,kr->ik', w_k, numpy.reshape(w_k_rhs, newshape=(num_k_block, rank)), out=bus_delta_k_float_1)
+                numpy.subtract(bus_delta_k_float_1, bus_delta_k_float, out=bus_delta_k_float)
+                end_time = time.time()
+                self.time['compute_w_v_wt_multi_k_time'] += (end_time - start_time)
+            else:
+                numpy.negative(bus_delta_k_float, out=bus_delta_k_float)
+
+            # compute AC branch flow deltas
+            br_delta_k_float, br_rows, br_delta_k_out_idx_lists = self.compute_br_delta_k(
+                'multi', bus_delta_k_float, br_b_t,
+                (numpy.reshape(block_br, newshape=(num_k_block * rank, )),
+                 numpy.repeat(numpy.arange(num_k_block, dtype=int), rank)))
+
+            self.eval_br_delta_k(
+                'multi', k_block, br_delta_k_float, br_rows, br_delta_k_out_idx_lists, self.br_bool_4, multi_delta_k_float, t_max_arg)
+
+        print('num AC branches with possible violations in ACL contingencies: {}'.format(numpy.count_nonzero(self.br_bool_1)))
+        print('num AC branches with possible violations in DCL contingencies: {}'.format(numpy.count_nonzero(self.br_bool_2)))
+        print('num AC branches with possible violations in XFR contingencies: {}'.format(numpy.count_nonzero(self.br_bool_3)))
+        print('num AC branches with possible violations in multiple outage contingencies: {}'.format(numpy.count_nonzero(self.br_bool_4)))
+        print('num AC branch flow deltas computed in ACL, DCL, XFR, multi contingencies: {}, {}, {}, {}, of {}, {}, {}, {}'.format(
+            self.num_br_delta_k_computed['acl'], self.num_br_delta_k_computed['dcl'],
+            self.num_br_delta_k_computed['xfr'], self.num_br_delta_k_computed['multi'],
+            num_br * num_acl_delta_k, num_br * num_dcl_delta_k, num_br * num_xfr_delta_k, num_br * num_multi_delta_k))
+        print('num AC branch-contingency pairs pruned in ACL, DCL, XFR, multi contingencies: {}, {}, {}, {}'.format(
+            self.num_br_delta_k_pruned['acl'], self.num_br_delta_k_pruned['dcl'],
+            self.num_br_delta_k_pruned['xfr'], self.num_br_delta_k_pruned['multi']))
+
+        # store the new topology in the cache
+        start_time = time.time()
+        if t_new_topology:
+            self.topology_cache.put(
+                topology_key, topology,
+                get_topology_nbytes(topology, [data['w0_acl_k'], data['w0_xfr_k']]))
+        end_time = time.time()
+        self.time['topology_cache_time'] += (end_time - start_time)
+
+        # worst violations, with uids
+        t_viol = {k: None for k in CTG_VIOL_KEYS}
+        for k, row_uid, col_uid in [
+                ('acl_acl', acl_uid, acl_uid[acl_delta_k]),
+                ('xfr_acl', xfr_uid, acl_uid[acl_delta_k]),
+                ('acl_dcl', acl_uid, dcl_uid[dcl_delta_k]),
+                ('xfr_dcl', xfr_uid, dcl_uid[dcl_delta_k]),
+                ('acl_xfr', acl_uid, xfr_uid[xfr_delta_k]),
+                ('xfr_xfr', xfr_uid, xfr_uid[xfr_delta_k]),
+                ('acl_multi', acl_uid, multi_delta_k_uid),
+                ('xfr_multi', xfr_uid, multi_delta_k_uid)]:
+            if t_max_arg[k] is not None:
+                val, row, col = t_max_arg[k]
+                t_viol[k] = {'val': val, 'idx': {0: row_uid[row], 1: col_uid[col], 2: t}}
 
         # acl_delta_k_float, dcl_delta_k_float, and xfr_delta_k_float
-        # have the total penalties for this t under ACL, DCL, and XFR outages
+        # have the total violations for this t under ACL, DCL, and XFR outages
         # need to collect these into total penalty for this t under each contingency
-        # goes into sol_eval.t_k_z (with minus sign)
+        # goes into k_z, then sol_eval.t_k_z (with minus sign)
         start_time = time.time()
-        sol_eval.t_k_z[t, k_out_is_acl_list] = (-1.0) * acl_delta_k_float[k_out_is_acl_acl_delta_k_list]
-        sol_eval.t_k_z[t, k_out_is_dcl_list] = (-1.0) * dcl_delta_k_float[k_out_is_dcl_dcl_delta_k_list]
-        sol_eval.t_k_z[t, k_out_is_xfr_list] = (-1.0) * xfr_delta_k_float[k_out_is_xfr_xfr_delta_k_list]
+        numpy.multiply(t_d[t] * c_s, acl_delta_k_float, out=acl_delta_k_float)
+        numpy.multiply(t_d[t] * c_s, dcl_delta_k_float, out=dcl_delta_k_float)
+        numpy.multiply(t_d[t] * c_s, xfr_delta_k_float, out=xfr_delta_k_float)
+        numpy.multiply(t_d[t] * c_s, multi_delta_k_float, out=multi_delta_k_float)
+        k_z[k_out_is_acl_list] = (-1.0) * acl_delta_k_float[k_out_is_acl_acl_delta_k_list]
+        k_z[k_out_is_dcl_list] = (-1.0) * dcl_delta_k_float[k_out_is_dcl_dcl_delta_k_list]
+        k_z[k_out_is_xfr_list] = (-1.0) * xfr_delta_k_float[k_out_is_xfr_xfr_delta_k_list]
+        k_z[k_out_is_multi_list] = (-1.0) * multi_delta_k_float[k_out_is_multi_multi_delta_k_list]
         end_time = time.time()
-        collect_penalties_into_obj_array_time += (end_time - start_time)
+        self.time['collect_penalties_into_obj_array_time'] += (end_time - start_time)
 
         t_end_time = time.time()
-        t_computation_time[t] = t_end_time - t_start_time
-        print('t: {}, time: {}, memory_info: {}'.format(t, t_computation_time[t], utils.get_memory_info()))
+        t_computation_time = t_end_time - t_start_time
+        print('t: {}, time: {}, memory_info: {}'.format(t, t_computation_time, utils.get_memory_info()))
 
-    # todo check result
+        return {
+            't': t, 'use_smw': t_use_smw[t], 'k_z': k_z, 'viol': t_viol,
+            'num_br_k_pruned': sum(self.num_br_delta_k_pruned.values()), 'time': t_computation_time}
 
-    # not needed
-    # reduce as in HIPPO SFT
-    # LHS : monitored branches (well, they are all monitored so this will not help)
-    # RHS : injection buses (generators, loads, shunts) and deal with distributed slack
-    # really this is only of value in case of repeated evaluation, as in a solver callback, not in solution eval
+def update_max_arg(max_arg, arr, col_offset, rows=None):
+    '''
+    (val, row, col) of the largest entry of arr, with col shifted by col_offset, or max_arg if that is larger.
+    ties go to the smallest row, then the smallest col,
+    so reducing over column blocks gives the same result as utils.get_max on the whole array
+    max_arg may be None
+    rows - if not None, row i of arr is row rows[i] of the whole array, with rows increasing
+    '''
 
-    # not needed
-    # GPU deployment of linear algebra, as in DMC-SCY0 paper
+    if arr.size == 0:
+        return max_arg
+    row, col = numpy.unravel_index(numpy.argmax(arr), shape=arr.shape)
+    arg = (arr[row, col], row if rows is None else rows[row], col + col_offset)
+    if max_arg is None or arg[0] > max_arg[0] or (arg[0] == max_arg[0] and arg[1:] < max_arg[1:]):
+        return arg
+    return max_arg
 
-    # report worst violations
-    sol_eval.viol_acl_acl_t_s_max_ctg = max_viol_acl_acl_delta_k
-    sol_eval.viol_xfr_acl_t_s_max_ctg = max_viol_xfr_acl_delta_k
-    sol_eval.viol_acl_dcl_t_s_max_ctg = max_viol_acl_dcl_delta_k
-    sol_eval.viol_xfr_dcl_t_s_max_ctg = max_viol_xfr_dcl_delta_k
-    sol_eval.viol_acl_xfr_t_s_max_ctg = max_viol_acl_xfr_delta_k
-    sol_eval.viol_xfr_xfr_t_s_max_ctg = max_viol_xfr_xfr_delta_k
-        
-    print('initialize_m_w_time: {}'.format(initialize_m_w_time))
-    print('compute_static_w_time: {}'.format(compute_static_w_time))
-    print('get_time_varying_branch_characteristics_time: {}'.format(get_time_varying_branch_characteristics_time))
-    print('construct_a_t_time: {}'.format(construct_a_t_time))
-    print('factor_a_t_time: {}'.format(factor_a_t_time))
-    print('compute_w_with_t_a_solve_time: {}'.format(compute_w_with_t_a_solve_time))
-    print('compute_v_t_time: {}'.format(compute_v_t_time))
-    print('compute_w_with_t_smw_time: {}'.format(compute_w_with_t_smw_time))
-    print('compute_v_time: {}'.format(compute_v_time))
-    print('compute_bus_theta_with_t_a_solve_time: {}'.format(compute_bus_theta_with_t_a_solve_time))
-    print('compute_bus_theta_with_t_smw_time: {}'.format(compute_bus_theta_with_t_smw_time))
-    print('compute_br_p_time: {}'.format(compute_br_p_time))
-    print('apply_w_v_wt_time: {}'.format(apply_w_v_wt_time))
-    print('compute_bus_dtheta_rhs_dcl_k_time: {}'.format(compute_bus_dtheta_rhs_dcl_k_time))
-    print('compute_w_v_wt_xfr_k_time: {}'.format(compute_w_v_wt_xfr_k_time))
-    print('compute_bus_dtheta_rhs_xfr_k_time: {}'.format(compute_bus_dtheta_rhs_xfr_k_time))
-    print('compute_br_acl_delta_k_p_delta_time: {}'.format(compute_br_acl_delta_k_p_delta_time))
-    print('compute_br_dcl_delta_k_p_delta_time: {}'.format(compute_br_dcl_delta_k_p_delta_time))
-    print('compute_br_xfr_delta_k_p_delta_time: {}'.format(compute_br_xfr_delta_k_p_delta_time))
-    print('filter_branches_acl_k_time: {}'.format(filter_branches_acl_k_time))
-    print('filter_branches_dcl_k_time: {}'.format(filter_branches_dcl_k_time))
-    print('filter_branches_xfr_k_time: {}'.format(filter_branches_xfr_k_time))
-    print('compute_br_acl_delta_k_p_time: {}'.format(compute_br_acl_delta_k_p_time))
-    print('compute_br_dcl_delta_k_p_time: {}'.format(compute_br_dcl_delta_k_p_time))
-    print('compute_br_xfr_delta_k_p_time: {}'.format(compute_br_xfr_delta_k_p_time))
-    print('compute_br_acl_delta_k_s_over_time: {}'.format(compute_br_acl_delta_k_s_over_time))
-    print('compute_br_dcl_delta_k_s_over_time: {}'.format(compute_br_dcl_delta_k_s_over_time))
-    print('compute_br_xfr_delta_k_s_over_time: {}'.format(compute_br_xfr_delta_k_s_over_time))
-    print('zero_out_time: {}'.format(zero_out_time))
-    print('get_max_br_acl_delta_k_s_over_time: {}'.format(get_max_br_acl_delta_k_s_over_time))
-    print('get_max_br_dcl_delta_k_s_over_time: {}'.format(get_max_br_dcl_delta_k_s_over_time))
-    print('get_max_br_xfr_delta_k_s_over_time: {}'.format(get_max_br_xfr_delta_k_s_over_time))
-    print('compute_br_k_z_time: {}'.format(compute_br_k_z_time))
-    print('collect_penalties_into_obj_array_time: {}'.format(collect_penalties_into_obj_array_time))
-    print('end of contingency model method 1, memory info: {}'.format(utils.get_memory_info()))
+def split_data(data):
+    '''
+    arrays, sparse, other = split_data(data)
+
+    arrays - numpy arrays in data, and the data, indices, and indptr arrays of the csr and csc matrices in data
+    sparse - format and shape of the csr and csc matrices in data
+    other - everything else in data, small enough to be pickled for each process
+    '''
+
+    arrays = {}
+    sparse = {}
+    other = {}
+    for k, v in data.items():
+        if isinstance(v, numpy.ndarray):
+            arrays[k] = v
+        elif scipy.sparse.isspmatrix_csr(v) or scipy.sparse.isspmatrix_csc(v):
+            v.sort_indices() # otherwise scipy may sort them later in place, in shared memory
+            arrays[k + '.data'] = v.data
+            arrays[k + '.indices'] = v.indices
+            arrays[k + '.indptr'] = v.indptr
+            sparse[k] = (v.format, v.shape)
+        else:
+            other[k] = v
+    return arrays, sparse, other
+
+def join_data(arrays, sparse, other):
+    '''
+    inverse of split_data, without copying the arrays
+    '''
+
+    data = dict(other)
+    for k, v in arrays.items():
+        if k.split('.')[0] not in sparse:
+            data[k] = v
+    for k, (fmt, shape) in sparse.items():
+        mat_type = scipy.sparse.csr_matrix if fmt == 'csr' else scipy.sparse.csc_matrix
+        data[k] = mat_type(
+            (arrays[k + '.data'], arrays[k + '.indices'], arrays[k + '.indptr']), shape=shape, copy=False)
+    return data
+
+def get_t_lists(t_keys, num_lists):
+    '''
+    partition range(len(t_keys)) into at most num_lists lists of similar size,
+    keeping t with the same key (topology) together where this does not unbalance the lists,
+    so each process's topology cache gets as many hits as possible
+    '''
+
+    key_t_lists = collections.OrderedDict()
+    for t, key in enumerate(t_keys):
+        key_t_lists.setdefault(key, []).append(t)
+    max_list_size = -(-len(t_keys) // num_lists)
+    pieces = []
+    for key_t_list in key_t_lists.values():
+        pieces += [key_t_list[i:(i + max_list_size)] for i in range(0, len(key_t_list), max_list_size)]
+    pieces.sort(key=len, reverse=True)
+    t_lists = [[] for i in range(num_lists)]
+    for piece in pieces:
+        min(t_lists, key=len).extend(piece)
+    return [sorted(t_list) for t_list in t_lists if len(t_list) > 0]
+
+# evaluator of a worker process, with the shared memory blocks its data is in
+worker_evaluator = None
+worker_shms = None
+
+def init_worker(spec, sparse, other):
+
+    global worker_evaluator, worker_shms
+    arrays, worker_shms = utils.get_arrays_from_shared_memory(spec)
+    for v in arrays.values():
+        v.flags.writeable = False
+    # factor the static matrix here - factors cannot be pickled
+    worker_evaluator = IntervalEvaluator(join_data(arrays, sparse, other))
+
+def eval_t_list(t_list):
+
+    worker_evaluator.reset_time()
+    t_results = [worker_evaluator.eval_t(t) for t in t_list]
+    return t_results, worker_evaluator.time, os.getpid(), worker_evaluator.get_topology_cache_stats()
+
+def eval_t_parallel(data, t_keys, num_proc):
+    '''
+    t_results, eval_time, topology_cache_stats = eval_t_parallel(data, t_keys, num_proc)
+
+    evaluate each t with an IntervalEvaluator on a pool of num_proc processes.
+    the arrays in data are put in shared memory, so the processes do not each get a copy.
+    t with the same key in t_keys (topology) are sent to the same process where possible.
+
+    t_results - result of IntervalEvaluator.eval_t for each t, in order of t
+    eval_time - run time counters summed over processes
+    topology_cache_stats - topology cache stats summed over processes
+    '''
+
+    arrays, sparse, other = split_data(data)
+    spec, shms = utils.put_arrays_in_shared_memory(arrays)
+    try:
+        t_lists = get_t_lists(t_keys, num_proc)
+        print('contingency model t lists: {}'.format(t_lists))
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=len(t_lists), initializer=init_worker, initargs=(spec, sparse, other)) as executor:
+            futures = [executor.submit(eval_t_list, t_list) for t_list in t_lists]
+            worker_results = [f.result() for f in futures]
+    finally:
+        utils.close_shared_memory(shms, unlink=True)
+
+    t_results = [None for t in t_keys]
+    eval_time = collections.OrderedDict()
+    pid_topology_cache_stats = {}
+    for list_t_results, list_eval_time, pid, list_topology_cache_stats in worker_results:
+        for r in list_t_results:
+            t_results[r['t']] = r
+        for k, v in list_eval_time.items():
+            eval_time[k] = eval_time.get(k, 0.0) + v
+        # cumulative over the lists done by a process, so keep the latest
+        if (pid not in pid_topology_cache_stats or
+            list_topology_cache_stats['num_miss'] + list_topology_cache_stats['num_hit'] >
+            pid_topology_cache_stats[pid]['num_miss'] + pid_topology_cache_stats[pid]['num_hit']):
+            pid_topology_cache_stats[pid] = list_topology_cache_stats
+    topology_cache_stats = {
+        k: sum(s[k] for s in pid_topology_cache_stats.values())
+        for k in ['num_bytes', 'num_entries', 'num_hit', 'num_miss', 'num_evict']}
+    return t_results, eval_time, topology_cache_stats
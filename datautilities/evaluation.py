@@ -2,25 +2,469 @@
 Evaluation of solutions to the GO Competition Challenge 3 problem.
 '''
 
-import time
+import time, concurrent.futures
 import numpy, scipy, scipy.sparse, scipy.sparse.linalg, time
-from datautilities import arraydata, utils, ctgmodel
+from datautilities import arraydata, utils, ctgmodel, topology
+from datautilities.errors import ModelError
+
+# solution fields that SolutionEvaluator.apply_patch can change, by device type,
+# with field names as in the solution file, mapped to the evaluator's solution arrays
+PATCH_FIELDS = {
+    'bus': {
+        'vm': 'bus_t_v',
+        'va': 'bus_t_theta'},
+    'sh': {
+        'step': 'sh_t_u_st'},
+    'sd': {
+        'on_status': 'sd_t_u_on',
+        'p_on': 'sd_t_p_on',
+        'q': 'sd_t_q',
+        'p_reg_res_up': 'sd_t_p_rgu',
+        'p_reg_res_down': 'sd_t_p_rgd',
+        'p_syn_res': 'sd_t_p_scr',
+        'p_nsyn_res': 'sd_t_p_nsc',
+        'p_ramp_res_up_online': 'sd_t_p_rru_on',
+        'p_ramp_res_down_online': 'sd_t_p_rrd_on',
+        'p_ramp_res_up_offline': 'sd_t_p_rru_off',
+        'p_ramp_res_down_offline': 'sd_t_p_rrd_off',
+        'q_res_up': 'sd_t_q_qru',
+        'q_res_down': 'sd_t_q_qrd'},
+    'acl': {
+        'on_status': 'acl_t_u_on'},
+    'dcl': {
+        'pdc_fr': 'dcl_t_p',
+        'qdc_fr': 'dcl_t_q_fr',
+        'qdc_to': 'dcl_t_q_to'},
+    'xfr': {
+        'on_status': 'xfr_t_u_on',
+        'tm': 'xfr_t_tau',
+        'ta': 'xfr_t_phi'},
+}
+
+# patch fields with integer values, as in the solution data model, and the values allowed, None for any
+PATCH_INT_FIELDS = {
+    'step': None,
+    'on_status': [0, 1],
+}
+
+# matrices set by SolutionEvaluator.set_matrices, depending only on the problem
+MATRIX_NAMES = [
+    'bus_sd_inj_mat',
+    'bus_sh_inj_mat',
+    'bus_acl_fr_inj_mat',
+    'bus_acl_to_inj_mat',
+    'bus_dcl_fr_inj_mat',
+    'bus_dcl_to_inj_mat',
+    'bus_xfr_fr_inj_mat',
+    'bus_xfr_to_inj_mat',
+    'prz_sd_inc_mat',
+    'qrz_sd_inc_mat',
+    'sd_max_startup_w_mat',
+    'sd_max_energy_w_mat',
+    'sd_min_energy_w_mat',
+]
+
+# working arrays set by SolutionEvaluator.set_work_zero, holding intermediate values within an eval function.
+# a step of SolutionEvaluator.run on a thread gets its own copies (see RunStepView)
+WORK_NAMES = [
+    'bus_float', 'sh_float', 'sd_float', 'acl_float', 'dcl_float', 'xfr_float', 'prz_float', 'qrz_float',
+    't_float', 't_float_1', 'k_float',
+    'bus_int', 'sh_int', 'sd_int', 'acl_int', 'dcl_int', 'xfr_int', 'prz_int', 'qrz_int',
+    't_int', 't_int_1', 't_int_2', 'k_int',
+    'sd_t_int', 'sd_t_float', 'sd_t_float_1', 'sd_t_float_2',
+    'pr_t_float', 'cs_t_float',
+    'bus_t_float', 'bus_t_float_1',
+    'sh_t_int', 'sh_t_float',
+    'dcl_t_float',
+    'acl_t_int', 'acl_t_float', 'acl_t_float_1', 'acl_t_float_2',
+    'xfr_t_int', 'xfr_t_float', 'xfr_t_float_1', 'xfr_t_float_2',
+    'prz_t_float', 'prz_t_float_1', 'prz_t_float_2',
+    'qrz_t_float', 'qrz_t_float_1', 'qrz_t_float_2',
+]
+
+# steps of SolutionEvaluator.run, in serial order.
+# each step runs its eval functions in order, sharing working arrays between them,
+# and declares the evaluator attributes it reads from ('in') and writes for ('out') other steps.
+# a step follows an earlier step if one reads or writes what the other writes,
+# so steps with no such overlap can run concurrently, with the same results as in serial order.
+# violations and costs read only by the last step are not declared. 'in': None means after all earlier steps
+RUN_STEPS = [
+    {'name': 'sd_u_on',
+     'eval': ['eval_sd_t_u_on_max', 'eval_sd_t_u_on_min', 'eval_sd_t_d_up_dn', 'eval_sd_t_u_su_sd'],
+     'in': ['sd_t_u_on'],
+     'out': ['sd_t_d_up_start', 'sd_t_d_dn_start', 'sd_t_u_su', 'sd_t_u_sd']},
+    {'name': 'sd_u_on_constr',
+     'eval': ['eval_sd_t_d_up_min', 'eval_sd_t_d_dn_min', 'eval_sd_max_startup'],
+     'in': ['sd_t_d_up_start', 'sd_t_d_dn_start', 'sd_t_u_su', 'sd_t_u_sd'],
+     'out': []},
+    {'name': 'sd_z_on',
+     'eval': ['eval_sd_t_z_on', 'eval_sd_t_z_su', 'eval_sd_t_z_sd', 'eval_sd_t_z_sus'],
+     'in': ['sd_t_u_on', 'sd_t_u_su', 'sd_t_u_sd', 'sd_t_d_dn_start'],
+     'out': ['sd_t_z']},
+    {'name': 'bus_v',
+     'eval': ['eval_bus_t_v_max', 'eval_bus_t_v_min'],
+     'in': ['bus_t_v'],
+     'out': []},
+    {'name': 'sh',
+     'eval': ['eval_sh_t_u_st_max', 'eval_sh_t_u_st_min', 'eval_sh_t_p_q'],
+     'in': ['sh_t_u_st', 'bus_t_v'],
+     'out': ['sh_t_p', 'sh_t_q']},
+    {'name': 'dcl',
+     'eval': [
+         'eval_dcl_t_p_max', 'eval_dcl_t_p_min', 'eval_dcl_t_q_fr_max', 'eval_dcl_t_q_fr_min',
+         'eval_dcl_t_q_to_max', 'eval_dcl_t_q_to_min'],
+     'in': ['dcl_t_p', 'dcl_t_q_fr', 'dcl_t_q_to'],
+     'out': []},
+    {'name': 'xfr_control',
+     'eval': ['eval_xfr_t_tau_max', 'eval_xfr_t_tau_min', 'eval_xfr_t_phi_max', 'eval_xfr_t_phi_min'],
+     'in': ['xfr_t_tau', 'xfr_t_phi'],
+     'out': []},
+    {'name': 'acl_switch',
+     'eval': ['eval_acl_t_u_su', 'eval_acl_t_u_sd'],
+     'in': ['acl_t_u_on'],
+     'out': []},
+    {'name': 'xfr_switch',
+     'eval': ['eval_xfr_t_u_su', 'eval_xfr_t_u_sd'],
+     'in': ['xfr_t_u_on'],
+     'out': []},
+    {'name': 'acl_flow',
+     'eval': ['eval_acl_t_p_q_fr_to', 'eval_acl_t_s_max_fr_to'],
+     'in': ['acl_t_u_on', 'bus_t_v', 'bus_t_theta'],
+     'out': ['acl_t_p_fr', 'acl_t_p_to', 'acl_t_q_fr', 'acl_t_q_to']},
+    {'name': 'xfr_flow',
+     'eval': ['eval_xfr_t_p_q_fr_to', 'eval_xfr_t_s_max_fr_to'],
+     'in': ['xfr_t_u_on', 'xfr_t_tau', 'xfr_t_phi', 'bus_t_v', 'bus_t_theta'],
+     'out': ['xfr_t_p_fr', 'xfr_t_p_to', 'xfr_t_q_fr', 'xfr_t_q_to']},
+    {'name': 'sd_su_sd_trajectories',
+     'eval': ['eval_sd_t_su_sd_trajectories'],
+     'in': ['sd_t_u_on', 'sd_t_u_su', 'sd_t_u_sd'],
+     'out': ['sd_t_p_su', 'sd_t_p_sd', 'sd_t_u_on_su_sd']},
+    {'name': 'sd_p_on_off',
+     'eval': [
+         'eval_pr_t_p_on_max', 'eval_cs_t_p_on_max', 'eval_pr_t_p_on_min', 'eval_cs_t_p_on_min',
+         'eval_pr_t_p_off_max', 'eval_cs_t_p_off_max', 'eval_pr_t_p_off_min', 'eval_cs_t_p_off_min'],
+     'in': [
+         'sd_t_u_on', 'sd_t_p_on', 'sd_t_p_su', 'sd_t_p_sd', 'sd_t_p_rgu', 'sd_t_p_rgd', 'sd_t_p_scr', 'sd_t_p_nsc',
+         'sd_t_p_rru_on', 'sd_t_p_rrd_on', 'sd_t_p_rru_off', 'sd_t_p_rrd_off'],
+     'out': []},
+    {'name': 'sd_p',
+     'eval': ['eval_sd_t_p'],
+     'in': ['sd_t_p_on', 'sd_t_p_su', 'sd_t_p_sd'],
+     'out': ['sd_t_p']},
+    {'name': 'sd_p_ramp_energy',
+     'eval': ['eval_sd_t_p_ramp_up_dn', 'eval_sd_max_energy', 'eval_sd_min_energy'],
+     'in': ['sd_t_p', 'sd_t_u_on', 'sd_t_u_su'],
+     'out': []},
+    {'name': 'sd_res',
+     'eval': [
+         'eval_sd_t_p_rgu_nonneg', 'eval_sd_t_p_rgd_nonneg', 'eval_sd_t_p_scr_nonneg', 'eval_sd_t_p_nsc_nonneg',
+         'eval_sd_t_p_rru_on_nonneg', 'eval_sd_t_p_rru_off_nonneg', 'eval_sd_t_p_rrd_on_nonneg',
+         'eval_sd_t_p_rrd_off_nonneg', 'eval_sd_t_q_qru_nonneg', 'eval_sd_t_q_qrd_nonneg',
+         'eval_sd_t_p_rgu_max', 'eval_sd_t_p_rgd_max', 'eval_sd_t_p_scr_max', 'eval_sd_t_p_nsc_max',
+         'eval_sd_t_p_rru_on_max', 'eval_sd_t_p_rrd_on_max', 'eval_sd_t_p_rru_off_max', 'eval_sd_t_p_rrd_off_max'],
+     'in': [
+         'sd_t_u_on', 'sd_t_p_rgu', 'sd_t_p_rgd', 'sd_t_p_scr', 'sd_t_p_nsc', 'sd_t_p_rru_on', 'sd_t_p_rrd_on',
+         'sd_t_p_rru_off', 'sd_t_p_rrd_off', 'sd_t_q_qru', 'sd_t_q_qrd'],
+     'out': []},
+    {'name': 'sd_q',
+     'eval': [
+         'eval_pr_t_q_max', 'eval_pr_t_q_min', 'eval_pr_t_q_p_max', 'eval_pr_t_q_p_min',
+         'eval_cs_t_q_max', 'eval_cs_t_q_min', 'eval_cs_t_q_p_max', 'eval_cs_t_q_p_min'],
+     'in': ['sd_t_u_on_su_sd', 'sd_t_p', 'sd_t_q', 'sd_t_q_qru', 'sd_t_q_qrd'],
+     'out': []},
+    {'name': 'sd_z_p',
+     'eval': ['eval_sd_t_z_p'],
+     'in': ['sd_t_p'],
+     'out': []},
+    {'name': 'sd_z_res',
+     'eval': [
+         'eval_sd_t_z_rgu', 'eval_sd_t_z_rgd', 'eval_sd_t_z_scr', 'eval_sd_t_z_nsc', 'eval_sd_t_z_rru_on',
+         'eval_sd_t_z_rrd_on', 'eval_sd_t_z_rru_off', 'eval_sd_t_z_rrd_off', 'eval_sd_t_z_qru', 'eval_sd_t_z_qrd'],
+     'in': [
+         'sd_t_p_rgu', 'sd_t_p_rgd', 'sd_t_p_scr', 'sd_t_p_nsc', 'sd_t_p_rru_on', 'sd_t_p_rrd_on',
+         'sd_t_p_rru_off', 'sd_t_p_rrd_off', 'sd_t_q_qru', 'sd_t_q_qrd'],
+     'out': []},
+    {'name': 'bus_p',
+     'eval': ['eval_bus_t_p'],
+     'in': ['sd_t_p', 'sh_t_p', 'acl_t_p_fr', 'acl_t_p_to', 'dcl_t_p', 'xfr_t_p_fr', 'xfr_t_p_to'],
+     'out': []},
+    {'name': 'bus_q',
+     'eval': ['eval_bus_t_q'],
+     'in': ['sd_t_q', 'sh_t_q', 'acl_t_q_fr', 'acl_t_q_to', 'dcl_t_q_fr', 'dcl_t_q_to', 'xfr_t_q_fr', 'xfr_t_q_to'],
+     'out': []},
+    # rgu -> scr -> nsc share prz_t_float_1 and need to be in this order, in one step
+    {'name': 'prz',
+     'eval': [
+         'eval_prz_t_z_rgu', 'eval_prz_t_z_rgd', 'eval_prz_t_z_scr', 'eval_prz_t_z_nsc',
+         'eval_prz_t_z_rru', 'eval_prz_t_z_rrd'],
+     'in': [
+         'sd_t_p', 'sd_t_p_rgu', 'sd_t_p_rgd', 'sd_t_p_scr', 'sd_t_p_nsc', 'sd_t_p_rru_on', 'sd_t_p_rrd_on',
+         'sd_t_p_rru_off', 'sd_t_p_rrd_off'],
+     'out': []},
+    {'name': 'qrz',
+     'eval': ['eval_qrz_t_z_qru', 'eval_qrz_t_z_qrd'],
+     'in': ['sd_t_q_qru', 'sd_t_q_qrd'],
+     'out': []},
+    {'name': 'connectedness',
+     'eval': ['eval_connectedness'],
+     'in': ['acl_t_u_on', 'xfr_t_u_on'],
+     'out': ['viol_t_connected_base', 'viol_t_connected_ctg']},
+    {'name': 'post_contingency',
+     'eval': ['eval_post_contingency_model'],
+     'in': [
+         'viol_t_connected_base', 'viol_t_connected_ctg', 'acl_t_u_on', 'xfr_t_u_on', 'xfr_t_phi', 'sd_t_p', 'sh_t_p',
+         'dcl_t_p', 'acl_t_q_fr', 'acl_t_q_to', 'xfr_t_q_fr', 'xfr_t_q_to'],
+     'out': ['t_k_z']},
+    {'name': 'objective',
+     'eval': [
+         'eval_t_k_z', 'eval_t_z_base', 'eval_t_z_k_worst_case', 'eval_t_z_k_average_case', 'eval_t_z',
+         'eval_z_max_energy', 'eval_z_min_energy', 'eval_z_value', 'eval_switches', 'eval_z_cost', 'eval_z_penalty',
+         'eval_z_base', 'eval_z_k_worst_case', 'eval_z_k_average_case', 'eval_z', 'eval_infeas'],
+     'in': None,
+     'out': []},
+]
+
+def get_matrices(problem, config):
+    '''
+    the sparse matrices of MATRIX_NAMES, as a dict,
+    depending only on the problem and config, e.g. to set them in SolutionEvaluator or keep them in a problem cache
+    '''
+
+    matrices = {}
+    matrices['bus_sd_inj_mat'] = scipy.sparse.csr_matrix(
+        (problem.sd_is_pr - problem.sd_is_cs,
+         #[1.0 for i in range(problem.num_sd)],
+         #numpy.ones(shape=(problem.num_sd, )),
+         (problem.sd_bus,
+          range(problem.num_sd))),
+        (problem.num_bus, problem.num_sd))
+    matrices['bus_sh_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_sh, )),
+         (problem.sh_bus,
+          range(problem.num_sh))),
+        (problem.num_bus, problem.num_sh))
+    matrices['bus_acl_fr_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_acl, )),
+         (problem.acl_fbus,
+          range(problem.num_acl))),
+        (problem.num_bus, problem.num_acl))
+    matrices['bus_acl_to_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_acl, )),
+         (problem.acl_tbus,
+          range(problem.num_acl))),
+        (problem.num_bus, problem.num_acl))
+    matrices['bus_dcl_fr_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_dcl, )),
+         (problem.dcl_fbus,
+          range(problem.num_dcl))),
+        (problem.num_bus, problem.num_dcl))
+    matrices['bus_dcl_to_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_dcl, )),
+         (problem.dcl_tbus,
+          range(problem.num_dcl))),
+        (problem.num_bus, problem.num_dcl))
+    matrices['bus_xfr_fr_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_xfr, )),
+         (problem.xfr_fbus,
+          range(problem.num_xfr))),
+        (problem.num_bus, problem.num_xfr))
+    matrices['bus_xfr_to_inj_mat'] = scipy.sparse.csr_matrix(
+        (-1.0 * numpy.ones(shape=(problem.num_xfr, )),
+         (problem.xfr_tbus,
+          range(problem.num_xfr))),
+        (problem.num_bus, problem.num_xfr))
+    matrices['prz_sd_inc_mat'] = scipy.sparse.csr_matrix(
+        (numpy.ones(shape=(numpy.sum(problem.prz_num_sd), )),
+         ([i for i in range(problem.num_prz) for j in problem.prz_sd_list[i]],
+          [j for i in range(problem.num_prz) for j in problem.prz_sd_list[i]])),
+        (problem.num_prz, problem.num_sd))
+    matrices['qrz_sd_inc_mat'] = scipy.sparse.csr_matrix(
+        (numpy.ones(shape=(numpy.sum(problem.qrz_num_sd), )),
+         ([i for i in range(problem.num_qrz) for j in problem.qrz_sd_list[i]],
+          [j for i in range(problem.num_qrz) for j in problem.qrz_sd_list[i]])),
+        (problem.num_qrz, problem.num_sd))
+
+    # multi-interval window constraints of sd
+    # an interval is in a startup window if its start is in [a_start, a_end),
+    # and in an energy window if its midpoint is in (a_start, a_end], up to time_eq_tol
+    tol = config['time_eq_tol']
+    matrices['sd_max_startup_w_mat'] = get_sd_w_mat(
+        problem,
+        problem.sd_max_startup_w_sd,
+        numpy.logical_and(
+            numpy.less_equal(
+                numpy.reshape(problem.sd_max_startup_w_a_start - tol, newshape=(-1, 1)),
+                problem.t_a_start),
+            numpy.less(
+                problem.t_a_start,
+                numpy.reshape(problem.sd_max_startup_w_a_end - tol, newshape=(-1, 1)))),
+        numpy.ones(shape=(problem.num_t, ), dtype=int))
+    matrices['sd_max_energy_w_mat'] = get_sd_w_mat(
+        problem,
+        problem.sd_max_energy_w_sd,
+        numpy.logical_and(
+            numpy.less(
+                numpy.reshape(problem.sd_max_energy_w_a_start + tol, newshape=(-1, 1)),
+                problem.t_a_mid),
+            numpy.less_equal(
+                problem.t_a_mid,
+                numpy.reshape(problem.sd_max_energy_w_a_end + tol, newshape=(-1, 1)))),
+        problem.t_d)
+    matrices['sd_min_energy_w_mat'] = get_sd_w_mat(
+        problem,
+        problem.sd_min_energy_w_sd,
+        numpy.logical_and(
+            numpy.less(
+                numpy.reshape(problem.sd_min_energy_w_a_start + tol, newshape=(-1, 1)),
+                problem.t_a_mid),
+            numpy.less_equal(
+                problem.t_a_mid,
+                numpy.reshape(problem.sd_min_energy_w_a_end + tol, newshape=(-1, 1)))),
+        problem.t_d)
+
+    return matrices
+
+def get_matrices_arrays(matrices):
+    '''
+    arrays, shapes = get_matrices_arrays(matrices)
+
+    the matrices of get_matrices as flat numpy arrays, name + '.data', '.indices', and '.indptr' of each,
+    and their shapes, e.g. to keep them in shared memory or in files, and back with get_matrices_from_arrays
+    '''
+
+    arrays = {}
+    shapes = {}
+    for k, v in matrices.items():
+        v = scipy.sparse.csr_matrix(v)
+        for a in ['data', 'indices', 'indptr']:
+            arrays['{}.{}'.format(k, a)] = getattr(v, a)
+        shapes[k] = v.shape
+    return arrays, shapes
+
+def get_matrices_from_arrays(arrays, shapes):
+    '''
+    the matrices from get_matrices_arrays output, without copying the arrays
+    '''
+
+    return {
+        k: scipy.sparse.csr_matrix(
+            (arrays[k + '.data'], arrays[k + '.indices'], arrays[k + '.indptr']), shape=tuple(shape))
+        for k, shape in shapes.items()}
+
+def get_sd_w_mat(problem, w_sd, w_t_in, t_val):
+    '''
+    incidence of sd window constraints and intervals,
+    as a sparse matrix with a row for each window and a column for each sd-interval pair (i, j), column i * num_t + j,
+    so that the product with a flattened sd-t array sums it over each window
+
+    w_sd - device of each window
+    w_t_in - bool array, w_t_in[w, j] if interval j is in window w
+    t_val - matrix entry for each interval, e.g. duration to sum power into energy
+    '''
+
+    w, t = numpy.nonzero(w_t_in)
+    return scipy.sparse.csr_matrix(
+        (t_val[t], (w, w_sd[w] * problem.num_t + t)),
+        shape=(w_sd.size, problem.num_sd * problem.num_t))
+
+def get_run_step_deps(steps):
+    '''
+    deps[i] = set of the earlier steps that step i must follow, as declared in RUN_STEPS
+    '''
+
+    deps = []
+    for i, step in enumerate(steps):
+        deps.append(set())
+        for j in range(i):
+            if step['in'] is None or steps[j]['in'] is None:
+                deps[i].add(j)
+                continue
+            step_in = set(step['in'])
+            step_out = set(step['out'])
+            if (step_in & set(steps[j]['out'])) or (step_out & set(steps[j]['in'])) or (step_out & set(steps[j]['out'])):
+                deps[i].add(j)
+    return deps
+
+RUN_STEP_DEPS = get_run_step_deps(RUN_STEPS)
+
+def get_run_steps_after(steps, changed):
+    '''
+    the steps to run after a change to the evaluator attributes in changed, as indices into steps, in order,
+    i.e. the steps reading a changed attribute or one written by an earlier step to run, and those with 'in': None.
+    the other steps would give the same results as before
+    '''
+
+    changed = set(changed)
+    steps_after = []
+    for i, step in enumerate(steps):
+        if step['in'] is None or (changed & set(step['in'])):
+            steps_after.append(i)
+            changed.update(step['out'])
+    return steps_after
+
+class RunStepView(object):
+    '''
+    A SolutionEvaluator as seen by one step of run on a thread.
+    Working arrays (WORK_NAMES) belong to the view, allocated on first use and kept for later runs,
+    so concurrent steps do not share them. Everything else is read from and written to the evaluator,
+    and evaluator methods are bound to the view, so the eval functions run on it unchanged.
+    '''
+
+    def __init__(self, evaluator):
+
+        object.__setattr__(self, 'evaluator', evaluator)
+        object.__setattr__(self, 'work', {})
+
+    def __getattr__(self, name):
+
+        if name in WORK_NAMES:
+            if name not in self.work:
+                self.work[name] = numpy.zeros_like(getattr(self.evaluator, name))
+            return self.work[name]
+        value = getattr(self.evaluator, name)
+        if getattr(value, '__self__', None) is self.evaluator:
+            return getattr(type(self.evaluator), name).__get__(self)
+        return value
+
+    def __setattr__(self, name, value):
+
+        if name in WORK_NAMES:
+            self.work[name] = value
+        else:
+            setattr(self.evaluator, name, value)
 
 class SolutionEvaluator(object):
 
     @utils.timeit
-    def __init__(self, problem, solution, config={}):
+    def __init__(self, problem, solution, config={}, shared=None):
+        '''
+        shared - dict of data depending only on the problem and config, filled in by the first evaluator using it,
+            so that evaluators of several solutions to the same problem, as in batch evaluation, can reuse it.
+            None for no sharing
+        '''
         
         self.config = config
-        self.set_summary()
+        self.shared = shared
         self.set_problem(problem)
+        self.set_summary()
         self.set_solution(solution)
         self.set_solution_zero()
         self.set_work_zero()
         self.set_matrices()
+        self.set_topology()
 
     @utils.timeit
-    def run(self):
+    def run(self, connectedness_t_list=None, update_post_contingency_model=False, steps=None):
+        '''
+        evaluate the solution
+
+        connectedness_t_list - evaluate connectedness only in these t, e.g. when re-evaluating after apply_patch.
+            None for all t
+        update_post_contingency_model - evaluate the post-contingency model only in the t that changed
+            since the last evaluation (see ctgmodel.update_post_contingency_model)
+        steps - run only these steps of RUN_STEPS, as indices in order, keeping the results of an earlier run
+            for the others, e.g. from get_run_steps_after. None for all steps
+        '''
 
         start_time = time.time()
         # todo performance - which functions are expensive here and elsewhere - how bad does it get for larger data
@@ -28,188 +472,135 @@ class SolutionEvaluator(object):
         # todo add projections
         # * use the ones we have when config['do_proj']==True
         # * implement the SD ones
-
-        # simple dispatchable device
-        # on/off state
-        self.eval_sd_t_u_on_max()
-        self.eval_sd_t_u_on_min()
-        self.eval_sd_t_d_up_dn()
-        self.eval_sd_t_u_su_sd()
-        self.eval_sd_t_d_up_min()
-        self.eval_sd_t_d_dn_min()
-        self.eval_sd_t_z_on()
-        self.eval_sd_t_z_su()
-        self.eval_sd_t_z_sd()
-        self.eval_sd_max_startup()
-        self.eval_sd_t_z_sus()
-
-        # bus voltage
-        self.eval_bus_t_v_max()
-        self.eval_bus_t_v_min()
-        #self.proj_bus_t_v_max()
-        #self.proj_bus_t_v_min()
-
-        # shunts
-        # no proj needed because integer
-        self.eval_sh_t_u_st_max()
-        self.eval_sh_t_u_st_min()
-        self.eval_sh_t_p_q()
-
-        # DC line bounds
-        self.eval_dcl_t_p_max()
-        self.eval_dcl_t_p_min()
-        #self.proj_dcl_t_p_max()
-        #self.proj_dcl_t_p_min()
-        self.eval_dcl_t_q_fr_max()
-        self.eval_dcl_t_q_fr_min()
-        #self.proj_dcl_t_q_fr_max()
-        #self.proj_dcl_t_q_fr_min()
-        self.eval_dcl_t_q_to_max()
-        self.eval_dcl_t_q_to_min()
-        #self.proj_dcl_t_q_to_max()
-        #self.proj_dcl_t_q_to_min()
-
-        # transformer controls
-        self.eval_xfr_t_tau_max()
-        self.eval_xfr_t_tau_min()
-        #self.proj_xfr_t_tau_max()
-        #self.proj_xfr_t_tau_min()
-        self.eval_xfr_t_phi_max()
-        self.eval_xfr_t_phi_min()
-        #self.proj_xfr_t_phi_max()
-        #self.proj_xfr_t_phi_min()
-
-        # AC branch switching
-        self.eval_acl_t_u_su()
-        self.eval_acl_t_u_sd()
-        self.eval_xfr_t_u_su()
-        self.eval_xfr_t_u_sd()
-
-        # AC branch p/q
-        self.eval_acl_t_p_q_fr_to()
-        self.eval_xfr_t_p_q_fr_to()
-
-        # AC branch s max
-        self.eval_acl_t_s_max_fr_to()
-        self.eval_xfr_t_s_max_fr_to()
-
-        #self.eval_acl_t_u_su_sd_test()
-
-        # simple dispatchable device
-        # p_on, p_su, p_sd, q
-        # bounds and constraints - no projection yet
-        self.eval_sd_t_su_sd_trajectories()
-        self.eval_pr_t_p_on_max()
-        self.eval_cs_t_p_on_max()
-        self.eval_pr_t_p_on_min()
-        self.eval_cs_t_p_on_min()
-        self.eval_pr_t_p_off_max()
-        self.eval_cs_t_p_off_max()
-        self.eval_pr_t_p_off_min()
-        self.eval_cs_t_p_off_min()
-        self.eval_sd_t_p()
-        self.eval_sd_t_p_ramp_up_dn()
-        self.eval_sd_max_energy()
-        self.eval_sd_min_energy()
-        self.eval_sd_t_p_rgu_nonneg()
-        self.eval_sd_t_p_rgd_nonneg()
-        self.eval_sd_t_p_scr_nonneg()
-        self.eval_sd_t_p_nsc_nonneg()
-        self.eval_sd_t_p_rru_on_nonneg()
-        self.eval_sd_t_p_rru_off_nonneg()
-        self.eval_sd_t_p_rrd_on_nonneg()
-        self.eval_sd_t_p_rrd_off_nonneg()
-        self.eval_sd_t_q_qru_nonneg()
-        self.eval_sd_t_q_qrd_nonneg()
-        self.eval_sd_t_p_rgu_max()
-        self.eval_sd_t_p_rgd_max()
-        self.eval_sd_t_p_scr_max()
-        self.eval_sd_t_p_nsc_max()
-        self.eval_sd_t_p_rru_on_max()
-        self.eval_sd_t_p_rrd_on_max()
-        self.eval_sd_t_p_rru_off_max()
-        self.eval_sd_t_p_rrd_off_max()
-        self.eval_pr_t_q_max()
-        self.eval_pr_t_q_min()
-        self.eval_pr_t_q_p_max()
-        self.eval_pr_t_q_p_min()
-        self.eval_cs_t_q_max()
-        self.eval_cs_t_q_min()
-        self.eval_cs_t_q_p_max()
-        self.eval_cs_t_q_p_min()
-
         # have to project p_on down onto [u_on*p_min, u_on*p_max] to make sense of reserves
         # could account for ramping, max/min energy, and p-q constraints in projection
         # on computing p_max_final and p_min_final, if p_min_final > p_max_final + tol, declare infeas
-        #self.proj_sd_t_p_on()
-        # then recompute p from p_on, p_su, p_sd based on projected p_on
-        #self.eval_sd_t_p()
-        # then project q
-        #self.proj_sd_t_q()
 
-        # simple dispatchable device
-        # dispatch costs
-        self.eval_sd_t_z_p()
-        # order needs to be: rgu -> scr -> nsc
-        # other reserve computations are mutually independent
-        self.eval_sd_t_z_rgu()
-        self.eval_sd_t_z_rgd()
-        self.eval_sd_t_z_scr()
-        self.eval_sd_t_z_nsc()
-        self.eval_sd_t_z_rru_on()
-        self.eval_sd_t_z_rrd_on()
-        self.eval_sd_t_z_rru_off()
-        self.eval_sd_t_z_rrd_off()
-        self.eval_sd_t_z_qru()
-        self.eval_sd_t_z_qrd()
+        # the eval functions are run in the steps of RUN_STEPS,
+        # in serial order, or on config['run_num_threads'] threads as the steps they follow finish
+        args = {
+            'eval_connectedness': (connectedness_t_list, ),
+            'eval_post_contingency_model': (update_post_contingency_model, )}
+        if steps is None:
+            steps = range(len(RUN_STEPS))
+        if self.config['run_num_threads'] > 1:
+            self.run_steps_threaded(args, steps)
+        else:
+            for i in steps:
+                self.run_step(self, RUN_STEPS[i], args)
 
-        # simple dispatchable device
-        # max/min energy soft constraint violation costs
-        # todo - maybe
-
-        # bus p/q balance
-        self.eval_bus_t_p()
-        self.eval_bus_t_q()
-
-        # zonal reserve balance
-        self.eval_prz_t_z_rgu()
-        self.eval_prz_t_z_rgd()
-        self.eval_prz_t_z_scr()
-        self.eval_prz_t_z_nsc()
-        self.eval_prz_t_z_rru()
-        self.eval_prz_t_z_rrd()
-        self.eval_qrz_t_z_qru()
-        self.eval_qrz_t_z_qrd()
-
-        # connectedness - each time interval, base case and contingencies
-        self.eval_connectedness()
-
-        # contingency DC power flow solve
-        self.eval_post_contingency_model()
-
-        # objective - net market surplus
-        self.eval_t_k_z()
-        self.eval_t_z_base()
-        self.eval_t_z_k_worst_case()
-        self.eval_t_z_k_average_case()
-        self.eval_t_z()
-        self.eval_z_max_energy()
-        self.eval_z_min_energy()
-        self.eval_z_value()
-        self.eval_switches()
-        self.eval_z_cost()
-        self.eval_z_penalty()
-        self.eval_z_base()
-        self.eval_z_k_worst_case()
-        self.eval_z_k_average_case()
-        self.eval_z()
-
-        # feasibility determination
-        self.eval_infeas()
-        
         end_time = time.time()
         self.time_run = end_time - start_time
 
+    def run_step(self, target, step, args):
+        '''
+        run the eval functions of a step of RUN_STEPS on target, the evaluator or a RunStepView of it
+        '''
+
+        for name in step['eval']:
+            getattr(target, name)(*args.get(name, ()))
+
+    def run_steps_threaded(self, args, steps):
+        '''
+        run the steps of RUN_STEPS in steps on a thread pool, each step on its own RunStepView,
+        starting a step when the steps it follows (RUN_STEP_DEPS) have finished or are not in steps.
+        the steps running at the same time do not read or write what another one writes,
+        so the results are the same as in serial order
+        '''
+
+        if self.run_step_views is None:
+            self.run_step_views = [RunStepView(self) for step in RUN_STEPS]
+        num_steps = len(RUN_STEPS)
+        waiting = list(steps)
+        running = {}
+        finished = set(range(num_steps)) - set(steps)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.config['run_num_threads']) as executor:
+            while len(finished) < num_steps:
+                ready = [i for i in waiting if RUN_STEP_DEPS[i] <= finished]
+                for i in ready:
+                    waiting.remove(i)
+                    running[executor.submit(self.run_step, self.run_step_views[i], RUN_STEPS[i], args)] = i
+                done, not_done = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    future.result() # raises an exception from the step
+                    finished.add(running.pop(future))
+
+    @utils.timeit
+    def apply_patch(self, patch):
+        '''
+        change some values of the solution and re-evaluate it.
+        run must have been called first.
+
+        patch - list of (uid, t, field, value), with field as in the solution file,
+            e.g. [(sd_uid, 3, 'p_on', 1.25), (acl_uid, 3, 'on_status', 0)]
+
+        returns (z, infeas_summary), as from get_obj and get_infeas_summary
+
+        the whole patch is checked before any value is changed, and a ModelError is raised if any entry is malformed,
+        i.e. an unknown uid or field, t not an int in [0, num_t), or a value not of the type of the field
+        in the solution data model, so a malformed patch leaves the solution unchanged.
+
+        the solution arrays are changed in place, so the OutputData the evaluator was constructed with changes too.
+        only the steps of RUN_STEPS reading a changed array, directly or through another step, are rerun.
+        connectedness is re-evaluated only in the t where an AC branch is switched,
+        and the post-contingency model only in the t whose injections or branch data change.
+        the other steps are vectorized over all t and are redone in full,
+        as a change in one t can affect others through ramping, startup/shutdown, min up/down time, and energy
+        '''
+
+        patch_idx = [self.get_patch_idx(entry) for entry in patch]
+
+        changed = set()
+        connectedness_t = set()
+        for (uid, t, field, value), (name, i) in zip(patch, patch_idx):
+            arr = getattr(self, name)
+            if arr[i, t] == value:
+                continue
+            arr[i, t] = value
+            changed.add(name)
+            if name in ['acl_t_u_on', 'xfr_t_u_on']:
+                connectedness_t.add(t)
+
+        steps = get_run_steps_after(RUN_STEPS, changed)
+        print('apply patch. changed: {}, steps run: {}'.format(sorted(changed), [RUN_STEPS[i]['name'] for i in steps]))
+        self.run(connectedness_t_list=sorted(connectedness_t), update_post_contingency_model=True, steps=steps)
+        return self.get_obj(), self.get_infeas_summary()
+
+    def get_patch_idx(self, entry):
+        '''
+        (name, i) - the solution array changed by a patch entry (uid, t, field, value) of apply_patch, and the row of uid.
+        raises ModelError if the entry is malformed
+        '''
+
+        if not isinstance(entry, (tuple, list)) or len(entry) != 4:
+            raise ModelError('patch entry is not (uid, t, field, value): {}'.format(entry))
+        uid, t, field, value = entry
+        dev_type = None
+        for k in PATCH_FIELDS.keys():
+            if isinstance(uid, str) and uid in getattr(self.problem, k + '_map'):
+                dev_type = k
+                break
+        if dev_type is None:
+            raise ModelError('patch uid not found in problem: {}'.format(uid))
+        if field not in PATCH_FIELDS[dev_type]:
+            raise ModelError('patch field not in {} for {} uid {}: {}'.format(
+                list(PATCH_FIELDS[dev_type].keys()), dev_type, uid, field))
+        if isinstance(t, bool) or not isinstance(t, (int, numpy.integer)) or not (0 <= t < self.problem.num_t):
+            raise ModelError('patch t not an int in [0, {}) for uid {}, field {}: {}'.format(
+                self.problem.num_t, uid, field, t))
+        if field in PATCH_INT_FIELDS:
+            if isinstance(value, bool) or not isinstance(value, (int, numpy.integer)):
+                raise ModelError('patch value not an int for uid {}, t {}, field {}: {}'.format(uid, t, field, value))
+            if PATCH_INT_FIELDS[field] is not None and value not in PATCH_INT_FIELDS[field]:
+                raise ModelError('patch value not in {} for uid {}, t {}, field {}: {}'.format(
+                    PATCH_INT_FIELDS[field], uid, t, field, value))
+        else:
+            if isinstance(value, bool) or not isinstance(value, (int, float, numpy.integer, numpy.floating)):
+                raise ModelError('patch value not a number for uid {}, t {}, field {}: {}'.format(uid, t, field, value))
+            if not numpy.isfinite(value):
+                raise ModelError('patch value not finite for uid {}, t {}, field {}: {}'.format(uid, t, field, value))
+        return PATCH_FIELDS[dev_type][field], getattr(self.problem, dev_type + '_map')[uid]
+
     @utils.timeit
     def set_summary(self):
 
@@ -842,11 +1233,35 @@ class SolutionEvaluator(object):
              'num_indices': 0},
         ]
 
+        # multi-element contingency items only if there are multi-element contingencies,
+        # so the summary of a problem without them has the same items as before they were modeled
+        if numpy.any(self.problem.k_num_out > 1):
+            i = [i['key'] for i in self.summary_structure].index('viol_xfr_xfr_t_s_max_ctg') + 1
+            self.summary_structure[i:i] = [
+                {'key': 'viol_acl_multi_t_s_max_ctg',
+                 'val_type': float,
+                 'tol': None,
+                 'num_indices': 2},
+                {'key': 'viol_xfr_multi_t_s_max_ctg',
+                 'val_type': float,
+                 'tol': None,
+                 'num_indices': 2},
+            ]
+
         # set up the summary items based on the structure
         for i in self.summary_structure:
             assert(not hasattr(self, i['key']))
             setattr(self, i['key'], utils.make_empty_viol(val=i['val_type'](0), num_indices=i['num_indices']))
 
+    def reset_summary_items(self, keys):
+        '''
+        set summary items back to their initial values, before a re-evaluation that may not set them
+        '''
+
+        for i in self.summary_structure:
+            if i['key'] in keys:
+                setattr(self, i['key'], utils.make_empty_viol(val=i['val_type'](0), num_indices=i['num_indices']))
+
     @utils.timeit
     def set_problem(self, prob):
 
@@ -888,7 +1303,9 @@ class SolutionEvaluator(object):
         '''
 
         self.t_connected_components_base = numpy.zeros(shape=(self.problem.num_t, ), dtype=int)
-        self.t_ctg_bridges = numpy.zeros(shape=(self.problem.num_t, ), dtype=int)
+        self.t_ctg_bridges = numpy.zeros(shape=(self.problem.num_t, ), dtype=int) # bridges outaged, plus disconnecting multiple outages
+        self.t_disconnected_base = [None for t in range(self.problem.num_t)] # (i0, i1) if disconnected
+        self.t_disconnected_ctg = [None for t in range(self.problem.num_t)] # (i0, i1, k) if disconnected
 
         self.sd_t_u_su = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=int)
         self.sd_t_u_sd = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=int)
@@ -914,6 +1331,12 @@ class SolutionEvaluator(object):
         # extras/output
         self.t_k_z = numpy.zeros(shape=(self.problem.num_t, self.problem.num_k), dtype=float)
 
+        # contingency model factors and results, kept by ctgmodel for re-evaluation after apply_patch
+        self.ctg_model = None
+
+        # working arrays of the steps of run on threads, see run_steps_threaded
+        self.run_step_views = None
+
     @utils.timeit
     def set_work_zero(self):
         '''
@@ -981,58 +1404,46 @@ class SolutionEvaluator(object):
     @utils.timeit
     def set_matrices(self):
 
-        self.bus_sd_inj_mat = scipy.sparse.csr_matrix(
-            (self.problem.sd_is_pr - self.problem.sd_is_cs,
-             #[1.0 for i in range(self.problem.num_sd)],
-             #numpy.ones(shape=(self.problem.num_sd, )),
-             (self.problem.sd_bus,
-              range(self.problem.num_sd))),
-            (self.problem.num_bus, self.problem.num_sd))
-        self.bus_sh_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_sh, )),
-             (self.problem.sh_bus,
-              range(self.problem.num_sh))),
-            (self.problem.num_bus, self.problem.num_sh))
-        self.bus_acl_fr_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_acl, )),
-             (self.problem.acl_fbus,
-              range(self.problem.num_acl))),
-            (self.problem.num_bus, self.problem.num_acl))
-        self.bus_acl_to_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_acl, )),
-             (self.problem.acl_tbus,
-              range(self.problem.num_acl))),
-            (self.problem.num_bus, self.problem.num_acl))
-        self.bus_dcl_fr_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_dcl, )),
-             (self.problem.dcl_fbus,
-              range(self.problem.num_dcl))),
-            (self.problem.num_bus, self.problem.num_dcl))
-        self.bus_dcl_to_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_dcl, )),
-             (self.problem.dcl_tbus,
-              range(self.problem.num_dcl))),
-            (self.problem.num_bus, self.problem.num_dcl))
-        self.bus_xfr_fr_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_xfr, )),
-             (self.problem.xfr_fbus,
-              range(self.problem.num_xfr))),
-            (self.problem.num_bus, self.problem.num_xfr))
-        self.bus_xfr_to_inj_mat = scipy.sparse.csr_matrix(
-            (-1.0 * numpy.ones(shape=(self.problem.num_xfr, )),
-             (self.problem.xfr_tbus,
-              range(self.problem.num_xfr))),
-            (self.problem.num_bus, self.problem.num_xfr))
-        self.prz_sd_inc_mat = scipy.sparse.csr_matrix(
-            (numpy.ones(shape=(numpy.sum(self.problem.prz_num_sd), )),
-             ([i for i in range(self.problem.num_prz) for j in self.problem.prz_sd_list[i]],
-              [j for i in range(self.problem.num_prz) for j in self.problem.prz_sd_list[i]])),
-            (self.problem.num_prz, self.problem.num_sd))
-        self.qrz_sd_inc_mat = scipy.sparse.csr_matrix(
-            (numpy.ones(shape=(numpy.sum(self.problem.qrz_num_sd), )),
-             ([i for i in range(self.problem.num_qrz) for j in self.problem.qrz_sd_list[i]],
-              [j for i in range(self.problem.num_qrz) for j in self.problem.qrz_sd_list[i]])),
-            (self.problem.num_qrz, self.problem.num_sd))
+        if self.shared is not None and 'matrices' in self.shared:
+            for k, v in self.shared['matrices'].items():
+                setattr(self, k, v)
+            return
+
+        matrices = get_matrices(self.problem, self.config)
+        for k, v in matrices.items():
+            setattr(self, k, v)
+
+        if self.shared is not None:
+            self.shared['matrices'] = matrices
+
+    def get_sd_w_max_viol(self, w_viol, w_sd, sd_num_w):
+        '''
+        max_viol, max_i, max_j = get_sd_w_max_viol(w_viol, w_sd, sd_num_w)
+
+        largest violation over sd window constraints, first one in order of device, then window,
+        its device, and its window number within the device. (0, 0, 0) if no violation
+        '''
+
+        if w_viol.size == 0 or not (numpy.amax(w_viol) > 0):
+            return 0, 0, 0
+        max_w = numpy.argmax(w_viol)
+        max_i = w_sd[max_w]
+        max_j = max_w - (numpy.sum(sd_num_w[:max_i]))
+        return w_viol[max_w], max_i, max_j
+
+    def set_topology(self):
+        '''
+        network topology for the connectedness check, shared across solutions if possible
+        '''
+
+        if self.shared is not None and 'topology' in self.shared:
+            self.topology = self.shared['topology']
+            return
+
+        self.topology = topology.NetworkTopology(self.problem)
+
+        if self.shared is not None:
+            self.shared['topology'] = self.topology
 
     def eval_infeas(self):
         '''
@@ -1271,9 +1682,10 @@ class SolutionEvaluator(object):
             self.t_z_k_average_case = numpy.zeros(shape=(self.problem.num_t, ), dtype=float)
 
     @utils.timeit
-    def eval_connectedness(self):
+    def eval_connectedness(self, t_list=None):
         '''
         connectedness - each time interval, base case and contingencies
+        t_list - evaluate only these t, keeping the results of an earlier evaluation for the others. None for all t
 
         The set of AC branches (AC lines and transformers)
         that are in service with respect to the solution (u_on = 1) forms a graph.
@@ -1291,89 +1703,51 @@ class SolutionEvaluator(object):
         A bridge is an edge such that when it is removed, the number of connected components increases.
         Then, for each contingency, the graph for that contingency is connected if and only if
         the branch going out of service is either not an AC branch or not a bridge.
+        A contingency outaging more than one AC branch can disconnect the graph without outaging a bridge,
+        so for each of these, the connected components are computed with all of its branches out of service.
 
         '''
 
         start_time = time.time()
 
-        vertices = list(range(self.problem.num_bus))
-        # acl_edges = [(self.problem.acl_fbus[i], self.problem.acl_tbus[i]) for i in range(self.problem.num_acl)]
-        # xfr_edges = [(self.problem.xfr_fbus[i], self.problem.xfr_tbus[i]) for i in range(self.problem.num_xfr)]
-        # edges = acl_edges + xfr_edges
-
-        # ctg_edges = [
-        #     (self.problem.k_out_fbus[i], self.problem.k_out_tbus[i])
-        #     for i in range(self.problem.num_k)
-        #     if self.problem.k_out_is_acl[i] or self.problem.k_out_is_xfr[i]]
-        # ctg_edge_ctg_map = {i:[] for i in ctg_edges}
-        # for i in range(self.problem.num_k):
-        #     if self.problem.k_out_is_acl[i] or self.problem.k_out_is_xfr[i]:
-        #         ctg_edge_ctg_map[(self.problem.k_out_fbus[i], self.problem.k_out_tbus[i])].append(i)
-
-        found_base_violation = False
-        base_violation_t = None
-        base_violation_i0 = None
-        base_violation_i1 = None
-        found_ctg_violation = False
-        ctg_violation_t = None
-        ctg_violation_k = None
-        ctg_violation_i0 = None
-        ctg_violation_i1 = None
-
-        for t in range(self.problem.num_t):
-
-            # todo performance
-            # make any of this t-independent?
-            # faster?
-
-            # edges corresponding to in service AC branches
-            t_acl = [i for i in range(self.problem.num_acl) if self.acl_t_u_on[i,t] == 1]
-            t_xfr = [i for i in range(self.problem.num_xfr) if self.xfr_t_u_on[i,t] == 1]
-            t_acl_edges = [(self.problem.acl_fbus[i], self.problem.acl_tbus[i]) for i in t_acl]
-            t_xfr_edges = [(self.problem.xfr_fbus[i], self.problem.xfr_tbus[i]) for i in t_xfr]
-            t_edges = t_acl_edges + t_xfr_edges
-
-            # need this to select only the contingency edges from the bridges
-            # bridges not outaged by a contingency are not a violation of post-contingency connectedness
-            t_ctg_acl = [self.problem.k_out_acl[i] for i in range(self.problem.num_k) if self.problem.k_out_is_acl[i]]
-            t_ctg_xfr = [self.problem.k_out_xfr[i] for i in range(self.problem.num_k) if self.problem.k_out_is_xfr[i]]
-            t_ctg_acl = [i for i in t_ctg_acl if self.acl_t_u_on[i,t] == 1]
-            t_ctg_xfr = [i for i in t_ctg_xfr if self.xfr_t_u_on[i,t] == 1]
-            t_ctg_acl_edges = [(self.problem.acl_fbus[i], self.problem.acl_tbus[i]) for i in t_ctg_acl]
-            t_ctg_xfr_edges = [(self.problem.xfr_fbus[i], self.problem.xfr_tbus[i]) for i in t_ctg_xfr]
-            t_ctg_edges_set = set(t_ctg_acl_edges + t_ctg_xfr_edges)
-
-            # need this to find a contingency for a given bridge
-            # only needed for information, not to determine if there is a violation
-            t_ctg_edge_ctg_map = {i:[] for i in t_ctg_edges_set}
-            for i in range(self.problem.num_k):
-                if self.problem.k_out_is_acl[i]:
-                    if self.acl_t_u_on[self.problem.k_out_acl[i], t] == 1:
-                        t_ctg_edge_ctg_map[(self.problem.k_out_fbus[i], self.problem.k_out_tbus[i])].append(i)
-                elif self.problem.k_out_is_xfr[i]:
-                    if self.xfr_t_u_on[self.problem.k_out_xfr[i], t] == 1:
-                        t_ctg_edge_ctg_map[(self.problem.k_out_fbus[i], self.problem.k_out_tbus[i])].append(i)
-
-            # base case - connected components
-            t_base_connected_components = utils.get_connected_components(vertices, t_edges)
-            self.t_connected_components_base[t] = len(t_base_connected_components)
-            if self.t_connected_components_base[t] > 1 and not found_base_violation:
-                found_base_violation = True
-                base_violation_t = t
-                base_violation_i0 = t_base_connected_components[0][0]
-                base_violation_i1 = t_base_connected_components[1][0]
-
-            # contingencies - bridges
-            t_bridges = utils.get_bridges(t_edges) # todo: performance - sorted? - loop/dict?
-            t_bridge_edges = [t_edges[i] for i in t_bridges]
-            t_ctg_bridge_edges = sorted(list(set(t_bridge_edges).intersection(t_ctg_edges_set)))
-            self.t_ctg_bridges[t] = len(t_ctg_bridge_edges)
-            if self.t_ctg_bridges[t] > 0 and not found_ctg_violation:
-                found_ctg_violation = True
-                ctg_violation_t = t
-                ctg_violation_i0 = t_ctg_bridge_edges[0][0]
-                ctg_violation_i1 = t_ctg_bridge_edges[0][1]
-                ctg_violation_k = t_ctg_edge_ctg_map[(ctg_violation_i0, ctg_violation_i1)][0]
+        # in service AC branches (AC lines, then transformers) in each t
+        br_t_u_on = numpy.concatenate((self.acl_t_u_on, self.xfr_t_u_on), axis=0)
+
+        if t_list is None:
+            t_list = range(self.problem.num_t)
+
+        # the in service branches usually take only a few distinct values over t,
+        # so evaluate each distinct topology once and copy the result to each t having it.
+        # a new topology usually differs from the previous one by a few switched branches,
+        # and the topology keeps the spanning forest of the previous one as long as it still spans the graph.
+        # the forest prefers branches that are in service for all t, so switching rarely touches it
+        br_cost = numpy.logical_not(numpy.all(br_t_u_on == 1, axis=1)).astype(float)
+        topology_results = {}
+        num_forest = self.topology.num_forest
+        for t in t_list:
+
+            t_br_u_on = (br_t_u_on[:, t] == 1)
+            topology_key = numpy.packbits(t_br_u_on).tobytes()
+            topology_result = topology_results.get(topology_key)
+            if topology_result is None:
+
+                # base case - connected components
+                # contingencies - bridges outaged by a single device contingency,
+                # and multiple outage contingencies disconnecting the graph
+                num_components, components, bridges = self.topology.get_connectivity(t_br_u_on, br_cost)
+                ctg_bridges = self.topology.get_ctg_bridges(bridges)
+                disconnected_multi_ctgs = self.topology.get_disconnected_multi_ctgs(t_br_u_on, num_components, components)
+                topology_result = (
+                    num_components, self.topology.get_disconnected_base(num_components, components),
+                    ctg_bridges.size + len(disconnected_multi_ctgs),
+                    self.topology.get_disconnected_ctg(ctg_bridges, disconnected_multi_ctgs))
+                topology_results[topology_key] = topology_result
+
+            (self.t_connected_components_base[t], self.t_disconnected_base[t],
+             self.t_ctg_bridges[t], self.t_disconnected_ctg[t]) = topology_result
+
+        print('connectedness evaluated t: {}, distinct topologies: {}, spanning forests built: {}'.format(
+            len(t_list), len(topology_results), self.topology.num_forest - num_forest))
 
         # report violations
         self.viol_t_connected_base = utils.get_max(
@@ -1383,12 +1757,20 @@ class SolutionEvaluator(object):
         # useful information on violations
         # * at least two buses (i1, i2) not connected in the base case
         # * at least one contingency k and two buses (i1, i2) not connected in contingency k
-        if found_base_violation:
+        # reported for the first t with a violation
+        self.reset_summary_items(['info_i_i_t_disconnected_base', 'info_i_i_k_t_disconnected_ctg'])
+        base_violation_t_list = [t for t in range(self.problem.num_t) if self.t_disconnected_base[t] is not None]
+        ctg_violation_t_list = [t for t in range(self.problem.num_t) if self.t_disconnected_ctg[t] is not None]
+        if len(base_violation_t_list) > 0:
+            base_violation_t = base_violation_t_list[0]
+            base_violation_i0, base_violation_i1 = self.t_disconnected_base[base_violation_t]
             self.info_i_i_t_disconnected_base['val'] = 1
             self.info_i_i_t_disconnected_base['idx'][0] = self.problem.bus_uid[base_violation_i0]
             self.info_i_i_t_disconnected_base['idx'][1] = self.problem.bus_uid[base_violation_i1]
             self.info_i_i_t_disconnected_base['idx'][2] = base_violation_t
-        if found_ctg_violation:
+        if len(ctg_violation_t_list) > 0:
+            ctg_violation_t = ctg_violation_t_list[0]
+            ctg_violation_i0, ctg_violation_i1, ctg_violation_k = self.t_disconnected_ctg[ctg_violation_t]
             self.info_i_i_k_t_disconnected_ctg['val'] = 1
             self.info_i_i_k_t_disconnected_ctg['idx'][0] = self.problem.bus_uid[ctg_violation_i0]
             self.info_i_i_k_t_disconnected_ctg['idx'][1] = self.problem.bus_uid[ctg_violation_i1]
@@ -1401,15 +1783,23 @@ class SolutionEvaluator(object):
         print('end of eval_connectedness(), memory info: {}'.format(utils.get_memory_info()))
 
     @utils.timeit
-    def eval_post_contingency_model(self):
+    def eval_post_contingency_model(self, update=False):
         '''
+        update - evaluate only the t that changed since the last evaluation, if any
         '''
 
         start_time = time.time()
         #self.t_k_z = numpy.zeros(shape=(self.problem.num_t, self.problem.num_k), dtype=float) # this is done earlier
         # skip post-contingency evaluation if not connected - might as well skip if infeasible so far - todo
         if self.viol_t_connected_base['val'] == 0 and self.viol_t_connected_ctg['val'] == 0:
-            ctgmodel.eval_post_contingency_model(self)
+            if update:
+                ctgmodel.update_post_contingency_model(self)
+            else:
+                ctgmodel.eval_post_contingency_model(self)
+        else:
+            # zero, as in an evaluation that skips it from the start
+            self.t_k_z[:] = 0.0
+            self.reset_summary_items(['viol_{}_t_s_max_ctg'.format(k) for k in ctgmodel.CTG_VIOL_KEYS])
         end_time = time.time()
         self.time_post_contingency = end_time - start_time
 
@@ -1432,15 +1822,12 @@ class SolutionEvaluator(object):
         '''
 
         # evaluate sd_t_z_p and store in sd_t_float
-        # maybe passing in work arrays could make it more efficient,
-        # but probably not. really need cython on this if it becomes a problem
-        for i in range(self.problem.num_sd):
-            for j in range(self.problem.num_t):
-                self.sd_t_float[i,j] = utils.eval_convex_cost_function(
-                    self.problem.sd_t_num_block[i,j],
-                    self.problem.sd_t_block_p_max_list[i][j],
-                    self.problem.sd_t_block_c_list[i][j],
-                    self.sd_t_p[i,j])
+        # all device-intervals at once, over the flat cost block arrays
+        self.sd_t_float[:] = numpy.reshape(
+            utils.eval_convex_cost_functions(
+                self.problem.sd_t_block_ptr, self.problem.sd_t_block_p_start, self.problem.sd_t_block_p_max,
+                self.problem.sd_t_block_c, numpy.ravel(self.sd_t_p)),
+            newshape=(self.problem.num_sd, self.problem.num_t))
         numpy.multiply(
             numpy.reshape(self.problem.t_d, newshape=(1, self.problem.num_t)), self.sd_t_float, out=self.sd_t_float)
 
@@ -1580,12 +1967,12 @@ class SolutionEvaluator(object):
     def eval_sd_t_su_sd_trajectories(self):
         '''
         set u_on_su_sd, p_su, p_sd
-        loop over u_su nonzeros and u_sd nonzeros
+        all u_su nonzeros and all u_sd nonzeros at once,
+        stepping each trajectory one interval at a time away from its event until p <= 0 or the horizon ends.
+        where trajectories overlap, the one from the latest event wins,
+        i.e. the farthest su trajectory step overwrites nearer ones, and the first sd trajectory step is kept
         '''
 
-        #todo - for now set to 0 - add su/sd curve
-        # todo performance - eliminate a loop with numpy operations
-        # todo definitely check for bugs
         # todo need to ensure p > 0 is not ambiguous,
         # i.e. abs(p) > epsilon for some reasonably large epsilon, e.g. 1e-6,
         # or else just require q = 0 when in su/sd trajectory - i.e. u_on==0 but p_su > 0 or p_sd > 0
@@ -1593,65 +1980,40 @@ class SolutionEvaluator(object):
         self.sd_t_p_su = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=float)
         self.sd_t_p_sd = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=float)
 
-        # su
-        indices = numpy.nonzero(self.sd_t_u_su)
-        num_indices = indices[0].size
-        for i in range(num_indices):
-            sd = indices[0][i]
-            t_1 = indices[1][i]
-            if t_1 == 0:
-                continue
-            p_1 = self.problem.sd_t_p_min[sd, t_1]
-            pr = self.problem.sd_p_startup_ramp_up_max[sd]
-            t = int(t_1) - 1
-            done = False
-            while not done:
-                # debugging
-                # if t == -43:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t))
-                p = p_1 - pr * (self.problem.t_a_end[t_1] - self.problem.t_a_end[t])
-                # debugging
-                # if i == 67:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-                if p > 0.0:
-                    self.sd_t_u_on_su_sd[sd, t] = 1
-                    self.sd_t_p_su[sd, t] = p
-                    # debugging
-                    # print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-                else:
-                    done = True
-                if t == 0:
-                    done = True
-                if not done:
-                    t -= 1
-                # debugging
-                # else:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-
-        # sd
-        indices = numpy.nonzero(self.sd_t_u_sd)
-        num_indices = indices[0].size
-        for i in range(num_indices):
-            sd = indices[0][i]
-            t_1 = indices[1][i]
-            if t_1 == 0:
-                p_1 = self.problem.sd_p_0[sd]
-            else:
-                p_1 = self.problem.sd_t_p_min[sd, t_1 - 1]
-            pr = self.problem.sd_p_shutdown_ramp_dn_max[sd]
-            t = int(t_1)
-            done = False
-            while not done:
-                p = p_1 - pr * (self.problem.t_a_end[t] - self.problem.t_a_start[t_1])
-                if p > 0.0:
-                    self.sd_t_u_on_su_sd[sd, t] = 1
-                    self.sd_t_p_sd[sd, t] = p
-                else:
-                    done = True
-                if t == self.problem.num_t - 1:
-                    done = True
-                if not done:
-                    t += 1
+        # su - trajectory before t_1, p = p_1 - pr * (a_end[t_1] - a_end[t])
+        sd, t_1 = numpy.nonzero(self.sd_t_u_su)
+        keep = numpy.flatnonzero(t_1 > 0)
+        sd = sd[keep]
+        t_1 = t_1[keep]
+        p_1 = self.problem.sd_t_p_min[sd, t_1]
+        pr = self.problem.sd_p_startup_ramp_up_max[sd]
+        t = t_1 - 1
+        while t.size > 0:
+            p = p_1 - pr * (self.problem.t_a_end[t_1] - self.problem.t_a_end[t])
+            keep = numpy.flatnonzero(p > 0.0)
+            sd, t_1, p_1, pr, t, p = sd[keep], t_1[keep], p_1[keep], pr[keep], t[keep], p[keep]
+            self.sd_t_u_on_su_sd[sd, t] = 1
+            self.sd_t_p_su[sd, t] = p
+            keep = numpy.flatnonzero(t > 0)
+            sd, t_1, p_1, pr, t = sd[keep], t_1[keep], p_1[keep], pr[keep], t[keep] - 1
+
+        # sd - trajectory from t_1 on, p = p_1 - pr * (a_end[t] - a_start[t_1])
+        sd_t_in_traj = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=bool)
+        sd, t_1 = numpy.nonzero(self.sd_t_u_sd)
+        p_1 = numpy.where(
+            t_1 == 0, self.problem.sd_p_0[sd], self.problem.sd_t_p_min[sd, numpy.maximum(t_1 - 1, 0)])
+        pr = self.problem.sd_p_shutdown_ramp_dn_max[sd]
+        t = t_1
+        while t.size > 0:
+            p = p_1 - pr * (self.problem.t_a_end[t] - self.problem.t_a_start[t_1])
+            keep = numpy.flatnonzero(p > 0.0)
+            sd, t_1, p_1, pr, t, p = sd[keep], t_1[keep], p_1[keep], pr[keep], t[keep], p[keep]
+            new = numpy.flatnonzero(numpy.logical_not(sd_t_in_traj[sd, t]))
+            sd_t_in_traj[sd[new], t[new]] = True
+            self.sd_t_u_on_su_sd[sd, t] = 1
+            self.sd_t_p_sd[sd[new], t[new]] = p[new]
+            keep = numpy.flatnonzero(t < self.problem.num_t - 1)
+            sd, t_1, p_1, pr, t = sd[keep], t_1[keep], p_1[keep], pr[keep], t[keep] + 1
 
     def eval_sd_t_p_rgu_nonneg(self):
         '''
@@ -2151,45 +2513,20 @@ class SolutionEvaluator(object):
         numpy.maximum(0.0, self.sd_t_float_1, out=self.sd_t_float_1)
         self.viol_sd_t_p_ramp_dn_max = utils.get_max(self.sd_t_float_1, idx_lists=[self.problem.sd_uid, self.problem.t_num])
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_max_energy(self):
         '''
         '''
 
-        max_viol = 0.0
-        max_i = 0
-        max_j = 0
-        self.sd_z_max_energy = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sum_viol = 0.0
-        for i in range(self.problem.num_sd):
-            sum_viol = 0.0
-            for j in range(self.problem.sd_num_max_energy_constr[i]):
-                a_start = self.problem.sd_max_energy_constr_a_start_list[i][j]
-                a_end = self.problem.sd_max_energy_constr_a_end_list[i][j]
-                numpy.less(a_start + self.config['time_eq_tol'], self.problem.t_a_mid, out=self.t_int_1) # todo - check if this is right
-                numpy.less_equal(self.problem.t_a_mid, a_end + self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.t_int, self.problem.t_d, out=self.t_float)
-                numpy.multiply(self.t_float, self.sd_t_p[i, :], out=self.t_float)
-                #print('t_d: {}'.format(self.problem.t_d))
-                #print('sd_t_u_p: {}'.format(self.sd_t_p[i, :]))
-                #print('t_float: {}'.format(self.t_float))
-                energy = numpy.sum(self.t_float)
-                viol = max(0, energy - self.problem.sd_max_energy_constr_max_energy_list[i][j])
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, max_energy: {}, energy: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_max_energy_constr_max_energy_list[i][j], energy, viol))
-                sum_viol += viol
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
-            self.sd_z_max_energy[i] = self.problem.c_e * sum_viol
+        # energy over each window, all windows of all devices at once
+        w_viol = self.sd_max_energy_w_mat.dot(numpy.ravel(self.sd_t_p))
+        numpy.subtract(w_viol, self.problem.sd_max_energy_w_max, out=w_viol)
+        numpy.maximum(w_viol, 0.0, out=w_viol)
+        self.sd_z_max_energy = self.problem.c_e * numpy.bincount(
+            self.problem.sd_max_energy_w_sd, weights=w_viol, minlength=self.problem.num_sd)
+        max_viol, max_i, max_j = self.get_sd_w_max_viol(
+            w_viol, self.problem.sd_max_energy_w_sd, self.problem.sd_num_max_energy_constr)
+        max_viol = float(max_viol)
         self.viol_sd_max_energy_constr = {
             'val': max_viol,
             #'abs': abs(max_viol),
@@ -2198,45 +2535,20 @@ class SolutionEvaluator(object):
             #'idx_int': (max_i, max_j),
         }
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_min_energy(self):
         '''
         '''
 
-        max_viol = 0.0
-        max_i = 0
-        max_j = 0
-        self.sd_z_min_energy = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sum_viol = 0.0
-        for i in range(self.problem.num_sd):
-            sum_viol = 0.0
-            for j in range(self.problem.sd_num_min_energy_constr[i]):
-                a_start = self.problem.sd_min_energy_constr_a_start_list[i][j]
-                a_end = self.problem.sd_min_energy_constr_a_end_list[i][j]
-                numpy.less(a_start + self.config['time_eq_tol'], self.problem.t_a_mid, out=self.t_int_1) # todo - check if this is right
-                numpy.less_equal(self.problem.t_a_mid, a_end + self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.t_int, self.problem.t_d, out=self.t_float)
-                numpy.multiply(self.t_float, self.sd_t_p[i, :], out=self.t_float)
-                #print('t_d: {}'.format(self.problem.t_d))
-                #print('sd_t_u_p: {}'.format(self.sd_t_p[i, :]))
-                #print('t_float: {}'.format(self.t_float))
-                energy = numpy.sum(self.t_float)
-                viol = max(0, self.problem.sd_min_energy_constr_min_energy_list[i][j] - energy)
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, min_energy: {}, energy: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_min_energy_constr_min_energy_list[i][j], energy, viol))
-                sum_viol += viol
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
-            self.sd_z_min_energy[i] = self.problem.c_e * sum_viol
+        # energy over each window, all windows of all devices at once
+        w_viol = self.sd_min_energy_w_mat.dot(numpy.ravel(self.sd_t_p))
+        numpy.subtract(self.problem.sd_min_energy_w_min, w_viol, out=w_viol)
+        numpy.maximum(w_viol, 0.0, out=w_viol)
+        self.sd_z_min_energy = self.problem.c_e * numpy.bincount(
+            self.problem.sd_min_energy_w_sd, weights=w_viol, minlength=self.problem.num_sd)
+        max_viol, max_i, max_j = self.get_sd_w_max_viol(
+            w_viol, self.problem.sd_min_energy_w_sd, self.problem.sd_num_min_energy_constr)
+        max_viol = float(max_viol)
         self.viol_sd_min_energy_constr = {
             'val': max_viol,
             #'abs': abs(max_viol),
@@ -2550,32 +2862,24 @@ class SolutionEvaluator(object):
         use this to evaluate min up/down time constraints and downtime-dependent startup costs
         '''
         
-        sd_d_up_start = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sd_d_dn_start = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sd_d_up_end = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sd_d_dn_end = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
+        # d_up_start[:, t] is d_up_0 plus t_d over the intervals before t in which sd is on,
+        # restarting from 0 after each interval in which sd is off, and vice versa for d_dn_start
+        sd_t_on = (self.sd_t_u_on == 1)
+        sd_t_off = (self.sd_t_u_on == 0)
+        t_d = numpy.reshape(self.problem.t_d[:-1], newshape=(1, self.problem.num_t - 1))
+        sd_t_d = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=float)
+        sd_t_reset = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=bool)
+
+        sd_t_d[:, 0] = self.problem.sd_d_up_0
+        numpy.multiply(t_d, sd_t_on[:, :-1], out=sd_t_d[:, 1:])
+        sd_t_reset[:, 1:] = sd_t_off[:, :-1]
+        self.sd_t_d_up_start[:] = utils.get_segmented_cumsum(sd_t_d, sd_t_reset)
+
+        sd_t_d[:, 0] = self.problem.sd_d_dn_0
+        numpy.multiply(t_d, sd_t_off[:, :-1], out=sd_t_d[:, 1:])
+        sd_t_reset[:, 1:] = sd_t_on[:, :-1]
+        self.sd_t_d_dn_start[:] = utils.get_segmented_cumsum(sd_t_d, sd_t_reset)
 
-        sd_d_up_end[:] = self.problem.sd_d_up_0
-        sd_d_dn_end[:] = self.problem.sd_d_dn_0
-        
-        for t in range(self.problem.num_t):
-            sd_d_up_start[:] = sd_d_up_end
-            sd_d_dn_start[:] = sd_d_dn_end
-            numpy.add(
-                sd_d_up_start, self.problem.t_d[t],
-                out=sd_d_up_end, where=(self.sd_t_u_on[:,t] == 1))
-            numpy.add(
-                sd_d_dn_start, self.problem.t_d[t],
-                out=sd_d_dn_end, where=(self.sd_t_u_on[:,t] == 0))
-            sd_d_up_end[self.sd_t_u_on[:,t] == 0] = 0.0
-            sd_d_dn_end[self.sd_t_u_on[:,t] == 1] = 0.0
-            self.sd_t_d_up_start[:,t] = sd_d_up_start
-            self.sd_t_d_dn_start[:,t] = sd_d_dn_start
-        # print('up_start:')
-        # print(self.sd_t_d_up_start)
-        # print('dn_start:')
-        # print(self.sd_t_d_dn_start)
-        
     def eval_sd_t_u_su_sd(self):
 
         self.sd_t_int[:] = numpy.diff(
@@ -2644,39 +2948,16 @@ class SolutionEvaluator(object):
         self.sum_sd_t_z_sd = numpy.sum(self.sd_t_float)
         self.t_sum_sd_t_z_sd = numpy.sum(self.sd_t_float, axis=0)
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_max_startup(self):
 
-        max_viol = 0
-        max_i = 0
-        max_j = 0
-        for i in range(self.problem.num_sd):
-            for j in range(self.problem.sd_num_max_startup_constr[i]):
-                #viol = 0
-                #self.sd_max_startup_constr_over[i][j] = ??
-                #self.t_int[:] = 1
-                a_start = self.problem.sd_max_startup_constr_a_start_list[i][j]
-                a_end = self.problem.sd_max_startup_constr_a_end_list[i][j]
-                numpy.less_equal(a_start - self.config['time_eq_tol'], self.problem.t_a_start, out=self.t_int_1)
-                numpy.less(self.problem.t_a_start, a_end - self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.sd_t_u_su[i, :], self.t_int, out=self.t_int)
-                #print('sd_t_u_su: {}'.format(self.sd_t_u_su[i, :]))
-                #print('t_int: {}'.format(self.t_int))
-                startups = numpy.sum(self.t_int)
-                viol = max(0, startups - self.problem.sd_max_startup_constr_max_startup_list[i][j])
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, max_startups: {}, startups: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_max_startup_constr_max_startup_list[i][j], startups, viol))
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
+        # startups in each window, all windows of all devices at once
+        w_viol = self.sd_max_startup_w_mat.dot(numpy.ravel(self.sd_t_u_su))
+        numpy.subtract(w_viol, self.problem.sd_max_startup_w_max, out=w_viol)
+        numpy.maximum(w_viol, 0, out=w_viol)
+        max_viol, max_i, max_j = self.get_sd_w_max_viol(
+            w_viol, self.problem.sd_max_startup_w_sd, self.problem.sd_num_max_startup_constr)
+        max_viol = int(max_viol)
         self.viol_sd_max_startup_constr = {
             'val': max_viol,
             #'abs': abs(max_viol),
@@ -2688,18 +2969,20 @@ class SolutionEvaluator(object):
     @utils.timeit
     def eval_sd_t_z_sus(self):
         
-        for i in range(self.problem.num_sd):
-            self.t_float[:] = 0.0 # selecting no startup state, with no startup state cost adjustment, is allowed
-            for j in range(self.problem.sd_num_startup_state[i]):
-                # qualify for this startup state if self.sd_t_d_dn_start[i, :] <= max_prior_d_dn + tol
-                max_downtime = self.problem.sd_startup_state_d_max_list[i][j]
-                numpy.less_equal(self.sd_t_d_dn_start[i, :], max_downtime + self.config['time_eq_tol'], out=self.t_int)
-                # if qualify for this state what is cost?
-                cost = self.problem.sd_startup_state_c_list[i][j]
-                numpy.multiply(cost, self.t_int, out=self.t_float_1)
-                # take the better of qualified cost for this state and prior best cost
-                numpy.minimum(self.t_float, self.t_float_1, out=self.t_float)
-            self.sd_t_float[i, :] = self.t_float
+        # qualify for startup state j if self.sd_t_d_dn_start[i, :] <= max_prior_d_dn + tol
+        # take the best (min) cost over qualified states,
+        # and selecting no startup state, with no startup state cost adjustment, is allowed
+        # padded states never qualify
+        sd_t_state_qualify = numpy.less_equal(
+            numpy.reshape(self.sd_t_d_dn_start, newshape=(self.problem.num_sd, self.problem.num_t, 1)),
+            numpy.reshape(
+                self.problem.sd_startup_state_d_max + self.config['time_eq_tol'],
+                newshape=(self.problem.num_sd, 1, -1)))
+        sd_t_state_c = numpy.where(
+            sd_t_state_qualify,
+            numpy.reshape(self.problem.sd_startup_state_c, newshape=(self.problem.num_sd, 1, -1)),
+            0.0)
+        numpy.amin(sd_t_state_c, axis=2, initial=0.0, out=self.sd_t_float)
         # cost adjustment applies only when starting up
         numpy.multiply(self.sd_t_u_su, self.sd_t_float, out=self.sd_t_float)
         #
@@ -0,0 +1,164 @@
+'''
+Data model objects from parsed JSON without pydantic validation, e.g. for problems already checked.
+
+Building the pydantic data model (datamodel.input.data.InputDataFile) validates every field of every item,
+which is most of the time of reading a problem that has passed its checks before.
+load builds, from the dict parsed by json.load, objects with the same attributes and values
+as the data model, converted the same way, and the methods of the data model classes, e.g. Network.get_bus_uids,
+so arraydata.InputData.set_from_data_model, the problem summary, the supply/demand analysis,
+and the solution model checks use them unchanged, and validation.get_problem_objects converts
+the objects of a problem read without the data model, e.g. network.general, with them:
+* float fields (confloat) are floats, also when given as JSON integers
+* str fields have surrounding whitespace stripped (anystr_strip_whitespace)
+* tuples in lists are tuples
+* optional fields that are not given are None
+the only checks are that each object has the required fields of its model and no others.
+values are not validated, so a problem that fails the data model gives undefined results.
+
+the conversion of each model is compiled once from the pydantic fields, see get_model_converter.
+'''
+
+import typing, inspect
+import pydantic
+from datautilities.errors import ModelError
+
+class JsonModel(object):
+    '''
+    an object of a data model class, with its fields as attributes,
+    and the methods the data model class adds to pydantic BaseModel, e.g. Network.get_bus_uids
+    '''
+
+    def __init__(self, model_class, fields):
+
+        self.__dict__.update(fields)
+        self.__dict__['_model_class'] = model_class
+
+    def __getattr__(self, name):
+
+        if not name.startswith('_') and not hasattr(pydantic.BaseModel, name):
+            method = getattr(self.__dict__.get('_model_class'), name, None)
+            if inspect.isfunction(method):
+                return method.__get__(self)
+        raise AttributeError('{} has no attribute {}'.format(type(self).__name__, name))
+
+    def dict(self):
+        '''
+        fields as a dict, nested objects as dicts, as pydantic BaseModel.dict
+        '''
+
+        return {k: get_dict_value(v) for k, v in self.__dict__.items() if k != '_model_class'}
+
+def get_dict_value(value):
+
+    if isinstance(value, JsonModel):
+        return value.dict()
+    if isinstance(value, list):
+        return [get_dict_value(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(get_dict_value(v) for v in value)
+    return value
+
+def load(model_class, data):
+    '''
+    JsonModel of data, a dict parsed by json.load, as model_class, e.g. InputDataFile, would hold it.
+    raises ModelError if an object lacks a required field or has a field not in its model
+    '''
+
+    return get_model_converter(model_class)(data, ())
+
+def format_path(path):
+    '''
+    path, a nested tuple (parent path, key or index) as passed to the converters, as a string, e.g. network.bus[3].uid
+    '''
+
+    keys = []
+    while len(path) > 0:
+        path, key = path
+        keys.append('[{}]'.format(key) if isinstance(key, int) else '.' + key)
+    return ''.join(reversed(keys)).lstrip('.') or 'data'
+
+def identity(value, path):
+
+    return value
+
+def to_float(value, path):
+
+    return float(value)
+
+def strip_str(value, path):
+
+    return value.strip()
+
+def get_type_converter(type_):
+    '''
+    function (value, path) -> value converted as pydantic converts a valid value of type_.
+    path is the location of value in the data, for error messages, see format_path
+    '''
+
+    origin = typing.get_origin(type_)
+    args = typing.get_args(type_)
+    if origin is list:
+        item_converter = get_type_converter(args[0])
+        if item_converter is identity:
+            return lambda value, path: list(value)
+        if item_converter is to_float:
+            return lambda value, path: [float(v) for v in value]
+        return lambda value, path: [item_converter(v, (path, i)) for i, v in enumerate(value)]
+    if origin is tuple:
+        item_converters = [get_type_converter(a) for a in args]
+        return lambda value, path: tuple(c(v, (path, i)) for i, (c, v) in enumerate(zip(item_converters, value)))
+    if origin is typing.Union:
+        converters = [get_type_converter(a) for a in args if a is not type(None)]
+        if len(converters) != 1:
+            return identity
+        converter = converters[0]
+        return lambda value, path: None if value is None else converter(value, path)
+    if isinstance(type_, type):
+        if issubclass(type_, pydantic.BaseModel):
+            return get_model_converter(type_)
+        if issubclass(type_, float):
+            return to_float
+        if issubclass(type_, str):
+            return strip_str
+    return identity
+
+model_converters = {}
+
+def get_model_converter(model_class):
+    '''
+    function (value, path) -> JsonModel of value, a dict, as an object of model_class
+    '''
+
+    if model_class in model_converters:
+        return model_converters[model_class]
+
+    # placeholder, so a model nested in itself gets the converter being built
+    def convert_placeholder(value, path):
+        return model_converters[model_class](value, path)
+    model_converters[model_class] = convert_placeholder
+
+    model_name = model_class.__name__
+    fields = []
+    for name, field in model_class.__fields__.items():
+        converter = get_type_converter(field.outer_type_)
+        if field.allow_none and converter is not identity:
+            converter = (lambda c: lambda value, path: None if value is None else c(value, path))(converter)
+        fields.append((name, converter))
+    field_names = set(name for name, converter in fields)
+    required = set(name for name, field in model_class.__fields__.items() if field.required)
+
+    def convert(value, path):
+        if isinstance(value, JsonModel):
+            return value
+        if not isinstance(value, dict):
+            raise ModelError('{} is not an object for {}: {}'.format(format_path(path), model_name, type(value)))
+        keys = value.keys()
+        if not (required <= keys and keys <= field_names):
+            raise ModelError('{} fields do not match {}. missing: {}, not in model: {}'.format(
+                format_path(path), model_name, sorted(required - keys), sorted(keys - field_names)))
+        return JsonModel(model_class, {
+            name: (converter(value[name], (path, name)) if name in value else None)
+            for name, converter in fields})
+
+    model_converters[model_class] = convert
+    return convert
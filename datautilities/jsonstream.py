@@ -0,0 +1,267 @@
+'''
+Streaming reader for large JSON files, e.g. problem and solution files.
+
+json.load builds the whole file as Python objects before anything can use it.
+JSONStreamReader reads the file in chunks and walks its objects and arrays,
+so the caller can decode one item of a large array at a time, e.g. a device record,
+write it to preallocated numpy arrays, and drop it,
+and can skip the sections it does not need without decoding them.
+Memory is then bounded by the arrays filled plus one chunk and one item,
+rather than by the object tree of the whole file.
+
+usage, e.g. the items of time_series_output.bus:
+
+    with open(file_name, 'r') as f:
+        reader = JSONStreamReader(f)
+        for key in reader.iter_object():
+            if key == 'time_series_output':
+                for section in reader.iter_object():
+                    if section == 'bus':
+                        for i in reader.iter_array():
+                            item = reader.read_value()
+                    else:
+                        reader.skip_value()
+            else:
+                reader.skip_value()
+
+iter_object yields each key, and iter_array each index, with the reader at the value,
+which the caller must consume with read_value, skip_value, iter_object, or iter_array
+before the next key or index.
+'''
+
+import json, re, inspect
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STRUCTURE = re.compile(r'["\[\]{}]')
+STRING_END = re.compile(r'(?:[^"\\]|\\.)*+"', re.DOTALL)
+DELIMITER = re.compile(r'[ \t\n\r,\]}]')
+
+class JSONStreamReader(object):
+
+    def __init__(self, f, chunk_size=1048576):
+        '''
+        f - file object open for reading in text mode
+        chunk_size - number of characters read from f at a time
+        '''
+
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0 # position in the file of the start of buf
+        self.eof = False
+
+    def fill(self):
+        '''
+        drop the consumed part of the buffer and read the next chunk,
+        return False if the file is at its end
+        '''
+
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if len(chunk) == 0:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, msg):
+
+        raise json.JSONDecodeError(
+            '{} at position {} of the file'.format(msg, self.offset + self.pos), self.buf, self.pos)
+
+    def peek(self):
+        '''
+        next non whitespace character, '' at the end of the file
+        '''
+
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, c):
+
+        if self.peek() != c:
+            self.error('expecting {}'.format(repr(c)))
+        self.pos += 1
+
+    def read_value(self):
+        '''
+        decode the next value
+        '''
+
+        if self.peek() not in ('[', '{', '"'):
+            # a number or literal is complete only once the delimiter after it is read
+            while DELIMITER.search(self.buf, self.pos) is None and self.fill():
+                pass
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # may be a value cut at the end of the buffer
+                if self.fill():
+                    continue
+                raise e
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        '''
+        move past the next value without decoding it.
+        objects and arrays are only scanned for strings and brackets, not checked for syntax
+        '''
+
+        c = self.peek()
+        if c not in ('[', '{'):
+            self.read_value()
+            return
+        depth = 0
+        while True:
+            m = STRUCTURE.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    self.error('unterminated value')
+                continue
+            self.pos = m.end()
+            c = m.group()
+            if c == '"':
+                while True:
+                    m = STRING_END.match(self.buf, self.pos)
+                    if m is not None:
+                        self.pos = m.end()
+                        break
+                    if not self.fill():
+                        self.error('unterminated string')
+            elif c in ('[', '{'):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_object(self):
+        '''
+        yield the keys of the next value, an object
+        '''
+
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self.error('expecting object key')
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == '}':
+                return
+            if c != ',':
+                self.pos -= 1
+                self.error("expecting ',' or '}'")
+
+    def iter_array(self):
+        '''
+        yield the indices of the items of the next value, an array
+        '''
+
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            c = self.peek()
+            self.pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                self.pos -= 1
+                self.error("expecting ',' or ']'")
+
+    def end(self):
+        '''
+        check that nothing but whitespace follows
+        '''
+
+        if self.peek() != '':
+            self.error('extra data')
+
+def iter_items(f, path, chunk_size=1048576):
+    '''
+    yield the items of the array at path, e.g. ['time_series_output', 'bus'],
+    in the JSON file open as f, decoding one item at a time and skipping everything else.
+    yields nothing if there is no such array
+    '''
+
+    def walk(reader, depth):
+        for key in reader.iter_object():
+            if key != path[depth]:
+                reader.skip_value()
+            elif depth + 1 < len(path):
+                if reader.peek() == '{':
+                    yield from walk(reader, depth + 1)
+                else:
+                    reader.skip_value()
+            elif reader.peek() == '[':
+                for i in reader.iter_array():
+                    yield reader.read_value()
+            else:
+                reader.skip_value()
+
+    reader = JSONStreamReader(f, chunk_size)
+    yield from walk(reader, 0)
+    reader.end()
+
+def iter_sections(f, chunk_size=1048576):
+    '''
+    yield (section, fields, value) for each field of the object in the JSON file open as f,
+    e.g. ('network', fields, None) for a problem file, decoding one item of each array of a section at a time.
+    if the field is an object, fields yields (key, items, value) for each of its fields, and value is None,
+    else fields is None and value is the decoded field.
+    if a field of a section is an array, items yields its items, and value is None,
+    else items is None and value is the decoded field.
+    the caller can leave fields or items unfinished, the rest is skipped before the next section or field
+    '''
+
+    def iter_values(reader):
+        for i in reader.iter_array():
+            yield reader.read_value()
+
+    def iter_fields(reader):
+        for key in reader.iter_object():
+            if reader.peek() != '[':
+                yield key, None, reader.read_value()
+                continue
+            items = iter_values(reader)
+            yield key, items, None
+            finish(reader, items)
+
+    def finish(reader, values):
+        if inspect.getgeneratorstate(values) == inspect.GEN_CREATED:
+            reader.skip_value()
+        else:
+            for v in values:
+                pass
+
+    reader = JSONStreamReader(f, chunk_size)
+    for section in reader.iter_object():
+        if reader.peek() != '{':
+            yield section, None, reader.read_value()
+            continue
+        fields = iter_fields(reader)
+        yield section, fields, None
+        finish(reader, fields)
+    reader.end()
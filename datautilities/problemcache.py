@@ -0,0 +1,169 @@
+'''
+Cache of prepared problems, for evaluating solutions to the same problem in separate runs.
+
+An entry holds what evaluation needs from the problem:
+the arrays of arraydata.InputData, the matrices of evaluation.get_matrices, and the problem summary.
+It is a directory in the cache directory, named by the key of the problem, with
+* meta.json - cache version, scalars of InputData, shapes of the matrices, problem summary
+* a .npy file for each array of InputData.get_arrays and evaluation.get_matrices_arrays, loaded memory mapped
+so a later run skips reading the problem file, the data model, its checks, and building the arrays.
+
+invalidation:
+* the key is a hash of the problem file contents, of the config, except CONFIG_KEYS_IGNORED,
+  of the source files of datautilities and of the installed datamodel package, and of the numpy and scipy versions,
+  so any change to the problem, the config, or the code that prepared the entry gives a new key
+* an entry with another CACHE_VERSION, or that fails to load, is removed and treated as a miss
+* after a new entry is written, the least recently used entries are removed
+  until the cache directory is within config['problem_cache_max_bytes']
+
+entries are written to a temporary directory and renamed into place,
+so concurrent runs see either no entry or a complete one.
+'''
+
+import os, json, hashlib, pathlib, shutil, time
+import numpy, scipy
+import datamodel
+from datautilities import utils, arraydata, evaluation
+
+CACHE_VERSION = 2
+
+# config keys that do not change the prepared problem, left out of the key
+CONFIG_KEYS_IGNORED = [
+    'problem_cache_dir',
+    'problem_cache_max_bytes',
+    'problem_fast_load',
+    'problem_stream_load',
+    'solution_fast_load',
+    'solution_stream_load',
+    'json_stream_chunk_size',
+    'json_stream_batch_size',
+    'run_num_threads',
+    'ctg_num_proc',
+    'batch_share_problem',
+]
+
+def get_key(problem_file, config):
+    '''
+    hex digest of the problem file contents, the config, the source files of get_source_files,
+    and the numpy and scipy versions
+    '''
+
+    h = hashlib.sha256()
+    h.update('problem cache version {}\n'.format(CACHE_VERSION).encode())
+    with open(problem_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 24), b''):
+            h.update(chunk)
+    h.update(json.dumps(
+        {k: v for k, v in config.items() if k not in CONFIG_KEYS_IGNORED},
+        sort_keys=True, cls=utils.NpEncoder).encode())
+    h.update('numpy {}\nscipy {}\n'.format(numpy.__version__, scipy.__version__).encode())
+    for fn in get_source_files():
+        h.update('{}\n'.format(fn.name).encode())
+        h.update(fn.read_bytes())
+    return h.hexdigest()
+
+def get_source_files():
+    '''
+    the source files of the code that prepares an entry: datautilities, and the datamodel package,
+    which has no version number, as installed
+    '''
+
+    files = sorted(pathlib.Path(utils.get_data_utils_dir()).glob('*.py'))
+    files += sorted(pathlib.Path(datamodel.__file__).parent.rglob('*.py'))
+    return files
+
+def get_entry_dir(cache_dir, key):
+
+    return pathlib.Path(cache_dir, key)
+
+def load(cache_dir, key):
+    '''
+    problem_data_array, matrices, problem_summary = load(cache_dir, key)
+    or None if there is no valid entry for key
+    '''
+
+    entry_dir = get_entry_dir(cache_dir, key)
+    meta_file = entry_dir / 'meta.json'
+    if not meta_file.is_file():
+        return None
+    try:
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        if meta['version'] != CACHE_VERSION:
+            raise ValueError('problem cache version: {}, expected: {}'.format(meta['version'], CACHE_VERSION))
+        problem_data_array = arraydata.InputData()
+        problem_data_array.set_from_arrays(
+            {k: load_array(entry_dir, k) for k in meta['arrays']}, meta['scalars'])
+        matrices = evaluation.get_matrices_from_arrays(
+            {k: load_array(entry_dir, k) for k in meta['matrix_arrays']}, meta['matrices'])
+    except Exception as e:
+        print('problem cache entry invalid, removing it: {}, error: {}'.format(entry_dir, e))
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        return None
+    # last use, for eviction
+    os.utime(meta_file)
+    return problem_data_array, matrices, meta['problem_summary']
+
+def load_array(entry_dir, name):
+
+    return numpy.load(entry_dir / (name + '.npy'), mmap_mode='r')
+
+def save(cache_dir, key, problem_data_array, matrices, problem_summary, max_bytes):
+    '''
+    write the entry for key, if there is none yet, then evict entries down to max_bytes
+    '''
+
+    entry_dir = get_entry_dir(cache_dir, key)
+    if entry_dir.is_dir():
+        return
+    tmp_dir = pathlib.Path(cache_dir, '{}.tmp.{}'.format(key, os.getpid()))
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        arrays, scalars = problem_data_array.get_arrays()
+        matrix_arrays, matrix_shapes = evaluation.get_matrices_arrays(matrices)
+        for k, v in list(arrays.items()) + list(matrix_arrays.items()):
+            numpy.save(tmp_dir / (k + '.npy'), v, allow_pickle=False)
+        meta = {
+            'version': CACHE_VERSION,
+            'time': time.time(),
+            'scalars': scalars,
+            'arrays': list(arrays.keys()),
+            'matrices': matrix_shapes,
+            'matrix_arrays': list(matrix_arrays.keys()),
+            'problem_summary': problem_summary}
+        # meta.json last, so an entry with meta.json is complete
+        with open(tmp_dir / 'meta.json', 'w') as f:
+            json.dump(meta, f, cls=utils.NpEncoder)
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # another run wrote the entry first
+        if not entry_dir.is_dir():
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict(cache_dir, max_bytes, keep=key)
+
+def get_dir_nbytes(path):
+
+    return sum(fn.stat().st_size for fn in pathlib.Path(path).rglob('*') if fn.is_file())
+
+def evict(cache_dir, max_bytes, keep=None):
+    '''
+    remove the least recently used entries, other than keep, until the cache directory is within max_bytes
+    '''
+
+    entries = []
+    for entry_dir in pathlib.Path(cache_dir).iterdir():
+        meta_file = entry_dir / 'meta.json'
+        if entry_dir.name == keep or not meta_file.is_file():
+            continue
+        entries.append((meta_file.stat().st_mtime, entry_dir))
+    entries.sort()
+    nbytes = get_dir_nbytes(cache_dir)
+    for mtime, entry_dir in entries:
+        if nbytes <= max_bytes:
+            break
+        entry_nbytes = get_dir_nbytes(entry_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        nbytes -= entry_nbytes
+        print('problem cache entry evicted: {}, bytes: {}'.format(entry_dir, entry_nbytes))
@@ -4,6 +4,7 @@ try:
 except:
     print('cannot load matplotlib')
 import numpy as np
+from datautilities import utils
 
 def get_sd_uid(data):
 
@@ -83,13 +84,13 @@ def sort_sd_t_blocks_by_decreasing_margin(data, sd_t_blocks):
 
 def sort_t_blocks_by_increasing_c(data, t_blocks):
 
-    num_t = get_num_t(data)
+    num_t = len(t_blocks)
     for t in range(num_t):
         t_blocks[t] = sorted(t_blocks[t], key=(lambda x: x['c']))
 
 def sort_t_blocks_by_decreasing_c(data, t_blocks):
 
-    num_t = get_num_t(data)
+    num_t = len(t_blocks)
     for t in range(num_t):
         t_blocks[t] = sorted(t_blocks[t], key=(lambda x: -x['c']))
 
@@ -147,7 +148,7 @@ def get_t_blocks_cs(data, t_blocks):
 
 def add_p_max_cumul_to_t_blocks(data, t_blocks):
 
-    num_t = get_num_t(data)
+    num_t = len(t_blocks)
     for t in range(num_t):
         p_max_cumul = np.cumsum([b['p_max'] for b in t_blocks[t]])
         for i in range(len(t_blocks[t])):
@@ -530,26 +531,85 @@ def analyze_supply_demand(data, do_plots=False, problem_file_name=None):
     t_blocks = flatten_sd_t_blocks_to_t_blocks(data, sd_t_blocks)
     t_blocks_pr = get_t_blocks_pr(data, t_blocks)
     t_blocks_cs = get_t_blocks_cs(data, t_blocks)
+    return get_supply_demand_info(
+        [[b['p_max'] for b in blocks] for blocks in t_blocks_pr],
+        [[b['c'] for b in blocks] for blocks in t_blocks_pr],
+        [[b['p_max'] for b in blocks] for blocks in t_blocks_cs],
+        [[b['c'] for b in blocks] for blocks in t_blocks_cs],
+        data.time_series_input.general.interval_duration, do_plots, problem_file_name)
+
+def analyze_supply_demand_arrays(problem_data_array, do_plots=False, problem_file_name=None):
+    '''
+    analyze_supply_demand on the problem as arraydata.InputData, with the same result.
+    the cost blocks of InputData are already sorted by increasing c within each device and interval,
+    with c negated for consumers, so this is the order of decreasing margin,
+    and the filter by the device p_ub is done on all blocks at once
+    '''
+
+    p = problem_data_array
+    block_sd_t = np.repeat(np.arange(p.num_sd * p.num_t), np.ravel(p.sd_t_num_block))
+    block_sd = block_sd_t // p.num_t
+    block_t = block_sd_t % p.num_t
+    block_p_max = p.sd_t_block_p_max.copy()
+    block_p_max_cumul = p.sd_t_block_p_start + block_p_max
+    sd_t_p_max = np.ravel(p.sd_t_p_max)[block_sd_t]
+
+    # keep the blocks up to the first one that takes the device past its p_ub, and cut that one to p_ub
+    block_over = block_p_max_cumul > sd_t_p_max
+    block_num_over_before = utils.get_block_p_start(p.sd_t_block_ptr, block_over.astype(float))
+    block_keep = block_num_over_before == 0.0
+    cut = np.logical_and(block_keep, block_over)
+    block_p_max[cut] -= (block_p_max_cumul[cut] - sd_t_p_max[cut])
+    block_p_max[cut] = np.where(block_p_max[cut] > 0.0, block_p_max[cut], 0.0)
+
+    # the kept blocks of each interval, in device order, split into producer and consumer blocks
+    block_c = np.where(p.sd_is_cs[block_sd] == 1, -p.sd_t_block_c, p.sd_t_block_c)
+    t_block_p_max = [[], []]
+    t_block_c = [[], []]
+    for t in range(p.num_t):
+        for i, is_cs in enumerate([0, 1]):
+            blocks = np.flatnonzero(np.logical_and(
+                np.logical_and(block_keep, block_t == t), p.sd_is_cs[block_sd] == is_cs))
+            t_block_p_max[i].append(block_p_max[blocks].tolist())
+            t_block_c[i].append(block_c[blocks].tolist())
+    return get_supply_demand_info(
+        t_block_p_max[0], t_block_c[0], t_block_p_max[1], t_block_c[1],
+        p.t_d.tolist(), do_plots, problem_file_name)
+
+def get_supply_demand_info(
+        t_pr_block_p_max, t_pr_block_c, t_cs_block_p_max, t_cs_block_c, t_duration, do_plots, problem_file_name):
+    '''
+    equilibrium of each interval, from its producer and consumer blocks in device order,
+    and the totals over the intervals weighted by duration
+    '''
+
+    num_t = len(t_duration)
     t_equilibrium = [
         compute_equilibrium_flexible_demand(
-            pr_block_max_p=[b['p_max'] for b in t_blocks_pr[t]],
-            pr_block_c=[b['c'] for b in t_blocks_pr[t]],
-            cs_block_max_p=[b['p_max'] for b in t_blocks_cs[t]],
-            cs_block_c=[b['c'] for b in t_blocks_cs[t]],
+            pr_block_max_p=t_pr_block_p_max[t],
+            pr_block_c=t_pr_block_c[t],
+            cs_block_max_p=t_cs_block_p_max[t],
+            cs_block_c=t_cs_block_c[t],
             fixed_demand=0.0)
         for t in range(num_t)]
     for t in range(num_t):
         print('t: {}'.format(t))
         print('equilibrium: {}'.format(t_equilibrium[t]))
-    sort_t_blocks_by_increasing_c(data, t_blocks_pr)
-    sort_t_blocks_by_decreasing_c(data, t_blocks_cs)
-    add_p_max_cumul_to_t_blocks(data, t_blocks_pr)
-    add_p_max_cumul_to_t_blocks(data, t_blocks_cs)
     #do_plots = True
     if do_plots:
         if plt is None:
             print('cannot do plots due to failure to import matplotlib')
         else:
+            t_blocks_pr = [
+                [{'p_max': b_p_max, 'c': b_c} for b_p_max, b_c in zip(t_pr_block_p_max[t], t_pr_block_c[t])]
+                for t in range(num_t)]
+            t_blocks_cs = [
+                [{'p_max': b_p_max, 'c': b_c} for b_p_max, b_c in zip(t_cs_block_p_max[t], t_cs_block_c[t])]
+                for t in range(num_t)]
+            sort_t_blocks_by_increasing_c(None, t_blocks_pr)
+            sort_t_blocks_by_decreasing_c(None, t_blocks_cs)
+            add_p_max_cumul_to_t_blocks(None, t_blocks_pr)
+            add_p_max_cumul_to_t_blocks(None, t_blocks_cs)
             for t in range(num_t):
                 plot_blocks_pr_cs_one_t(
                     t_blocks_pr[t],
@@ -558,7 +618,6 @@ def analyze_supply_demand(data, do_plots=False, problem_file_name=None):
                     problem_file_name=problem_file_name,
                     t=t,
                     file_name='supply_demand_t_{}.pdf'.format(t))
-    t_duration = data.time_series_input.general.interval_duration
     surplus_total = sum([t_duration[t] * t_equilibrium[t]['surplus_total'] for t in range(num_t)])
     value_exchanged = sum([t_duration[t] * t_equilibrium[t]['value_exchanged'] for t in range(num_t)])
     surplus_pr = sum([t_duration[t] * t_equilibrium[t]['surplus_pr'] for t in range(num_t)])
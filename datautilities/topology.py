@@ -0,0 +1,179 @@
+'''
+Network topology, i.e. the graph on the buses with an edge for each AC branch (AC lines and transformers),
+over the index arrays of arraydata.InputData.
+Used by the connectedness checks of the problem (validation.connected, initial status)
+and of the solution (evaluation.SolutionEvaluator.eval_connectedness, on status in each interval).
+'''
+
+import numpy
+from datautilities import utils
+
+class NetworkTopology(object):
+    '''
+    The branches are the AC lines followed by the transformers, i.e. branch num_acl + i is transformer i.
+    A topology is the set of in service branches, given by a bool array br_on over the branches.
+
+    The graph of all branches, the bus pairs spanned by the branches with the number of branches on each,
+    and the map from contingencies to branches depend only on the problem and are computed once.
+    The spanning forest of the last topology evaluated is kept and reused for the next one as long as it
+    still spans it. Then only the bridge check is redone.
+    '''
+
+    def __init__(self, problem):
+
+        self.num_bus = problem.num_bus
+        self.num_acl = problem.num_acl
+        self.num_xfr = problem.num_xfr
+        self.num_br = self.num_acl + self.num_xfr
+        self.num_k = problem.num_k
+        self.bus_uid = problem.bus_uid
+        self.k_uid = problem.k_uid
+        self.br_fbus = numpy.concatenate((problem.acl_fbus, problem.xfr_fbus))
+        self.br_tbus = numpy.concatenate((problem.acl_tbus, problem.xfr_tbus))
+        self.set_pairs()
+        self.set_k_br(problem)
+        self.forest = None
+        self.num_forest = 0
+
+    def set_pairs(self):
+        '''
+        bus pair spanned by each branch, and number of branches on each pair
+        '''
+
+        self.br_pair, self.pair_fbus, self.pair_tbus = utils.get_vertex_pairs(self.num_bus, self.br_fbus, self.br_tbus)
+        self.pair_num_br = numpy.bincount(self.br_pair[self.br_pair >= 0], minlength=self.pair_fbus.size)
+
+    def set_k_br(self, problem):
+        '''
+        branch outaged by each single device contingency, -1 if not an AC branch,
+        first single device contingency outaging each branch, -1 if none,
+        and the contingencies outaging more than one device that outage some AC branch, with their branches.
+        the branches of contingency k_multi[j] are k_multi_br[k_multi_br_ptr[j]:k_multi_br_ptr[j + 1]]
+        '''
+
+        k_single = (problem.k_num_out == 1)
+        self.k_br = numpy.full(shape=(self.num_k, ), fill_value=-1, dtype=int)
+        k_is_acl = numpy.flatnonzero(numpy.logical_and(problem.k_out_is_acl, k_single))
+        k_is_xfr = numpy.flatnonzero(numpy.logical_and(problem.k_out_is_xfr, k_single))
+        self.k_br[k_is_acl] = problem.k_out_acl[k_is_acl]
+        self.k_br[k_is_xfr] = self.num_acl + problem.k_out_xfr[k_is_xfr]
+        k_is_br = numpy.flatnonzero(self.k_br >= 0)
+        br, k_first = numpy.unique(self.k_br[k_is_br], return_index=True)
+        self.br_ctg = numpy.full(shape=(self.num_br, ), fill_value=-1, dtype=int)
+        self.br_ctg[br] = k_is_br[k_first]
+
+        # multiple outages, from the k_out_all_* arrays
+        out_br = numpy.full(shape=(problem.k_out_all_ptr[-1], ), fill_value=-1, dtype=int)
+        out_is_acl = numpy.flatnonzero(problem.k_out_all_is_acl)
+        out_is_xfr = numpy.flatnonzero(problem.k_out_all_is_xfr)
+        out_br[out_is_acl] = problem.k_out_all_acl[out_is_acl]
+        out_br[out_is_xfr] = self.num_acl + problem.k_out_all_xfr[out_is_xfr]
+        out_k = numpy.repeat(numpy.arange(self.num_k), problem.k_num_out)
+        out_is_multi_br = numpy.flatnonzero(numpy.logical_and(out_br >= 0, problem.k_num_out[out_k] > 1))
+        self.k_multi, k_multi_num_br = numpy.unique(out_k[out_is_multi_br], return_counts=True)
+        self.k_multi_br = out_br[out_is_multi_br]
+        self.k_multi_br_ptr = numpy.zeros(shape=(self.k_multi.size + 1, ), dtype=int)
+        numpy.cumsum(k_multi_num_br, out=self.k_multi_br_ptr[1:])
+
+    def get_connectivity(self, br_on, br_cost=None):
+        '''
+        num_components, labels, bridges = get_connectivity(br_on, br_cost=None)
+
+        br_on - bool array, in service branches
+        br_cost - float array, branches with lower cost are preferred in a new spanning forest,
+          e.g. those in service in all intervals, so the forest can be reused for more topologies
+        num_components, labels - connected components, as utils.get_graph_components
+        bridges - sorted int array of the in service branches that are bridges
+        '''
+
+        if self.forest is None or not utils.is_spanning_forest(self.forest, self.br_fbus, self.br_tbus, br_on):
+            self.forest = utils.get_spanning_forest(
+                self.num_bus, self.br_fbus, self.br_tbus, br_on, cost=br_cost,
+                pair=(self.br_pair, self.pair_fbus, self.pair_tbus))
+            self.num_forest += 1
+        bridges = utils.get_forest_bridges(self.forest, self.br_fbus, self.br_tbus, br_on)
+        return self.forest['num_components'], self.forest['labels'], bridges
+
+    def get_disconnected_base(self, num_components, labels):
+        '''
+        (i0, i1), the first buses of the first two connected components, or None if connected
+        '''
+
+        if num_components < 2:
+            return None
+        components_first_bus = numpy.unique(labels, return_index=True)[1]
+        return (int(components_first_bus[0]), int(components_first_bus[1]))
+
+    def get_ctg_bridges(self, bridges):
+        '''
+        the bridges outaged by a single device contingency.
+        a bridge is the only in service branch on its bus pair,
+        so each contingency outaging it disconnects the network
+        '''
+
+        return bridges[self.br_ctg[bridges] >= 0]
+
+    def get_disconnected_multi_ctgs(self, br_on, num_components, labels):
+        '''
+        the contingencies outaging more than one device that disconnect the graph of br_on,
+        as a list of (i0, i1, k), with buses i0, i1 connected in br_on but not under contingency k, in order of k.
+
+        bridges cover the outage of one branch, so each of these contingencies is checked on its own,
+        by the connected components with all of its branches out of service.
+        num_components, labels - connected components of br_on, as get_connectivity
+        '''
+
+        disconnected = []
+        if self.k_multi.size == 0:
+            return disconnected
+        components_first_bus = numpy.unique(labels, return_index=True)[1]
+        bus_component_first_bus = components_first_bus[labels]
+        for j in range(self.k_multi.size):
+            k_br = self.k_multi_br[self.k_multi_br_ptr[j]:self.k_multi_br_ptr[j + 1]]
+            if not numpy.any(br_on[k_br]):
+                continue
+            k_br_on = numpy.copy(br_on)
+            k_br_on[k_br] = False
+            k_br_on = numpy.flatnonzero(k_br_on)
+            k_num_components, k_labels = utils.get_graph_components(
+                self.num_bus, self.br_fbus[k_br_on], self.br_tbus[k_br_on])
+            if k_num_components > num_components:
+                # first bus not in the same component under k as the first bus of its component in br_on
+                i1 = numpy.flatnonzero(k_labels != k_labels[bus_component_first_bus])[0]
+                disconnected.append((int(bus_component_first_bus[i1]), int(i1), int(self.k_multi[j])))
+        return disconnected
+
+    def get_disconnected_ctg(self, ctg_bridges, disconnected_multi_ctgs=[]):
+        '''
+        (i0, i1, k), the buses of the first bridge outaged by a contingency, in order of (i0, i1),
+        and the first contingency outaging it, or else the first of disconnected_multi_ctgs,
+        as from get_disconnected_multi_ctgs, or None if there is none
+        '''
+
+        if ctg_bridges.size == 0:
+            if len(disconnected_multi_ctgs) > 0:
+                return disconnected_multi_ctgs[0]
+            return None
+        br = ctg_bridges[numpy.lexsort((self.br_tbus[ctg_bridges], self.br_fbus[ctg_bridges]))[0]]
+        return (int(self.br_fbus[br]), int(self.br_tbus[br]), int(self.br_ctg[br]))
+
+    def get_disconnecting_ctgs(self, bridges, disconnected_multi_ctgs=[]):
+        '''
+        sorted int array of the contingencies outaging a bridge,
+        and those of disconnected_multi_ctgs, as from get_disconnected_multi_ctgs
+        '''
+
+        br_is_bridge = numpy.zeros(shape=(self.num_br + 1, ), dtype=bool) # last entry for k_br == -1
+        br_is_bridge[bridges] = True
+        return numpy.union1d(
+            numpy.flatnonzero(br_is_bridge[self.k_br]),
+            numpy.array([k for i0, i1, k in disconnected_multi_ctgs], dtype=int))
+
+    def get_components_uid(self, num_components, labels):
+        '''
+        list of the sets of bus uids in each connected component
+        '''
+
+        order = numpy.argsort(labels, kind='stable')
+        split = numpy.flatnonzero(numpy.diff(labels[order])) + 1
+        return [set(self.bus_uid[i].tolist()) for i in numpy.split(order, split)][:num_components]
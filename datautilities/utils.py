@@ -3,8 +3,9 @@ Functions needed in various places in datautilities
 '''
 
 import os, sys, subprocess, traceback, pathlib, time, psutil, json
-import numpy, networkx
-from scipy.sparse import sparsetools
+import numpy, scipy.sparse
+from scipy.sparse import sparsetools, csgraph
+from multiprocessing import shared_memory
 
 import datamodel
 from datautilities.errors import GitError
@@ -256,240 +257,277 @@ def csr_mat_vec_max_to_vec(a, x, out):
         temp[nj,:] = out[i,:]
         numpy.amax(temp, axis=0, out=out[i,:])
 
-@timeit
-def get_connected_components(vertices, od_pairs):
-    '''
-
-    components = get_connected_components(vertices, od_pairs)
-
-    vertices
-    should be a list of nonnegative ints
-    nonnegative ints represent vertices
-
-    od_pairs
-    should be a list of pairs of nonnegative ints
-    each int in each element of od_pairs should be in vertices
-    pairs represent edges specified by the origin and destination vertices
-
-    components
-    will be a list of lists of nonnegative ints
-    each element of components is a component
-    each component is a list of vertices that are connected by edges
-    no vertex is listed twice in a single component
-    each vertex is listed in exactly one component
-    for any two vertices listed in two different components, there is no path of edges connecting them
-
-    The following unusual features ARE OK:
-    * empty list of pairs
-    * empty list of vertices (requires an empty list of pairs)
-    * isolated vertices, i.e. not adjacent to any pairs
-    * pairs listing vertices in decreasing order
-    * pairs listing vertices in increasing order
-    * duplicate pairs
-    * pairs that are the same except for the order of vertices
-    * pairs where both vertices are the same, i.e. a self edge
-    '''
-
-    num_vertices = len(vertices)
-    num_edges = len(od_pairs)
-    edge_vertices = sorted(list(set([p[0] for p in od_pairs] + [p[1] for p in od_pairs])))
-    vertices_in_edges_not_in_vertices = sorted(list(set(edge_vertices).difference(set(vertices))))
-    if len(vertices_in_edges_not_in_vertices) > 0:
-        print('vertices in edge set but not in vertex set: {}'.format(vertices_in_edges_not_in_vertices))
-        assert(len(vertices_in_edges_not_in_vertices) <= 0)
-    if num_vertices == 0:
-        return []
-
-    # for connectedness, we do not need self edges, duplicate edges, or edges that are duplicates on switching o-d order
-    pairs_o_lt_d = (
-        [(p[0], p[1]) for p in od_pairs if p[0] < p[1]] +
-        [(p[1], p[0]) for p in od_pairs if p[1] < p[0]])
-    pairs_sorted = sorted(pairs_o_lt_d)
-    pairs_unique = sorted(list(set(pairs_sorted)))
-
-    g = networkx.Graph()
-    g.add_nodes_from(sorted(list(set(vertices))))
-    #g.add_edges_from(sorted(od_pairs))
-    g.add_edges_from(sorted(pairs_unique))
-    g_connected_components = networkx.connected_components(g)
-    return [sorted(list(c)) for c in g_connected_components]
-
-@timeit
-def get_bridges(od_pairs):
-    '''
-    bridges = get_bridges(od_pairs)
-
-    od_pairs
-    should be a list of pairs of nonnegative ints
-    nonnegative ints represent vertices
-    pairs represent edges specified by the origin and destination vertices
-
-    bridges
-    will be a list of nonnegative ints
-    each element of bridges is the index of a bridge as an element of od_pairs
-    i.e. [od_pairs[i] for i in bridges] is the set of pairs representing edges that are bridges
-    A bridge is an edge such that when it is removed from the graph, the number of connected components
-    of the graph increases. Specifically, the connected component containing a bridge will be disconnected
-    into two connected components, so the number of connected components increases by 1.
-
-    The following unusual features ARE OK:
-    * empty list of pairs
-    * empty list of vertices (requires an empty list of pairs)
-    * isolated vertices, i.e. not adjacent to any pairs
-    * pairs listing vertices in decreasing order
-    * pairs listing vertices in increasing order
-    * duplicate pairs
-    * pairs that are the same except for the order of vertices
-    * pairs where both vertices are the same, i.e. a self edge
-
-    the following types of edges cannot be a bridge:
-    * self-edge e (o[e] == d[e])
-    * edge e that is parallel with another edge e2 (o[e] == o[e2] and d[e] == d[e2)
-    * edge e that is parallel with another edge e2 on switching ordder (o[e] == d[e2] and d[e] == o[e2)
-    so we could reduce the graph so that it has none of these edges
-    and exclude any of them if they show up as bridges    
-    '''
-
-    # todo make this more efficient
-    
-    num_edges = len(od_pairs)
-    if num_edges == 0:
-        return []
-    o_nodes = [p[0] for p in od_pairs]
-    d_nodes = [p[1] for p in od_pairs]
-    nodes = sorted(list(set(o_nodes + d_nodes)))
-    num_nodes = len(nodes)
-    if num_nodes == 0:
-        return []
-    max_node = max(nodes)
-
-    # pair map
-    #od_pairs_map = {od_pairs[i]:i for i in range(num_edges)}
-    pairs_o_lt_d_map = {}
-    for i in range(num_edges): # todo this is likely inefficient
-        if od_pairs[i][0] < od_pairs[i][1]:
-            pairs_o_lt_d_map[od_pairs[i]] = i
-        elif od_pairs[i][1] < od_pairs[i][0]:
-            pairs_o_lt_d_map[(od_pairs[i][1], od_pairs[i][0])] = i
-
-    # for connectedness, we do not need self edges, duplicate edges, or edges that are duplicates on switching o-d order
-    pairs_o_lt_d = (
-        [(p[0], p[1]) for p in od_pairs if p[0] < p[1]] +
-        [(p[1], p[0]) for p in od_pairs if p[1] < p[0]])
-    pairs_sorted = sorted(pairs_o_lt_d)
-    pairs_unique = sorted(list(set(pairs_sorted)))
-    pairs_unique_count = {p:0 for p in pairs_unique}
-    for p in pairs_o_lt_d:
-        pairs_unique_count[p] += 1
-    pairs_count_gt_1 = sorted([p for p in pairs_unique if pairs_unique_count[p] > 1])
-
-    # get bridges on reduced graph
-    g = networkx.Graph()
-    g.add_nodes_from(nodes)
-    g.add_edges_from(pairs_unique)
-    g_bridges = networkx.bridges(g)
-
-    # get bridges on original graph by removing those that cannot be bridges as they have multiple edges
-    bridges = sorted(list(set(list(g_bridges)).difference(set(pairs_count_gt_1))))
-    #bridges_idx = sorted([od_pairs_map[i] for i in bridges])
-    bridges_idx = sorted([pairs_o_lt_d_map[i] for i in bridges])
-    # print('od_pairs: {}'.format(od_pairs))
-    # print('o_nodes: {}'.format(o_nodes))
-    # print('d_nodes: {}'.format(d_nodes))
-    # print('nodes: {}'.format(nodes))
-    # print('num_nodes: {}'.format(num_nodes))
-    # print('num_edges: {}'.format(num_edges))
-    # print('pairs_sorted: {}'.format(pairs_sorted))
-    # print('pairs_dict: {}'.format(pairs_dict))
-    # print('pairs_local_sorted: {}'.format(pairs_local_sorted))
-    # print('pairs_augmented: {}'.format(pairs_augmented))
-    # print('nodes(g): {}'.format(list(g.nodes)))
-    # print('edges(g): {}'.format(list(g.edges)))
-    # print('bridges(g): {}'.format(list(g_bridges)))
-    # print('bridge_pair_indices: {}'.format(bridge_pair_indices))
-    return bridges_idx
-
-def get_bridges_orig(od_pairs):
-    '''
-    bridges = get_bridges(od_pairs)
-
-    od_pairs
-    should be a list of pairs of nonnegative ints
-    nonnegative ints represent vertices
-    pairs represent edges specified by the origin and destination vertices
-
-    bridges
-    will be a list of nonnegative ints
-    each element of bridges is the index of a bridge as an element of od_pairs
-    i.e. [od_pairs[i] for i in bridges] is the set of pairs representing edges that are bridges
-    A bridge is an edge such that when it is removed from the graph, the number of connected components
-    of the graph increases. Specifically, the connected component containing a bridge will be disconnected
-    into two connected components, so the number of connected components increases by 1.
-
-    The following unusual features ARE OK:
-    * empty list of pairs
-    * empty list of vertices (requires an empty list of pairs)
-    * isolated vertices, i.e. not adjacent to any pairs
-    * pairs listing vertices in decreasing order
-    * pairs listing vertices in increasing order
-    * duplicate pairs
-    * pairs that are the same except for the order of vertices
-    * pairs where both vertices are the same, i.e. a self edge
-    '''
-    # todo: this one has a bug somewhere. the final mapping had a key error
-    # this method is faster than the replacement though
-    
-    num_edges = len(od_pairs)
-    if num_edges == 0:
-        return []
-    o_nodes = [p[0] for p in od_pairs]
-    d_nodes = [p[1] for p in od_pairs]
-    nodes = sorted(list(set(o_nodes + d_nodes)))
-    num_nodes = len(nodes)
-    if num_nodes == 0:
-        return []
-    max_node = max(nodes)
-    pairs_o_lt_d = [
-        (o_nodes[i], d_nodes[i], i)
-        if o_nodes[i] <= d_nodes[i]
-        else (d_nodes[i], o_nodes[i], i)
-        for i in range(num_edges)]
-    pairs_sorted = sorted(pairs_o_lt_d)
-    pairs_unique = list(set(pairs_sorted))
-    pairs_dict = {p:[] for p in pairs_unique}
-    for p in pairs_sorted:
-        pairs_dict[(p[0], p[1])].append(p)
-    pairs_local_sorted = sorted(
-        [(v[i][0], v[i][1], i, v[i][2]) for k, v in pairs_dict.items() for i in range(len(v))])
-    pairs_first = [p for p in pairs_local_sorted if p[2] == 0]
-    pairs_with_extra_edges = sorted([k for k, v in pairs_dict.items() if len(v) > 1])
-    num_pairs_with_extra_edges = len(pairs_with_extra_edges)
-    extra_pairs = (
-        [(pairs_with_extra_edges[i][0], num_nodes + i, num_edges + i)
-         for i in range(num_pairs_with_extra_edges)] +
-        [(pairs_with_extra_edges[i][1], num_nodes + i, num_edges + i + num_pairs_with_extra_edges)
-         for i in range(num_pairs_with_extra_edges)])
-    pairs_augmented = sorted([(p[0], p[1], p[3]) for p in pairs_first] + extra_pairs)
-    pairs_augmented_dict = {(p[0], p[1]): p[2] for p in pairs_augmented}
-    g = networkx.Graph()
-    g.add_edges_from(sorted(pairs_augmented_dict.keys()))
-    g_bridges = networkx.bridges(g)
-    bridge_pair_indices = [pairs_augmented_dict[p] for p in list(g_bridges)]
-    # print('od_pairs: {}'.format(od_pairs))
-    # print('o_nodes: {}'.format(o_nodes))
-    # print('d_nodes: {}'.format(d_nodes))
-    # print('nodes: {}'.format(nodes))
-    # print('num_nodes: {}'.format(num_nodes))
-    # print('num_edges: {}'.format(num_edges))
-    # print('pairs_sorted: {}'.format(pairs_sorted))
-    # print('pairs_dict: {}'.format(pairs_dict))
-    # print('pairs_local_sorted: {}'.format(pairs_local_sorted))
-    # print('pairs_augmented: {}'.format(pairs_augmented))
-    # print('nodes(g): {}'.format(list(g.nodes)))
-    # print('edges(g): {}'.format(list(g.edges)))
-    # print('bridges(g): {}'.format(list(g_bridges)))
-    # print('bridge_pair_indices: {}'.format(bridge_pair_indices))
-    return bridge_pair_indices
+def put_arrays_in_shared_memory(arrays):
+    '''
+    spec, shms = put_arrays_in_shared_memory(arrays)
+
+    copy numpy arrays into new shared memory blocks
+
+    arrays - dict of numpy arrays
+    spec - dict of (block name, shape, dtype str) with the same keys as arrays,
+      small and picklable, to be passed to other processes and read there with get_arrays_from_shared_memory
+    shms - list of SharedMemory blocks. the caller owns these and should close and unlink them when done
+    '''
+
+    spec = {}
+    shms = []
+    try:
+        for k, v in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, v.nbytes)) # size 0 is not allowed
+            shms.append(shm)
+            arr = numpy.ndarray(shape=v.shape, dtype=v.dtype, buffer=shm.buf)
+            arr[...] = v
+            spec[k] = (shm.name, v.shape, v.dtype.str)
+    except:
+        close_shared_memory(shms, unlink=True)
+        raise
+    return spec, shms
+
+def get_arrays_from_shared_memory(spec):
+    '''
+    arrays, shms = get_arrays_from_shared_memory(spec)
+
+    attach to shared memory blocks created by put_arrays_in_shared_memory
+
+    spec - as returned by put_arrays_in_shared_memory
+    arrays - dict of numpy arrays backed by the shared memory blocks, no copy
+    shms - list of SharedMemory blocks. keep these referenced as long as the arrays are used
+    '''
+
+    arrays = {}
+    shms = []
+    for k, (name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        shms.append(shm)
+        arrays[k] = numpy.ndarray(shape=shape, dtype=dtype, buffer=shm.buf)
+    return arrays, shms
+
+def close_shared_memory(shms, unlink=False):
+    '''
+    close shared memory blocks, and unlink (free) them if unlink is True.
+    only the creating process should unlink
+    '''
+
+    for shm in shms:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+def get_csr_adjacency(num_vertices, o, d):
+    '''
+    indptr, adj_vertex, adj_edge = get_csr_adjacency(num_vertices, o, d)
+
+    adjacency of the undirected graph with edges e = (o[e], d[e]) in compressed sparse row form.
+    the neighbors of vertex i are adj_vertex[indptr[i]:indptr[i + 1]],
+    reached by the edges adj_edge[indptr[i]:indptr[i + 1]].
+    each edge appears once in the adjacency of each of its ends, twice for a self edge
+    '''
+
+    num_edges = len(o)
+    src = numpy.concatenate((o, d))
+    dst = numpy.concatenate((d, o))
+    edge = numpy.concatenate((numpy.arange(num_edges), numpy.arange(num_edges)))
+    order = numpy.argsort(src, kind='stable')
+    indptr = numpy.zeros(shape=(num_vertices + 1, ), dtype=int)
+    numpy.cumsum(numpy.bincount(src, minlength=num_vertices), out=indptr[1:])
+    return indptr, dst[order], edge[order]
+
+def get_graph_components(num_vertices, o, d):
+    '''
+    num_components, labels = get_graph_components(num_vertices, o, d)
+
+    connected components, by scipy.sparse.csgraph
+
+    num_vertices - vertices are range(num_vertices)
+    o, d - int arrays of origin and destination vertices of the edges.
+      duplicate edges, edges with o[e] > d[e], and self edges are OK
+    num_components - number of connected components
+    labels - int array, labels[i] is the component containing vertex i.
+      components are numbered in increasing order of their smallest vertex
+    '''
+
+    adj = scipy.sparse.csr_matrix(
+        (numpy.ones(shape=(len(o), ), dtype=int), (o, d)), shape=(num_vertices, num_vertices))
+    return csgraph.connected_components(adj, directed=False)
+
+def get_range_reduce(x, start, end, ufunc):
+    '''
+    y = get_range_reduce(x, start, end, ufunc)
+
+    y[i] = ufunc.reduce(x[start[i]:end[i]]) for an idempotent ufunc, e.g. numpy.minimum or numpy.maximum,
+    and nonempty ranges, by a sparse table: O(len(x) log(len(x))) to build and O(1) for each range
+    '''
+
+    y = numpy.zeros(shape=(len(start), ), dtype=x.dtype)
+    if len(start) == 0:
+        return y
+    level = numpy.frexp(end - start)[1] - 1 # floor(log2(end - start))
+    table = x # table[s] = ufunc.reduce(x[s:(s + width)])
+    width = 1
+    for j in range(numpy.amax(level) + 1):
+        if j > 0:
+            table = ufunc(table[:-width], table[width:])
+            width *= 2
+        i = numpy.flatnonzero(level == j)
+        y[i] = ufunc(table[start[i]], table[end[i] - width])
+    return y
+
+def get_vertex_pairs(num_vertices, o, d):
+    '''
+    pair, pair_o, pair_d = get_vertex_pairs(num_vertices, o, d)
+
+    the distinct unordered vertex pairs spanned by the edges e = (o[e], d[e])
+
+    pair - int array, pair[e] is the index of the pair spanned by edge e, -1 for a self edge (o[e] == d[e]).
+      numpy.bincount(pair[pair >= 0]) is the number of edges on each pair
+    pair_o, pair_d - int arrays of the vertices of each pair, pair_o < pair_d, in increasing order of (pair_o, pair_d)
+    '''
+
+    o = numpy.asarray(o, dtype=int)
+    d = numpy.asarray(d, dtype=int)
+    lo = numpy.minimum(o, d)
+    hi = numpy.maximum(o, d)
+    edge = numpy.flatnonzero(lo < hi)
+    pair_key, pair_edge = numpy.unique(lo[edge] * num_vertices + hi[edge], return_inverse=True)
+    pair = numpy.full(shape=(len(o), ), fill_value=-1, dtype=int)
+    pair[edge] = pair_edge
+    return pair, pair_key // max(1, num_vertices), pair_key % max(1, num_vertices)
+
+def get_spanning_forest(num_vertices, o, d, on, cost=None, pair=None):
+    '''
+    forest = get_spanning_forest(num_vertices, o, d, on, cost=None, pair=None)
+
+    spanning forest of the graph with vertices range(num_vertices) and edges e = (o[e], d[e]) with on[e],
+    for use with get_forest_bridges. duplicate edges, edges with o[e] > d[e], and self edges are OK
+
+    cost - float array, edges with lower cost are preferred as forest edges (minimum spanning forest),
+      e.g. to prefer edges that are also on in other graphs, so the forest spans those too
+    pair - (pair, pair_o, pair_d) from get_vertex_pairs(num_vertices, o, d), if already known
+    forest - dict:
+      num_components, labels - as get_graph_components
+      edge - int array of the forest edges
+      child - int array, edge[i] joins vertex child[i] to its parent
+      preorder - vertices in depth first preorder, roots in increasing order
+      start, end - int arrays, the subtree of vertex v is preorder[start[v]:end[v]]
+    '''
+
+    o = numpy.asarray(o, dtype=int)
+    d = numpy.asarray(d, dtype=int)
+    if cost is None:
+        cost = numpy.zeros(shape=(len(o), ))
+    if pair is None:
+        pair = get_vertex_pairs(num_vertices, o, d)
+    pair, pair_o, pair_d = pair
+
+    # one candidate edge, the lowest cost one, for each vertex pair spanned by an edge that is on
+    edge = numpy.flatnonzero(numpy.logical_and(on, pair >= 0))
+    order = numpy.lexsort((cost[edge], pair[edge]))
+    edge = edge[order]
+    edge_pair = pair[edge]
+    first = numpy.flatnonzero(numpy.diff(edge_pair, prepend=-1))
+    pair_edge = numpy.full(shape=(len(pair_o), ), fill_value=-1, dtype=int)
+    pair_edge[edge_pair[first]] = edge[first]
+
+    # minimum spanning forest. weights must be positive, as zeros are not edges
+    weight = 1.0 + cost[edge[first]] - (numpy.amin(cost[edge[first]]) if first.size > 0 else 0.0)
+    tree = csgraph.minimum_spanning_tree(
+        scipy.sparse.csr_matrix(
+            (weight, (pair_o[edge_pair[first]], pair_d[edge_pair[first]])),
+            shape=(num_vertices, num_vertices))).tocoo()
+    forest_edge = pair_edge[numpy.searchsorted(
+        pair_o * num_vertices + pair_d,
+        numpy.minimum(tree.row, tree.col) * num_vertices + numpy.maximum(tree.row, tree.col))]
+    forest_edge.sort()
+
+    # depth first preorder of the forest
+    indptr, adj_vertex, adj_edge = get_csr_adjacency(num_vertices, o[forest_edge], d[forest_edge])
+    indptr = indptr.tolist()
+    adj_vertex = adj_vertex.tolist()
+    adj_edge = adj_edge.tolist()
+    next_adj = indptr[:num_vertices]
+    start = [-1] * num_vertices
+    end = [0] * num_vertices
+    labels = [0] * num_vertices
+    child = [0] * len(forest_edge)
+    preorder = []
+    num_components = 0
+    for root in range(num_vertices):
+        if start[root] >= 0:
+            continue
+        start[root] = len(preorder)
+        labels[root] = num_components
+        preorder.append(root)
+        stack = [root]
+        while stack:
+            v = stack[-1]
+            p = next_adj[v]
+            if p < indptr[v + 1]:
+                next_adj[v] = p + 1
+                w = adj_vertex[p]
+                if start[w] < 0: # otherwise w is the parent of v
+                    child[adj_edge[p]] = w
+                    start[w] = len(preorder)
+                    labels[w] = num_components
+                    preorder.append(w)
+                    stack.append(w)
+            else:
+                stack.pop()
+                end[v] = len(preorder)
+        num_components += 1
+
+    return {
+        'num_components': num_components,
+        'labels': numpy.array(labels, dtype=int),
+        'edge': forest_edge,
+        'child': numpy.array(child, dtype=int),
+        'preorder': numpy.array(preorder, dtype=int),
+        'start': numpy.array(start, dtype=int),
+        'end': numpy.array(end, dtype=int)}
+
+def is_spanning_forest(forest, o, d, on):
+    '''
+    True if forest, from get_spanning_forest, is a spanning forest of the graph with edges e with on[e],
+    i.e. all forest edges are on and no edge that is on joins two trees of the forest.
+    then the components of this graph are those of the forest
+    '''
+
+    return bool(
+        numpy.all(on[forest['edge']]) and
+        numpy.all(forest['labels'][o[on]] == forest['labels'][d[on]]))
+
+def get_forest_bridges(forest, o, d, on):
+    '''
+    bridges = get_forest_bridges(forest, o, d, on)
+
+    sorted int array of the edges e with on[e] that are bridges of the graph of these edges,
+    given a spanning forest of this graph from get_spanning_forest.
+    self edges and edges parallel to another edge (in either direction) are not bridges
+
+    only forest edges can be bridges. forest edge e into vertex c is a bridge iff no other edge has
+    exactly one end in the subtree of c, i.e. iff over the subtree, the lowest and highest preorder positions
+    of the vertices and their other neighbors stay inside the subtree.
+    the forest can be reused across graphs that it spans, e.g. from one interval to the next,
+    and only this check is redone
+    '''
+
+    start = forest['start']
+    end = forest['end']
+    forest_on = numpy.zeros(shape=(len(on), ), dtype=bool)
+    forest_on[forest['edge']] = True
+    other = numpy.flatnonzero(numpy.logical_and(on, numpy.logical_not(forest_on)))
+    lo = start.copy()
+    hi = start.copy()
+    numpy.minimum.at(lo, o[other], start[d[other]])
+    numpy.minimum.at(lo, d[other], start[o[other]])
+    numpy.maximum.at(hi, o[other], start[d[other]])
+    numpy.maximum.at(hi, d[other], start[o[other]])
+    preorder = forest['preorder']
+    sub_start = start[forest['child']]
+    sub_end = end[forest['child']]
+    is_bridge = numpy.logical_and(
+        get_range_reduce(lo[preorder], sub_start, sub_end, numpy.minimum) >= sub_start,
+        get_range_reduce(hi[preorder], sub_start, sub_end, numpy.maximum) < sub_end)
+    return forest['edge'][is_bridge]
 
 def eval_convex_cost_function(num_block, p_max, c, p):
     '''
@@ -513,3 +551,65 @@ def eval_convex_cost_function(num_block, p_max, c, p):
             z_so_far += c[i] * p_remaining
             break
     return z_so_far
+
+def get_block_p_start(block_ptr, block_p_max):
+    '''
+    block_p_start = get_block_p_start(block_ptr, block_p_max)
+
+    for cost functions with blocks stored as in eval_convex_cost_functions,
+    block_p_start[b] is the sum of block_p_max over the blocks of the same function before b.
+    summed within each function, not over the flat array, to keep the sums as accurate as a loop over the blocks
+    '''
+
+    num_function = len(block_ptr) - 1
+    function_num_block = numpy.diff(block_ptr)
+    block_function = numpy.repeat(numpy.arange(num_function), function_num_block)
+    block_pos = numpy.arange(len(block_p_max)) - block_ptr[block_function]
+    padded = numpy.zeros(shape=(num_function, (numpy.amax(function_num_block) if num_function > 0 else 0) + 1))
+    padded[block_function, block_pos + 1] = block_p_max
+    numpy.cumsum(padded, axis=1, out=padded)
+    return padded[block_function, block_pos]
+
+def eval_convex_cost_functions(block_ptr, block_p_start, block_p_max, block_c, p):
+    '''
+    z = eval_convex_cost_functions(block_ptr, block_p_start, block_p_max, block_c, p)
+
+    vectorized eval_convex_cost_function over many cost functions, z[i] = cost function i at p[i].
+    the blocks of function i are block_ptr[i]:block_ptr[i + 1] in the flat block arrays,
+    in order of increasing marginal cost block_c, with size block_p_max,
+    and block_p_start as from get_block_p_start.
+
+    the cost is the sum over the blocks of block_c times the part of p in the block,
+    i.e. min(block_p_max, p - block_p_start), clipped at 0 except in the first block,
+    so as in eval_convex_cost_function, p below 0 is costed at the first block and p above the sum of block_p_max is not costed
+    '''
+
+    num_function = len(block_ptr) - 1
+    function_num_block = numpy.diff(block_ptr)
+    block_function = numpy.repeat(numpy.arange(num_function), function_num_block)
+    block_p = numpy.subtract(p[block_function], block_p_start)
+    numpy.minimum(block_p, block_p_max, out=block_p)
+    block_is_first = numpy.zeros(shape=(len(block_p), ), dtype=bool)
+    block_is_first[block_ptr[:-1][function_num_block > 0]] = True
+    numpy.maximum(block_p, 0.0, out=block_p, where=numpy.logical_not(block_is_first))
+    numpy.multiply(block_c, block_p, out=block_p)
+    return numpy.bincount(block_function, weights=block_p, minlength=num_function)
+
+def get_segmented_cumsum(x, reset):
+    '''
+    y = get_segmented_cumsum(x, reset)
+
+    cumulative sum along axis 1 of a 2D array x, restarting from 0 after each position where reset is True,
+    i.e. y[i, j] = sum(x[i, (r + 1):(j + 1)]) with r the last reset position in row i at or before j,
+    or sum(x[i, :(j + 1)]) if there is none.
+    computed as the cumsum of the row minus its value at the last reset,
+    so entries after a reset may differ from a running sum by rounding
+    '''
+
+    y = numpy.cumsum(x, axis=1)
+    last_reset = numpy.where(reset, numpy.arange(x.shape[1]), -1)
+    numpy.maximum.accumulate(last_reset, axis=1, out=last_reset)
+    has_reset = last_reset >= 0
+    i, j = numpy.nonzero(has_reset)
+    y[i, j] -= y[i, last_reset[i, j]]
+    return y
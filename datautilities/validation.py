@@ -2,11 +2,11 @@
 
 '''
 
-import numpy, networkx, traceback, pprint, json, re, pandas, time, copy
+import os, numpy, traceback, pprint, json, re, pandas, time, copy, pathlib, itertools, shutil, tempfile, concurrent.futures
 from pydantic.error_wrappers import ValidationError
 from datamodel.input.data import InputDataFile
 from datamodel.output.data import OutputDataFile
-from datautilities import utils, arraydata, evaluation
+from datautilities import utils, arraydata, evaluation, topology, jsonstream, jsonmodel, problemcache
 from datautilities.errors import ModelError, GitError
 from datautilities import supply_demand
 
@@ -33,6 +33,21 @@ def read_json(file_name):
     #print(config['timestamp_pattern_str'])
     return data
 
+def load_data_model(data_model_class, data, file_name):
+    '''
+    data model of class data_model_class, e.g. InputDataFile or OutputDataFile,
+    from data, the dict read from file_name by read_json.
+    same as data_model_class.load(file_name), without parsing the file again,
+    including resolving relative file paths in pydantic validators from the directory of the file
+    '''
+
+    orig_dir = os.getcwd()
+    os.chdir(pathlib.Path(file_name).parent.absolute())
+    try:
+        return data_model_class(**data)
+    finally:
+        os.chdir(orig_dir)
+
 def write_json(data, file_name, sort_keys=False):
 
     with open(file_name, 'w') as f:
@@ -357,6 +372,13 @@ def scrub_data(problem_file, default_config_file, config_file, parameters_str, s
     # output file
     print('scrubbed problem data file: {}\n'.format(scrubbed_problem_file))
 
+    if config['problem_stream_load']:
+        if config['do_private_modifications']:
+            print('problem_stream_load is not used with do_private_modifications, reading the whole problem')
+        else:
+            scrub_problem_stream(problem_file, config, scrubbed_problem_file)
+            return
+
     # use json? or pydantic model? - json for now
     use_json = True
     if use_json:
@@ -368,6 +390,105 @@ def scrub_data(problem_file, default_config_file, config_file, parameters_str, s
         scrub_problem(problem_data_model, config, use_pydantic=True)
         problem_data_model.save(scrubbed_problem_file)
 
+def scrub_problem_stream(problem_file, config, scrubbed_problem_file):
+    '''
+    scrub the problem as scrub_problem does, reading and writing the files in a stream,
+    with the same output as the json path of scrub_data.
+    the parsed json of the whole problem is never held. instead, the problem is read twice:
+    * first into a skeleton, with the fields of each item of the lists of the sections, e.g. network.bus,
+      except time series and other lists of numbers or lists (see is_scrub_time_series),
+      which scrub_problem does not read or change. scrub_problem scrubs the skeleton,
+      computing the new uids for the whole problem
+    * then item by item, each item taking the scrubbed fields of its skeleton item, and written out.
+      the lists are written to temporary files, then joined in the sorted key order of the output
+    both reads go through jsonstream.iter_sections, as load_problem_stream does
+    '''
+
+    chunk_size = config['json_stream_chunk_size']
+    skeleton = read_problem_skeleton(problem_file, chunk_size)
+    scrub_problem(skeleton, config)
+
+    out_dir = pathlib.Path(scrubbed_problem_file).absolute().parent
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp_dir:
+        list_files = {}
+        with open(problem_file, 'r') as f:
+            for section, fields, value in jsonstream.iter_sections(f, chunk_size):
+                if fields is None or not isinstance(skeleton[section], dict):
+                    continue
+                for key, items, value in fields:
+                    if items is None or not isinstance(skeleton[section][key], list):
+                        continue
+                    list_files[section, key] = os.path.join(tmp_dir, '{}.{}.json'.format(len(list_files), key))
+                    with open(list_files[section, key], 'w') as g:
+                        g.write('[')
+                        for i, item in enumerate(items):
+                            set_from_scrub_skeleton_item(item, skeleton[section][key][i])
+                            g.write((', ' if i > 0 else '') + json.dumps(item, sort_keys=True))
+                        g.write(']')
+
+        with open(scrubbed_problem_file, 'w') as g:
+            g.write('{')
+            for i, section in enumerate(sorted(skeleton.keys())):
+                g.write((', ' if i > 0 else '') + json.dumps(section) + ': ')
+                if not isinstance(skeleton[section], dict):
+                    g.write(json.dumps(skeleton[section], sort_keys=True))
+                    continue
+                g.write('{')
+                for j, key in enumerate(sorted(skeleton[section].keys())):
+                    g.write((', ' if j > 0 else '') + json.dumps(key) + ': ')
+                    if (section, key) in list_files:
+                        with open(list_files[section, key], 'r') as h:
+                            shutil.copyfileobj(h, g)
+                    else:
+                        g.write(json.dumps(skeleton[section][key], sort_keys=True))
+                g.write('}')
+            g.write('}')
+
+def read_problem_skeleton(problem_file, chunk_size):
+    '''
+    the problem as parsed by json, without the time series and other lists of numbers or lists
+    in the items of the lists of the sections, reading the file in a stream
+    '''
+
+    skeleton = {}
+    with open(problem_file, 'r') as f:
+        for section, fields, value in jsonstream.iter_sections(f, chunk_size):
+            if fields is None:
+                skeleton[section] = value
+                continue
+            skeleton[section] = {}
+            for key, items, value in fields:
+                if items is None:
+                    skeleton[section][key] = value
+                    continue
+                skeleton[section][key] = [get_scrub_skeleton_item(item) for item in items]
+    return skeleton
+
+def is_scrub_time_series(value):
+    '''
+    True if value, a field of an item, is a list of numbers or lists, e.g. a time series or cost curve
+    '''
+
+    return isinstance(value, list) and any(not isinstance(v, str) for v in value)
+
+def get_scrub_skeleton_item(item):
+
+    if not isinstance(item, dict):
+        return item
+    return {k: v for k, v in item.items() if not is_scrub_time_series(v)}
+
+def set_from_scrub_skeleton_item(item, skeleton_item):
+    '''
+    set the fields of item that are in the skeleton from skeleton_item, after scrubbing,
+    removing those that scrubbing removed from it
+    '''
+
+    if not isinstance(item, dict):
+        return
+    for k in [k for k, v in item.items() if not is_scrub_time_series(v) and k not in skeleton_item]:
+        del item[k]
+    item.update(skeleton_item)
+
 def scrub_problem(problem_data, config, use_pydantic=False):
 
     # todo - others?
@@ -896,6 +1017,42 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
             pass
 
     # summary - write this to the summary file when exiting
+    summary = get_empty_summary(problem_file, solution_file)
+
+    # data files
+    print('problem data file: {}\n'.format(problem_file))
+    print('pop solution data file: {}\n'.format(pop_sol_file))
+    print('solution data file: {}\n'.format(solution_file))
+
+    # git info
+    set_git_info(summary, ignored_errors_file)
+
+    if solution_file is None:
+
+        # read and check problem
+        data_model = check_problem(
+            summary, problem_file, config, True, pop_sol_file,
+            summary_csv_file, summary_json_file, problem_errors_file)
+
+    else:
+
+        # read and check problem and convert problem data to numpy arrays, or load them from the problem cache
+        data_model, problem_data_array, shared = prepare_problem(
+            summary, problem_file, config, summary_csv_file, summary_json_file, problem_errors_file)
+
+        # read, check, and evaluate solution
+        check_solution(
+            summary, data_model, problem_data_array, solution_file, config,
+            summary_csv_file, summary_json_file, solution_errors_file, shared=shared)
+
+    write_summary(summary, summary_csv_file, summary_json_file, config)
+
+    print('end of check_data(), memory info: {}'.format(utils.get_memory_info()))
+
+    return summary
+
+def get_empty_summary(problem_file, solution_file):
+
     summary = {
         'problem_data_file': problem_file,
         'solution_data_file': solution_file,
@@ -923,10 +1080,9 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
     summary['evaluation']['error_diagnostics'] = ''
     summary['evaluation']['infeas_diagnostics'] = {}
 
-    # data files
-    print('problem data file: {}\n'.format(problem_file))
-    print('pop solution data file: {}\n'.format(pop_sol_file))
-    print('solution data file: {}\n'.format(solution_file))
+    return summary
+
+def set_git_info(summary, ignored_errors_file):
 
     # git info
     try:
@@ -943,7 +1099,19 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
     else:
         summary['git_info'] = git_info
 
-    # read problem data file without validation (faster)
+def check_problem(summary, problem_file, config, do_problem_checks, pop_sol_file, summary_csv_file, summary_json_file, problem_errors_file):
+    '''
+    read and check the problem file, and set the problem part of summary
+    do_problem_checks - do the model, connectedness, and optimization checks, and write the POP solution.
+        these can be skipped if evaluating a solution.
+        with config['problem_fast_load'] or config['problem_stream_load'],
+        prepare_problem does not build the data model, see load_problem_arrays
+    returns the problem data model
+    '''
+
+    # read problem data file without validation, i.e. parse the json.
+    # the data model is built from the parsed data, so the file is read only once,
+    # and a json syntax error is still told apart from a pydantic validation error
     start_time = time.time()
     try:
         problem_data_dict = read_json(problem_file)
@@ -970,7 +1138,7 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
     # have not yet implemented more expensive problem data checks - initial AC feas, independent device feas
     start_time = time.time()
     try:
-        data_model = InputDataFile.load(problem_file)
+        data_model = load_data_model(InputDataFile, problem_data_dict, problem_file)
     except ValidationError as e:
         err_msg = 'data read error - pydantic validation'
         summary['problem']['pass'] = 0
@@ -980,12 +1148,13 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
         with open(problem_errors_file, 'a') as f:
             f.write(traceback.format_exc())
         raise e
+    del problem_data_dict
     print('after reading problem with validation, memory info: {}'.format(utils.get_memory_info()))
     end_time = time.time()
     print('load time: {}'.format(end_time - start_time))
 
     # can skip further problem checks, POP solution, etc., if evaluating a solution
-    if solution_file is None:
+    if do_problem_checks:
 
         # independent data model checks
         start_time = time.time()
@@ -1093,7 +1262,15 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
 
     # summary
     # if we got to this point there are no error diagnostics to report
-    problem_summary = get_summary(data_model)
+    set_problem_summary(summary, get_summary(data_model), supply_demand_info)
+
+    return data_model
+
+def set_problem_summary(summary, problem_summary, supply_demand_info):
+    '''
+    set the problem part of summary from the problem summary and the supply/demand analysis, for a problem that passed
+    '''
+
     problem_summary['t_supply_demand'] = supply_demand_info['t_equilibrium']
     supply_demand_keys = [
         'value_exchanged',
@@ -1111,49 +1288,200 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
     summary['problem'] = problem_summary
     summary['problem']['pass'] = 1
 
-    if solution_file is not None:
+def prepare_problem(summary, problem_file, config, summary_csv_file, summary_json_file, problem_errors_file):
+    '''
+    data_model, problem_data_array, shared = prepare_problem(...)
+
+    read and check the problem file and convert it to numpy arrays, for evaluating solutions,
+    and set the problem part of summary.
+    if config['problem_cache_dir'] is set, load these from the problem cache (see problemcache) instead,
+    or write them to it. data_model is None when loaded from the cache,
+    or with config['problem_fast_load'] or config['problem_stream_load'],
+    when the arrays are set from the parsed or streamed problem, see load_problem_arrays.
+    shared - dict for SolutionEvaluator, with the matrices of evaluation.get_matrices
+    '''
+
+    cache_dir = config['problem_cache_dir']
+    if cache_dir is not None:
+        start_time = time.time()
+        key = problemcache.get_key(problem_file, config)
+        entry = problemcache.load(cache_dir, key)
+        end_time = time.time()
+        print('problem cache {}, key: {}, time: {}'.format('hit' if entry is not None else 'miss', key, end_time - start_time))
+        if entry is not None:
+            problem_data_array, matrices, problem_summary = entry
+            summary['problem'] = problem_summary
+            return None, problem_data_array, {'matrices': matrices}
+
+    if config['problem_fast_load'] or config['problem_stream_load']:
+        data_model = None
+        problem_data_array = load_problem_arrays(summary, problem_file, config, summary_csv_file, summary_json_file, problem_errors_file)
+    else:
+        data_model = check_problem(summary, problem_file, config, False, None, summary_csv_file, summary_json_file, problem_errors_file)
+        problem_data_array = get_problem_data_array(summary, data_model, config, summary_csv_file, summary_json_file)
+    matrices = evaluation.get_matrices(problem_data_array, config)
 
-        # read solution data file without validation (faster)
+    if cache_dir is not None:
         start_time = time.time()
         try:
-            solution_data_dict = read_json(solution_file)
+            problemcache.save(cache_dir, key, problem_data_array, matrices, summary['problem'], config['problem_cache_max_bytes'])
+        except Exception:
+            # evaluation goes on without the cache
+            print('problem cache write error ignored\n')
+            traceback.print_exc()
+        end_time = time.time()
+        print('problem cache write time: {}'.format(end_time - start_time))
+
+    return data_model, problem_data_array, {'matrices': matrices}
+
+def load_problem_arrays(summary, problem_file, config, summary_csv_file, summary_json_file, problem_errors_file):
+    '''
+    read the problem file and convert it to numpy arrays without its data model, for evaluating solutions
+    to a problem that has passed its checks before, with the checks of problem_json_checks,
+    and set the problem part of summary from the arrays.
+    the parsed problem is converted per section and field, so it is read once, and not held as objects of the data model.
+    with config['problem_stream_load'], the file is read in a stream instead, see load_problem_stream
+    returns the problem as arraydata.InputData
+    '''
+
+    if config['problem_stream_load']:
+        # read the problem file in a stream, checking it and filling the problem arrays a batch of items at a time,
+        # without holding the parsed json of the whole file
+        start_time = time.time()
+        try:
+            problem_data_array, problem_objects = load_problem_stream(problem_file, config)
+        except ModelError as e:
+            err_msg = 'data read error - json checks'
+            summary['problem']['pass'] = 0
+            summary['problem']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            write_summary(summary, summary_csv_file, summary_json_file, config)
+            print(err_msg + '\n')
+            with open(problem_errors_file, 'a') as f:
+                f.write(traceback.format_exc())
+            raise e
         except Exception as e:
-            err_msg = 'solution read error - read without validation'
-            summary['solution']['pass'] = 0
-            summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            err_msg = 'data read error - read without validation'
+            summary['problem']['pass'] = 0
+            summary['problem']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
             write_summary(summary, summary_csv_file, summary_json_file, config)
             print(err_msg + '\n')
-            with open(solution_errors_file, 'a') as f:
+            with open(problem_errors_file, 'a') as f:
                 f.write(traceback.format_exc())
             raise e
-        print('after read solution without validation, memory info: {}'.format(utils.get_memory_info()))
+        print('after stream reading problem, memory info: {}'.format(utils.get_memory_info()))
         end_time = time.time()
-        print('read solution data file without validation time: {}'.format(end_time - start_time))
+        print('problem stream load time: {}'.format(end_time - start_time))
+    else:
+        # read problem data file without validation, i.e. parse the json
+        start_time = time.time()
+        try:
+            problem_data_dict = read_json(problem_file)
+        except Exception as e:
+            err_msg = 'data read error - read without validation'
+            summary['problem']['pass'] = 0
+            summary['problem']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            write_summary(summary, summary_csv_file, summary_json_file, config)
+            print(err_msg + '\n')
+            with open(problem_errors_file, 'a') as f:
+                f.write(traceback.format_exc())
+            raise e
+        print('after reading problem without validation, memory info: {}'.format(utils.get_memory_info()))
+        end_time = time.time()
+        print('read problem data file without validation time: {}'.format(end_time - start_time))
 
-        # read solution
+        # check the parsed problem and fill the problem arrays from it directly, skipping the data model
         start_time = time.time()
-        #print('solution file: {}'.format(solution_file))
         try:
-            solution_data_model = OutputDataFile.load(solution_file)
-        except ValidationError as e:
-            err_msg = 'solution read error - pydantic validation'
-            summary['solution']['pass'] = 0
-            summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            problem_data_array, problem_objects = load_problem_json(problem_data_dict)
+        except ModelError as e:
+            err_msg = 'data read error - json checks'
+            summary['problem']['pass'] = 0
+            summary['problem']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
             write_summary(summary, summary_csv_file, summary_json_file, config)
             print(err_msg + '\n')
-            with open(solution_errors_file, 'a') as f:
+            with open(problem_errors_file, 'a') as f:
                 f.write(traceback.format_exc())
             raise e
-        print('after read solution with validation, memory info: {}'.format(utils.get_memory_info()))
+        del problem_data_dict
+        print('after load_problem_json(), memory info: {}'.format(utils.get_memory_info()))
         end_time = time.time()
-        print('solution load time: {}'.format(end_time - start_time))
-        
-        # solution data model checks
+        print('problem json checks and convert problem data to numpy arrays time: {}'.format(end_time - start_time))
+
+    set_problem_summary_arrays(summary, problem_data_array, problem_objects, problem_file, config, problem_errors_file)
+
+    return problem_data_array
+
+def set_problem_summary_arrays(summary, problem_data_array, problem_objects, problem_file, config, problem_errors_file):
+    '''
+    the supply/demand analysis and the summary of check_problem, from the problem arrays
+    '''
+
+    start_time = time.time()
+    try:
+        supply_demand_info = supply_demand.analyze_supply_demand_arrays(
+            problem_data_array, config['do_problem_supply_demand_plots'], problem_file)
+    except Exception as e:
+        err_msg = 'data error - analyze supply and demand'
+        print(err_msg +'\n')
+        print(traceback.format_exc())
+        with open(problem_errors_file, 'a') as f:
+            f.write(traceback.format_exc())
+        raise e
+    print('after analyzing supply and demand, memory info: {}'.format(utils.get_memory_info()))
+    end_time = time.time()
+    print('supply/demand time: {}'.format(end_time - start_time))
+
+    set_problem_summary(summary, get_summary_arrays(problem_data_array, problem_objects), supply_demand_info)
+
+def get_problem_data_array(summary, data_model, config, summary_csv_file, summary_json_file):
+
+    # convert problem data to numpy arrays
+    start_time = time.time()
+    try:
+        problem_data_array = arraydata.InputData()
+        problem_data_array.set_from_data_model(data_model)
+    except Exception as e:
+        err_msg = 'evaluation error in converting problem data model to numpy arrays - unexpected'
+        summary['evaluation']['pass'] = 0
+        summary['evaluation']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+        write_summary(summary, summary_csv_file, summary_json_file, config)
+        print(err_msg + '\n')
+        # with open(solution_errors_file, 'a') as f: # this just goes to standard error
+        #     f.write(traceback.format_exc())
+        raise e
+    print('after problem_data_array.set_from_data_model(), memory info: {}'.format(utils.get_memory_info()))
+    end_time = time.time()
+    print('convert problem data to numpy arrays time: {}'.format(end_time - start_time))
+
+    return problem_data_array
+
+def check_solution(summary, data_model, problem_data_array, solution_file, config, summary_csv_file, summary_json_file, solution_errors_file, shared=None):
+    '''
+    read, check, and evaluate the solution file, and set the solution and evaluation parts of summary
+    shared - passed to SolutionEvaluator, to reuse data across solutions to the same problem
+    data_model - None if the problem was loaded from the problem cache.
+        then the solution is checked and converted without its data model, as with config['solution_fast_load']
+    '''
+
+    if data_model is None and not config['solution_stream_load']:
+        config = dict(config, solution_fast_load=True)
+
+    if config['solution_stream_load']:
+        # read, check, and convert the solution to numpy arrays in one pass over the file, without the data model
         start_time = time.time()
         try:
-            solution_model_checks(data_model, solution_data_model, config)
+            solution_data_array = load_solution_stream(problem_data_array, solution_file, config)
         except ModelError as e:
-            err_msg = 'solution model error - independent checks'
+            err_msg = 'solution model error - json checks'
+            summary['solution']['pass'] = 0
+            summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            write_summary(summary, summary_csv_file, summary_json_file, config)
+            print(err_msg + '\n')
+            with open(solution_errors_file, 'a') as f:
+                f.write(traceback.format_exc())
+            raise e
+        except Exception as e:
+            err_msg = 'solution read error - read without validation'
             summary['solution']['pass'] = 0
             summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
             write_summary(summary, summary_csv_file, summary_json_file, config)
@@ -1161,42 +1489,101 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
             with open(solution_errors_file, 'a') as f:
                 f.write(traceback.format_exc())
             raise e
-        print('after solution_model_checks(), memory info: {}'.format(utils.get_memory_info()))
+        print('after load_solution_stream(), memory info: {}'.format(utils.get_memory_info()))
         end_time = time.time()
-        print('solution model_checks time: {}'.format(end_time - start_time))
-
-        # summary
-        # if we got to this point there are no error diagnostics to report
-        solution_summary = get_solution_summary(data_model, solution_data_model)
-        solution_summary['error_diagnostics'] = ''
-        pp = pprint.PrettyPrinter()
-        pp.pprint(solution_summary)
-        summary['solution'] = solution_summary
-        summary['solution']['pass'] = 1
-
-        # convert problem data to numpy arrays
+        print('solution stream load time: {}'.format(end_time - start_time))
+        solution_data_model = None
+    else:
+        # read solution data file without validation, i.e. parse the json, once, as for the problem
         start_time = time.time()
         try:
-            problem_data_array = arraydata.InputData()
-            problem_data_array.set_from_data_model(data_model)
+            solution_data_dict = read_json(solution_file)
         except Exception as e:
-            err_msg = 'evaluation error in converting problem data model to numpy arrays - unexpected'
-            summary['evaluation']['pass'] = 0
-            summary['evaluation']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+            err_msg = 'solution read error - read without validation'
+            summary['solution']['pass'] = 0
+            summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
             write_summary(summary, summary_csv_file, summary_json_file, config)
             print(err_msg + '\n')
-            # with open(solution_errors_file, 'a') as f: # this just goes to standard error
-            #     f.write(traceback.format_exc())
+            with open(solution_errors_file, 'a') as f:
+                f.write(traceback.format_exc())
             raise e
-        print('after problem_data_array.set_from_data_model(), memory info: {}'.format(utils.get_memory_info()))
+        print('after read solution without validation, memory info: {}'.format(utils.get_memory_info()))
         end_time = time.time()
-        print('convert problem data to numpy arrays time: {}'.format(end_time - start_time))
+        print('read solution data file without validation time: {}'.format(end_time - start_time))
 
-        # convert solution data to numpy arrays
+        if config['solution_fast_load']:
+            # check the parsed solution and fill the solution arrays from it directly, skipping the data model
+            start_time = time.time()
+            try:
+                solution_json_checks(problem_data_array, solution_data_dict, config)
+            except ModelError as e:
+                err_msg = 'solution model error - json checks'
+                summary['solution']['pass'] = 0
+                summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+                write_summary(summary, summary_csv_file, summary_json_file, config)
+                print(err_msg + '\n')
+                with open(solution_errors_file, 'a') as f:
+                    f.write(traceback.format_exc())
+                raise e
+            end_time = time.time()
+            print('solution json checks time: {}'.format(end_time - start_time))
+            solution_data_model = None
+        else:
+            # read solution
+            start_time = time.time()
+            #print('solution file: {}'.format(solution_file))
+            try:
+                solution_data_model = load_data_model(OutputDataFile, solution_data_dict, solution_file)
+            except ValidationError as e:
+                err_msg = 'solution read error - pydantic validation'
+                summary['solution']['pass'] = 0
+                summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+                write_summary(summary, summary_csv_file, summary_json_file, config)
+                print(err_msg + '\n')
+                with open(solution_errors_file, 'a') as f:
+                    f.write(traceback.format_exc())
+                raise e
+            del solution_data_dict
+            print('after read solution with validation, memory info: {}'.format(utils.get_memory_info()))
+            end_time = time.time()
+            print('solution load time: {}'.format(end_time - start_time))
+    
+            # solution data model checks
+            start_time = time.time()
+            try:
+                solution_model_checks(data_model, solution_data_model, config)
+            except ModelError as e:
+                err_msg = 'solution model error - independent checks'
+                summary['solution']['pass'] = 0
+                summary['solution']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+                write_summary(summary, summary_csv_file, summary_json_file, config)
+                print(err_msg + '\n')
+                with open(solution_errors_file, 'a') as f:
+                    f.write(traceback.format_exc())
+                raise e
+            print('after solution_model_checks(), memory info: {}'.format(utils.get_memory_info()))
+            end_time = time.time()
+            print('solution model_checks time: {}'.format(end_time - start_time))
+
+    # summary
+    # if we got to this point there are no error diagnostics to report
+    solution_summary = get_solution_summary(data_model, solution_data_model)
+    solution_summary['error_diagnostics'] = ''
+    pp = pprint.PrettyPrinter()
+    pp.pprint(solution_summary)
+    summary['solution'] = solution_summary
+    summary['solution']['pass'] = 1
+
+    # convert solution data to numpy arrays, done already by load_solution_stream
+    if not config['solution_stream_load']:
         start_time = time.time()
         try:
             solution_data_array = arraydata.OutputData()
-            solution_data_array.set_from_data_model(problem_data_array, solution_data_model)
+            if config['solution_fast_load']:
+                solution_data_array.set_from_json(problem_data_array, solution_data_dict)
+                del solution_data_dict
+            else:
+                solution_data_array.set_from_data_model(problem_data_array, solution_data_model)
         except Exception as e:
             err_msg = 'evaluation error in converting solution data model to numpy arrays - unexpected'
             summary['evaluation']['pass'] = 0
@@ -1209,70 +1596,232 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
         print('after solution_data_array.set_from_data_model(), memory info: {}'.format(utils.get_memory_info()))
         end_time = time.time()
         print('convert solution data to numpy arrays time: {}'.format(end_time - start_time))
-        # todo more systematic memory measurement
-        # print('bus_t_v numpy array memory info. shape: {}, size: {}, itemsize: {}, size*itemsize: {}, nbytes: {}'.format(
-        #     solution_data_array.bus_t_v.shape,
-        #     solution_data_array.bus_t_v.size,
-        #     solution_data_array.bus_t_v.itemsize,
-        #     solution_data_array.bus_t_v.size *
-        #     solution_data_array.bus_t_v.itemsize,
-        #     solution_data_array.bus_t_v.nbytes))
-
-        # evaluate solution
-        start_time = time.time()
+    # todo more systematic memory measurement
+    # print('bus_t_v numpy array memory info. shape: {}, size: {}, itemsize: {}, size*itemsize: {}, nbytes: {}'.format(
+    #     solution_data_array.bus_t_v.shape,
+    #     solution_data_array.bus_t_v.size,
+    #     solution_data_array.bus_t_v.itemsize,
+    #     solution_data_array.bus_t_v.size *
+    #     solution_data_array.bus_t_v.itemsize,
+    #     solution_data_array.bus_t_v.nbytes))
+
+    # evaluate solution
+    start_time = time.time()
+    try:
+        solution_evaluator = evaluation.SolutionEvaluator(problem_data_array, solution_data_array, config=config, shared=shared)
+        #solution_evaluator.problem = problem_data_array
+        #solution_evaluator.solution = solution_data_array
+        solution_evaluator.run()
+    except Exception as e:
+        err_msg = 'evaluation error in evaluating solution - unexpected'
+        summary['evaluation']['pass'] = 0
+        summary['evaluation']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
+        write_summary(summary, summary_csv_file, summary_json_file, config)
+        print(err_msg + '\n')
+        with open(solution_errors_file, 'a') as f: # todo where to put this?
+            f.write(traceback.format_exc())
+        raise e
+    print('after solution_evaluator.run(), memory info: {}'.format(utils.get_memory_info()))
+    evaluation_summary = solution_evaluator.get_summary()
+    infeas_summary = solution_evaluator.get_infeas_summary()
+    obj = solution_evaluator.get_obj()
+    feas = solution_evaluator.get_feas()
+    pp = pprint.PrettyPrinter()
+    print('evaluation summary:')
+    pp.pprint(evaluation_summary)
+    print('infeasibility summary:')
+    pp.pprint(infeas_summary)            
+    print('feas: {}'.format(feas))
+    print('obj: {}'.format(obj))
+    summary['evaluation'] = evaluation_summary
+    summary['evaluation']['pass'] = 1
+    summary['evaluation']['error_diagnostics'] = ''
+
+    summary['evaluation']['infeas_diagnostics'] = infeas_summary
+    #summary['evaluation']['infeas_diagnostics'] = str(infeas_summary)
+    #summary['evaluation']['infeas_diagnostics'] = json.dumps(infeas_summary)
+    #summary['evaluation']['infeas_diagnostics'] = json.dumps(infeas_summary, cls=utils.NpEncoder)
+    #summary['evaluation']['infeas_diagnostics'] = json_dumps_int64(infeas_summary)
+
+    end_time = time.time()
+    print('evaluate solution time: {}'.format(end_time - start_time))
+
+    # print('solution data')
+    # for s in ['bus', 'shunt', 'simple_dispatchable_device', 'ac_line', 'dc_line', 'two_winding_transformer']:
+    #     print('section: {}'.format(s))
+    #     for i in solution_data_model.time_series_output.__dict__[s]:
+    #         for k, v in i.__dict__.items():
+    #             if k == 'uid':
+    #                 print('  {}: {}'.format(k, v))
+    #             else:
+    #                 print('    {}: {}'.format(k, v))            
+
+def check_data_batch(problem_file, solution_files, default_config_file, config_file, parameters_str, summary_csv_file, summary_dir, problem_errors_file, ignored_errors_file, num_workers=1):
+    '''
+    evaluate several solution files against one problem file, e.g. for leaderboard scoring
+
+    the problem is read, checked, and converted to numpy arrays once.
+    the solution evaluators share the sparse matrices that depend only on the problem,
+    and the static factors of the contingency model, as long as the AC branches in service in some t
+    are the same from one solution to the next (see SolutionEvaluator, shared).
+    an error in one solution is recorded in its summary and does not stop the others.
+
+    summary_csv_file - one row for each solution file
+    summary_dir - a summary json file and a solution errors file for each solution file are written here
+    num_workers - evaluate the solutions on a pool of this many processes, each with its own shared data,
+        or serially if <= 1. with config['batch_share_problem'], the processes share the problem arrays
+        in shared memory (see put_problem_in_shared_memory)
+
+    returns the summaries, in order of solution_files
+    '''
+
+    # read config
+    config = read_config(default_config_file, config_file, parameters_str)
+
+    # open files
+    for fn in [summary_csv_file, problem_errors_file, ignored_errors_file]:
+        with open(fn, 'w') as f:
+            pass
+    pathlib.Path(summary_dir).mkdir(parents=True, exist_ok=True)
+
+    # per solution output files, named by the solution file, or also by its position if names repeat
+    solution_names = [pathlib.Path(fn).stem for fn in solution_files]
+    if len(set(solution_names)) < len(solution_names):
+        solution_names = ['{}_{}'.format(i, n) for i, n in enumerate(solution_names)]
+    summary_json_files = [str(pathlib.Path(summary_dir, '{}_summary.json'.format(n))) for n in solution_names]
+    solution_errors_files = [str(pathlib.Path(summary_dir, '{}_solution_errors.txt'.format(n))) for n in solution_names]
+
+    # summary - copied for each solution
+    summary = get_empty_summary(problem_file, None)
+
+    # data files
+    print('problem data file: {}\n'.format(problem_file))
+    print('solution data files: {}\n'.format(solution_files))
+
+    # git info
+    set_git_info(summary, ignored_errors_file)
+
+    # read problem and convert to numpy arrays, once, or load from the problem cache
+    start_time = time.time()
+    data_model, problem_data_array, shared = prepare_problem(summary, problem_file, config, summary_csv_file, None, problem_errors_file)
+    end_time = time.time()
+    print('batch problem preparation time: {}'.format(end_time - start_time))
+
+    # evaluate each solution, serially or on a pool of processes
+    start_time = time.time()
+    num_workers = max(1, min(num_workers, len(solution_files)))
+    print('batch evaluation processes: {}'.format(num_workers))
+    if num_workers > 1:
+        # no nested process pools, and no thread pools within the processes
+        config = dict(config, ctg_num_proc=1, run_num_threads=1)
+        shms = []
+        if config['batch_share_problem']:
+            # the processes attach to one copy of the problem arrays and matrices in shared memory,
+            # rather than each getting its own. the problem data model is not sent,
+            # so the solutions are checked without it, as with solution_fast_load
+            spec, shms = put_problem_in_shared_memory(problem_data_array, shared)
+            initializer, initargs = init_batch_worker_shared, (spec, config)
+        else:
+            initializer, initargs = init_batch_worker, (data_model, problem_data_array, config, shared)
         try:
-            solution_evaluator = evaluation.SolutionEvaluator(problem_data_array, solution_data_array, config=config)
-            #solution_evaluator.problem = problem_data_array
-            #solution_evaluator.solution = solution_data_array
-            solution_evaluator.run()
-        except Exception as e:
-            err_msg = 'evaluation error in evaluating solution - unexpected'
-            summary['evaluation']['pass'] = 0
-            summary['evaluation']['error_diagnostics'] = err_msg + '\n' + traceback.format_exc()
-            write_summary(summary, summary_csv_file, summary_json_file, config)
-            print(err_msg + '\n')
-            with open(solution_errors_file, 'a') as f: # todo where to put this?
-                f.write(traceback.format_exc())
-            raise e
-        print('after solution_evaluator.run(), memory info: {}'.format(utils.get_memory_info()))
-        evaluation_summary = solution_evaluator.get_summary()
-        infeas_summary = solution_evaluator.get_infeas_summary()
-        obj = solution_evaluator.get_obj()
-        feas = solution_evaluator.get_feas()
-        pp = pprint.PrettyPrinter()
-        print('evaluation summary:')
-        pp.pprint(evaluation_summary)
-        print('infeasibility summary:')
-        pp.pprint(infeas_summary)            
-        print('feas: {}'.format(feas))
-        print('obj: {}'.format(obj))
-        summary['evaluation'] = evaluation_summary
-        summary['evaluation']['pass'] = 1
-        summary['evaluation']['error_diagnostics'] = ''
-
-        summary['evaluation']['infeas_diagnostics'] = infeas_summary
-        #summary['evaluation']['infeas_diagnostics'] = str(infeas_summary)
-        #summary['evaluation']['infeas_diagnostics'] = json.dumps(infeas_summary)
-        #summary['evaluation']['infeas_diagnostics'] = json.dumps(infeas_summary, cls=utils.NpEncoder)
-        #summary['evaluation']['infeas_diagnostics'] = json_dumps_int64(infeas_summary)
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=num_workers, initializer=initializer, initargs=initargs) as executor:
+                summaries = list(executor.map(
+                    check_batch_solution, [summary] * len(solution_files), solution_files, summary_json_files, solution_errors_files))
+        finally:
+            utils.close_shared_memory(shms, unlink=True)
+    else:
+        init_batch_worker(data_model, problem_data_array, config, shared)
+        summaries = [
+            check_batch_solution(summary, solution_files[i], summary_json_files[i], solution_errors_files[i])
+            for i in range(len(solution_files))]
+        init_batch_worker(None, None, None, None)
+    end_time = time.time()
+    print('batch evaluation time: {}'.format(end_time - start_time))
 
-        end_time = time.time()
-        print('evaluate solution time: {}'.format(end_time - start_time))
-
-        # print('solution data')
-        # for s in ['bus', 'shunt', 'simple_dispatchable_device', 'ac_line', 'dc_line', 'two_winding_transformer']:
-        #     print('section: {}'.format(s))
-        #     for i in solution_data_model.time_series_output.__dict__[s]:
-        #         for k, v in i.__dict__.items():
-        #             if k == 'uid':
-        #                 print('  {}: {}'.format(k, v))
-        #             else:
-        #                 print('    {}: {}'.format(k, v))            
+    # aggregate summary csv
+    summary_table = pandas.concat([get_summary_table(s, config) for s in summaries], ignore_index=True)
+    summary_table.to_csv(summary_csv_file, index=False)
+    for fn, s in zip(solution_files, summaries):
+        print('solution: {}, solution pass: {}, evaluation pass: {}, feas: {}, obj: {}'.format(
+            fn, s['solution'].get('pass'), s['evaluation'].get('pass'), s['evaluation'].get('feas'), s['evaluation'].get('z')))
 
-    write_summary(summary, summary_csv_file, summary_json_file, config)
+    print('end of check_data_batch(), memory info: {}'.format(utils.get_memory_info()))
 
-    print('end of check_data(), memory info: {}'.format(utils.get_memory_info()))
+    return summaries
+
+# problem data of a batch evaluation process, and data shared by its solution evaluators
+batch_worker = None
+
+def init_batch_worker(data_model, problem_data_array, config, shared):
+
+    global batch_worker
+    batch_worker = {
+        'data_model': data_model,
+        'problem_data_array': problem_data_array,
+        'config': config,
+        'shared': dict(shared) if shared is not None else {}}
+
+def put_problem_in_shared_memory(problem_data_array, shared):
+    '''
+    spec, shms = put_problem_in_shared_memory(problem_data_array, shared)
+
+    copy the problem arrays and the matrices in shared into shared memory, for init_batch_worker_shared.
+    the caller owns shms and should close and unlink them when the workers are done
+    '''
+
+    arrays, scalars = problem_data_array.get_arrays()
+    matrix_arrays, matrix_shapes = evaluation.get_matrices_arrays(shared['matrices'])
+    arrays_spec, shms = utils.put_arrays_in_shared_memory(arrays)
+    try:
+        matrix_arrays_spec, matrix_shms = utils.put_arrays_in_shared_memory(matrix_arrays)
+    except:
+        utils.close_shared_memory(shms, unlink=True)
+        raise
+    spec = {
+        'arrays': arrays_spec,
+        'scalars': scalars,
+        'matrix_arrays': matrix_arrays_spec,
+        'matrices': matrix_shapes}
+    return spec, shms + matrix_shms
+
+def init_batch_worker_shared(spec, config):
+    '''
+    init_batch_worker, with the problem arrays and matrices in the shared memory of put_problem_in_shared_memory,
+    read only, and no problem data model
+    '''
+
+    arrays, shms = utils.get_arrays_from_shared_memory(spec['arrays'])
+    matrix_arrays, matrix_shms = utils.get_arrays_from_shared_memory(spec['matrix_arrays'])
+    for v in list(arrays.values()) + list(matrix_arrays.values()):
+        v.flags.writeable = False
+    problem_data_array = arraydata.InputData()
+    problem_data_array.set_from_arrays(arrays, spec['scalars'])
+    matrices = evaluation.get_matrices_from_arrays(matrix_arrays, spec['matrices'])
+    init_batch_worker(None, problem_data_array, config, {'matrices': matrices})
+    # keep the blocks open as long as the arrays are used
+    batch_worker['shms'] = shms + matrix_shms
+
+def check_batch_solution(summary, solution_file, summary_json_file, solution_errors_file):
+    '''
+    read, check, and evaluate one solution file of a batch, with the problem data of the batch process.
+    returns its summary
+    '''
 
+    summary = copy.deepcopy(summary)
+    summary['solution_data_file'] = solution_file
+    for fn in [summary_json_file, solution_errors_file]:
+        with open(fn, 'w') as f:
+            pass
+    try:
+        check_solution(
+            summary, batch_worker['data_model'], batch_worker['problem_data_array'], solution_file, batch_worker['config'],
+            None, summary_json_file, solution_errors_file, shared=batch_worker['shared'])
+    except Exception:
+        # check_solution has written the summary with the error diagnostics
+        print('batch solution error ignored, solution data file: {}\n'.format(solution_file))
+    else:
+        write_summary(summary, None, summary_json_file, batch_worker['config'])
     return summary
 
 def write_summary(summary, summary_csv_file, summary_json_file, config):
@@ -1285,6 +1834,14 @@ def write_summary(summary, summary_csv_file, summary_json_file, config):
 
 def write_summary_csv(summary, summary_csv_file, config):
 
+    summary_table = get_summary_table(summary, config)
+    summary_table.to_csv(summary_csv_file, index=False)
+
+def get_summary_table(summary, config):
+    '''
+    summary flattened to a table of one row, with long text fields truncated
+    '''
+
     max_field_len = config['summary_field_str_len_max']
     summary_for_csv = copy.deepcopy(summary)
     summary_for_csv['evaluation']['infeas_diagnostics'] = json.dumps(summary_for_csv['evaluation']['infeas_diagnostics'], cls=utils.NpEncoder)
@@ -1294,7 +1851,7 @@ def write_summary_csv(summary, summary_csv_file, config):
     # print('summary evaluation infeas_diagnostics:')
     # print(summary_for_csv['evaluation']['infeas_diagnostics'])
     summary_table = pandas.json_normalize(summary_for_csv)
-    summary_table.to_csv(summary_csv_file, index=False)
+    return summary_table
 
 def get_summary(data):
 
@@ -1370,6 +1927,49 @@ def get_summary(data):
 
     return summary
 
+def get_summary_arrays(problem_data_array, problem_objects):
+    '''
+    get_summary of the problem as arraydata.InputData, without its data model,
+    with the objects of the problem file in arraydata.PROBLEM_OBJECTS, as from get_problem_objects
+    '''
+
+    p = problem_data_array
+    summary = {}
+
+    summary['general'] = problem_objects['network', 'general']
+    summary['violation costs'] = problem_objects['network', 'violation_cost']
+
+    summary['num buses'] = p.num_bus
+    summary['num ac lines'] = p.num_acl
+    summary['num dc lines'] = p.num_dcl
+    summary['num transformers'] = p.num_xfr
+    summary['num shunts'] = p.num_sh
+    summary['num simple dispatchable devices'] = p.num_sd
+    summary['num producing devices'] = p.num_pr
+    summary['num consuming devices'] = p.num_cs
+    summary['num real power reserve zones'] = p.num_prz
+    summary['num reactive power reserve zones'] = p.num_qrz
+    summary['num intervals'] = problem_objects['time_series_input', 'general']['time_periods']
+    summary['num contingencies'] = p.num_k
+
+    # sums of Python numbers in item order, as get_summary
+    ts_intervals = p.t_d.tolist()
+    summary['total duration'] = sum(ts_intervals)
+    summary['interval durations'] = ts_intervals
+
+    summary['p_pr_0'] = sum(p.sd_p_0[p.pr_sd].tolist())
+    summary['p_cs_0'] = sum(p.sd_p_0[p.cs_sd].tolist())
+    summary['q_pr_0'] = sum(p.sd_q_0[p.pr_sd].tolist())
+    summary['q_cs_0'] = sum(p.sd_q_0[p.cs_sd].tolist())
+    summary['u_pr_0'] = sum(p.sd_u_on_0[p.pr_sd].tolist())
+    summary['u_cs_0'] = sum(p.sd_u_on_0[p.cs_sd].tolist())
+    summary['u_acl_0'] = sum(p.acl_u_on_0.tolist())
+    summary['u_xfr_0'] = sum(p.xfr_u_on_0.tolist())
+
+    summary['reserve_info'] = get_problem_reserve_info_arrays(p)
+
+    return summary
+
 def get_problem_reserve_info(data):
     """
     # reserve parameters
@@ -1430,145 +2030,73 @@ def get_problem_reserve_info(data):
     #   qrd_req
     """
     
+    zone = [
+        [getattr(i, field) for i in getattr(data.network, section)]
+        for name, section, field, array in RESERVE_INFO_ZONE]
+    zone_time = [
+        [getattr(i, field) for i in getattr(data.time_series_input, section)]
+        for name, section, field, array in RESERVE_INFO_ZONE_TIME]
+    return get_reserve_info(zone, zone_time)
+
+# reserve info parameters, for get_problem_reserve_info, as
+# (name, problem file section, field, arraydata.InputData array)
+RESERVE_INFO_ZONE = [
+    ('rgu_short_cost', 'active_zonal_reserve', 'REG_UP_vio_cost', 'prz_c_rgu'),
+    ('rgd_short_cost', 'active_zonal_reserve', 'REG_DOWN_vio_cost', 'prz_c_rgd'),
+    ('scr_short_cost', 'active_zonal_reserve', 'SYN_vio_cost', 'prz_c_scr'),
+    ('nsc_short_cost', 'active_zonal_reserve', 'NSYN_vio_cost', 'prz_c_nsc'),
+    ('rru_short_cost', 'active_zonal_reserve', 'RAMPING_RESERVE_UP_vio_cost', 'prz_c_rru'),
+    ('rrd_short_cost', 'active_zonal_reserve', 'RAMPING_RESERVE_DOWN_vio_cost', 'prz_c_rrd'),
+    ('qru_short_cost', 'reactive_zonal_reserve', 'REACT_UP_vio_cost', 'qrz_c_qru'),
+    ('qrd_short_cost', 'reactive_zonal_reserve', 'REACT_DOWN_vio_cost', 'qrz_c_qrd'),
+    ('rgu_req_scale', 'active_zonal_reserve', 'REG_UP', 'prz_sigma_rgu'),
+    ('rgd_req_scale', 'active_zonal_reserve', 'REG_DOWN', 'prz_sigma_rgd'),
+    ('scr_req_scale', 'active_zonal_reserve', 'SYN', 'prz_sigma_scr'),
+    ('nsc_req_scale', 'active_zonal_reserve', 'NSYN', 'prz_sigma_nsc'),
+]
+RESERVE_INFO_ZONE_TIME = [
+    ('rru_req', 'active_zonal_reserve', 'RAMPING_RESERVE_UP', 'prz_t_p_rru_min'),
+    ('rrd_req', 'active_zonal_reserve', 'RAMPING_RESERVE_DOWN', 'prz_t_p_rrd_min'),
+    ('qru_req', 'reactive_zonal_reserve', 'REACT_UP', 'qrz_t_q_qru_min'),
+    ('qrd_req', 'reactive_zonal_reserve', 'REACT_DOWN', 'qrz_t_q_qrd_min'),
+]
+
+def get_reserve_info(zone, zone_time):
+    '''
+    the reserve info of get_problem_reserve_info, from
+    zone - for each parameter of RESERVE_INFO_ZONE, its values over the zones
+    zone_time - for each parameter of RESERVE_INFO_ZONE_TIME, its values over time for each zone
+    '''
+
     info = {}
     imin = lambda x: None if x is None else (None if len(x) == 0 else numpy.amin(x))
     imed = lambda x: None if x is None else (None if len(x) == 0 else numpy.median(x))
     imax = lambda x: None if x is None else (None if len(x) == 0 else numpy.amax(x))
     irng = lambda x: None if x is None else (None if len(x) == 0 else imax(x) - imin(x))
-    info['min_zone_rgu_short_cost'] = imin([i.REG_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_rgu_short_cost'] = imed([i.REG_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_rgu_short_cost'] = imax([i.REG_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_rgu_short_cost'] = irng([i.REG_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_rgd_short_cost'] = imin([i.REG_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_rgd_short_cost'] = imed([i.REG_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_rgd_short_cost'] = imax([i.REG_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_rgd_short_cost'] = irng([i.REG_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_scr_short_cost'] = imin([i.SYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_scr_short_cost'] = imed([i.SYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_scr_short_cost'] = imax([i.SYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_scr_short_cost'] = irng([i.SYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_nsc_short_cost'] = imin([i.NSYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_nsc_short_cost'] = imed([i.NSYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_nsc_short_cost'] = imax([i.NSYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_nsc_short_cost'] = irng([i.NSYN_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_rru_short_cost'] = imin([i.RAMPING_RESERVE_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_rru_short_cost'] = imed([i.RAMPING_RESERVE_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_rru_short_cost'] = imax([i.RAMPING_RESERVE_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_rru_short_cost'] = irng([i.RAMPING_RESERVE_UP_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_rrd_short_cost'] = imin([i.RAMPING_RESERVE_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['med_zone_rrd_short_cost'] = imed([i.RAMPING_RESERVE_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['max_zone_rrd_short_cost'] = imax([i.RAMPING_RESERVE_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['rng_zone_rrd_short_cost'] = irng([i.RAMPING_RESERVE_DOWN_vio_cost for i in data.network.active_zonal_reserve])
-    info['min_zone_qru_short_cost'] = imin([i.REACT_UP_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['med_zone_qru_short_cost'] = imed([i.REACT_UP_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['max_zone_qru_short_cost'] = imax([i.REACT_UP_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['rng_zone_qru_short_cost'] = irng([i.REACT_UP_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['min_zone_qrd_short_cost'] = imin([i.REACT_DOWN_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['med_zone_qrd_short_cost'] = imed([i.REACT_DOWN_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['max_zone_qrd_short_cost'] = imax([i.REACT_DOWN_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['rng_zone_qrd_short_cost'] = irng([i.REACT_DOWN_vio_cost for i in data.network.reactive_zonal_reserve])
-    info['min_zone_rgu_req_scale'] = imin([i.REG_UP for i in data.network.active_zonal_reserve])
-    info['med_zone_rgu_req_scale'] = imed([i.REG_UP for i in data.network.active_zonal_reserve])
-    info['max_zone_rgu_req_scale'] = imax([i.REG_UP for i in data.network.active_zonal_reserve])
-    info['rng_zone_rgu_req_scale'] = irng([i.REG_UP for i in data.network.active_zonal_reserve])
-    info['min_zone_rgd_req_scale'] = imin([i.REG_DOWN for i in data.network.active_zonal_reserve])
-    info['med_zone_rgd_req_scale'] = imed([i.REG_DOWN for i in data.network.active_zonal_reserve])
-    info['max_zone_rgd_req_scale'] = imax([i.REG_DOWN for i in data.network.active_zonal_reserve])
-    info['rng_zone_rgd_req_scale'] = irng([i.REG_DOWN for i in data.network.active_zonal_reserve])
-    info['min_zone_scr_req_scale'] = imin([i.SYN for i in data.network.active_zonal_reserve])
-    info['med_zone_scr_req_scale'] = imed([i.SYN for i in data.network.active_zonal_reserve])
-    info['max_zone_scr_req_scale'] = imax([i.SYN for i in data.network.active_zonal_reserve])
-    info['rng_zone_scr_req_scale'] = irng([i.SYN for i in data.network.active_zonal_reserve])
-    info['min_zone_nsc_req_scale'] = imin([i.NSYN for i in data.network.active_zonal_reserve])
-    info['med_zone_nsc_req_scale'] = imed([i.NSYN for i in data.network.active_zonal_reserve])
-    info['max_zone_nsc_req_scale'] = imax([i.NSYN for i in data.network.active_zonal_reserve])
-    info['rng_zone_nsc_req_scale'] = irng([i.NSYN for i in data.network.active_zonal_reserve])
-    zone_min_time_rru_req = [imin(i.RAMPING_RESERVE_UP) for i in data.time_series_input.active_zonal_reserve]
-    zone_med_time_rru_req = [imed(i.RAMPING_RESERVE_UP) for i in data.time_series_input.active_zonal_reserve]
-    zone_max_time_rru_req = [imax(i.RAMPING_RESERVE_UP) for i in data.time_series_input.active_zonal_reserve]
-    zone_rng_time_rru_req = [irng(i.RAMPING_RESERVE_UP) for i in data.time_series_input.active_zonal_reserve]
-    zone_min_time_rrd_req = [imin(i.RAMPING_RESERVE_DOWN) for i in data.time_series_input.active_zonal_reserve]
-    zone_med_time_rrd_req = [imed(i.RAMPING_RESERVE_DOWN) for i in data.time_series_input.active_zonal_reserve]
-    zone_max_time_rrd_req = [imax(i.RAMPING_RESERVE_DOWN) for i in data.time_series_input.active_zonal_reserve]
-    zone_rng_time_rrd_req = [irng(i.RAMPING_RESERVE_DOWN) for i in data.time_series_input.active_zonal_reserve]
-    zone_min_time_qru_req = [imin(i.REACT_UP) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_med_time_qru_req = [imed(i.REACT_UP) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_max_time_qru_req = [imax(i.REACT_UP) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_rng_time_qru_req = [irng(i.REACT_UP) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_min_time_qrd_req = [imin(i.REACT_DOWN) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_med_time_qrd_req = [imed(i.REACT_DOWN) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_max_time_qrd_req = [imax(i.REACT_DOWN) for i in data.time_series_input.reactive_zonal_reserve]
-    zone_rng_time_qrd_req = [irng(i.REACT_DOWN) for i in data.time_series_input.reactive_zonal_reserve]
-    info['min_zone_min_time_rru_req'] = imin(zone_min_time_rru_req)
-    info['med_zone_min_time_rru_req'] = imed(zone_min_time_rru_req)
-    info['max_zone_min_time_rru_req'] = imax(zone_min_time_rru_req)
-    info['rng_zone_min_time_rru_req'] = irng(zone_min_time_rru_req)
-    info['min_zone_med_time_rru_req'] = imin(zone_med_time_rru_req)
-    info['med_zone_med_time_rru_req'] = imed(zone_med_time_rru_req)
-    info['max_zone_med_time_rru_req'] = imax(zone_med_time_rru_req)
-    info['rng_zone_med_time_rru_req'] = irng(zone_med_time_rru_req)
-    info['min_zone_max_time_rru_req'] = imin(zone_max_time_rru_req)
-    info['med_zone_max_time_rru_req'] = imed(zone_max_time_rru_req)
-    info['max_zone_max_time_rru_req'] = imax(zone_max_time_rru_req)
-    info['rng_zone_max_time_rru_req'] = irng(zone_max_time_rru_req)
-    info['min_zone_rng_time_rru_req'] = imin(zone_rng_time_rru_req)
-    info['med_zone_rng_time_rru_req'] = imed(zone_rng_time_rru_req)
-    info['max_zone_rng_time_rru_req'] = imax(zone_rng_time_rru_req)
-    info['rng_zone_rng_time_rru_req'] = irng(zone_rng_time_rru_req)
-    info['min_zone_min_time_rrd_req'] = imin(zone_min_time_rrd_req)
-    info['med_zone_min_time_rrd_req'] = imed(zone_min_time_rrd_req)
-    info['max_zone_min_time_rrd_req'] = imax(zone_min_time_rrd_req)
-    info['rng_zone_min_time_rrd_req'] = irng(zone_min_time_rrd_req)
-    info['min_zone_med_time_rrd_req'] = imin(zone_med_time_rrd_req)
-    info['med_zone_med_time_rrd_req'] = imed(zone_med_time_rrd_req)
-    info['max_zone_med_time_rrd_req'] = imax(zone_med_time_rrd_req)
-    info['rng_zone_med_time_rrd_req'] = irng(zone_med_time_rrd_req)
-    info['min_zone_max_time_rrd_req'] = imin(zone_max_time_rrd_req)
-    info['med_zone_max_time_rrd_req'] = imed(zone_max_time_rrd_req)
-    info['max_zone_max_time_rrd_req'] = imax(zone_max_time_rrd_req)
-    info['rng_zone_max_time_rrd_req'] = irng(zone_max_time_rrd_req)
-    info['min_zone_rng_time_rrd_req'] = imin(zone_rng_time_rrd_req)
-    info['med_zone_rng_time_rrd_req'] = imed(zone_rng_time_rrd_req)
-    info['max_zone_rng_time_rrd_req'] = imax(zone_rng_time_rrd_req)
-    info['rng_zone_rng_time_rrd_req'] = irng(zone_rng_time_rrd_req)
-    info['min_zone_min_time_qru_req'] = imin(zone_min_time_qru_req)
-    info['med_zone_min_time_qru_req'] = imed(zone_min_time_qru_req)
-    info['max_zone_min_time_qru_req'] = imax(zone_min_time_qru_req)
-    info['rng_zone_min_time_qru_req'] = irng(zone_min_time_qru_req)
-    info['min_zone_med_time_qru_req'] = imin(zone_med_time_qru_req)
-    info['med_zone_med_time_qru_req'] = imed(zone_med_time_qru_req)
-    info['max_zone_med_time_qru_req'] = imax(zone_med_time_qru_req)
-    info['rng_zone_med_time_qru_req'] = irng(zone_med_time_qru_req)
-    info['min_zone_max_time_qru_req'] = imin(zone_max_time_qru_req)
-    info['med_zone_max_time_qru_req'] = imed(zone_max_time_qru_req)
-    info['max_zone_max_time_qru_req'] = imax(zone_max_time_qru_req)
-    info['rng_zone_max_time_qru_req'] = irng(zone_max_time_qru_req)
-    info['min_zone_rng_time_qru_req'] = imin(zone_rng_time_qru_req)
-    info['med_zone_rng_time_qru_req'] = imed(zone_rng_time_qru_req)
-    info['max_zone_rng_time_qru_req'] = imax(zone_rng_time_qru_req)
-    info['rng_zone_rng_time_qru_req'] = irng(zone_rng_time_qru_req)
-    info['min_zone_min_time_qrd_req'] = imin(zone_min_time_qrd_req)
-    info['med_zone_min_time_qrd_req'] = imed(zone_min_time_qrd_req)
-    info['max_zone_min_time_qrd_req'] = imax(zone_min_time_qrd_req)
-    info['rng_zone_min_time_qrd_req'] = irng(zone_min_time_qrd_req)
-    info['min_zone_med_time_qrd_req'] = imin(zone_med_time_qrd_req)
-    info['med_zone_med_time_qrd_req'] = imed(zone_med_time_qrd_req)
-    info['max_zone_med_time_qrd_req'] = imax(zone_med_time_qrd_req)
-    info['rng_zone_med_time_qrd_req'] = irng(zone_med_time_qrd_req)
-    info['min_zone_max_time_qrd_req'] = imin(zone_max_time_qrd_req)
-    info['med_zone_max_time_qrd_req'] = imed(zone_max_time_qrd_req)
-    info['max_zone_max_time_qrd_req'] = imax(zone_max_time_qrd_req)
-    info['rng_zone_max_time_qrd_req'] = irng(zone_max_time_qrd_req)
-    info['min_zone_rng_time_qrd_req'] = imin(zone_rng_time_qrd_req)
-    info['med_zone_rng_time_qrd_req'] = imed(zone_rng_time_qrd_req)
-    info['max_zone_rng_time_qrd_req'] = imax(zone_rng_time_qrd_req)
-    info['rng_zone_rng_time_qrd_req'] = irng(zone_rng_time_qrd_req)
-
+    stats = [('min', imin), ('med', imed), ('max', imax), ('rng', irng)]
+    for (name, section, field, array), values in zip(RESERVE_INFO_ZONE, zone):
+        for m1, f1 in stats:
+            info['{}_zone_{}'.format(m1, name)] = f1(values)
+    for (name, section, field, array), values in zip(RESERVE_INFO_ZONE_TIME, zone_time):
+        for m2, f2 in stats:
+            zone_values = [f2(i) for i in values]
+            for m1, f1 in stats:
+                info['{}_zone_{}_time_{}'.format(m1, m2, name)] = f1(zone_values)
     return info
 
+def get_problem_reserve_info_arrays(problem_data_array):
+    '''
+    get_problem_reserve_info of the problem as arraydata.InputData
+    '''
+
+    zone = [getattr(problem_data_array, array) for name, section, field, array in RESERVE_INFO_ZONE]
+    zone_time = [list(getattr(problem_data_array, array)) for name, section, field, array in RESERVE_INFO_ZONE_TIME]
+    return get_reserve_info(zone, zone_time)
+
 def get_solution_summary(problem_data, solution_data):
 
-    problem_summary = get_summary(problem_data)
+    if problem_data is not None:
+        problem_summary = get_summary(problem_data)
     # todo add solution info - is there anything?
     solution_summary = {}
     return solution_summary
@@ -1776,6 +2304,599 @@ def solution_model_checks(data, solution_data, config):
             '\n'.join([str(r) for r in errors]))
         raise ModelError(msg)
 
+def get_problem_model_class(section, key):
+    '''
+    the data model class of the object, or of each item of the list, network.bus etc., of the problem file
+    '''
+
+    return InputDataFile.__fields__[section].type_.__fields__[key].type_
+
+# optional fields of problem items, given when a flag field is 1, and used only then, as
+# {(section, key): [(flag field, [optional fields]), ...]}
+PROBLEM_CONDITIONAL_FIELDS = {
+    ('network', 'simple_dispatchable_device'): [
+        ('q_linear_cap', ['q_0', 'beta']),
+        ('q_bound_cap', ['q_0_ub', 'q_0_lb', 'beta_ub', 'beta_lb'])],
+    ('network', 'ac_line'): [
+        ('additional_shunt', ['g_fr', 'b_fr', 'g_to', 'b_to'])],
+    ('network', 'two_winding_transformer'): [
+        ('additional_shunt', ['g_fr', 'b_fr', 'g_to', 'b_to'])],
+}
+
+# int fields of problem items with values in {0, 1}
+PROBLEM_BINARY_FIELDS = [
+    'initial_status.on_status', 'on_status_ub', 'on_status_lb', 'q_linear_cap', 'q_bound_cap', 'additional_shunt']
+
+def problem_json_checks(problem_data):
+    '''
+    the checks of the problem data model (pydantic) that arraydata.InputData relies on,
+    done on problem_data, the problem file as parsed by json, so that InputData can be set from it directly.
+    used when config['problem_fast_load'], for a problem that has passed its checks before,
+    and per batch of items by load_problem_stream, when config['problem_stream_load'].
+    returns the columns of the problem, from arraydata.get_problem_columns, and its objects, from get_problem_objects.
+
+    sections present, items of each list objects with the required fields of their model and no others,
+    and the fields InputData reads of the types of the model, see problem_items_checks,
+    then uids unique and references to other items in their domain, see problem_columns_checks.
+    checked per section and field over all items at once, rather than item by item.
+    unlike pydantic, numbers given as strings are not accepted.
+    the other checks of the data model, e.g. bounds on values, and of model_checks are not done
+    '''
+
+    errors = problem_sections_checks(problem_data)
+    if len(errors) > 0:
+        raise_problem_json_errors(errors)
+    for (section, key), fields in arraydata.PROBLEM_FIELDS:
+        items = problem_data[section][key]
+        if not isinstance(items, list):
+            errors.append('fails {}.{} is a list'.format(section, key))
+            continue
+        errors += problem_items_checks(section, key, items, 0)
+    if len(errors) > 0:
+        raise_problem_json_errors(errors)
+    columns = arraydata.get_problem_columns(problem_data, True)
+    problem_objects = get_problem_objects(columns)
+    errors = problem_columns_checks(columns)
+    if len(errors) > 0:
+        raise_problem_json_errors(errors)
+    return columns, problem_objects
+
+def raise_problem_json_errors(errors):
+
+    msg = (
+        'validation.problem_json_checks found errors\n' + 
+        'number of errors: {}\n'.format(len(errors)) +
+        '\n'.join(errors))
+    raise ModelError(msg)
+
+def problem_sections_checks(problem_data):
+    '''
+    errors, as a list of str, in the sections of the problem, network etc., being objects with the lists
+    and objects InputData reads
+    '''
+
+    errors = []
+    if not isinstance(problem_data, dict):
+        return ['fails problem is an object. type: {}'.format(type(problem_data))]
+    keys = {}
+    for section, key in [k for k, fields in arraydata.PROBLEM_FIELDS] + arraydata.PROBLEM_OBJECTS:
+        keys.setdefault(section, []).append(key)
+    for section, section_keys in keys.items():
+        value = problem_data.get(section)
+        if not isinstance(value, dict):
+            errors.append('fails problem {} is an object. type: {}'.format(section, type(value)))
+            continue
+        missing = [k for k in section_keys if k not in value]
+        if len(missing) > 0:
+            errors.append('fails problem {} has fields {}. missing: {}'.format(section, section_keys, missing))
+    return errors
+
+def get_problem_objects(columns):
+    '''
+    the objects of the problem file in arraydata.PROBLEM_OBJECTS, e.g. network.general,
+    as dicts of the values the data model holds, e.g. floats given as JSON integers as floats,
+    from the columns of the problem.
+    raises ModelError if an object lacks a required field or has a field not in its model
+    '''
+
+    objects = {}
+    for section, key in arraydata.PROBLEM_OBJECTS:
+        convert = jsonmodel.get_model_converter(get_problem_model_class(section, key))
+        objects[section, key] = convert(columns[section, key], (((), section), key)).dict()
+    return objects
+
+def get_values_type_errors(values, types):
+
+    return sorted(t.__name__ for t in set(map(type, values)) - types)
+
+def problem_items_checks(section, key, items, start):
+    '''
+    errors, as a list of str, in items, a list of the items start, start + 1, ... of a list of the problem file,
+    e.g. network.bus. the items can be all of the list or a batch of it.
+    each item an object with the required fields of its data model and no others, and the fields in
+    arraydata.PROBLEM_FIELDS of the types of the model: strings, JSON integers, finite JSON numbers,
+    lists, and lists of the tuples of the model, with the values of PROBLEM_BINARY_FIELDS in {0, 1},
+    device_type producer or consumer, and the optional fields of PROBLEM_CONDITIONAL_FIELDS given if their flag is 1
+    '''
+
+    errors = []
+    name = '{}.{}'.format(section, key)
+    model_class = get_problem_model_class(section, key)
+    idx_err = [start + i for i, x in enumerate(items) if not isinstance(x, dict)]
+    if len(idx_err) > 0:
+        errors.append('fails {} items are objects. failing items (idx): {}'.format(name, idx_err))
+        return errors
+    required = set(n for n, f in model_class.__fields__.items() if f.required)
+    allowed = set(model_class.__fields__.keys())
+    idx_err = [(start + i, x.get('uid'), sorted(required - x.keys()), sorted(x.keys() - allowed))
+               for i, x in enumerate(items) if not (required <= x.keys() and x.keys() <= allowed)]
+    if len(idx_err) > 0:
+        errors.append('fails {} fields match {}. failing items (idx, uid, missing fields, fields not in model): {}'.format(
+            name, model_class.__name__, idx_err))
+        return errors
+    if 'initial_status' in model_class.__fields__:
+        status_class = model_class.__fields__['initial_status'].type_
+        status_required = set(n for n, f in status_class.__fields__.items() if f.required)
+        status_allowed = set(status_class.__fields__.keys())
+        idx_err = [(start + i, x.get('uid')) for i, x in enumerate(items) if not (
+            isinstance(x['initial_status'], dict)
+            and status_required <= x['initial_status'].keys() and x['initial_status'].keys() <= status_allowed)]
+        if len(idx_err) > 0:
+            errors.append('fails {} initial_status fields match {}. failing items (idx, uid): {}'.format(
+                name, status_class.__name__, idx_err))
+            return errors
+
+    uids = [x.get('uid') for x in items]
+    for field, dtype, kind in arraydata.PROBLEM_SECTION_FIELDS[section, key]:
+        values = items
+        for n in field.split('.'):
+            values = [x.get(n) for x in values]
+        if kind != 'value':
+            value_types = get_values_type_errors(values, {list})
+            if len(value_types) > 0:
+                errors.append('fails {} {} is a list. value types: {}'.format(name, field, value_types))
+                continue
+            values = list(itertools.chain.from_iterable(values))
+        if kind == 'list_tuples':
+            value_types = get_values_type_errors(values, {list})
+            if len(value_types) > 0:
+                errors.append('fails {} {} values are lists. value types: {}'.format(name, field, value_types))
+                continue
+            values = list(itertools.chain.from_iterable(values))
+        if kind in ['tuples', 'list_tuples']:
+            value_types = get_values_type_errors(values, {list})
+            lens = set(len(v) for v in values) if len(value_types) == 0 else set()
+            if len(value_types) > 0 or len(lens - {len(dtype)}) > 0:
+                errors.append('fails {} {} values are lists of {} values. value types: {}, lengths: {}'.format(
+                    name, field, len(dtype), value_types, sorted(lens)))
+                continue
+            values = [[v[i] for v in values] for i in range(len(dtype))]
+            dtypes = list(dtype)
+        else:
+            values = [values]
+            dtypes = [dtype]
+        optional = kind == 'value' and '.' not in field and not model_class.__fields__[field].required
+        for position_values, position_dtype in zip(values, dtypes):
+            errors += problem_values_checks(name, field, uids if kind == 'value' else None, start, position_values, position_dtype, optional)
+
+    for flag, fields in PROBLEM_CONDITIONAL_FIELDS.get((section, key), []):
+        flag_on = [x[flag] == 1 for x in items]
+        for field in fields:
+            idx_err = [(start + i, uids[i]) for i, x in enumerate(items) if flag_on[i] and x.get(field) is None]
+            if len(idx_err) > 0:
+                errors.append('fails {} {} given if {} == 1. failing items (idx, uid): {}'.format(name, field, flag, idx_err))
+    return errors
+
+def problem_values_checks(name, field, uids, start, values, dtype, optional):
+    '''
+    errors, as a list of str, in the values of a field of problem items, or of the lists or tuples in it,
+    being of dtype, with None allowed if optional, with the checks of problem_items_checks.
+    uids - of the items, if values are one per item, for the failing items in the error messages
+    '''
+
+    errors = []
+    types = {str} if dtype is str else ({int} if dtype is int else {int, float})
+    if optional:
+        types = types | {type(None)}
+    value_types = get_values_type_errors(values, types)
+    if len(value_types) > 0:
+        errors.append('fails {} {} values are {}. value types: {}'.format(
+            name, field, {str: 'strings', int: 'integers', float: 'numbers'}[dtype], value_types))
+        return errors
+    if dtype is str:
+        if field == 'device_type':
+            arr = numpy.array([v.strip() for v in values], dtype=str)
+            idx_err = numpy.flatnonzero(numpy.logical_and(arr != 'producer', arr != 'consumer'))
+            if idx_err.size > 0:
+                errors.append('fails {} {} values in [producer, consumer]. failing items (idx, uid): {}'.format(
+                    name, field, [(start + i, uids[i]) for i in idx_err.tolist()]))
+        return errors
+    arr = numpy.array(values, dtype=float)
+    if dtype is int:
+        if field in PROBLEM_BINARY_FIELDS:
+            idx_err = numpy.flatnonzero(numpy.logical_and(arr != 0, arr != 1))
+            if idx_err.size > 0:
+                errors.append('fails {} {} values in [0, 1]. failing {}'.format(
+                    name, field, get_failing_values(uids, start, idx_err)))
+    else:
+        not_given = numpy.array([v is None for v in values], dtype=bool) if optional else False
+        idx_err = numpy.flatnonzero(numpy.logical_not(numpy.logical_or(numpy.isfinite(arr), not_given)))
+        if idx_err.size > 0:
+            errors.append('fails {} {} values finite. failing {}'.format(name, field, get_failing_values(uids, start, idx_err)))
+    return errors
+
+def get_failing_values(uids, start, idx_err):
+
+    if uids is None:
+        return 'values (idx in list): {}'.format(idx_err.tolist())
+    return 'items (idx, uid): {}'.format([(start + i, uids[i]) for i in idx_err.tolist()])
+
+def problem_columns_checks(columns):
+    '''
+    errors, as a list of str, in the columns of the problem, from arraydata.get_problem_columns,
+    after problem_items_checks found no errors in all the items:
+    number of intervals, uids unique, references to buses, reserve zones, and branches in their domain,
+    time series items covering the devices and zones, with lists of the number of intervals, and contingency components.
+    '''
+
+    errors = []
+    ts_general = columns['time_series_input', 'general']
+    interval_duration = ts_general.get('interval_duration')
+    time_periods = ts_general.get('time_periods')
+    if not isinstance(interval_duration, list) or get_values_type_errors(interval_duration, {int, float}):
+        errors.append('fails time_series_input.general interval_duration is a list of numbers')
+        return errors
+    num_t = len(interval_duration)
+    if type(time_periods) is not int or time_periods != num_t:
+        errors.append('fails time_series_input.general time_periods == len(interval_duration). time_periods: {}, len(interval_duration): {}'.format(
+            time_periods, num_t))
+        return errors
+
+    # uids, unique over the network and contingencies, and in each time series list
+    network_keys = [k for k, fields in arraydata.PROBLEM_FIELDS if k[0] != 'time_series_input']
+    all_uid = numpy.concatenate([columns[k]['uid'] for k in network_keys])
+    uids, counts = numpy.unique(all_uid, return_counts=True)
+    if numpy.any(counts > 1):
+        errors.append('fails uid uniqueness in network and reliability sections. repeated uids (uid, number of occurrences): {}'.format(
+            [(str(u), int(c)) for u, c in zip(uids[counts > 1].tolist(), counts[counts > 1].tolist())]))
+
+    def domain_checks(name, field, values, domain_key):
+        not_in_domain = numpy.flatnonzero(numpy.logical_not(numpy.isin(values, columns[domain_key]['uid'])))
+        if not_in_domain.size > 0:
+            errors.append('fails items field in domain. items: {}, field: {}, domain: {}.{} uids, failing values: {}'.format(
+                name, field, domain_key[0], domain_key[1], values[not_in_domain].tolist()))
+
+    bus = ('network', 'bus')
+    domain_checks('network.bus', 'active_reserve_uids', columns[bus]['active_reserve_uids'][1], ('network', 'active_zonal_reserve'))
+    domain_checks('network.bus', 'reactive_reserve_uids', columns[bus]['reactive_reserve_uids'][1], ('network', 'reactive_zonal_reserve'))
+    domain_checks('network.shunt', 'bus', columns['network', 'shunt']['bus'], bus)
+    domain_checks('network.simple_dispatchable_device', 'bus', columns['network', 'simple_dispatchable_device']['bus'], bus)
+    for key in ['ac_line', 'dc_line', 'two_winding_transformer']:
+        for field in ['fr_bus', 'to_bus']:
+            domain_checks('network.' + key, field, columns['network', key][field], bus)
+
+    # contingencies outage one or more branches
+    k_num_out, k_out = columns['reliability', 'contingency']['components']
+    idx_err = numpy.flatnonzero(k_num_out == 0)
+    if idx_err.size > 0:
+        errors.append('fails reliability.contingency components not empty. failing items (idx, uid): {}'.format(
+            [(i, str(columns['reliability', 'contingency']['uid'][i])) for i in idx_err.tolist()]))
+    branch_uid = numpy.concatenate([columns['network', k]['uid'] for k in ['ac_line', 'dc_line', 'two_winding_transformer']])
+    not_in_domain = numpy.flatnonzero(numpy.logical_not(numpy.isin(k_out, branch_uid)))
+    if not_in_domain.size > 0:
+        errors.append('fails items field in domain. items: reliability.contingency, field: components, domain: ac_line, dc_line, and two_winding_transformer uids, failing values: {}'.format(
+            k_out[not_in_domain].tolist()))
+
+    # time series
+    for (section, key), fields in arraydata.PROBLEM_FIELDS:
+        if section != 'time_series_input':
+            continue
+        name = '{}.{}'.format(section, key)
+        ts_uid = columns[section, key]['uid']
+        dev_uid = columns['network', key]['uid']
+        uids, counts = numpy.unique(ts_uid, return_counts=True)
+        if numpy.any(counts > 1):
+            errors.append('fails uid uniqueness in {}. repeated uids (uid, number of occurrences): {}'.format(
+                name, [(str(u), int(c)) for u, c in zip(uids[counts > 1].tolist(), counts[counts > 1].tolist())]))
+        domain_checks(name, 'uid', ts_uid, ('network', key))
+        not_covered = numpy.flatnonzero(numpy.logical_not(numpy.isin(dev_uid, ts_uid)))
+        if not_covered.size > 0:
+            errors.append('fails items field cover domain. items: {}, field: uid, domain: network.{} uids, failing domain elements: {}'.format(
+                name, key, dev_uid[not_covered].tolist()))
+        for field, dtype, kind in fields:
+            if kind == 'value':
+                continue
+            lens = columns[section, key][field][0]
+            idx_err = numpy.flatnonzero(lens != num_t)
+            if idx_err.size > 0:
+                errors.append('fails {} len({}) == len(time_series_input.general.interval_duration). len(interval_duration): {}. failing items (idx, uid, len({})): {}'.format(
+                    name, field, num_t, field, [(i, str(ts_uid[i]), int(lens[i])) for i in idx_err.tolist()]))
+    return errors
+
+def load_problem_json(problem_data):
+    '''
+    problem_data_array, problem_objects = load_problem_json(problem_data)
+
+    the problem as a new arraydata.InputData, and its objects from get_problem_objects, set directly
+    from problem_data, the problem file as parsed by json, per section and field, without the data model,
+    after problem_json_checks.
+    raises ModelError for failed checks, with all errors found
+    '''
+
+    columns, problem_objects = problem_json_checks(problem_data)
+    problem_data_array = arraydata.InputData()
+    problem_data_array.set_from_columns(columns)
+    return problem_data_array, problem_objects
+
+def load_problem_stream(problem_file, config):
+    '''
+    problem_data_array, problem_objects = load_problem_stream(problem_file, config)
+
+    read the problem file with jsonstream.iter_sections, checking it as problem_json_checks
+    and converting each list of the sections to the columns of arraydata.get_items_columns,
+    config['json_stream_batch_size'] items at a time, then set a new arraydata.InputData from the columns,
+    as load_problem_json. the problem is never held as a whole in Python objects.
+    raises ModelError for failed checks, with all errors found, or json.JSONDecodeError for malformed JSON
+    '''
+
+    batch_size = config['json_stream_batch_size']
+    batches = {k: [] for k, fields in arraydata.PROBLEM_FIELDS}
+    columns = {}
+    # the sections and fields read, for problem_sections_checks
+    skeleton = {}
+    errors = []
+    with open(problem_file, 'r') as f:
+        for section, section_fields, value in jsonstream.iter_sections(f, config['json_stream_chunk_size']):
+            if section_fields is None:
+                skeleton[section] = value
+                continue
+            skeleton[section] = {}
+            for key, items, value in section_fields:
+                skeleton[section][key] = None
+                if (section, key) in arraydata.PROBLEM_OBJECTS:
+                    columns[section, key] = value
+                    continue
+                fields = arraydata.PROBLEM_SECTION_FIELDS.get((section, key))
+                if fields is None:
+                    continue
+                if items is None:
+                    errors.append('fails {}.{} is a list'.format(section, key))
+                    continue
+                batch = []
+                start = 0
+                num_errors = len(errors)
+                for item in items:
+                    batch.append(item)
+                    if len(batch) == batch_size:
+                        errors += problem_items_checks(section, key, batch, start)
+                        if len(errors) == num_errors:
+                            batches[section, key].append(arraydata.get_items_columns(batch, fields, True))
+                        start += len(batch)
+                        batch = []
+                errors += problem_items_checks(section, key, batch, start)
+                if len(errors) == num_errors:
+                    batches[section, key].append(arraydata.get_items_columns(batch, fields, True))
+    errors = problem_sections_checks(skeleton) + errors
+    if len(errors) > 0:
+        raise_problem_json_errors(errors)
+    for k, fields in arraydata.PROBLEM_FIELDS:
+        columns[k] = arraydata.concatenate_columns(batches[k], fields)
+    del batches
+    problem_objects = get_problem_objects(columns)
+    errors = problem_columns_checks(columns)
+    if len(errors) > 0:
+        raise_problem_json_errors(errors)
+    problem_data_array = arraydata.InputData()
+    problem_data_array.set_from_columns(columns)
+    return problem_data_array, problem_objects
+
+def solution_json_checks(problem_data_array, solution_data, config):
+    '''
+    the checks of the solution data model (pydantic) and of solution_model_checks that evaluation relies on,
+    done on solution_data, the solution file as parsed by json, so that arraydata.OutputData.set_from_json
+    can skip the data model. used when config['solution_fast_load'].
+
+    sections and fields present with no others, uids strings, unique, in and covering the problem uids,
+    field lengths equal to the number of intervals, float fields finite JSON numbers,
+    int fields JSON integers, on_status in {0, 1}.
+    checked per section and field over all items at once, rather than item by item.
+    unlike pydantic, numbers given as strings are not accepted.
+    '''
+
+    sections = [section for section, dev_type, fields in arraydata.SOLUTION_FIELDS]
+    if not isinstance(solution_data, dict) or set(solution_data.keys()) != {'time_series_output'}:
+        raise_solution_json_errors([
+            'fails solution keys == [time_series_output]. keys: {}'.format(
+                list(solution_data.keys()) if isinstance(solution_data, dict) else type(solution_data))])
+    output = solution_data['time_series_output']
+    if not isinstance(output, dict) or set(output.keys()) != set(sections):
+        raise_solution_json_errors([
+            'fails time_series_output keys == {}. keys: {}'.format(
+                sections, list(output.keys()) if isinstance(output, dict) else type(output))])
+
+    errors = []
+    for section in sections:
+        items = output[section]
+        if not isinstance(items, list):
+            errors.append('fails time_series_output {} is a list'.format(section))
+            continue
+        dev_num_items = solution_dev_num_items_zero(problem_data_array, section)
+        items_errors = solution_items_checks(problem_data_array, section, items, 0, dev_num_items)
+        if len(items_errors) > 0:
+            errors += items_errors
+            continue
+        errors += solution_items_cover_checks(problem_data_array, section, dev_num_items)
+    if len(errors) > 0:
+        raise_solution_json_errors(errors)
+
+def raise_solution_json_errors(errors):
+
+    msg = (
+        'validation.solution_json_checks found errors\n' + 
+        'number of errors: {}\n'.format(len(errors)) +
+        '\n'.join(errors))
+    raise ModelError(msg)
+
+def solution_dev_num_items_zero(problem_data_array, section):
+    '''
+    number of items of each device in a time_series_output section, for solution_items_checks
+    '''
+
+    dev_type, fields = arraydata.SOLUTION_SECTION_FIELDS[section]
+    return numpy.zeros(shape=(getattr(problem_data_array, 'num_' + dev_type), ), dtype=int)
+
+def solution_items_checks(problem_data_array, section, items, start, dev_num_items):
+    '''
+    errors, as a list of str, in items, a list of the items start, start + 1, ... of a time_series_output section.
+    the items can be all of the section or a batch of it.
+    adds the items of each device in the problem to dev_num_items, for solution_items_cover_checks
+    '''
+
+    errors = []
+    num_t = problem_data_array.num_t
+    dev_type, fields = arraydata.SOLUTION_SECTION_FIELDS[section]
+    idx_err = [start + i for i, x in enumerate(items) if not isinstance(x, dict)]
+    if len(idx_err) > 0:
+        errors.append('fails time_series_output {} items are objects. failing items (idx): {}'.format(section, idx_err))
+        return errors
+    keys = set(['uid'] + [field for field, name, dtype in fields])
+    idx_err = [(start + i, x.get('uid'), sorted(set(x.keys()).symmetric_difference(keys))) for i, x in enumerate(items) if set(x.keys()) != keys]
+    if len(idx_err) > 0:
+        errors.append('fails time_series_output {} fields == {}. failing items (idx, uid, missing or extra fields): {}'.format(
+            section, sorted(keys), idx_err))
+        return errors
+
+    # uids
+    uids = [x['uid'] for x in items]
+    if set(map(type, uids)) - {str}:
+        errors.append('fails time_series_output {} uid is a string'.format(section))
+        return errors
+    dev_map = getattr(problem_data_array, dev_type + '_map')
+    idx = numpy.array([dev_map.get(u, -1) for u in uids], dtype=int)
+    not_in_domain = [(start + i, uids[i]) for i in numpy.flatnonzero(idx < 0).tolist()]
+    if len(not_in_domain) > 0:
+        errors.append('fails items field in domain. items: time_series_output.{}, field: uid, domain: {} uids, failing items (index, uid): {}'.format(
+            section, dev_type, not_in_domain))
+    numpy.add.at(dev_num_items, idx[idx >= 0], 1)
+
+    # values
+    for field, name, dtype in fields:
+        values = [x[field] for x in items]
+        if set(map(type, values)) - {list}:
+            errors.append('fails time_series_output {} {} is a list'.format(section, field))
+            continue
+        lens = numpy.array([len(v) for v in values], dtype=int)
+        idx_err = numpy.flatnonzero(lens != num_t)
+        if idx_err.size > 0:
+            errors.append('fails time_series_output {} len({}) == len(time_series_input.intervals). len(intervals): {}. failing items (idx, uid, len({})): {}'.format(
+                section, field, num_t, field, [(start + i, uids[i], lens[i]) for i in idx_err.tolist()]))
+            continue
+        value_types = set(map(type, itertools.chain.from_iterable(values)))
+        if dtype is int:
+            if value_types - {int}:
+                errors.append('fails time_series_output {} {} values are integers. value types: {}'.format(
+                    section, field, sorted(t.__name__ for t in value_types)))
+                continue
+            if field == 'on_status':
+                arr = numpy.reshape(numpy.array(values, dtype=int), newshape=(len(values), num_t))
+                idx_err = numpy.flatnonzero(numpy.any(numpy.logical_and(arr != 0, arr != 1), axis=1))
+                if idx_err.size > 0:
+                    errors.append('fails time_series_output {} {} values in [0, 1]. failing items (idx, uid): {}'.format(
+                        section, field, [(start + i, uids[i]) for i in idx_err.tolist()]))
+        else:
+            if value_types - {int, float}:
+                errors.append('fails time_series_output {} {} values are numbers. value types: {}'.format(
+                    section, field, sorted(t.__name__ for t in value_types)))
+                continue
+            arr = numpy.reshape(numpy.array(values, dtype=float), newshape=(len(values), num_t))
+            idx_err = numpy.flatnonzero(numpy.logical_not(numpy.all(numpy.isfinite(arr), axis=1)))
+            if idx_err.size > 0:
+                errors.append('fails time_series_output {} {} values finite. failing items (idx, uid): {}'.format(
+                    section, field, [(start + i, uids[i]) for i in idx_err.tolist()]))
+
+    return errors
+
+def solution_items_cover_checks(problem_data_array, section, dev_num_items):
+    '''
+    errors, as a list of str, in the uids of all the items of a time_series_output section,
+    given the number of items of each device from solution_items_checks, if it found no errors.
+    uids in other sections cannot be in the domain of this one, as problem uids are not repeated,
+    so uniqueness over all sections follows from uniqueness in each section
+    '''
+
+    errors = []
+    dev_type, fields = arraydata.SOLUTION_SECTION_FIELDS[section]
+    dev_uid = getattr(problem_data_array, dev_type + '_uid')
+    idx_err = numpy.flatnonzero(dev_num_items == 0)
+    if idx_err.size > 0:
+        errors.append('fails items field cover domain. items: time_series_output.{}, field: uid, domain: {} uids, failing domain elements: {}'.format(
+            section, dev_type, dev_uid[idx_err].tolist()))
+    idx_err = numpy.flatnonzero(dev_num_items > 1)
+    if idx_err.size > 0:
+        errors.append('fails uid uniqueness in time_series_output section. repeated uids (uid, number of occurrences): {}'.format(
+            [(str(dev_uid[i]), int(dev_num_items[i])) for i in idx_err.tolist()]))
+    return errors
+
+def load_solution_stream(problem_data_array, solution_file, config):
+    '''
+    read the solution file with jsonstream, checking it as solution_json_checks
+    and writing it to the arrays of a new arraydata.OutputData, config['json_stream_batch_size'] items at a time.
+    the solution is never held as a whole in Python objects.
+    raises ModelError for failed checks, with all errors found, or json.JSONDecodeError for malformed JSON
+    '''
+
+    solution_data_array = arraydata.OutputData()
+    solution_data_array.set_zero(problem_data_array)
+    batch_size = config['json_stream_batch_size']
+    sections = [section for section, dev_type, fields in arraydata.SOLUTION_FIELDS]
+    errors = []
+    keys = []
+    with open(solution_file, 'r') as f:
+        reader = jsonstream.JSONStreamReader(f, config['json_stream_chunk_size'])
+        if reader.peek() != '{':
+            raise_solution_json_errors(['fails solution keys == [time_series_output]. solution is not an object'])
+        for key in reader.iter_object():
+            keys.append(key)
+            if key != 'time_series_output':
+                reader.skip_value()
+                continue
+            if reader.peek() != '{':
+                reader.skip_value()
+                errors.append('fails time_series_output keys == {}. time_series_output is not an object'.format(sections))
+                continue
+            section_keys = []
+            for section in reader.iter_object():
+                section_keys.append(section)
+                if section not in sections or reader.peek() != '[':
+                    reader.skip_value()
+                    if section in sections:
+                        errors.append('fails time_series_output {} is a list'.format(section))
+                    continue
+                dev_num_items = solution_dev_num_items_zero(problem_data_array, section)
+                items = []
+                start = 0
+                num_errors = len(errors)
+                for i in reader.iter_array():
+                    items.append(reader.read_value())
+                    if len(items) == batch_size:
+                        errors += solution_items_checks(problem_data_array, section, items, start, dev_num_items)
+                        if len(errors) == num_errors:
+                            solution_data_array.set_items(problem_data_array, section, items)
+                        start += len(items)
+                        items = []
+                errors += solution_items_checks(problem_data_array, section, items, start, dev_num_items)
+                if len(errors) == num_errors:
+                    solution_data_array.set_items(problem_data_array, section, items)
+                    errors += solution_items_cover_checks(problem_data_array, section, dev_num_items)
+            if sorted(section_keys) != sorted(sections):
+                errors.insert(0, 'fails time_series_output keys == {}. keys: {}'.format(sections, section_keys))
+        reader.end()
+    if keys != ['time_series_output']:
+        errors.insert(0, 'fails solution keys == [time_series_output]. keys: {}'.format(keys))
+    if len(errors) > 0:
+        raise_solution_json_errors(errors)
+    return solution_data_array
+
 def valid_timestamp_str(timestamp_pattern_str, data):
     '''
     returns True if data is a valid timestamp string else False
@@ -3941,101 +5062,30 @@ def connected(data, config):
     '''
     check connectedness under the base case and each contingency
     '''
-    # todo could use the cleaner interface in utils.get_connected_components and utils.get_bridges
 
     msg = ""
 
-    # get buses, branches, and contingencies that are relavant to this check
-    # i.e. all buses, AC in service branches, contingencies outaging AC in service branches
-    buses, branches, ctgs = get_buses_branches_ctgs_on_in_service_ac_network(data)
-    num_buses = len(buses)
-    num_branches = len(branches)
-    num_ctgs = len(ctgs)
-
-    # get uids in natural order (ordinal index -> uid)
-    buses_uid = [i.uid for i in buses]
-    branches_uid = [i.uid for i in branches]
-    branches_fbus_uid = [i.fr_bus for i in branches]
-    branches_tbus_uid = [i.to_bus for i in branches]
-    ctgs_uid = [i.uid for i in ctgs]
-    ctgs_branch_uid = [i.components[0] for i in ctgs] # exactly one branch outaged in each contingency
-
-    # map uids to indices
-    bus_uid_map = {buses_uid[i]: i for i in range(num_buses)}
-    branch_uid_map = {branches_uid[i]: i for i in range(num_branches)}
-    ctg_uid_map = {ctgs_uid[i]: i for i in range(num_ctgs)}
-
-    # get branch outaged by each contingency
-    ctgs_branch = [branch_uid_map[i] for i in ctgs_branch_uid]
-
-    # get uids on from and to buses of branch outaged in each contingency
-    ctgs_branch_fbus_uid = [branches_fbus_uid[branch_uid_map[i]] for i in ctgs_branch_uid]
-    ctgs_branch_tbus_uid = [branches_tbus_uid[branch_uid_map[i]] for i in ctgs_branch_uid]
-
-    # get from and to bus indices on each branch and the branch outaged by each contingency
-    branches_fbus = [bus_uid_map[i] for i in branches_fbus_uid]
-    branches_tbus = [bus_uid_map[i] for i in branches_tbus_uid]
-    ctgs_branch_fbus = [bus_uid_map[i] for i in ctgs_branch_fbus_uid]
-    ctgs_branch_tbus = [bus_uid_map[i] for i in ctgs_branch_tbus_uid]
-
-    # get the bus pair (i.e. from and to, listed in natural order) of each branch
-    branches_pair = [
-        (branches_fbus[i], branches_tbus[i]) # ordered pair (f,t) if f < t
-        if (branches_fbus[i] < branches_tbus[i])
-        else (branches_tbus[i], branches_fbus[i]) # ordered pair (t,f) if t < t
-        for i in range(num_branches)] # note f = t is not possible
-    branches_pair_uid = [(buses_uid[i[0]], buses_uid[i[1]]) for i in branches_pair]
-    pairs = list(set(branches_pair))
-    num_pairs = len(pairs)
-    pairs_uid = [(buses_uid[i[0]], buses_uid[i[1]]) for i in pairs]
-
-    # get the bus pair of each contingency
-    ctgs_pair = [branches_pair[i] for i in ctgs_branch]
-    ctgs_pair_uid = [(buses_uid[i[0]], buses_uid[i[1]]) for i in ctgs_pair]
-    
-    # form graph
-    # use only one edge for each bus pair,
-    # even if there are multiple branches spanning that pair
-    # this will not affect connectedness
-    # and as for bridges, just remove the bridges that correspond to pairs spanned by more than one branch
-    graph = networkx.Graph()
-    graph.add_nodes_from(buses_uid)
-    graph.add_edges_from(pairs_uid)
+    # the relevant graph is on all buses and the AC branches in service in the initial status,
+    # and the relevant contingencies are those outaging one of these branches
+    problem = arraydata.InputData()
+    problem.set_network_from_data_model(data)
+    network = topology.NetworkTopology(problem)
+    br_on = numpy.concatenate((problem.acl_u_on_0, problem.xfr_u_on_0)) > 0
+    num_components, components, bridges = network.get_connectivity(br_on)
 
     # check connectedness under the base case
-    connected_components = list(networkx.connected_components(graph))
-    if len(connected_components) != 1:
+    if num_components != 1:
         msg += "fails connectedness of graph on all buses and base case in service AC branches. num connected components: {}, expected: 1, components: {}".format(
-            len(connected_components), connected_components)
-
-    # what branches span each pair?
-    pair_branches = {i:[] for i in pairs}
-    for i in range(num_branches):
-        j = branches_pair[i]
-        pair_branches[j].append(i)
-    pair_num_branches = {i:len(pair_branches[i]) for i in pairs}
-    #print('pair_num_branches: {}'.format(pair_num_branches))
-
-    # what contingencies outage a branch spanning each pair?
-    pair_ctgs = {i:[] for i in pairs}
-    for i in range(num_ctgs):
-        j = ctgs_pair[i]
-        pair_ctgs[j].append(i)
+            num_components, network.get_components_uid(num_components, components))
 
     # check connectedness under each contingency
-    bridges_uid = list(networkx.bridges(graph))
-    bridges = [(bus_uid_map[i[0]], bus_uid_map[i[1]]) for i in bridges_uid]
-    #print('bridges: {}'.format(bridges))
-    num_bridges = len(bridges)
-    bridges_one_branch = [i for i in bridges if pair_num_branches[i] == 1]
-    #print('bridges spanned by one branch: {}'.format(bridges_one_branch))
-    num_bridges_one_branch = len(bridges_one_branch)
-    #bridges_one_branch_ctgs = [pair_ctgs[i] for i in bridges_one_branch]
-    #bridges_one_branch_at_least_one_ctg = [i for i in bridges_one_branch if len(bridges_one_branch_ctgs[i]) > 0]
-    disconnecting_ctgs = [j for i in bridges_one_branch for j in pair_ctgs[i]]
-    disconnecting_ctgs_uid = [ctgs_uid[i] for i in disconnecting_ctgs]
+    # a contingency disconnects the graph if it outages a bridge,
+    # i.e. a branch that is the only in service branch on its bus pair and is not in a cycle,
+    # or if it outages more than one branch and the graph without them has more components
+    disconnected_multi_ctgs = network.get_disconnected_multi_ctgs(br_on, num_components, components)
+    disconnecting_ctgs_uid = network.k_uid[network.get_disconnecting_ctgs(bridges, disconnected_multi_ctgs)].tolist()
     if len(disconnecting_ctgs_uid) > 0:
-        msg += "fails connectedness of graph on all buses and post-contingency in service AC branches. failing contingencies are those outaging a branch that is a bridge in the graph. num failing contingencies: {}, expected: 0, failing contingencies uid: {}".format(
+        msg += "fails connectedness of graph on all buses and post-contingency in service AC branches. failing contingencies are those outaging a branch that is a bridge in the graph, or outaging branches whose removal disconnects the graph. num failing contingencies: {}, expected: 0, failing contingencies uid: {}".format(
             len(disconnecting_ctgs_uid), disconnecting_ctgs_uid)
 
     # report the errors
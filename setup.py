@@ -19,7 +19,6 @@ setup(
         "numpy",
         "pandas",
         "pydantic",
-        "networkx",
         "psutil",
         "GO-3-data-model",
         ]
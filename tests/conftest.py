@@ -0,0 +1,307 @@
+'''
+shared helpers for the tests
+
+reference results in tests/data were computed at commit ebf9a8e,
+before the changes to the contingency model and to problem and solution loading,
+so the tests check that those changes give the same results:
+* <case>_summary.json - summary from check_data.py --problem <problem> --solution <solution>
+* ctg_synthetic_t_k_z.npz, ctg_synthetic_viol.json - t_k_z and worst violations
+  from ctgmodel.eval_post_contingency_model on the cases of get_synthetic_ctg_case
+'''
+
+import json, pathlib, types
+import numpy, scipy.sparse
+import pytest
+from datamodel.input.data import InputDataFile
+from datamodel.output.data import OutputDataFile
+from datautilities import validation, arraydata, evaluation
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+DATA_DIR = pathlib.Path(__file__).resolve().parent / 'data'
+DEFAULT_CONFIG_FILE = str(ROOT_DIR / 'config.json')
+
+CASES = {
+    'scenario_112': (ROOT_DIR / 'scenario_112.json', ROOT_DIR / 'scenario_112_solution.json'),
+    'scenario_114': (ROOT_DIR / 'E1_1_00014_scenario_114.json', ROOT_DIR / 'E1_1_00014_scenario_114_solution.json'),
+}
+
+# branches switched off in each t, cycling, in the switching case.
+# each set keeps the network connected under every contingency
+SWITCHING_BR_OFF = [[], ['xfr_1'], ['xfr_2'], ['acl_03'], ['acl_06'], ['acl_03', 'xfr_2'], ['acl_04', 'xfr_1'], ['acl_06', 'xfr_2'], ['acl_04']]
+
+# branch limits in the switching case, low enough that contingencies have penalties
+SWITCHING_BR_S_MAX = 0.3
+
+# summary keys not compared with the references
+SUMMARY_KEYS_IGNORED = ['git_info', 'problem_data_file', 'solution_data_file']
+
+CTG_VIOL_KEYS = ['acl_acl', 'xfr_acl', 'acl_dcl', 'xfr_dcl', 'acl_xfr', 'xfr_xfr']
+
+SYNTHETIC_CTG_CASES = [(seed, switch_frac) for seed in range(4) for switch_frac in [0.0, 0.1, 0.4]]
+
+def read_config(**parameters):
+
+    return validation.read_config(DEFAULT_CONFIG_FILE, None, json.dumps(parameters))
+
+def write_switching_case(problem_file, solution_file):
+    '''
+    write the switching case, from scenario_114: the problem with low branch limits,
+    and the solution with the branches of SWITCHING_BR_OFF switched off
+    '''
+
+    problem_file_in, solution_file_in = CASES['scenario_114']
+    with open(problem_file_in, 'r') as f:
+        problem = json.load(f)
+    for section in ['ac_line', 'two_winding_transformer']:
+        for i in problem['network'][section]:
+            i['mva_ub_nom'] = SWITCHING_BR_S_MAX
+            i['mva_ub_em'] = SWITCHING_BR_S_MAX
+    with open(problem_file, 'w') as f:
+        json.dump(problem, f)
+    with open(solution_file_in, 'r') as f:
+        solution = json.load(f)
+    for section in ['ac_line', 'two_winding_transformer']:
+        for i in solution['time_series_output'][section]:
+            i['on_status'] = [
+                0 if i['uid'] in SWITCHING_BR_OFF[t % len(SWITCHING_BR_OFF)] else 1
+                for t in range(len(i['on_status']))]
+    with open(solution_file, 'w') as f:
+        json.dump(solution, f)
+
+@pytest.fixture(scope='session')
+def switching_case(tmp_path_factory):
+
+    case_dir = tmp_path_factory.mktemp('switching_case')
+    problem_file = case_dir / 'switching.json'
+    solution_file = case_dir / 'switching_solution.json'
+    write_switching_case(problem_file, solution_file)
+    return problem_file, solution_file
+
+@pytest.fixture(scope='session')
+def cases(switching_case):
+    '''
+    name: (problem file, solution file), for each case with a reference summary
+    '''
+
+    cases = dict(CASES)
+    cases['switching'] = switching_case
+    cases['switching_unswitched'] = (switching_case[0], CASES['scenario_114'][1])
+    return cases
+
+def run_check_data(out_dir, problem_file, solution_file, **parameters):
+    '''
+    run check_data with the default config and parameters, with output files in out_dir, return the summary
+    '''
+
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return validation.check_data(
+        str(problem_file), (None if solution_file is None else str(solution_file)), DEFAULT_CONFIG_FILE, None, json.dumps(parameters),
+        str(out_dir / 'summary.csv'), str(out_dir / 'summary.json'), str(out_dir / 'data_errors.txt'),
+        str(out_dir / 'ignored_errors.txt'), str(out_dir / 'solution_errors.txt'), None)
+
+def read_case_arrays(problem_file, solution_file):
+    '''
+    arraydata.InputData and arraydata.OutputData of the problem and solution, read through the data model
+    '''
+
+    problem = arraydata.InputData()
+    problem.set_from_data_model(InputDataFile.load(str(problem_file)))
+    solution = arraydata.OutputData()
+    solution.set_from_data_model(problem, OutputDataFile.load(str(solution_file)))
+    return problem, solution
+
+def get_evaluator(problem_file, solution_file, config):
+    '''
+    SolutionEvaluator of the solution, after run
+    '''
+
+    problem, solution = read_case_arrays(problem_file, solution_file)
+    sol_eval = evaluation.SolutionEvaluator(problem, solution, config=config)
+    sol_eval.run()
+    return sol_eval
+
+def read_reference_summary(name):
+
+    with open(DATA_DIR / '{}_summary.json'.format(name), 'r') as f:
+        return json.load(f)
+
+def normalize_summary(summary):
+    '''
+    summary as written to the summary json file, without the items that change from run to run
+    '''
+
+    summary = json.loads(json.dumps(summary, cls=validation.utils.NpEncoder))
+    def strip(d):
+        return {
+            k: (strip(v) if isinstance(v, dict) else v)
+            for k, v in d.items()
+            if k not in SUMMARY_KEYS_IGNORED and 'time' not in k and 'memory' not in k}
+    return strip(summary)
+
+def assert_summary_equal(summary, reference, rel_tol=1e-9, abs_tol=1e-9):
+    '''
+    same items, same values, with floats within the tolerances
+    '''
+
+    summary = normalize_summary(summary)
+    reference = normalize_summary(reference)
+    def compare(a, b, path):
+        if isinstance(b, dict):
+            assert isinstance(a, dict), path
+            assert sorted(a.keys()) == sorted(b.keys()), path
+            for k in b:
+                compare(a[k], b[k], path + '.' + k)
+        elif isinstance(b, float) and isinstance(a, (int, float)):
+            assert abs(a - b) <= max(abs_tol, rel_tol * abs(b)), '{}: {} != {}'.format(path, a, b)
+        elif isinstance(b, list):
+            assert isinstance(a, list) and len(a) == len(b), path
+            for i in range(len(b)):
+                compare(a[i], b[i], '{}[{}]'.format(path, i))
+        else:
+            assert a == b, '{}: {} != {}'.format(path, a, b)
+    compare(summary, reference, '')
+
+def get_synthetic_ctg_case(seed, switch_frac, config):
+    '''
+    stand-in for a SolutionEvaluator, with the data used by ctgmodel.eval_post_contingency_model,
+    on a random meshed network with a single branch contingency for each branch and DC line.
+    every bus pair of a spanning tree is connected by two branches, one of which stays on,
+    and the other branches are switched off at random in a fraction switch_frac of the intervals,
+    so the network is connected under every contingency, with many topology changes over t
+    '''
+
+    num_bus = 60
+    num_extra_br = 60
+    num_t = 6
+    num_xfr = 10
+    num_dcl = 3
+    rng = numpy.random.default_rng(seed)
+
+    # spanning tree with each branch doubled, plus extra branches
+    br_fbus = []
+    br_tbus = []
+    for i in range(1, num_bus):
+        j = rng.integers(0, i)
+        br_fbus += [i, i]
+        br_tbus += [j, j]
+    for e in range(num_extra_br):
+        i, j = rng.choice(num_bus, 2, replace=False)
+        br_fbus.append(i)
+        br_tbus.append(j)
+    br_fbus = numpy.array(br_fbus)
+    br_tbus = numpy.array(br_tbus)
+    num_br = br_fbus.size
+    num_xfr = min(num_xfr, num_br // 4)
+    num_acl = num_br - num_xfr
+
+    p = types.SimpleNamespace()
+    p.num_bus = num_bus
+    p.num_acl = num_acl
+    p.num_xfr = num_xfr
+    p.num_dcl = num_dcl
+    p.num_t = num_t
+    p.acl_fbus = br_fbus[:num_acl]
+    p.acl_tbus = br_tbus[:num_acl]
+    p.xfr_fbus = br_fbus[num_acl:]
+    p.xfr_tbus = br_tbus[num_acl:]
+    p.dcl_fbus = rng.integers(0, num_bus, num_dcl)
+    p.dcl_tbus = (p.dcl_fbus + 1 + rng.integers(0, num_bus - 1, num_dcl)) % num_bus
+    p.acl_b_sr = -rng.uniform(5, 20, num_acl)
+    p.xfr_b_sr = -rng.uniform(5, 20, num_xfr)
+    p.acl_s_max_ctg = rng.uniform(0.5, 2.0, num_acl)
+    p.xfr_s_max_ctg = rng.uniform(0.5, 2.0, num_xfr)
+    p.bus_uid = numpy.array(['bus_{}'.format(i) for i in range(num_bus)])
+    p.acl_uid = numpy.array(['acl_{}'.format(i) for i in range(num_acl)])
+    p.xfr_uid = numpy.array(['xfr_{}'.format(i) for i in range(num_xfr)])
+    p.dcl_uid = numpy.array(['dcl_{}'.format(i) for i in range(num_dcl)])
+
+    # contingencies
+    k_out = [('acl', i) for i in range(num_acl)] + [('xfr', i) for i in range(num_xfr)] + [('dcl', i) for i in range(num_dcl)]
+    p.num_k = len(k_out)
+    p.k_uid = numpy.array(['k_{}'.format(i) for i in range(p.num_k)])
+    for dev_type in ['acl', 'xfr', 'dcl']:
+        setattr(p, 'k_out_is_' + dev_type, numpy.array([d == dev_type for d, i in k_out], dtype=int))
+        setattr(p, 'k_out_' + dev_type, numpy.array([i if d == dev_type else 0 for d, i in k_out], dtype=int))
+        setattr(p, 'k_out_all_is_' + dev_type, getattr(p, 'k_out_is_' + dev_type))
+        setattr(p, 'k_out_all_' + dev_type, getattr(p, 'k_out_' + dev_type))
+    p.k_num_out = numpy.ones(p.num_k, dtype=int)
+    p.k_out_all_ptr = numpy.arange(p.num_k + 1)
+
+    # one producer at each bus, no shunts
+    p.t_d = numpy.ones(num_t)
+    p.c_s = 1000.0
+    p.t_num = numpy.arange(num_t)
+    p.num_sd = num_bus
+    p.sd_bus = numpy.arange(num_bus)
+    p.sd_is_pr = numpy.ones(p.num_sd, dtype=int)
+    p.sd_is_cs = numpy.zeros(p.num_sd, dtype=int)
+    p.num_sh = 0
+    p.sh_bus = numpy.zeros(0, dtype=int)
+
+    s = types.SimpleNamespace()
+    s.problem = p
+    s.shared = None
+    s.ctg_model = None
+    s.config = config
+    def get_inj_mat(num_dev, dev_bus):
+        return scipy.sparse.csr_matrix((-numpy.ones(num_dev), (dev_bus, range(num_dev))), (num_bus, num_dev))
+    s.bus_sd_inj_mat = scipy.sparse.csr_matrix((numpy.ones(p.num_sd), (p.sd_bus, range(p.num_sd))), (num_bus, p.num_sd))
+    s.bus_sh_inj_mat = get_inj_mat(0, p.sh_bus)
+    s.bus_acl_fr_inj_mat = get_inj_mat(num_acl, p.acl_fbus)
+    s.bus_acl_to_inj_mat = get_inj_mat(num_acl, p.acl_tbus)
+    s.bus_xfr_fr_inj_mat = get_inj_mat(num_xfr, p.xfr_fbus)
+    s.bus_xfr_to_inj_mat = get_inj_mat(num_xfr, p.xfr_tbus)
+    s.bus_dcl_fr_inj_mat = get_inj_mat(num_dcl, p.dcl_fbus)
+    s.bus_dcl_to_inj_mat = get_inj_mat(num_dcl, p.dcl_tbus)
+
+    # switching: the second branch of each tree pair and the extra branches may switch off.
+    # one of them is off in all t
+    br_t_u_on = numpy.ones((num_br, num_t), dtype=int)
+    br_switchable = numpy.arange(2 * (num_bus - 1), num_br)
+    for t in range(num_t):
+        br_off = rng.choice(br_switchable, int(switch_frac * br_switchable.size), replace=False)
+        br_t_u_on[br_off, t] = 0
+    br_t_u_on[br_switchable[0], :] = 0
+    s.acl_t_u_on = br_t_u_on[:num_acl].copy()
+    s.xfr_t_u_on = br_t_u_on[num_acl:].copy()
+
+    # injections and flows
+    s.acl_t_int = numpy.zeros((num_acl, num_t), dtype=int)
+    s.xfr_t_int = numpy.zeros((num_xfr, num_t), dtype=int)
+    s.bus_t_float = numpy.zeros((num_bus, num_t))
+    s.bus_t_float_1 = numpy.zeros((num_bus, num_t))
+    s.sd_t_p = rng.normal(0, 1.0, (p.num_sd, num_t))
+    s.sh_t_p = numpy.zeros((0, num_t))
+    s.dcl_t_p = rng.normal(0, 0.5, (num_dcl, num_t))
+    s.dcl_t_float = numpy.zeros((num_dcl, num_t))
+    s.xfr_t_phi = rng.normal(0, 0.05, (num_xfr, num_t))
+    s.xfr_t_float = numpy.zeros((num_xfr, num_t))
+    s.acl_t_q_fr = rng.normal(0, 0.2, (num_acl, num_t))
+    s.acl_t_q_to = rng.normal(0, 0.2, (num_acl, num_t))
+    s.xfr_t_q_fr = rng.normal(0, 0.2, (num_xfr, num_t))
+    s.xfr_t_q_to = rng.normal(0, 0.2, (num_xfr, num_t))
+
+    # results
+    s.t_k_z = numpy.zeros((num_t, p.num_k))
+    for k in CTG_VIOL_KEYS + ['acl_multi', 'xfr_multi']:
+        setattr(s, 'viol_{}_t_s_max_ctg'.format(k), None)
+    return s
+
+def get_ctg_viol(sol_eval):
+    '''
+    worst post-contingency violations of sol_eval, as {key: {'val': val, 'idx': [idx]}}
+    '''
+
+    viol = {}
+    for k in CTG_VIOL_KEYS:
+        v = getattr(sol_eval, 'viol_{}_t_s_max_ctg'.format(k))
+        viol[k] = {'val': float(v['val']), 'idx': [v['idx'][i] for i in sorted(v['idx'].keys())]}
+    return json.loads(json.dumps(viol, cls=validation.utils.NpEncoder))
+
+def assert_ctg_viol_equal(viol, reference, rel_tol=1e-9):
+
+    for k in CTG_VIOL_KEYS:
+        assert abs(viol[k]['val'] - reference[k]['val']) <= rel_tol * max(1.0, abs(reference[k]['val'])), k
+        if reference[k]['val'] > 0.0:
+            assert viol[k]['idx'] == reference[k]['idx'], k
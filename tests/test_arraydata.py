@@ -0,0 +1,143 @@
+'''
+the problem set in arraydata.InputData from the parsed problem file, without the data model,
+gives the same arrays, summary, and supply/demand analysis as from the pydantic data model,
+and validation.problem_json_checks finds the errors the arrays would be built on.
+the same from the problem file read in a stream, by validation.load_problem_stream
+'''
+
+import json
+import numpy
+import pytest
+from datamodel.input.data import InputDataFile
+from datautilities import arraydata, validation, supply_demand
+from datautilities.errors import ModelError
+from conftest import CASES
+
+def read_problem(problem_file):
+
+    with open(problem_file, 'r') as f:
+        return json.load(f)
+
+def assert_problem_equal(problem_json, problem):
+
+    arrays, scalars = problem.get_arrays()
+    arrays_json, scalars_json = problem_json.get_arrays()
+    assert sorted(arrays_json.keys()) == sorted(arrays.keys())
+    for k, v in arrays.items():
+        assert arrays_json[k].dtype == v.dtype, k
+        assert arrays_json[k].shape == v.shape, k
+        assert numpy.array_equal(arrays_json[k], v), k
+    assert sorted(scalars_json.keys()) == sorted(scalars.keys())
+    for k, v in scalars.items():
+        assert type(scalars_json[k]) == type(v), k
+        assert scalars_json[k] == v, k
+
+def get_problem(problem_data):
+
+    problem = arraydata.InputData()
+    problem.set_from_data_model(InputDataFile(**problem_data))
+    return problem
+
+@pytest.mark.parametrize('name', ['scenario_112', 'scenario_114'])
+def test_input_data_json(name):
+
+    problem_data = read_problem(CASES[name][0])
+    data_model = InputDataFile(**problem_data)
+    problem = arraydata.InputData()
+    problem.set_from_data_model(data_model)
+    problem_json, problem_objects = validation.load_problem_json(problem_data)
+    assert_problem_equal(problem_json, problem)
+    problem_json = arraydata.InputData()
+    problem_json.set_from_json(problem_data)
+    assert_problem_equal(problem_json, problem)
+
+    summary = validation.get_summary(data_model)
+    summary_json = validation.get_summary_arrays(problem_json, problem_objects)
+    assert list(summary_json.keys()) == list(summary.keys())
+    assert list(summary_json['reserve_info'].keys()) == list(summary['reserve_info'].keys())
+    assert json.dumps(summary_json, cls=validation.utils.NpEncoder) == json.dumps(summary, cls=validation.utils.NpEncoder)
+    assert supply_demand.analyze_supply_demand_arrays(problem_json) == supply_demand.analyze_supply_demand(data_model)
+
+def test_input_data_json_conversions():
+    '''
+    time series items in another order than the devices, floats given as JSON integers,
+    strings with surrounding whitespace, and optional fields given when their flag is 1
+    '''
+
+    problem_data = read_problem(CASES['scenario_112'][0])
+    problem_data['time_series_input']['simple_dispatchable_device'].reverse()
+    bus = problem_data['network']['bus'][0]
+    bus['vm_ub'] = 2
+    for x in problem_data['network']['shunt'] + problem_data['network']['simple_dispatchable_device']:
+        if x['bus'] == bus['uid']:
+            x['bus'] = ' {} '.format(x['bus'])
+    acl = problem_data['network']['ac_line'][0]
+    acl.update(additional_shunt=1, g_fr=1, b_fr=0.5, g_to=0, b_to=-0.5)
+    sd = problem_data['network']['simple_dispatchable_device'][0]
+    sd.update(q_linear_cap=1, q_0=0, beta=0.25)
+    problem = get_problem(problem_data)
+    problem_json, problem_objects = validation.load_problem_json(problem_data)
+    assert_problem_equal(problem_json, problem)
+    assert problem_json.bus_v_max[0] == 2.0
+    assert problem_json.acl_g_fr[0] == 1.0
+
+@pytest.mark.parametrize('change,match', [
+    (lambda d: d.pop('reliability'), r'fails problem reliability is an object'),
+    (lambda d: d['network']['bus'][1].update(extra_field=1.0), r'network.bus fields match Bus.*extra_field'),
+    (lambda d: d['network']['bus'][1].pop('vm_ub'), r'network.bus fields match Bus.*vm_ub'),
+    (lambda d: d['network']['bus'][1]['initial_status'].pop('vm'), r'network.bus initial_status fields match'),
+    (lambda d: d['reliability'].update(contingency=[1]), r'reliability.contingency items are objects'),
+    (lambda d: d['network']['bus'][1].update(vm_ub='1.05'), r'network.bus vm_ub values are numbers. value types: \[\'str\'\]'),
+    (lambda d: d['network']['bus'][1].update(vm_ub=float('inf')), r'network.bus vm_ub values finite'),
+    (lambda d: d['network']['shunt'][0].update(step_ub=1.0), r'network.shunt step_ub values are integers'),
+    (lambda d: d['network']['shunt'][0].update(bus=0), r'network.shunt bus values are strings'),
+    (lambda d: d['network']['ac_line'][0].update(additional_shunt=2), r'network.ac_line additional_shunt values in \[0, 1\]'),
+    (lambda d: d['network']['ac_line'][0].update(additional_shunt=1), r'network.ac_line g_fr given if additional_shunt == 1'),
+    (lambda d: d['network']['simple_dispatchable_device'][0].update(device_type='storage'), r'device_type values in \[producer, consumer\]'),
+    (lambda d: d['network']['simple_dispatchable_device'][0].update(startups_ub=[[0.0, 12.0]]), r'startups_ub values are lists of 3 values'),
+    (lambda d: d['network']['simple_dispatchable_device'][0].update(startup_states=[[0.0, 'a']]), r'startup_states values are numbers'),
+    (lambda d: d['time_series_input']['simple_dispatchable_device'][0]['cost'][0].append([1.0]), r'cost values are lists of 2 values'),
+    (lambda d: d['time_series_input']['simple_dispatchable_device'][0]['p_ub'].pop(), r'len\(p_ub\) == len\(time_series_input.general.interval_duration\)'),
+    (lambda d: d['time_series_input']['simple_dispatchable_device'].pop(), r'field cover domain. items: time_series_input.simple_dispatchable_device'),
+    (lambda d: d['network']['shunt'][0].update(bus='bus_x'), r'field in domain. items: network.shunt, field: bus.*bus_x'),
+    (lambda d: d['network']['shunt'][0].update(uid=d['network']['bus'][0]['uid']), r'fails uid uniqueness in network and reliability sections'),
+    (lambda d: d['network']['bus'][0].update(active_reserve_uids=['prz_x']), r'field: active_reserve_uids.*prz_x'),
+    (lambda d: d['reliability']['contingency'][0].update(components=[]), r'reliability.contingency components not empty'),
+    (lambda d: d['reliability']['contingency'][0].update(components=['bus_0']), r'field: components.*bus_0'),
+    (lambda d: d['time_series_input']['general'].update(time_periods=1), r'time_periods == len\(interval_duration\)'),
+    (lambda d: d['network']['general'].update(extra_field=1), r'network.general fields do not match'),
+])
+def test_json_checks(change, match):
+
+    problem_data = read_problem(CASES['scenario_112'][0])
+    change(problem_data)
+    with pytest.raises(ModelError, match=match):
+        validation.load_problem_json(problem_data)
+
+@pytest.mark.parametrize('chunk_size,batch_size', [(7, 1), (61, 3), (1048576, 1000)])
+@pytest.mark.parametrize('name', ['scenario_112', 'scenario_114'])
+def test_load_problem_stream(name, chunk_size, batch_size):
+
+    problem_file = CASES[name][0]
+    problem_json, problem_objects_json = validation.load_problem_json(read_problem(problem_file))
+    problem_stream, problem_objects = validation.load_problem_stream(
+        problem_file, {'json_stream_chunk_size': chunk_size, 'json_stream_batch_size': batch_size})
+    assert_problem_equal(problem_stream, problem_json)
+    assert problem_objects == problem_objects_json
+
+@pytest.mark.parametrize('change,match', [
+    (lambda d: d.pop('reliability'), r'fails problem reliability is an object'),
+    (lambda d: d['network']['bus'][1].update(extra_field=1.0), r'network.bus fields match Bus.*extra_field'),
+    (lambda d: d['network']['bus'][2].update(vm_ub='1.05'), r'network.bus vm_ub values are numbers'),
+    (lambda d: d['network'].update(shunt={}), r'fails network.shunt is a list'),
+    (lambda d: d['network']['shunt'][0].update(bus='bus_x'), r'field in domain. items: network.shunt, field: bus.*bus_x'),
+    (lambda d: d['network']['general'].update(extra_field=1), r'network.general fields do not match'),
+])
+def test_load_problem_stream_checks(tmp_path, change, match):
+
+    problem_data = read_problem(CASES['scenario_112'][0])
+    change(problem_data)
+    problem_file = tmp_path / 'problem.json'
+    problem_file.write_text(json.dumps(problem_data))
+    with pytest.raises(ModelError, match=match):
+        validation.load_problem_stream(problem_file, {'json_stream_chunk_size': 61, 'json_stream_batch_size': 2})
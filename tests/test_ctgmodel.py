@@ -0,0 +1,165 @@
+'''
+the contingency model gives the reference results with and without SMW over t, and under each of its other options,
+and SMW over t gives the same results as refactoring in each t
+'''
+
+import json
+import numpy
+import pytest
+from datautilities import ctgmodel
+from conftest import (
+    DATA_DIR, SYNTHETIC_CTG_CASES, read_config, get_synthetic_ctg_case, get_evaluator, get_ctg_viol, assert_ctg_viol_equal,
+    read_reference_summary, run_check_data, assert_summary_equal)
+
+SMW_OVER_T_PARAMETERS = [
+    {'ctg_use_smw_over_t': False},
+    {'ctg_use_smw_over_t': True, 'ctg_smw_over_t_max_br_delta': 100},
+    {'ctg_use_smw_over_t': True, 'ctg_smw_over_t_max_br_delta': 1},
+]
+
+SMW_OVER_T_PARAMETERS_IDS = [','.join('{}={}'.format(k, v) for k, v in p.items()) for p in SMW_OVER_T_PARAMETERS]
+
+# the cases compared with the reference summaries under each option
+CTG_CASES = ['scenario_114', 'switching']
+
+@pytest.fixture(scope='module')
+def synthetic_reference():
+
+    with open(DATA_DIR / 'ctg_synthetic_viol.json', 'r') as f:
+        viol = json.load(f)
+    with numpy.load(DATA_DIR / 'ctg_synthetic_t_k_z.npz') as t_k_z:
+        return {k: (t_k_z[k], viol[k]) for k in viol}
+
+def eval_synthetic_ctg_case(seed, switch_frac, **parameters):
+
+    sol_eval = get_synthetic_ctg_case(seed, switch_frac, read_config(**parameters))
+    ctgmodel.eval_post_contingency_model(sol_eval)
+    return sol_eval
+
+def assert_t_k_z_equal(t_k_z, reference, rel_tol=1e-9):
+
+    assert t_k_z.shape == reference.shape
+    assert numpy.max(numpy.abs(t_k_z - reference), initial=0.0) <= rel_tol * max(1.0, numpy.max(numpy.abs(reference), initial=0.0))
+
+def assert_synthetic_reference(synthetic_reference, seed, switch_frac, **parameters):
+
+    sol_eval = eval_synthetic_ctg_case(seed, switch_frac, **parameters)
+    t_k_z, viol = synthetic_reference['{}_{}'.format(seed, switch_frac)]
+    assert_t_k_z_equal(sol_eval.t_k_z, t_k_z)
+    assert_ctg_viol_equal(get_ctg_viol(sol_eval), viol)
+
+def assert_case_reference(out_dir, cases, name, **parameters):
+
+    summary = run_check_data(out_dir, *cases[name], **parameters)
+    assert_summary_equal(summary, read_reference_summary(name))
+
+@pytest.mark.parametrize('parameters', SMW_OVER_T_PARAMETERS, ids=SMW_OVER_T_PARAMETERS_IDS)
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_smw_over_t_synthetic_reference(synthetic_reference, seed, switch_frac, parameters):
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, **parameters)
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_synthetic_smw_over_t_vs_refactor(seed, switch_frac):
+
+    smw = eval_synthetic_ctg_case(seed, switch_frac, ctg_use_smw_over_t=True, ctg_smw_over_t_max_br_delta=100)
+    refactor = eval_synthetic_ctg_case(seed, switch_frac, ctg_use_smw_over_t=False)
+    assert numpy.any(smw.t_k_z != 0.0)
+    assert_t_k_z_equal(smw.t_k_z, refactor.t_k_z)
+    assert_ctg_viol_equal(get_ctg_viol(smw), get_ctg_viol(refactor))
+
+@pytest.mark.parametrize('name', ['scenario_112', 'scenario_114', 'switching'])
+def test_case_smw_over_t_vs_refactor(cases, name):
+
+    problem_file, solution_file = cases[name]
+    smw = get_evaluator(problem_file, solution_file, read_config(ctg_use_smw_over_t=True, ctg_smw_over_t_max_br_delta=100))
+    refactor = get_evaluator(problem_file, solution_file, read_config(ctg_use_smw_over_t=False))
+    assert_t_k_z_equal(smw.t_k_z, refactor.t_k_z)
+    assert_ctg_viol_equal(get_ctg_viol(smw), get_ctg_viol(refactor))
+    assert smw.get_obj() == pytest.approx(refactor.get_obj(), rel=1e-12)
+
+@pytest.mark.parametrize('parameters', SMW_OVER_T_PARAMETERS, ids=SMW_OVER_T_PARAMETERS_IDS)
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_smw_over_t_case_reference(tmp_path, cases, name, parameters):
+
+    assert_case_reference(tmp_path, cases, name, **parameters)
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_topology_cache_off_synthetic_reference(synthetic_reference, seed, switch_frac):
+    '''
+    factorizations computed in each interval, without the topology cache
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_topology_cache_max_mb=0.0)
+
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_topology_cache_off_case_reference(tmp_path, cases, name):
+
+    assert_case_reference(tmp_path, cases, name, ctg_topology_cache_max_mb=0.0)
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_num_proc_synthetic_reference(synthetic_reference, seed, switch_frac):
+    '''
+    intervals evaluated on a process pool
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_num_proc=2)
+
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_num_proc_case_reference(tmp_path, cases, name):
+
+    assert_case_reference(tmp_path, cases, name, ctg_num_proc=2)
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_k_block_synthetic_reference(synthetic_reference, seed, switch_frac):
+    '''
+    contingencies processed in column blocks smaller than the number of contingencies
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_k_block_max_size=7)
+
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_k_block_case_reference(tmp_path, cases, name):
+
+    assert_case_reference(tmp_path, cases, name, ctg_k_block_max_size=7)
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_at_risk_branches_synthetic_reference(synthetic_reference, seed, switch_frac):
+    '''
+    flows computed only on the at-risk branches
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_flow_engine='at_risk_branches')
+
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_at_risk_branches_case_reference(tmp_path, cases, name):
+
+    assert_case_reference(tmp_path, cases, name, ctg_flow_engine='at_risk_branches')
+
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_br_filter_off_synthetic_reference(synthetic_reference, seed, switch_frac):
+    '''
+    all branches evaluated in each contingency, without the filter by the worst contingency
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_br_filter_by_worst_ctg=False)
+
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_br_filter_off_case_reference(tmp_path, cases, name):
+
+    assert_case_reference(tmp_path, cases, name, ctg_br_filter_by_worst_ctg=False)
+
+@pytest.mark.parametrize('ctg_factor_method', ['splu', 'splu_sym'])
+@pytest.mark.parametrize('seed,switch_frac', SYNTHETIC_CTG_CASES)
+def test_factor_method_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_factor_method):
+    '''
+    admittance matrices factored by SuperLU, in symmetric mode or not, rather than by the default method
+    '''
+
+    assert_synthetic_reference(synthetic_reference, seed, switch_frac, ctg_factor_method=ctg_factor_method)
+
+@pytest.mark.parametrize('ctg_factor_method', ['splu', 'splu_sym'])
+@pytest.mark.parametrize('name', CTG_CASES)
+def test_factor_method_case_reference(tmp_path, cases, name, ctg_factor_method):
+
+    assert_case_reference(tmp_path, cases, name, ctg_factor_method=ctg_factor_method)
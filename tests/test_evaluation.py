@@ -0,0 +1,173 @@
+'''
+SolutionEvaluator on cases the problem files cannot express, by changing the arrays
+'''
+
+import numpy
+import pytest
+from datautilities import arraydata, evaluation, ctgmodel, topology
+from datautilities.errors import ModelError
+from conftest import read_config, read_case_arrays, get_evaluator, assert_summary_equal
+
+def set_contingency_components(problem, k_components):
+    '''
+    set the outaged devices of each contingency of problem, an arraydata.InputData,
+    to k_components, a list of lists of device uids.
+    the data model allows only one device in a contingency, so contingencies outaging more than one
+    are set here, on the arrays, through the problem columns read by InputData.set_k
+    '''
+
+    assert len(k_components) == problem.num_k
+    fields = [f for f in arraydata.PROBLEM_SECTION_FIELDS['reliability', 'contingency'] if f[0] == 'components']
+    problem.set_k({('reliability', 'contingency'): arraydata.get_items_columns(
+        [{'components': c} for c in k_components], fields, True)})
+
+def get_multi_ctg_case(cases, k_uid, components):
+    '''
+    problem and solution of the switching problem with the scenario_114 solution,
+    with the contingency k_uid outaging the devices of components
+    '''
+
+    problem, solution = read_case_arrays(*cases['switching_unswitched'])
+    k_components = [[problem.all_uid[problem.k_out_device[k]]] for k in range(problem.num_k)]
+    k_components[problem.k_map[k_uid]] = components
+    set_contingency_components(problem, k_components)
+    return problem, solution
+
+def test_multi_ctg_islanding(cases):
+
+    # bus_02 is on acl_02 and acl_05 only
+    problem, solution = get_multi_ctg_case(cases, 'ctg_01', ['acl_02', 'acl_05'])
+    sol_eval = evaluation.SolutionEvaluator(problem, solution, config=read_config())
+    sol_eval.run()
+    assert sol_eval.viol_t_connected_base['val'] == 0
+    assert sol_eval.viol_t_connected_ctg['val'] == 1
+    assert sol_eval.info_i_i_k_t_disconnected_ctg['val'] == 1
+    assert sol_eval.info_i_i_k_t_disconnected_ctg['idx'] == {0: 'bus_00', 1: 'bus_02', 2: problem.k_map['ctg_01'], 3: 0}
+    assert sol_eval.get_feas() == 0
+    assert numpy.all(sol_eval.t_k_z == 0.0)
+
+    # the post-contingency model does not score the islanding contingency
+    with pytest.raises(ModelError, match='ctg_01'):
+        ctgmodel.eval_post_contingency_model(sol_eval)
+
+    # problem connectedness check, as in validation.connected
+    network = topology.NetworkTopology(problem)
+    br_on = numpy.ones(shape=(network.num_br, ), dtype=bool)
+    num_components, components, bridges = network.get_connectivity(br_on)
+    disconnected_multi_ctgs = network.get_disconnected_multi_ctgs(br_on, num_components, components)
+    assert disconnected_multi_ctgs == [(0, 2, problem.k_map['ctg_01'])]
+    assert network.get_disconnecting_ctgs(bridges, disconnected_multi_ctgs).tolist() == [problem.k_map['ctg_01']]
+
+def test_multi_ctg_not_islanding(cases):
+    '''
+    the penalty of a contingency outaging acl_03 and acl_06 is that of one outaging acl_06
+    in the solution with acl_03 switched off
+    '''
+
+    problem, solution = get_multi_ctg_case(cases, 'ctg_05', ['acl_03', 'acl_06'])
+    sol_eval = evaluation.SolutionEvaluator(problem, solution, config=read_config())
+    sol_eval.run()
+    assert sol_eval.viol_t_connected_base['val'] == 0
+    assert sol_eval.viol_t_connected_ctg['val'] == 0
+    k = problem.k_map['ctg_05']
+    assert numpy.any(sol_eval.t_k_z[:, k] < 0.0)
+
+    problem_single, solution_single = read_case_arrays(*cases['switching_unswitched'])
+    solution_single.acl_t_u_on[problem_single.acl_map['acl_03'], :] = 0
+    sol_eval_single = evaluation.SolutionEvaluator(problem_single, solution_single, config=read_config())
+    sol_eval_single.run()
+    assert sol_eval_single.viol_t_connected_ctg['val'] == 0
+    assert sol_eval.t_k_z[:, k] == pytest.approx(sol_eval_single.t_k_z[:, k], rel=1e-9)
+
+# the first device of each type at t = 1, given every patch field, with a value changed from the solution.
+# the bundled cases have no DC lines
+PATCH_TEST_FIELDS = [
+    (dev_type, field) for dev_type, fields in evaluation.PATCH_FIELDS.items() if dev_type != 'dcl' for field in fields]
+
+def get_patch(sol_eval, dev_type, field, t):
+
+    i = 0
+    uid = getattr(sol_eval.problem, dev_type + '_uid')[i]
+    value = getattr(sol_eval, evaluation.PATCH_FIELDS[dev_type][field])[i, t]
+    if field == 'on_status':
+        value = 1 - int(value)
+    elif field == 'step':
+        value = int(value) + 1
+    else:
+        value = float(value) + 0.05
+    return (uid, t, field, value)
+
+def assert_patch_equal_to_run(cases, patch, **parameters):
+    '''
+    apply_patch on an evaluated solution gives the same results as evaluating the patched solution
+    '''
+
+    sol_eval = get_evaluator(*cases['switching'], read_config(**parameters))
+    z, infeas_summary = sol_eval.apply_patch(patch)
+
+    problem, solution = read_case_arrays(*cases['switching'])
+    sol_eval_run = evaluation.SolutionEvaluator(problem, solution, config=read_config(**parameters))
+    for uid, t, field, value in patch:
+        name, i = sol_eval_run.get_patch_idx((uid, t, field, value))
+        getattr(sol_eval_run, name)[i, t] = value
+    sol_eval_run.run()
+
+    assert z == pytest.approx(sol_eval_run.get_obj(), rel=1e-12)
+    assert_summary_equal(infeas_summary, sol_eval_run.get_infeas_summary())
+    assert_summary_equal(sol_eval.get_summary(), sol_eval_run.get_summary())
+    assert numpy.array_equal(sol_eval.t_k_z, sol_eval_run.t_k_z)
+
+@pytest.mark.parametrize('dev_type,field', PATCH_TEST_FIELDS)
+def test_apply_patch(cases, dev_type, field):
+
+    sol_eval = get_evaluator(*cases['switching'], read_config())
+    assert_patch_equal_to_run(cases, [get_patch(sol_eval, dev_type, field, 1)])
+
+@pytest.mark.parametrize('run_num_threads', [1, 4])
+def test_apply_patch_many(cases, run_num_threads):
+
+    sol_eval = get_evaluator(*cases['switching'], read_config())
+    patch = [get_patch(sol_eval, dev_type, field, t) for dev_type, field in PATCH_TEST_FIELDS for t in [0, 4, 17]]
+    assert_patch_equal_to_run(cases, patch, run_num_threads=run_num_threads)
+
+def test_apply_patch_steps(cases):
+    '''
+    a patch reruns only the steps reading what it changes
+    '''
+
+    sol_eval = get_evaluator(*cases['switching'], read_config())
+    steps = [evaluation.RUN_STEPS[i]['name'] for i in evaluation.get_run_steps_after(evaluation.RUN_STEPS, ['sd_t_q_qru'])]
+    assert steps == ['sd_res', 'sd_q', 'sd_z_res', 'qrz', 'objective']
+    steps = [evaluation.RUN_STEPS[i]['name'] for i in evaluation.get_run_steps_after(evaluation.RUN_STEPS, [])]
+    assert steps == ['objective']
+    z = sol_eval.get_obj()
+    assert sol_eval.apply_patch([]) == (z, sol_eval.get_infeas_summary())
+
+@pytest.mark.parametrize('entry,match', [
+    (('sd_nonexistent', 1, 'p_on', 1.0), 'uid not found'),
+    (('bus_00', 1, 'p_on', 1.0), 'field not in'),
+    (('acl_03', 18, 'on_status', 0), 't not an int'),
+    (('acl_03', -1, 'on_status', 0), 't not an int'),
+    (('acl_03', 1.0, 'on_status', 0), 't not an int'),
+    (('acl_03', 1, 'on_status', 2), 'not in'),
+    (('acl_03', 1, 'on_status', 0.0), 'not an int'),
+    (('acl_03', 1, 'on_status', True), 'not an int'),
+    (('bus_00', 1, 'vm', float('nan')), 'not finite'),
+    (('bus_00', 1, 'vm', '1.0'), 'not a number'),
+    (('bus_00', 1, 'vm', [1.0]), 'not a number'),
+    (('bus_00', 1, 'vm'), 'not \\(uid, t, field, value\\)'),
+])
+def test_apply_patch_malformed(cases, entry, match):
+    '''
+    a malformed entry raises ModelError before any entry of the patch changes the solution
+    '''
+
+    sol_eval = get_evaluator(*cases['switching'], read_config())
+    patch = [get_patch(sol_eval, 'sd', 'p_on', 1), entry]
+    arrays = {name: numpy.copy(getattr(sol_eval, name)) for fields in evaluation.PATCH_FIELDS.values() for name in fields.values()}
+    z = sol_eval.get_obj()
+    with pytest.raises(ModelError, match=match):
+        sol_eval.apply_patch(patch)
+    for name, arr in arrays.items():
+        assert numpy.array_equal(getattr(sol_eval, name), arr)
+    assert sol_eval.get_obj() == z
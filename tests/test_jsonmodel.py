@@ -0,0 +1,72 @@
+'''
+the problem data model built by jsonmodel, without pydantic, from parsed json,
+gives the same InputData arrays as the pydantic data model
+'''
+
+import json
+import numpy
+import pytest
+from datamodel.input.data import InputDataFile
+from datautilities import arraydata, jsonmodel
+from datautilities.errors import ModelError
+from conftest import CASES
+
+def read_problem(problem_file):
+
+    with open(problem_file, 'r') as f:
+        return json.load(f)
+
+@pytest.mark.parametrize('name', ['scenario_112', 'scenario_114'])
+def test_input_data_arrays(name):
+
+    problem_data = read_problem(CASES[name][0])
+    data_model = InputDataFile(**problem_data)
+    json_model = jsonmodel.load(InputDataFile, problem_data)
+    assert json_model.dict() == data_model.dict()
+    assert json_model.network.get_uids() == data_model.network.get_uids()
+
+    problem = arraydata.InputData()
+    problem.set_from_data_model(data_model)
+    problem_json = arraydata.InputData()
+    problem_json.set_from_data_model(json_model)
+    arrays, scalars = problem.get_arrays()
+    arrays_json, scalars_json = problem_json.get_arrays()
+    assert sorted(arrays_json.keys()) == sorted(arrays.keys())
+    for k, v in arrays.items():
+        assert arrays_json[k].dtype == v.dtype, k
+        assert arrays_json[k].shape == v.shape, k
+        assert numpy.array_equal(arrays_json[k], v), k
+    assert sorted(scalars_json.keys()) == sorted(scalars.keys())
+    for k, v in scalars.items():
+        assert type(scalars_json[k]) == type(v), k
+        assert scalars_json[k] == v, k
+
+def test_conversions():
+    '''
+    floats given as JSON integers are floats, strings are stripped, optional fields not given are None
+    '''
+
+    problem_data = read_problem(CASES['scenario_112'][0])
+    bus = problem_data['network']['bus'][0]
+    bus['uid'] = ' {} '.format(bus['uid'])
+    bus['vm_ub'] = 2
+    bus.pop('area', None)
+    data_model = InputDataFile(**problem_data)
+    json_model = jsonmodel.load(InputDataFile, problem_data)
+    for field in ['uid', 'vm_ub', 'area']:
+        assert getattr(json_model.network.bus[0], field) == getattr(data_model.network.bus[0], field)
+        assert type(getattr(json_model.network.bus[0], field)) == type(getattr(data_model.network.bus[0], field))
+    assert type(json_model.network.bus[0].vm_ub) == float
+    assert json_model.network.bus[0].area is None
+
+@pytest.mark.parametrize('change,match', [
+    (lambda d: d['network']['bus'][1].update(extra_field=1.0), r'network.bus\[1\] fields do not match Bus.*extra_field'),
+    (lambda d: d['network']['bus'][1].pop('vm_ub'), r'network.bus\[1\] fields do not match Bus.*vm_ub'),
+    (lambda d: d['reliability'].update(contingency=[1]), r'reliability.contingency\[0\] is not an object'),
+])
+def test_fields_mismatch(change, match):
+
+    problem_data = read_problem(CASES['scenario_112'][0])
+    change(problem_data)
+    with pytest.raises(ModelError, match=match):
+        jsonmodel.load(InputDataFile, problem_data)
@@ -0,0 +1,54 @@
+'''
+the problem cache key covers what the prepared problem depends on,
+and check_data gives the reference summaries with the problem written to and loaded from the cache
+'''
+
+import numpy, scipy
+import pytest
+from datautilities import problemcache
+from conftest import CASES, read_config, read_reference_summary, run_check_data, assert_summary_equal
+
+def test_key_sources():
+
+    names = [(fn.parent.name, fn.name) for fn in problemcache.get_source_files()]
+    assert ('datautilities', 'arraydata.py') in names
+    assert ('input', 'data.py') in names
+    assert ('output', 'data.py') in names
+
+@pytest.mark.parametrize('module', [numpy, scipy], ids=['numpy', 'scipy'])
+def test_key_versions(monkeypatch, module):
+
+    problem_file = CASES['scenario_112'][0]
+    config = read_config()
+    key = problemcache.get_key(problem_file, config)
+    assert problemcache.get_key(problem_file, config) == key
+    monkeypatch.setattr(module, '__version__', module.__version__ + '.1')
+    assert problemcache.get_key(problem_file, config) != key
+
+def test_key_source_files(monkeypatch, tmp_path):
+
+    problem_file = CASES['scenario_112'][0]
+    config = read_config()
+    source_file = tmp_path / 'source.py'
+    source_file.write_text('a = 1\n')
+    source_files = problemcache.get_source_files() + [source_file]
+    monkeypatch.setattr(problemcache, 'get_source_files', lambda: source_files)
+    key = problemcache.get_key(problem_file, config)
+    source_file.write_text('a = 2\n')
+    assert problemcache.get_key(problem_file, config) != key
+
+@pytest.mark.parametrize('name', ['scenario_114', 'switching'])
+def test_problem_cache(tmp_path, cases, name):
+
+    cache_dir = tmp_path / 'cache'
+    for i in range(2):
+        summary = run_check_data(tmp_path / str(i), *cases[name], problem_cache_dir=str(cache_dir))
+        assert_summary_equal(summary, read_reference_summary(name))
+        assert len([d for d in cache_dir.iterdir() if (d / 'meta.json').is_file()]) == 1
+
+def test_problem_cache_ctg_num_proc(tmp_path, cases):
+
+    cache_dir = tmp_path / 'cache'
+    for i in range(2):
+        summary = run_check_data(tmp_path / str(i), *cases['switching'], problem_cache_dir=str(cache_dir), ctg_num_proc=2)
+        assert_summary_equal(summary, read_reference_summary('switching'))
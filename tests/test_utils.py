@@ -0,0 +1,130 @@
+'''
+the array graph functions of utils give the same components and bridges as networkx, on random graphs with
+parallel edges, self edges, isolated vertices, and edges given in either direction
+'''
+
+import numpy
+import pytest
+from datautilities import utils
+
+networkx = pytest.importorskip('networkx')
+
+def get_random_graph(seed):
+    '''
+    num_vertices, o, d, on
+    '''
+
+    rng = numpy.random.default_rng(seed)
+    num_vertices = int(rng.integers(1, 40))
+    num_edges = int(rng.integers(0, 2 * num_vertices))
+    # a sparse random graph, so it has bridges and isolated vertices
+    o = rng.integers(0, num_vertices, size=num_edges)
+    d = rng.integers(0, num_vertices, size=num_edges)
+    # a path through some of the vertices, in either direction
+    path = rng.permutation(num_vertices)[:int(rng.integers(1, num_vertices + 1))]
+    reverse = rng.random(size=(len(path) - 1, )) < 0.5
+    o = numpy.concatenate((o, numpy.where(reverse, path[1:], path[:-1])))
+    d = numpy.concatenate((d, numpy.where(reverse, path[:-1], path[1:])))
+    # parallel edges, in the same and the opposite direction
+    copy = rng.integers(0, len(o), size=int(rng.integers(0, 4)) if len(o) > 0 else 0)
+    flip = rng.random(size=copy.shape) < 0.5
+    o_copy = numpy.where(flip, d[copy], o[copy])
+    d_copy = numpy.where(flip, o[copy], d[copy])
+    o = numpy.concatenate((o, o_copy))
+    d = numpy.concatenate((d, d_copy))
+    # self edges
+    loop = rng.integers(0, num_vertices, size=int(rng.integers(0, 3)))
+    o = numpy.concatenate((o, loop))
+    d = numpy.concatenate((d, loop))
+    order = rng.permutation(len(o))
+    o = o[order]
+    d = d[order]
+    on = rng.random(size=o.shape) < 0.8
+    return num_vertices, o, d, on
+
+def get_reference_components(num_vertices, o, d):
+    '''
+    the connected components, as sorted lists of vertices, in increasing order of their smallest vertex, by networkx
+    '''
+
+    g = networkx.Graph()
+    g.add_nodes_from(range(num_vertices))
+    g.add_edges_from(zip(o.tolist(), d.tolist()))
+    return sorted(sorted(c) for c in networkx.connected_components(g))
+
+def get_reference_bridges(o, d, on):
+    '''
+    sorted edge indices e with on[e] that are bridges of the graph of these edges, by networkx.
+    networkx.bridges takes a simple graph, so the bridges of the graph of the vertex pairs
+    with more than one edge, or only self edges, are left out
+    '''
+
+    edge = numpy.flatnonzero(numpy.logical_and(on, o != d))
+    pairs = [(min(a, b), max(a, b)) for a, b in zip(o[edge].tolist(), d[edge].tolist())]
+    pair_edges = {}
+    for e, p in zip(edge.tolist(), pairs):
+        pair_edges.setdefault(p, []).append(e)
+    g = networkx.Graph()
+    g.add_edges_from(pair_edges.keys())
+    return sorted(
+        pair_edges[(min(a, b), max(a, b))][0] for a, b in networkx.bridges(g)
+        if len(pair_edges[(min(a, b), max(a, b))]) == 1)
+
+SEEDS = list(range(200))
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_graph_components(seed):
+
+    num_vertices, o, d, on = get_random_graph(seed)
+    components = get_reference_components(num_vertices, o[on], d[on])
+    num_components, labels = utils.get_graph_components(num_vertices, o[on], d[on])
+    assert num_components == len(components)
+    assert [sorted(numpy.flatnonzero(labels == i).tolist()) for i in range(num_components)] == components
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_forest_bridges(seed):
+
+    num_vertices, o, d, on = get_random_graph(seed)
+    forest = utils.get_spanning_forest(num_vertices, o, d, on)
+    assert utils.is_spanning_forest(forest, o, d, on)
+    num_components, labels = utils.get_graph_components(num_vertices, o[on], d[on])
+    assert forest['num_components'] == num_components
+    assert numpy.array_equal(forest['labels'], labels)
+    assert utils.get_forest_bridges(forest, o, d, on).tolist() == get_reference_bridges(o, d, on)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_forest_bridges_reused(seed):
+    '''
+    a forest preferring the edges on in two graphs, reused for the second graph where it spans it,
+    as topology.NetworkTopology reuses it from one interval to the next
+    '''
+
+    num_vertices, o, d, on = get_random_graph(seed)
+    rng = numpy.random.default_rng(seed + len(SEEDS))
+    on_next = numpy.logical_and(on, rng.random(size=on.shape) < 0.9)
+    pair = utils.get_vertex_pairs(num_vertices, o, d)
+    forest = utils.get_spanning_forest(
+        num_vertices, o, d, on, cost=numpy.logical_not(on_next).astype(float), pair=pair)
+    if not utils.is_spanning_forest(forest, o, d, on_next):
+        forest = utils.get_spanning_forest(num_vertices, o, d, on_next, pair=pair)
+    assert utils.get_forest_bridges(forest, o, d, on_next).tolist() == get_reference_bridges(o, d, on_next)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_vertex_pairs(seed):
+
+    num_vertices, o, d, on = get_random_graph(seed)
+    pair, pair_o, pair_d = utils.get_vertex_pairs(num_vertices, o, d)
+    pairs = sorted(set((min(a, b), max(a, b)) for a, b in zip(o.tolist(), d.tolist()) if a != b))
+    assert list(zip(pair_o.tolist(), pair_d.tolist())) == pairs
+    assert numpy.array_equal(pair < 0, o == d)
+    assert numpy.array_equal(pair_o[pair[o != d]], numpy.minimum(o, d)[o != d])
+    assert numpy.array_equal(pair_d[pair[o != d]], numpy.maximum(o, d)[o != d])
+
+def test_empty_graph():
+
+    o = numpy.zeros(shape=(0, ), dtype=int)
+    on = numpy.zeros(shape=(0, ), dtype=bool)
+    forest = utils.get_spanning_forest(3, o, o, on)
+    assert forest['num_components'] == 3
+    assert utils.get_forest_bridges(forest, o, o, on).size == 0
+    assert utils.get_graph_components(3, o, o)[0] == 3
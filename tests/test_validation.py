@@ -0,0 +1,114 @@
+'''
+check_data and check_data_batch give the reference summaries
+under the evaluation, loading, and batch options, and the scrubber streams the problem as it parses it
+'''
+
+import json, pathlib
+import pytest
+from datautilities import validation
+from conftest import (
+    CASES, DEFAULT_CONFIG_FILE, read_reference_summary, run_check_data, assert_summary_equal)
+
+def get_parameters_ids(parameters):
+
+    return [','.join('{}={}'.format(k, v) for k, v in p.items()) or 'default' for p in parameters]
+
+# the cases compared with the reference summaries under each option
+CHECK_DATA_CASES = ['scenario_112', 'scenario_114', 'switching', 'switching_unswitched']
+
+def assert_check_data_reference(out_dir, cases, name, **parameters):
+
+    summary = run_check_data(out_dir, *cases[name], **parameters)
+    assert_summary_equal(summary, read_reference_summary(name))
+
+@pytest.mark.parametrize('name', CHECK_DATA_CASES)
+def test_check_data_reference(tmp_path, cases, name):
+
+    assert_check_data_reference(tmp_path, cases, name)
+
+@pytest.mark.parametrize('name', CHECK_DATA_CASES)
+def test_check_data_threads(tmp_path, cases, name):
+    '''
+    the steps of SolutionEvaluator.run on a thread pool
+    '''
+
+    assert_check_data_reference(tmp_path, cases, name, run_num_threads=4)
+
+FAST_LOAD_PARAMETERS = [
+    {'solution_fast_load': True},
+    {'problem_fast_load': True},
+    {'problem_fast_load': True, 'solution_fast_load': True},
+]
+
+@pytest.mark.parametrize('parameters', FAST_LOAD_PARAMETERS, ids=get_parameters_ids(FAST_LOAD_PARAMETERS))
+@pytest.mark.parametrize('name', CHECK_DATA_CASES)
+def test_check_data_fast_load(tmp_path, cases, name, parameters):
+    '''
+    the problem or the solution read without its data model
+    '''
+
+    assert_check_data_reference(tmp_path, cases, name, **parameters)
+
+STREAM_LOAD_PARAMETERS = [
+    {'problem_stream_load': True, 'json_stream_chunk_size': 61},
+    {'solution_stream_load': True},
+    {'solution_stream_load': True, 'json_stream_chunk_size': 61, 'json_stream_batch_size': 3},
+]
+
+@pytest.mark.parametrize('parameters', STREAM_LOAD_PARAMETERS, ids=get_parameters_ids(STREAM_LOAD_PARAMETERS))
+@pytest.mark.parametrize('name', CHECK_DATA_CASES)
+def test_check_data_stream_load(tmp_path, cases, name, parameters):
+    '''
+    the problem or the solution read in a stream
+    '''
+
+    assert_check_data_reference(tmp_path, cases, name, **parameters)
+
+def test_check_data_problem_reference(tmp_path):
+
+    summary = run_check_data(
+        tmp_path, CASES['scenario_114'][0], None, do_opt_solves=False, require_q_res_cap_exceeds_req=False)
+    assert_summary_equal(summary, read_reference_summary('scenario_114_problem'))
+
+def assert_check_data_batch(out_dir, cases, num_workers, **parameters):
+
+    problem_file = cases['switching'][0]
+    names = ['switching', 'switching_unswitched', 'switching']
+    solution_files = [str(cases[n][1]) for n in names]
+    summaries = validation.check_data_batch(
+        str(problem_file), solution_files, DEFAULT_CONFIG_FILE, None, json.dumps(parameters),
+        str(out_dir / 'summary.csv'), str(out_dir / 'summaries'),
+        str(out_dir / 'data_errors.txt'), str(out_dir / 'ignored_errors.txt'), num_workers=num_workers)
+    assert len(summaries) == len(names)
+    for n, s in zip(names, summaries):
+        assert_summary_equal(s, read_reference_summary(n))
+    assert len(list(pathlib.Path(out_dir, 'summaries').glob('*_summary.json'))) == len(names)
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_check_data_batch(tmp_path, cases, num_workers):
+
+    assert_check_data_batch(tmp_path, cases, num_workers, batch_share_problem=False)
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_check_data_batch_shared(tmp_path, cases, num_workers):
+    '''
+    the workers read the problem arrays from one shared copy
+    '''
+
+    assert_check_data_batch(tmp_path, cases, num_workers, batch_share_problem=True)
+
+@pytest.mark.parametrize('parameters', [{}, {'json_stream_chunk_size': 61}, {'use_cost_defaults': True, 'SYN_vio_cost_default': 2.0}])
+@pytest.mark.parametrize('name', ['scenario_112', 'scenario_114'])
+def test_scrub_stream(tmp_path, name, parameters):
+    '''
+    the scrubbed problem is the same whether read and written in a stream or through json
+    '''
+
+    problem_file = str(CASES[name][0])
+    validation.scrub_data(
+        problem_file, DEFAULT_CONFIG_FILE, None, json.dumps(parameters), str(tmp_path / 'scrubbed.json'))
+    validation.scrub_data(
+        problem_file, DEFAULT_CONFIG_FILE, None, json.dumps(dict(parameters, problem_stream_load=True)),
+        str(tmp_path / 'scrubbed_stream.json'))
+    assert (tmp_path / 'scrubbed_stream.json').read_bytes() == (tmp_path / 'scrubbed.json').read_bytes()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['scrubbed.json', 'scrubbed_stream.json']